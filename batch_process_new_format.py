@@ -7,8 +7,11 @@ import asyncio
 import os
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
+import argparse
 from chat_client import ChatClient
+from src.utils.patient_source import iter_patient_records, parse_shard
+from src.utils.raw_report import FORMAT_V1, save_raw_report
 import logging
 
 logger = logging.getLogger(__name__)
@@ -58,24 +61,30 @@ class NewFormatBatchProcessor:
         output_dir: str = "./output/raw",
         models: List[str] = None,
         max_retries: int = 3,
-        max_tokens: int = 2000
+        max_tokens: int = 2000,
+        shard: Optional[str] = None,
+        raw_format_version: int = FORMAT_V1
     ):
         """
         初始化处理器
 
         Args:
             prompts_file: Prompt文件路径
-            records_dir: 患者记录目录
+            records_dir: 患者记录来源（目录、JSONL清单或glob模式）
             output_dir: 输出目录（默认：./output/raw）
             models: 模型列表
             max_retries: 最大重试次数（默认：3）
             max_tokens: 最大Token数（默认：2000）
+            shard: 分片参数 "i/N"，仅处理属于该分片的患者
+            raw_format_version: 输出文件格式版本（1：旧格式，2：紧凑格式）
         """
         self.prompts_file = prompts_file
         self.records_dir = records_dir
+        self.shard = parse_shard(shard)
         self.output_dir = output_dir
         self.max_retries = max_retries
         self.max_tokens = max_tokens
+        self.raw_format_version = raw_format_version
 
         # 默认模型列表
         self.models = models or [
@@ -90,7 +99,9 @@ class NewFormatBatchProcessor:
 
         logger.info(f"初始化新格式批量处理器")
         logger.info(f"  Prompts文件: {prompts_file}")
-        logger.info(f"  患者记录目录: {records_dir}")
+        logger.info(f"  患者记录来源: {records_dir}")
+        if self.shard:
+            logger.info(f"  分片: {self.shard[0]}/{self.shard[1]}")
         logger.info(f"  输出目录: {output_dir}")
         logger.info(f"  使用模型: {', '.join(self.models)}")
         logger.info(f"  最大重试次数: {max_retries}")
@@ -106,30 +117,13 @@ class NewFormatBatchProcessor:
         logger.info(f"成功加载 {len(prompts)} 个Prompts")
         return prompts
 
-    def load_patient_records(self) -> List[Dict[str, Any]]:
-        """加载所有患者记录"""
-        logger.info(f"正在扫描患者记录目录: {self.records_dir}")
+    def load_patient_records(self) -> Iterator[Dict[str, Any]]:
+        """惰性加载患者记录（每次只读取一个患者）"""
+        logger.info(f"正在扫描患者记录: {self.records_dir}")
 
-        records = []
-        records_path = Path(self.records_dir)
-
-        for file_path in sorted(records_path.glob("*.txt")):
-            logger.info(f"  发现患者文件: {file_path.name}")
-
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # 提取患者编号：去掉"_问答记录.txt"
-            patient_name = file_path.stem.replace('_问答记录', '')
-
-            records.append({
-                'people': patient_name,
-                'file_path': str(file_path),
-                'chat': content
-            })
-
-        logger.info(f"成功加载 {len(records)} 个患者记录")
-        return records
+        for record in iter_patient_records(self.records_dir, self.shard):
+            logger.info(f"  发现患者文件: {Path(record['file_path']).name}")
+            yield record
 
     async def process_single_conversation(
         self,
@@ -294,19 +288,23 @@ class NewFormatBatchProcessor:
         return output_data
 
     async def process_all(self) -> List[Dict[str, Any]]:
-        """处理所有模型和患者的组合"""
+        """
+        处理所有模型和患者的组合
+
+        患者记录按需逐个读取，每个(模型, 患者)组合完成后立即保存，
+        返回值只保留文件摘要信息
+        """
         prompts = self.load_prompts()
-        patients = self.load_patient_records()
 
-        total_tasks = len(self.models) * len(patients)
-        logger.info(f"开始批量处理: {len(self.models)} 个模型 × {len(patients)} 个患者 = {total_tasks} 个文件")
+        logger.info(f"开始批量处理: {len(self.models)} 个模型 × 流式患者记录")
 
-        # 顺序处理所有(模型, 患者)组合（不并发）
+        # 顺序处理所有(患者, 模型)组合（不并发），外层遍历患者使记录只读取一次
         results = []
-        for model in self.models:
-            for patient in patients:
+        for patient in self.load_patient_records():
+            for model in self.models:
                 result = await self.process_model_patient(model, patient, prompts)
-                results.append(result)
+                self.save_results([result])
+                results.append({'model': result['model'], 'people': result['people']})
 
         logger.info(f"所有任务处理完成，共生成 {len(results)} 个文件")
 
@@ -314,8 +312,6 @@ class NewFormatBatchProcessor:
 
     def save_results(self, results: List[Dict[str, Any]]):
         """保存结果到独立的JSON文件"""
-        logger.info(f"开始保存结果文件到: {self.output_dir}")
-
         for result in results:
             model = result['model']
             people = result['people']
@@ -328,13 +324,10 @@ class NewFormatBatchProcessor:
             filepath = os.path.join(self.output_dir, filename)
 
             # 保存JSON
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=4)
+            save_raw_report(result, filepath, self.raw_format_version)
 
             logger.info(f"  已保存: {filename}")
 
-        logger.info(f"所有结果已保存到: {self.output_dir}")
-
     async def run(self):
         """运行批量处理"""
         logger.info("=" * 80)
@@ -343,12 +336,9 @@ class NewFormatBatchProcessor:
 
         total_start = datetime.now()
 
-        # 处理所有任务
+        # 处理所有任务（结果在处理过程中逐个保存）
         results = await self.process_all()
 
-        # 保存结果
-        self.save_results(results)
-
         total_end = datetime.now()
         total_duration = (total_end - total_start).total_seconds()
 
@@ -362,15 +352,17 @@ class NewFormatBatchProcessor:
         return results
 
 
-async def main(config_file: str = "batch_config.json"):
+async def main(config_file: str = "batch_config.json", shard: Optional[str] = None):
     """
     主函数
 
     Args:
         config_file: 配置文件路径（默认：batch_config.json）
+        shard: 分片参数 "i/N"（覆盖配置中的 shard）
     """
     # 加载配置
     config = load_config(config_file)
+    shard = shard or config.get("shard")
 
     # 配置日志
     setup_logging(
@@ -385,7 +377,9 @@ async def main(config_file: str = "batch_config.json"):
     print(f"配置信息:")
     print(f"  配置文件: {config_file}")
     print(f"  Prompts文件: {config['prompts_file']}")
-    print(f"  患者记录目录: {config['records_dir']}")
+    print(f"  患者记录来源: {config['records_dir']}")
+    if shard:
+        print(f"  分片: {shard}")
     print(f"  输出目录: {config['output_dir']}")
     print(f"  使用模型: {', '.join(config['models'])}")
     print(f"  最大重试次数: {config.get('max_retries', 3)}")
@@ -399,7 +393,9 @@ async def main(config_file: str = "batch_config.json"):
         output_dir=config['output_dir'],
         models=config['models'],
         max_retries=config.get('max_retries', 3),
-        max_tokens=config.get('max_tokens', 2000)
+        max_tokens=config.get('max_tokens', 2000),
+        shard=shard,
+        raw_format_version=config.get('raw_format_version', FORMAT_V1)
     )
 
     # 运行处理
@@ -416,4 +412,9 @@ async def main(config_file: str = "batch_config.json"):
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="批量处理系统 - 新输出格式")
+    parser.add_argument("--config", default="batch_config.json", help="配置文件路径")
+    parser.add_argument("--shard", default=None, help="只处理指定分片的患者，格式 i/N (0 <= i < N)")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.config, args.shard))
@@ -0,0 +1,4 @@
+"""
+性能基准测试 - Benchmarks
+端到端吞吐基准和热点路径微基准，结果以JSON保存，可在不同提交之间对比
+"""
@@ -0,0 +1,244 @@
+"""
+交叉评测引擎端到端吞吐基准
+在本地模拟服务上运行 engine.run / engine.run_parallel / 离线批量模式，
+扫描并发数、矩阵规模(模型 × 患者)和时延分布，输出 calls/sec、makespan、
+p50/p95/p99 调用时延、CPU时间和峰值内存
+
+用法:
+    python -m benchmarks.bench_engine                       # quick 套件
+    python -m benchmarks.bench_engine --suite full
+    python -m benchmarks.bench_engine --modes run_parallel --workers 8 32 --matrix 8x10 --profiles heavy_tail
+    python -m benchmarks.harness compare old.json new.json  # 跨提交对比
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.harness import (
+    Measurement,
+    emit_result,
+    latency_summary,
+    run_case,
+    write_report,
+)
+from src.testing.mock_server import MockOpenAIServer
+from src.testing.synthetic_corpus import (
+    DIALOGUE_DIR,
+    model_names,
+    patient_names,
+    write_dialogues,
+    write_raw_reports,
+)
+from src.utils.raw_report import FORMAT_V1
+
+# 模拟服务的时延分布
+LATENCY_PROFILES = {
+    "fast": {"latency": 0.01},
+    "lognormal": {"latency": {"dist": "lognormal", "median": 0.05, "sigma": 0.5, "max": 1.0}},
+    "heavy_tail": {"latency": {"dist": "lognormal", "median": 0.05, "sigma": 1.2, "max": 3.0}},
+    "flaky": {
+        "latency": {"dist": "uniform", "low": 0.01, "high": 0.05},
+        "rate_limit_rate": 0.1,
+        "error_rate": 0.02,
+        "retry_after_s": 0.02
+    }
+}
+
+SUITES = {
+    "quick": {
+        "modes": ["run", "run_parallel", "batch"],
+        "workers": [4, 16],
+        "matrix": [(2, 2), (4, 2)],
+        "profiles": ["fast"]
+    },
+    "full": {
+        "modes": ["run", "run_parallel", "batch"],
+        "workers": [1, 4, 8, 16, 32, 50],
+        "matrix": [(4, 4), (8, 10)],
+        "profiles": ["fast", "lognormal", "heavy_tail", "flaky"]
+    }
+}
+
+# 不使用并发参数的模式
+SERIAL_MODES = {"run", "batch"}
+
+
+def parse_matrix(spec: str) -> Tuple[int, int]:
+    """解析 "模型数x患者数"，如 8x10"""
+    models, patients = spec.lower().split("x")
+    return int(models), int(patients)
+
+
+def build_workspace(root: Path, num_models: int, num_patients: int) -> Tuple[List[str], List[str]]:
+    """
+    用合成数据集生成 num_models × num_patients 份原始报告(v1)
+
+    Args:
+        root: 工作目录
+        num_models: 模型数
+        num_patients: 患者数
+
+    Returns:
+        (模型列表, 患者列表)
+    """
+    models = model_names(num_models)
+    patients = patient_names(num_patients)
+    dialogues = write_dialogues(root / DIALOGUE_DIR, patients)
+    write_raw_reports(root / "raw", models, patients, dialogues=dialogues, format_version=FORMAT_V1)
+    return models, patients
+
+
+def run_child(case: Dict[str, Any]):
+    """子进程: 配置引擎指向模拟服务并运行一个用例"""
+    from cross_evaluation.aggregator import score_aggregator
+    from cross_evaluation.batch_job import batch_job, fabricate_results
+    from cross_evaluation.config import config
+    from cross_evaluation.engine import engine
+    from cross_evaluation.model_client import model_client
+    from cross_evaluation.report_loader import report_loader
+
+    with tempfile.TemporaryDirectory(prefix="bench_engine_") as tmp:
+        root = Path(tmp)
+        models, patients = build_workspace(root, case["models"], case["patients"])
+        output_dir = root / "results"
+        output_dir.mkdir()
+
+        report_loader.raw_reports_dir = root / "raw"
+        engine.output_dir = output_dir
+        engine.progress_file = output_dir / ".progress.json"
+        score_aggregator.output_dir = output_dir
+        batch_job.output_dir = output_dir
+
+        os.environ["MOCK_API_KEY"] = "sk-bench"
+        model_client.model_registry = {
+            model: {"provider": "mock", "api_key_env": "MOCK_API_KEY", "base_url": case["base_url"]}
+            for model in models
+        }
+        model_client.api_config = {**config.api_config, "retry_attempts": 5, "retry_delay": 0.05}
+
+        # 记录每次评测调用(含重试)的时延
+        latencies = []
+        latencies_lock = threading.Lock()
+        call_model = model_client.call_model
+
+        def timed_call_model(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return call_model(*args, **kwargs)
+            finally:
+                with latencies_lock:
+                    latencies.append(time.perf_counter() - start)
+
+        model_client.call_model = timed_call_model
+
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            with Measurement() as measurement:
+                if case["mode"] == "run":
+                    engine.run(models=models, patients=patients)
+                elif case["mode"] == "run_parallel":
+                    engine.run_parallel(models=models, patients=patients, max_workers=case["workers"])
+                elif case["mode"] == "batch":
+                    files = batch_job.export_requests(root / "batch", models, patients)
+                    result_files = [fabricate_results(f, root / "batch" / "results" / f.name) for f in files.values()]
+                    batch_job.ingest_results(result_files)
+                else:
+                    raise ValueError(f"未知模式: {case['mode']}")
+
+        tasks = len(models) * len(models) * len(patients)
+        aggregated = len(list(output_dir.rglob("*_aggregated.json")))
+        makespan = measurement.makespan_s
+
+        emit_result({
+            **case,
+            "tasks": tasks,
+            "completed_tasks": aggregated,
+            "failed_tasks": tasks - aggregated,
+            "calls": len(latencies),
+            "calls_per_s": round(len(latencies) / makespan, 2) if makespan else 0.0,
+            "tasks_per_s": round(aggregated / makespan, 2) if makespan else 0.0,
+            **measurement.to_dict(),
+            "latency_s": latency_summary(latencies)
+        })
+
+
+def build_cases(
+    modes: List[str],
+    workers: List[int],
+    matrix: List[Tuple[int, int]],
+    profiles: List[str]
+) -> List[Dict[str, Any]]:
+    """展开扫描参数为用例列表"""
+    cases = []
+    for profile, (num_models, num_patients), mode in itertools.product(profiles, matrix, modes):
+        for worker_count in ([1] if mode in SERIAL_MODES else workers):
+            cases.append({
+                "case_id": f"{mode}/w{worker_count}/{num_models}x{num_patients}/{profile}",
+                "mode": mode,
+                "workers": worker_count,
+                "models": num_models,
+                "patients": num_patients,
+                "profile": profile
+            })
+    return cases
+
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="交叉评测引擎吞吐基准")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick", help="预设扫描套件")
+    parser.add_argument("--modes", nargs="+", help="引擎模式: run / run_parallel / batch")
+    parser.add_argument("--workers", nargs="+", type=int, help="run_parallel 的并发数")
+    parser.add_argument("--matrix", nargs="+", help="矩阵规模，格式 模型数x患者数")
+    parser.add_argument("--profiles", nargs="+", choices=sorted(LATENCY_PROFILES), help="时延分布")
+    parser.add_argument("--timeout", type=float, default=1800, help="单个用例超时时间(秒)")
+    parser.add_argument("--output", help="结果JSON路径")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(json.loads(args.child))
+        return
+
+    suite = SUITES[args.suite]
+    cases = build_cases(
+        modes=args.modes or suite["modes"],
+        workers=args.workers or suite["workers"],
+        matrix=[parse_matrix(m) for m in args.matrix] if args.matrix else suite["matrix"],
+        profiles=args.profiles or suite["profiles"]
+    )
+
+    print(f"交叉评测引擎基准: {len(cases)} 个用例")
+    results = []
+    for case in cases:
+        # 每个用例使用独立的模拟服务，统计互不干扰
+        with MockOpenAIServer({"default": LATENCY_PROFILES[case["profile"]]}, seed=0) as server:
+            result = run_case("benchmarks.bench_engine", {**case, "base_url": server.base_url}, args.timeout)
+            result["server"] = server.stats()
+        result.pop("base_url", None)
+        results.append(result)
+
+        if "error" not in result and result["failed_tasks"]:
+            result["error"] = f"{result['failed_tasks']}/{result['tasks']} 个任务未完成"
+        if "error" in result:
+            print(f"  ✗ {case['case_id']}: {result['error'].splitlines()[-1]}")
+        else:
+            print(f"  ✓ {case['case_id']:<40} {result['calls_per_s']:>8.1f} calls/s  "
+                  f"makespan {result['makespan_s']:.2f}s  p95 {result['latency_s']['p95']:.3f}s  "
+                  f"CPU {result['cpu_s']:.2f}s  RSS {result['peak_rss_mb']:.0f}MB")
+
+    path = write_report("engine", results, args.output)
+    print(f"\n✓ 结果已保存: {path}")
+    if any("error" in r for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+解析、聚合和前端数据生成热路径的微基准
+在合成数据集(src/testing/synthetic_corpus.py)上测量纯CPU/IO代码的耗时和内存:
+
+    parse_report        ReportModuleParser.parse_report
+    extract_result      ReportLoader.extract_result
+    parse_response      DimensionEvaluator._parse_response
+    aggregate_files     ScoreAggregator.aggregate_from_files
+    evaluate_single     AutoEvaluator.evaluate_single
+    frontend_load       generate_frontend_data.load_raw_reports + iter_evaluation_results (逐份遍历)
+    frontend_generate   generate_frontend_data 的四个生成函数(矩阵/对比/详情/统计)
+
+逐条调用的用例在数据集中抽样(--sample)，整库用例处理全部文件。每个用例重复 --rounds 轮，
+报告 min/mean 耗时、每秒处理条数，另跑一轮 tracemalloc 记录Python分配峰值
+
+用法:
+    python -m benchmarks.bench_hotpaths                          # small 规模
+    python -m benchmarks.bench_hotpaths --scale large --corpus-dir /tmp/corpus-large
+    python -m benchmarks.bench_hotpaths --benches parse_report parse_response
+    python -m benchmarks.harness compare benchmarks/baselines/hotpaths-small.json new.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.harness import Measurement, emit_result, run_case, write_report
+from src.testing.synthetic_corpus import build_corpus, write_result_tree
+from src.utils.raw_report import FORMAT_V2
+
+# 数据集规模: 模型数、患者数、评测模型数、写出维度结果文件的患者数
+SCALES = {
+    "small": {"models": 8, "patients": 10, "evaluators": 4, "dimension_patients": 10},
+    "medium": {"models": 30, "patients": 200, "evaluators": 4, "dimension_patients": 20},
+    "large": {"models": 100, "patients": 1000, "evaluators": 3, "dimension_patients": 20}
+}
+
+BENCHES = [
+    "parse_report",
+    "extract_result",
+    "parse_response",
+    "aggregate_files",
+    "evaluate_single",
+    "frontend_load",
+    "frontend_generate"
+]
+
+CORPUS_MANIFEST = "corpus.json"
+
+
+def prepare_corpus(corpus_dir: Path, scale: str) -> Dict[str, Any]:
+    """
+    生成(或复用)指定规模的数据集
+
+    目录中已有同规模的数据集描述文件时直接复用，大规模数据集只需生成一次
+
+    Returns:
+        数据集描述
+    """
+    manifest_path = corpus_dir / CORPUS_MANIFEST
+    if manifest_path.exists():
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            corpus = json.load(f)
+        if corpus.get("scale") == scale:
+            return corpus
+
+    spec = SCALES[scale]
+    start = time.perf_counter()
+    corpus = build_corpus(
+        corpus_dir, spec["models"], spec["patients"],
+        num_evaluators=spec["evaluators"], with_dimension_files=False, format_version=FORMAT_V2
+    )
+    # 维度结果文件数为聚合结果的5倍，只为部分患者生成
+    dimension_patients = corpus["patients"][:spec["dimension_patients"]]
+    corpus["dimension_files"], _ = write_result_tree(
+        corpus["results_dir"], corpus["models"], corpus["evaluators"], dimension_patients
+    )
+    corpus["dimension_patients"] = dimension_patients
+    corpus["scale"] = scale
+    corpus["build_s"] = round(time.perf_counter() - start, 2)
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(corpus, f, ensure_ascii=False)
+    return corpus
+
+
+def _sample(items: List[Any], size: int, seed: int = 0) -> List[Any]:
+    if len(items) <= size:
+        return list(items)
+    return random.Random(seed).sample(items, size)
+
+
+def setup_bench(bench: str, corpus: Dict[str, Any], sample: int, work_dir: Path) -> Tuple[int, Callable[[], Any]]:
+    """
+    准备基准用例（不计入耗时）
+
+    Returns:
+        (每轮处理条数, 执行一轮的函数)
+    """
+    from cross_evaluation.aggregator import score_aggregator
+    from cross_evaluation.dimension_evaluator import dimension_evaluator
+    from cross_evaluation.module_parser import module_parser
+    from cross_evaluation.report_loader import report_loader
+
+    report_loader.raw_reports_dir = Path(corpus["raw_dir"])
+    score_aggregator.output_dir = Path(corpus["results_dir"])
+
+    pairs = [(m, p) for m in corpus["models"] for p in corpus["patients"]]
+    sampled_pairs = _sample(pairs, sample)
+
+    if bench == "extract_result":
+        from cross_evaluation.artifact_cache import report_cache
+
+        def run():
+            # 测量首次读取: 每轮清空报告产物缓存
+            report_cache.clear()
+            for model, patient in sampled_pairs:
+                report_loader.extract_result(model, patient)
+        return len(sampled_pairs), run
+
+    if bench in ("parse_report", "evaluate_single"):
+        texts = [(m, p, report_loader.extract_result(m, p)) for m, p in sampled_pairs]
+        if bench == "parse_report":
+            def run():
+                for _, _, text in texts:
+                    module_parser.parse_report(text)
+        else:
+            from src.evaluation.auto_evaluator import AutoEvaluator
+            evaluator = AutoEvaluator()
+
+            def run():
+                for model, patient, text in texts:
+                    evaluator.evaluate_single(model, patient, text)
+        return len(texts), run
+
+    if bench == "parse_response":
+        results_dir = Path(corpus["results_dir"])
+        files = [f for f in results_dir.glob("*/*.json") if not f.stem.endswith("_aggregated")]
+        responses = []
+        for i, path in enumerate(_sample(files, sample)):
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            output = result["output"]
+            # 一半为纯JSON，一半为带说明文字的 markdown 代码块，覆盖两条解析路径
+            if i % 2:
+                output = f"以下是评测结果：\n```json\n{output}\n```\n以上。"
+            responses.append((output, result["dimension"], result["evaluator_model"],
+                              result["evaluated_model"], result["patient"]))
+
+        def run():
+            for response in responses:
+                dimension_evaluator._parse_response(*response)
+        return len(responses), run
+
+    if bench == "aggregate_files":
+        triples = _sample([
+            (evaluated, evaluator, patient)
+            for patient in corpus["dimension_patients"]
+            for evaluated in corpus["models"]
+            for evaluator in corpus["evaluators"]
+        ], sample)
+
+        def run():
+            for evaluated, evaluator, patient in triples:
+                score_aggregator.aggregate_from_files(evaluated, evaluator, patient)
+        return len(triples), run
+
+    import generate_frontend_data as gfd
+    gfd.RAW_DIR = Path(corpus["raw_dir"])
+    gfd.RESULTS_DIR = Path(corpus["results_dir"])
+    gfd.OUTPUT_DIR = work_dir
+
+    if bench == "frontend_load":
+        def run():
+            # 报告存储和评测结果都是惰性的，逐份遍历一遍
+            for _ in gfd.load_raw_reports().values():
+                pass
+            for _ in gfd.iter_evaluation_results():
+                pass
+        return corpus["raw_reports"] + corpus["aggregated_files"], run
+
+    if bench == "frontend_generate":
+        reports = gfd.load_raw_reports()
+        evaluations = gfd.load_evaluation_results()
+        models, patients = corpus["models"], corpus["patients"]
+
+        def run():
+            gfd.generate_cross_evaluation_matrix(evaluations, models, patients)
+            gfd.generate_comparison_data(reports, models, patients)
+            gfd.generate_evaluation_details(evaluations, reports)
+            gfd.generate_statistics(evaluations, models, patients, reports)
+        return len(evaluations), run
+
+    raise ValueError(f"未知基准: {bench}")
+
+
+def run_child(case: Dict[str, Any]):
+    """子进程: 运行一个基准用例"""
+    with open(Path(case["corpus_dir"]) / CORPUS_MANIFEST, 'r', encoding='utf-8') as f:
+        corpus = json.load(f)
+
+    # 被测函数的进度打印不计入结果
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    with tempfile.TemporaryDirectory(prefix="bench_hotpaths_") as tmp, quiet:
+        setup_start = time.perf_counter()
+        items, run = setup_bench(case["bench"], corpus, case["sample"], Path(tmp))
+        setup_s = time.perf_counter() - setup_start
+
+        timings = []
+        with Measurement() as measurement:
+            for _ in range(case["rounds"]):
+                start = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - start)
+                sys.stdout.seek(0)
+                sys.stdout.truncate()
+
+        # tracemalloc 会显著拖慢执行，单独跑一轮只取内存峰值
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    best = min(timings)
+    emit_result({
+        **{k: v for k, v in case.items() if k != "corpus_dir"},
+        "items": items,
+        "setup_s": round(setup_s, 4),
+        "min_s": round(best, 6),
+        "mean_s": round(sum(timings) / len(timings), 6),
+        "ops_per_s": round(items / best, 1) if best else 0.0,
+        "us_per_item": round(best / items * 1e6, 2) if items else 0.0,
+        "peak_mb": round(peak / (1024 * 1024), 2),
+        "peak_rss_mb": measurement.to_dict()["peak_rss_mb"]
+    })
+
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="解析/聚合/前端数据热路径微基准")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="数据集规模")
+    parser.add_argument("--benches", nargs="+", choices=BENCHES, help="只运行指定用例")
+    parser.add_argument("--sample", type=int, default=500, help="逐条用例的抽样条数")
+    parser.add_argument("--rounds", type=int, default=5, help="每个用例的重复轮数")
+    parser.add_argument("--corpus-dir", help="数据集目录(存在则复用，默认使用临时目录)")
+    parser.add_argument("--timeout", type=float, default=3600, help="单个用例超时时间(秒)")
+    parser.add_argument("--output", help="结果JSON路径")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(json.loads(args.child))
+        return
+
+    with contextlib.ExitStack() as stack:
+        if args.corpus_dir:
+            corpus_dir = Path(args.corpus_dir)
+            corpus_dir.mkdir(parents=True, exist_ok=True)
+        else:
+            corpus_dir = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="corpus_")))
+
+        spec = SCALES[args.scale]
+        print(f"准备数据集 {args.scale}: {spec['models']} 模型 × {spec['patients']} 患者 "
+              f"({spec['evaluators']} 个评测模型)")
+        corpus = prepare_corpus(corpus_dir, args.scale)
+        print(f"  原始报告 {corpus['raw_reports']}，聚合结果 {corpus['aggregated_files']}，"
+              f"维度结果 {corpus['dimension_files']}")
+
+        results = []
+        for bench in args.benches or BENCHES:
+            case = {
+                "case_id": f"{bench}/{args.scale}",
+                "bench": bench,
+                "scale": args.scale,
+                "sample": args.sample,
+                "rounds": args.rounds,
+                "corpus_dir": str(corpus_dir)
+            }
+            result = run_case("benchmarks.bench_hotpaths", case, args.timeout)
+            result.pop("corpus_dir", None)
+            results.append(result)
+
+            if "error" in result:
+                print(f"  ✗ {case['case_id']}: {result['error'].splitlines()[-1]}")
+            else:
+                print(f"  ✓ {case['case_id']:<28} {result['items']:>7} 条  min {result['min_s']:.4f}s  "
+                      f"{result['ops_per_s']:>10.1f} 条/s  {result['us_per_item']:>9.1f} µs/条  "
+                      f"峰值 {result['peak_mb']:.1f}MB")
+
+    path = write_report("hotpaths", results, args.output)
+    print(f"\n✓ 结果已保存: {path}")
+    if any("error" in r for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+JSON编解码基准: orjson vs 标准库 json
+在 output/ 下全部 JSON 文件(原始报告、维度结果、聚合结果、前端数据等)上对比:
+
+    load      解析文件内容（文件预先读入内存，不计磁盘读取）
+    dump      pretty 模式序列化（2空格缩进，人工查看的产物）
+    dump_compact  compact 模式序列化（程序读取的产物）
+
+每个用例对每个可用后端各运行一次，并检查两种后端解析结果一致
+
+用法:
+    python -m benchmarks.bench_json_codec
+    python -m benchmarks.bench_json_codec --root /tmp/corpus-large --rounds 3
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.harness import BASE_DIR, write_report
+from src.utils.json_codec import BACKEND_ORJSON, BACKEND_STDLIB, JsonCodec, available_backends
+
+
+def load_tree(root: Path) -> List[bytes]:
+    """读取目录下所有 JSON 文件的内容（跳过无法解析的文件）"""
+    codec = JsonCodec(BACKEND_STDLIB)
+    contents = []
+    for path in sorted(root.rglob("*.json")):
+        content = path.read_bytes()
+        try:
+            codec.loads(content)
+        except ValueError:
+            continue
+        contents.append(content)
+    return contents
+
+
+def time_case(fn: Callable[[Any], Any], items: List[Any], rounds: int, total_bytes: int) -> Dict[str, float]:
+    """运行 rounds 轮，每轮处理全部条目，返回 min/mean 耗时和吞吐"""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "min_s": round(best, 6),
+        "mean_s": round(sum(timings) / len(timings), 6),
+        "ops_per_s": round(len(items) / best, 1) if best else 0.0,
+        "mb_per_s": round(total_bytes / best / 1e6, 1) if best else 0.0
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="JSON编解码基准: orjson vs 标准库 json")
+    parser.add_argument("--root", default=str(BASE_DIR / "output"), help="扫描的目录")
+    parser.add_argument("--rounds", type=int, default=5, help="重复轮数")
+    parser.add_argument("--output", help="结果JSON路径")
+    args = parser.parse_args(argv)
+
+    contents = load_tree(Path(args.root))
+    if not contents:
+        print(f"✗ 没有找到 JSON 文件: {args.root}")
+        sys.exit(1)
+
+    total_bytes = sum(len(c) for c in contents)
+    backends = available_backends()
+    print(f"JSON 文件 {len(contents)} 个，共 {total_bytes / 1e6:.1f} MB，后端: {', '.join(backends)}")
+
+    stdlib = JsonCodec(BACKEND_STDLIB)
+    objects = [stdlib.loads(c) for c in contents]
+
+    mismatched = 0
+    if BACKEND_ORJSON in backends:
+        fast = JsonCodec(BACKEND_ORJSON)
+        mismatched = sum(1 for c, obj in zip(contents, objects) if fast.loads(c) != obj)
+        print(f"解析结果一致性: {len(contents) - mismatched}/{len(contents)}")
+
+    results = []
+    for backend in backends:
+        codec = JsonCodec(backend)
+        cases = {
+            "load": (codec.loads, contents),
+            "dump": (lambda obj: codec.dumps_bytes(obj, pretty=True), objects),
+            "dump_compact": (codec.dumps_bytes, objects)
+        }
+        for name, (fn, items) in cases.items():
+            result = {"case_id": f"{name}/{backend}", "bench": name, "backend": backend, "items": len(items),
+                      "rounds": args.rounds, **time_case(fn, items, args.rounds, total_bytes)}
+            results.append(result)
+            print(f"  ✓ {name:<13} {backend:<7} min {result['min_s']:.4f}s  {result['ops_per_s']:>10.1f} 个/s  "
+                  f"{result['mb_per_s']:>8.1f} MB/s")
+
+    by_case = {r["case_id"]: r["min_s"] for r in results}
+    if BACKEND_ORJSON in backends:
+        print()
+        for name in ("load", "dump", "dump_compact"):
+            fast_s = by_case[f"{name}/{BACKEND_ORJSON}"]
+            if fast_s:
+                print(f"{name:<13} orjson 相对标准库加速 {by_case[f'{name}/{BACKEND_STDLIB}'] / fast_s:.1f}x")
+
+    path = write_report("json_codec", results, args.output)
+    print(f"✓ 结果已保存: {path}")
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
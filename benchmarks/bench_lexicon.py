@@ -0,0 +1,126 @@
+"""
+词表匹配基准: Aho-Corasick 自动机 vs 逐个词条 `term in text`
+在 output/markdown 的报告上，对不同规模的词表比较 AutoEvaluator 实体覆盖率检查的两种实现:
+
+    loop       原实现，对每个词条做一次子串查找，耗时与词条数成正比
+    automaton  src/evaluation/lexicon.py 的自动机，每份报告只扫描一遍
+    lexicon    Lexicon.coverage，按词表规模选择策略(不超过 Lexicon.LOOP_MAX_TERMS 时逐个查找)
+
+词表由项目自带的 medical_entities.json 加上合成词条组成: 一部分截取自报告原文(会命中)，
+其余为随机汉字组合(基本不命中)，规模由 --sizes 指定。运行前逐份检查两种实现的结果一致
+
+用法:
+    python -m benchmarks.bench_lexicon
+    python -m benchmarks.bench_lexicon --sizes 20 1000 10000 --rounds 3
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.harness import BASE_DIR, write_report
+from src.evaluation.lexicon import LEXICON_DIR, Lexicon
+
+# 随机词条的字符池（常见医学文本用字）
+CHAR_POOL = ("糖尿病高血压脂肪肝肾功能不全视网膜神经病变足溃疡酮症酸中毒低血糖昏迷胰岛素抵抗"
+             "二甲双胍格列美脲吡格列酮西他列汀达格列净恩格列净利拉鲁肽阿卡波糖瑞格列奈"
+             "空腹餐后糖化血红蛋白尿微量白蛋白肌酐胆固醇甘油三酯尿酸体重指数腰围血压心率"
+             "口渴多饮多尿乏力消瘦手脚麻木视物模糊泡沫皮肤瘙痒伤口愈合慢头晕心悸出汗")
+
+
+def build_lexicon(base: Lexicon, size: int, texts: List[str], hit_ratio: float = 0.3, seed: int = 0) -> Lexicon:
+    """在基础词表上补充合成词条，直到总数达到 size"""
+    rng = random.Random(seed)
+    categories = {category: list(terms) for category, terms in base.categories.items()}
+    seen = set(base.terms)
+    synthetic = []
+    while len(seen) < size:
+        if rng.random() < hit_ratio:
+            text = rng.choice(texts)
+            start = rng.randrange(max(1, len(text) - 6))
+            term = text[start:start + rng.randint(2, 6)].strip()
+        else:
+            term = "".join(rng.choice(CHAR_POOL) for _ in range(rng.randint(2, 5)))
+        if term and term not in seen:
+            seen.add(term)
+            synthetic.append(term)
+    categories["合成"] = synthetic
+    return Lexicon(categories, name=f"synthetic-{size}")
+
+
+def loop_found(lexicon: Lexicon, text: str) -> set:
+    """原实现: 逐个词条查找"""
+    return {term_id for term_id, term in enumerate(lexicon.terms) if term in text}
+
+
+def time_case(fn: Callable[[str], object], texts: List[str], rounds: int) -> Dict[str, float]:
+    """运行 rounds 轮，每轮处理全部报告"""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "min_s": round(best, 6),
+        "mean_s": round(sum(timings) / len(timings), 6),
+        "us_per_report": round(best / len(texts) * 1e6, 1),
+        "ops_per_s": round(len(texts) / best, 1) if best else 0.0
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="词表匹配基准: Aho-Corasick vs 逐个查找")
+    parser.add_argument("--markdown-dir", default=str(BASE_DIR / "output" / "markdown"), help="报告目录")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 50, 100, 500, 2000, 10000], help="词表规模")
+    parser.add_argument("--rounds", type=int, default=5, help="重复轮数")
+    parser.add_argument("--output", help="结果JSON路径")
+    args = parser.parse_args(argv)
+
+    texts = [p.read_text(encoding='utf-8') for p in sorted(Path(args.markdown_dir).glob("*.md"))]
+    if not texts:
+        print(f"✗ 没有找到报告: {args.markdown_dir}")
+        sys.exit(1)
+    base = Lexicon.load(LEXICON_DIR / "medical_entities.json")
+    print(f"报告 {len(texts)} 份，平均 {sum(map(len, texts)) / len(texts):.0f} 字")
+
+    results = []
+    mismatched = 0
+    for size in args.sizes:
+        start = time.perf_counter()
+        lexicon = build_lexicon(base, size, texts)
+        build_s = time.perf_counter() - start
+
+        mismatched += sum(1 for text in texts
+                          if not lexicon.scan_ids(text) == loop_found(lexicon, text) == lexicon.found_ids(text))
+        cases = {
+            "loop": lambda text: loop_found(lexicon, text),
+            "automaton": lexicon.scan_ids,
+            "lexicon": lexicon.coverage
+        }
+        timings = {}
+        for name, fn in cases.items():
+            result = {"case_id": f"{name}/{len(lexicon)}", "bench": name, "terms": len(lexicon),
+                      "states": lexicon.state_count, "build_s": round(build_s, 4), "items": len(texts),
+                      "rounds": args.rounds, **time_case(fn, texts, args.rounds)}
+            results.append(result)
+            timings[name] = result["min_s"]
+        print(f"  ✓ {len(lexicon):>6} 词条  构建 {build_s * 1000:7.1f}ms  "
+              f"loop {timings['loop'] / len(texts) * 1e6:9.1f}µs/份  "
+              f"automaton {timings['automaton'] / len(texts) * 1e6:8.1f}µs/份  "
+              f"lexicon {timings['lexicon'] / len(texts) * 1e6:8.1f}µs/份  "
+              f"加速 {timings['loop'] / timings['automaton']:.1f}x")
+
+    print(f"\n结果一致性: {'一致' if not mismatched else f'{mismatched} 份不一致'}")
+    path = write_report("lexicon", results, args.output)
+    print(f"✓ 结果已保存: {path}")
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+报告模块解析基准: 单遍分段扫描 vs 正则级联
+在 output/raw 的原始报告上对比:
+
+    legacy      正则级联版 parse_report + get_module_summary（评测流程原来每个维度调用的组合）
+    analyze     ReportModuleParser.analyze（单遍扫描，一次得到模块和摘要）
+    tokenize    section_tokenizer.tokenize（只扫描标记）
+
+运行前先检查两种实现对每份报告的结果完全一致，纯CPU用例在当前进程中运行
+
+用法:
+    python -m benchmarks.bench_section_tokenizer
+    python -m benchmarks.bench_section_tokenizer --raw-dir /tmp/corpus/raw --rounds 50
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.harness import BASE_DIR, write_report
+from benchmarks.legacy_module_parser import legacy_module_parser
+from cross_evaluation.module_parser import module_parser
+from cross_evaluation.section_tokenizer import tokenize
+from src.utils.raw_report import load_raw_report
+
+
+def load_reports(raw_dir: Path) -> List[str]:
+    """读取目录下所有原始报告的 result 文本"""
+    reports = []
+    for path in sorted(raw_dir.glob("*.json")):
+        report = load_raw_report(path).get("result", "")
+        if report:
+            reports.append(report)
+    return reports
+
+
+def check_equivalence(reports: List[str]) -> int:
+    """
+    检查新旧实现的结果是否一致
+
+    Returns:
+        不一致的报告数
+    """
+    mismatched = 0
+    for report in reports:
+        legacy = (legacy_module_parser.parse_report(report), legacy_module_parser.get_module_summary(report))
+        if module_parser.analyze(report) != legacy:
+            mismatched += 1
+    return mismatched
+
+
+def time_cases(cases: Dict[str, Callable[[str], object]], reports: List[str], rounds: int) -> Dict[str, Dict[str, float]]:
+    """
+    运行 rounds 轮，每轮依次处理全部报告一次（各用例交替运行，机器负载的波动对各用例的影响相同）
+
+    Returns:
+        {用例名: min/mean 耗时}
+    """
+    timings = {name: [] for name in cases}
+    for _ in range(rounds):
+        for name, fn in cases.items():
+            start = time.perf_counter()
+            for report in reports:
+                fn(report)
+            timings[name].append(time.perf_counter() - start)
+
+    results = {}
+    for name, values in timings.items():
+        best = min(values)
+        results[name] = {
+            "min_s": round(best, 6),
+            "mean_s": round(sum(values) / len(values), 6),
+            "ops_per_s": round(len(reports) / best, 1) if best else 0.0,
+            "us_per_item": round(best / len(reports) * 1e6, 2)
+        }
+    return results
+
+
+CASES = {
+    "legacy": lambda report: (legacy_module_parser.parse_report(report), legacy_module_parser.get_module_summary(report)),
+    "analyze": module_parser.analyze,
+    "tokenize": tokenize
+}
+
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="报告模块解析基准: 单遍分段扫描 vs 正则级联")
+    parser.add_argument("--raw-dir", default=str(BASE_DIR / "output" / "raw"), help="原始报告目录")
+    parser.add_argument("--rounds", type=int, default=20, help="重复轮数")
+    parser.add_argument("--output", help="结果JSON路径")
+    args = parser.parse_args(argv)
+
+    reports = load_reports(Path(args.raw_dir))
+    if not reports:
+        print(f"✗ 没有找到原始报告: {args.raw_dir}")
+        sys.exit(1)
+
+    total_chars = sum(len(r) for r in reports)
+    print(f"原始报告 {len(reports)} 份，平均 {total_chars // len(reports)} 字符")
+
+    mismatched = check_equivalence(reports)
+    print(f"结果一致性: {len(reports) - mismatched}/{len(reports)}")
+
+    results = []
+    for name, timing in time_cases(CASES, reports, args.rounds).items():
+        result = {"case_id": f"{name}/raw", "bench": name, "items": len(reports), "rounds": args.rounds, **timing}
+        results.append(result)
+        print(f"  ✓ {name:<10} min {result['min_s']:.4f}s  {result['ops_per_s']:>10.1f} 份/s  "
+              f"{result['us_per_item']:>9.1f} µs/份")
+
+    legacy, analyze = results[0]["min_s"], results[1]["min_s"]
+    if analyze:
+        print(f"\nanalyze 相对 legacy 加速 {legacy / analyze:.1f}x")
+
+    path = write_report("section_tokenizer", results, args.output)
+    print(f"✓ 结果已保存: {path}")
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
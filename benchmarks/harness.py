@@ -0,0 +1,258 @@
+"""
+基准测试框架 - Benchmark Harness
+每个用例在独立子进程中运行，使CPU时间和峰值内存互不干扰；结果写成JSON便于跨提交对比
+
+对比两次结果:
+    python -m benchmarks.harness compare benchmarks/results/old.json benchmarks/results/new.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.core.generation_metrics import percentile
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = BASE_DIR / "benchmarks" / "results"
+
+# 子进程输出结果的行前缀，与用例自身的打印区分
+RESULT_PREFIX = "BENCH_RESULT "
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """
+    汇总时延样本
+
+    Args:
+        samples: 时延列表(秒)
+
+    Returns:
+        {count, mean, p50, p95, p99, max}
+    """
+    if not samples:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "count": len(samples),
+        "mean": round(sum(samples) / len(samples), 5),
+        "p50": round(percentile(samples, 50), 5),
+        "p95": round(percentile(samples, 95), 5),
+        "p99": round(percentile(samples, 99), 5),
+        "max": round(max(samples), 5)
+    }
+
+
+def resource_snapshot() -> Dict[str, float]:
+    """当前进程的CPU时间(秒)和峰值RSS(MB)"""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # Linux 下 ru_maxrss 单位为KB，macOS 下为字节
+    rss_mb = usage.ru_maxrss / (1024 * 1024) if sys.platform == "darwin" else usage.ru_maxrss / 1024
+    return {
+        "cpu_user_s": usage.ru_utime,
+        "cpu_system_s": usage.ru_stime,
+        "peak_rss_mb": rss_mb
+    }
+
+
+class Measurement:
+    """测量一段代码的耗时和资源占用（在子进程内使用）"""
+
+    def __enter__(self) -> "Measurement":
+        self._start_resources = resource_snapshot()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.makespan_s = time.perf_counter() - self._start
+        end = resource_snapshot()
+        self.cpu_s = (end["cpu_user_s"] - self._start_resources["cpu_user_s"]) + \
+            (end["cpu_system_s"] - self._start_resources["cpu_system_s"])
+        self.peak_rss_mb = end["peak_rss_mb"]
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "makespan_s": round(self.makespan_s, 4),
+            "cpu_s": round(self.cpu_s, 4),
+            "peak_rss_mb": round(self.peak_rss_mb, 1)
+        }
+
+
+def emit_result(result: Dict[str, Any]):
+    """子进程: 输出用例结果"""
+    sys.stdout.write(RESULT_PREFIX + json.dumps(result, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+def run_case(module: str, case: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    在子进程中运行一个基准用例
+
+    Args:
+        module: 基准模块名(如 benchmarks.bench_engine)，需支持 --child <用例JSON>
+        case: 用例参数
+        timeout: 超时时间(秒)
+
+    Returns:
+        用例结果；失败时包含 error 字段
+    """
+    env = {**os.environ, "PYTHONPATH": str(BASE_DIR) + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    proc = subprocess.run(
+        [sys.executable, "-m", module, "--child", json.dumps(case, ensure_ascii=False)],
+        cwd=BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=timeout
+    )
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    return {**case, "error": (proc.stderr or proc.stdout).strip()[-2000:] or f"exit code {proc.returncode}"}
+
+
+def git_commit() -> Optional[str]:
+    """当前提交(无法获取时返回None)"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(suite: str, results: List[Dict[str, Any]], output: Optional[str] = None) -> Path:
+    """
+    保存基准结果
+
+    Args:
+        suite: 基准套件名称
+        results: 用例结果列表
+        output: 输出文件路径(默认 benchmarks/results/{suite}-{时间}.json)
+
+    Returns:
+        结果文件路径
+    """
+    if output:
+        path = Path(output)
+    else:
+        path = RESULTS_DIR / f"{suite}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    report = {
+        "suite": suite,
+        "timestamp": datetime.now().isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def compare_reports(
+    old: Dict[str, Any],
+    new: Dict[str, Any],
+    metrics: Dict[str, bool],
+    threshold: float = 0.1
+) -> List[Dict[str, Any]]:
+    """
+    对比两次基准结果
+
+    Args:
+        old: 旧结果
+        new: 新结果
+        metrics: {指标名: 是否越大越好}，指标名可用点号访问嵌套字段(如 latency_s.p95)
+        threshold: 超过该比例的退化标记为 regression
+
+    Returns:
+        每个用例每个指标的对比行
+    """
+    def lookup(result: Dict[str, Any], dotted: str) -> Optional[float]:
+        value: Any = result
+        for part in dotted.split("."):
+            if not isinstance(value, dict) or part not in value:
+                return None
+            value = value[part]
+        return value if isinstance(value, (int, float)) else None
+
+    old_cases = {r["case_id"]: r for r in old.get("results", []) if "case_id" in r}
+    rows = []
+    for result in new.get("results", []):
+        before = old_cases.get(result.get("case_id"))
+        if before is None:
+            continue
+        for metric, higher_is_better in metrics.items():
+            a, b = lookup(before, metric), lookup(result, metric)
+            if a is None or b is None or a == 0:
+                continue
+            change = (b - a) / a
+            worse = -change if higher_is_better else change
+            rows.append({
+                "case_id": result["case_id"],
+                "metric": metric,
+                "old": a,
+                "new": b,
+                "change": round(change, 4),
+                "regression": worse > threshold
+            })
+    return rows
+
+
+# 对比时默认关注的指标
+DEFAULT_METRICS = {
+    "calls_per_s": True,
+    "tasks_per_s": True,
+    "makespan_s": False,
+    "cpu_s": False,
+    "peak_rss_mb": False,
+    "latency_s.p50": False,
+    "latency_s.p95": False,
+    "latency_s.p99": False,
+    "ops_per_s": True,
+    "min_s": False,
+    "peak_mb": False
+}
+
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口: 对比两次基准结果"""
+    parser = argparse.ArgumentParser(description="基准结果对比")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compare = sub.add_parser("compare", help="对比两个结果文件")
+    compare.add_argument("old", help="旧结果JSON")
+    compare.add_argument("new", help="新结果JSON")
+    compare.add_argument("--threshold", type=float, default=0.1, help="退化阈值(默认10%%)")
+    args = parser.parse_args(argv)
+
+    with open(args.old, 'r', encoding='utf-8') as f:
+        old = json.load(f)
+    with open(args.new, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+
+    rows = compare_reports(old, new, DEFAULT_METRICS, args.threshold)
+    regressions = [r for r in rows if r["regression"]]
+
+    print(f"对比: {old.get('commit')} -> {new.get('commit')} ({len(rows)} 项)")
+    for row in rows:
+        flag = "✗ 退化" if row["regression"] else "  "
+        print(f"{flag} {row['case_id']:<48} {row['metric']:<16} "
+              f"{row['old']:>10.4f} -> {row['new']:>10.4f} ({row['change']:+.1%})")
+
+    if regressions:
+        print(f"\n发现 {len(regressions)} 项退化(阈值 {args.threshold:.0%})")
+        sys.exit(1)
+    print("\n✓ 未发现退化")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ import json
 import os
 from pathlib import Path
 
+from src.utils.raw_report import load_raw_report
+
 
 def extract_conversation_title(prompt):
     """从 prompt 中提取对话类型作为标题"""
@@ -28,8 +30,7 @@ def convert_json_to_markdown(json_file_path, output_dir):
     """将单个 JSON 文件转换为 Markdown"""
     try:
         # 读取 JSON 文件
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load_raw_report(json_file_path)
 
         model = data.get("model", "未知模型")
         people = data.get("people", "未知患者")
@@ -2,11 +2,13 @@
 评分聚合器模块
 用于聚合5个维度的评分结果
 """
-import json
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Union
+
+from src.utils import json_codec
 from .config import config
+from .records import AggregatedResult, DimensionResult
 
 
 class ScoreAggregator:
@@ -18,7 +20,7 @@ class ScoreAggregator:
 
     def aggregate(
         self,
-        dimension_results: List[Dict[str, Any]],
+        dimension_results: List[Union[Dict[str, Any], DimensionResult]],
         evaluated_model: str,
         evaluator_model: str,
         patient: str
@@ -27,7 +29,7 @@ class ScoreAggregator:
         聚合5个维度的评分结果
 
         Args:
-            dimension_results: 5个维度的评测结果列表
+            dimension_results: 5个维度的评测结果列表（字典或 DimensionResult）
             evaluated_model: 被评测模型
             evaluator_model: 评测模型
             patient: 患者名称
@@ -35,40 +37,47 @@ class ScoreAggregator:
         Returns:
             聚合后的评测结果
         """
-        # 计算总分
-        total_score = sum(result.get("score", 0) for result in dimension_results)
-        max_total_score = config.get_total_score()
-
-        # 构建维度字典
-        dimensions = {}
-        for result in dimension_results:
-            dimension_name = result.get("dimension", "")
-            dimensions[dimension_name] = {
-                "score": result.get("score", 0),
-                "max_score": result.get("max_score", 0),
-                "issues": result.get("issues", "")
-            }
-
-        # 收集所有critical_feedback
-        feedbacks = [
-            result.get("critical_feedback", "")
-            for result in dimension_results
-            if result.get("critical_feedback")
-        ]
+        return self.aggregate_records(
+            dimension_results=dimension_results,
+            evaluated_model=evaluated_model,
+            evaluator_model=evaluator_model,
+            patient=patient
+        ).to_dict()
 
-        # 构建聚合结果
-        aggregated_result = {
-            "evaluated_model": evaluated_model,
-            "evaluator_model": evaluator_model,
-            "patient": patient,
-            "total_score": total_score,
-            "max_total_score": max_total_score,
-            "dimensions": dimensions,
-            "critical_feedbacks": feedbacks,
-            "timestamp": datetime.now().isoformat()
-        }
+    def aggregate_records(
+        self,
+        dimension_results: List[Union[Dict[str, Any], DimensionResult]],
+        evaluated_model: str,
+        evaluator_model: str,
+        patient: str
+    ) -> AggregatedResult:
+        """
+        聚合5个维度的评分结果，返回记录对象
 
-        return aggregated_result
+        Args:
+            dimension_results: 5个维度的评测结果列表（字典在此处校验并转换为 DimensionResult）
+            evaluated_model: 被评测模型
+            evaluator_model: 评测模型
+            patient: 患者名称
+
+        Returns:
+            聚合结果
+
+        Raises:
+            ValueError: 如果某个维度结果缺少维度名或评分不是数值
+        """
+        records = [
+            result if isinstance(result, DimensionResult) else DimensionResult.from_dict(result)
+            for result in dimension_results
+        ]
+        return AggregatedResult.from_dimensions(
+            records,
+            evaluated_model=evaluated_model,
+            evaluator_model=evaluator_model,
+            patient=patient,
+            max_total_score=config.get_total_score(),
+            timestamp=datetime.now().isoformat()
+        )
 
     def load_dimension_result(
         self,
@@ -96,8 +105,7 @@ class ScoreAggregator:
         if not file_path.exists():
             raise FileNotFoundError(f"维度评测结果文件不存在: {file_path}")
 
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return json_codec.load(file_path)
 
     def aggregate_from_files(
         self,
@@ -131,13 +139,12 @@ class ScoreAggregator:
             except FileNotFoundError as e:
                 print(f"警告: {e}")
                 # 如果某个维度的结果不存在，使用默认值
-                dimension_results.append({
-                    "dimension": dimension_name,
-                    "score": 0,
-                    "max_score": dimension["weight"],
-                    "issues": "评测文件不存在",
-                    "critical_feedback": ""
-                })
+                dimension_results.append(DimensionResult(
+                    dimension=dimension_name,
+                    score=0,
+                    max_score=dimension["weight"],
+                    issues="评测文件不存在"
+                ))
 
         # 聚合结果
         return self.aggregate(
@@ -175,8 +182,7 @@ class ScoreAggregator:
         file_path = patient_dir / filename
 
         # 保存结果
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(aggregated_result, f, ensure_ascii=False, indent=2)
+        json_codec.dump(aggregated_result, file_path, pretty=True)
 
         return file_path
 
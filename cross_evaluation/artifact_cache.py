@@ -0,0 +1,153 @@
+"""
+报告产物缓存
+同一份原始报告在一次评测中被每个评测模型、每个维度重复使用:
+按 (路径, 修改时间, 文件大小) 缓存解析后的JSON、提取的对话和标准格式报告，
+按报告文本缓存模块解析结果，每份报告每次运行只读取和解析一次
+
+两类条目都按LRU淘汰，条目数有上限；文件被修改后签名变化，下次访问时重新读取
+缓存的对象在多个任务间共享，调用方不应修改
+"""
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .config import config
+from .module_parser import module_parser
+
+# 文件签名: (修改时间ns, 文件大小)
+Signature = Tuple[int, int]
+
+
+class ReportArtifacts:
+    """一份原始报告文件的解析产物，对话和标准格式报告在第一次使用时生成"""
+
+    __slots__ = ("path", "signature", "data", "conversation", "report")
+
+    def __init__(self, path: Path, signature: Signature, data: Dict[str, Any]):
+        self.path = path
+        self.signature = signature
+        self.data = data
+        self.conversation: Optional[str] = None
+        self.report: Optional[str] = None
+
+
+class ReportArtifactCache:
+    """线程安全的报告产物LRU缓存"""
+
+    def __init__(self, max_entries: int = 256, enabled: bool = True):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 文件条目和模块解析条目各自的最大数量
+            enabled: 是否启用（关闭时每次都重新读取和解析）
+        """
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._files: "OrderedDict[str, ReportArtifacts]" = OrderedDict()
+        self._analyses: "OrderedDict[str, Tuple[Dict[str, str], Dict[str, Dict[str, Any]]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.analysis_hits = 0
+        self.analysis_misses = 0
+
+    @staticmethod
+    def file_signature(path: Path) -> Signature:
+        """文件签名 (修改时间ns, 文件大小)，文件不存在时抛出 FileNotFoundError"""
+        stat = path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, path: Path, loader: Callable[[Path], Dict[str, Any]]) -> ReportArtifacts:
+        """
+        获取报告文件的产物，未缓存或文件已变化时用 loader 读取
+
+        Args:
+            path: 报告文件路径
+            loader: 读取并解析文件的函数
+
+        Returns:
+            报告产物
+        """
+        signature = self.file_signature(path)
+        if not self.enabled:
+            return ReportArtifacts(path, signature, loader(path))
+
+        key = str(path)
+        with self._lock:
+            artifacts = self._files.get(key)
+            if artifacts is not None and artifacts.signature == signature:
+                self._files.move_to_end(key)
+                self.hits += 1
+                return artifacts
+            self.misses += 1
+
+        # 在锁外读取文件；并发的首次读取可能重复，但结果相同
+        artifacts = ReportArtifacts(path, signature, loader(path))
+        with self._lock:
+            self._files[key] = artifacts
+            self._files.move_to_end(key)
+            while len(self._files) > self.max_entries:
+                self._files.popitem(last=False)
+        return artifacts
+
+    def analyze(self, report: str) -> Tuple[Dict[str, str], Dict[str, Dict[str, Any]]]:
+        """
+        获取报告的模块解析结果（module_parser.analyze），按报告文本缓存
+
+        Args:
+            report: 报告文本
+
+        Returns:
+            (模块字典, 模块摘要字典)
+        """
+        if not self.enabled:
+            return module_parser.analyze(report)
+
+        with self._lock:
+            analysis = self._analyses.get(report)
+            if analysis is not None:
+                self._analyses.move_to_end(report)
+                self.analysis_hits += 1
+                return analysis
+            self.analysis_misses += 1
+
+        analysis = module_parser.analyze(report)
+        with self._lock:
+            self._analyses[report] = analysis
+            while len(self._analyses) > self.max_entries:
+                self._analyses.popitem(last=False)
+        return analysis
+
+    def clear(self):
+        """清空缓存和统计"""
+        with self._lock:
+            self._files.clear()
+            self._analyses.clear()
+            self.hits = self.misses = 0
+            self.analysis_hits = self.analysis_misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取缓存统计
+
+        Returns:
+            {"files", "hits", "misses", "analyses", "analysis_hits", "analysis_misses"}
+        """
+        with self._lock:
+            return {
+                "files": len(self._files),
+                "hits": self.hits,
+                "misses": self.misses,
+                "analyses": len(self._analyses),
+                "analysis_hits": self.analysis_hits,
+                "analysis_misses": self.analysis_misses
+            }
+
+
+# 创建全局实例
+report_cache = ReportArtifactCache(
+    max_entries=config.report_cache_config.get("max_entries", 256),
+    enabled=config.report_cache_config.get("enabled", True)
+)
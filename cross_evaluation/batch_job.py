@@ -0,0 +1,302 @@
+"""
+离线批量任务模块
+将交叉评测任务导出为提供商批量接口(OpenAI兼容 /v1/batches)的请求JSONL，
+并将完成后的结果JSONL导入为维度评测结果和聚合结果
+
+请求行格式:
+    {"custom_id": "患者1/gpt-5.1/qwen3-max/准确性", "method": "POST",
+     "url": "/v1/chat/completions", "body": {"model": ..., "messages": [...], ...}}
+
+结果行格式(与OpenAI批量接口输出一致):
+    {"custom_id": ..., "response": {"status_code": 200, "body": {chat.completion}}, "error": null}
+"""
+import re
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from src.utils import json_codec
+from .config import config
+from .report_loader import report_loader
+from .dimension_evaluator import dimension_evaluator
+from .aggregator import score_aggregator
+from .model_client import model_client
+
+BATCH_URL = "/v1/chat/completions"
+
+
+def make_custom_id(patient: str, evaluated_model: str, evaluator_model: str, dimension_name: str) -> str:
+    """
+    构造请求ID: 患者/被评测模型/评测模型/维度
+
+    Raises:
+        ValueError: 如果某个字段包含分隔符 "/"
+    """
+    parts = (patient, evaluated_model, evaluator_model, dimension_name)
+    for part in parts:
+        if "/" in part:
+            raise ValueError(f"custom_id 字段不能包含 '/': {part}")
+    return "/".join(parts)
+
+
+def parse_custom_id(custom_id: str) -> Tuple[str, str, str, str]:
+    """
+    解析请求ID
+
+    Returns:
+        (患者, 被评测模型, 评测模型, 维度)
+    """
+    parts = custom_id.split("/")
+    if len(parts) != 4:
+        raise ValueError(f"无法解析 custom_id: {custom_id}")
+    return parts[0], parts[1], parts[2], parts[3]
+
+
+def batch_file_name(base_url: str) -> str:
+    """
+    接口地址对应的请求文件名: 主机名加路径，非文件名字符替换为 "_"
+
+    末尾的 "/" 不影响结果，同一主机上不同路径的接口地址得到不同的文件名，如
+    https://api.jiekou.ai/openai -> api.jiekou.ai_openai.jsonl
+    """
+    address = base_url.split("://")[-1].strip("/")
+    return f"{re.sub(r'[^A-Za-z0-9._-]+', '_', address) or 'default'}.jsonl"
+
+
+def _iter_jsonl(file_path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json_codec.loads(line)
+
+
+class BatchJob:
+    """交叉评测离线批量任务"""
+
+    def __init__(self):
+        """初始化批量任务"""
+        self.output_dir = config.output_dir
+
+    def _dimension_file(self, evaluated_model: str, evaluator_model: str, patient: str, dimension_name: str) -> Path:
+        filename = f"{evaluated_model}_by_{evaluator_model}_{patient}_{dimension_name}.json"
+        return self.output_dir / patient / filename
+
+    def export_requests(
+        self,
+        export_dir: Union[str, Path],
+        models: Optional[List[str]] = None,
+        patients: Optional[List[str]] = None,
+        resume: bool = True
+    ) -> Dict[str, Path]:
+        """
+        导出完整任务计划为批量请求JSONL
+
+        批量任务需提交到单个接口地址，因此按评测模型的 base_url 分文件，
+        文件名为接口地址的主机名和路径(见 batch_file_name，如 api.jiekou.ai_openai.jsonl)；
+        只差末尾 "/" 的接口地址写入同一个文件
+
+        Args:
+            export_dir: 导出目录
+            models: 模型列表（None表示使用配置中的所有模型）
+            patients: 患者列表（None表示使用配置中的所有患者）
+            resume: 跳过已存在维度评测结果的任务
+
+        Returns:
+            {接口地址: 请求文件路径}
+        """
+        models = models or config.models
+        patients = patients or config.patients
+        export_dir = Path(export_dir)
+        export_dir.mkdir(parents=True, exist_ok=True)
+
+        api_config = config.api_config
+        files = {}
+        counts = {}
+        skipped = 0
+
+        try:
+            for patient in patients:
+                for evaluated_model in models:
+                    if not report_loader.check_report_exists(evaluated_model, patient):
+                        print(f"  跳过: {evaluated_model}-{patient} (报告不存在)")
+                        continue
+
+                    conversation, report = report_loader.load_report_data(evaluated_model, patient)
+
+                    for evaluator_model in models:
+                        base_url = model_client.get_base_url(evaluator_model)
+                        for dimension in config.dimensions:
+                            dimension_name = dimension["name"]
+                            if resume and self._dimension_file(
+                                    evaluated_model, evaluator_model, patient, dimension_name).exists():
+                                skipped += 1
+                                continue
+
+                            if base_url not in files:
+                                name = batch_file_name(base_url)
+                                if any(Path(f.name).name == name for f in files.values()):
+                                    # 替换字符后与其他接口地址同名，加上地址的校验码区分
+                                    name = f"{name[:-len('.jsonl')]}_{zlib.crc32(base_url.encode('utf-8')):08x}.jsonl"
+                                files[base_url] = open(export_dir / name, 'w', encoding='utf-8')
+                                counts[base_url] = 0
+
+                            request = {
+                                "custom_id": make_custom_id(patient, evaluated_model, evaluator_model, dimension_name),
+                                "method": "POST",
+                                "url": BATCH_URL,
+                                "body": {
+                                    "model": model_client.resolve_model_id(evaluator_model),
+                                    "messages": [{
+                                        "role": "user",
+                                        "content": dimension_evaluator.build_prompt(dimension_name, conversation, report)
+                                    }],
+                                    "temperature": api_config.get("temperature", 0),
+                                    "max_tokens": api_config.get("max_tokens", 4000)
+                                }
+                            }
+                            files[base_url].write(json_codec.dumps(request) + "\n")
+                            counts[base_url] += 1
+        finally:
+            for f in files.values():
+                f.close()
+
+        for base_url, count in counts.items():
+            print(f"  {Path(files[base_url].name).name}: {count} 个请求 ({base_url})")
+        if skipped:
+            print(f"  跳过已完成的维度评测: {skipped}")
+
+        return {base_url: Path(f.name) for base_url, f in files.items()}
+
+    def ingest_results(self, result_files: List[Union[str, Path]]) -> Dict[str, int]:
+        """
+        导入批量结果JSONL，生成维度评测结果并聚合
+
+        Args:
+            result_files: 结果文件列表
+
+        Returns:
+            统计 {"ingested": 导入数, "failed": 失败数, "aggregated": 聚合数}
+        """
+        reports = {}
+        touched = set()
+        ingested = 0
+        failed = 0
+
+        for result_file in result_files:
+            for line in _iter_jsonl(result_file):
+                custom_id = line.get("custom_id", "")
+                response = line.get("response") or {}
+                if line.get("error") or response.get("status_code", 200) != 200:
+                    print(f"  失败: {custom_id} - {line.get('error') or response.get('status_code')}")
+                    failed += 1
+                    continue
+
+                body = response.get("body") or {}
+                choices = body.get("choices")
+                if not choices or not (choices[0] or {}).get("message"):
+                    print(f"  失败: {custom_id} - 响应中没有 choices")
+                    failed += 1
+                    continue
+
+                patient, evaluated_model, evaluator_model, dimension_name = parse_custom_id(custom_id)
+
+                report_key = (evaluated_model, patient)
+                if report_key not in reports:
+                    reports[report_key] = report_loader.load_report_data(evaluated_model, patient)
+                conversation, report = reports[report_key]
+
+                content = choices[0]["message"].get("content") or ""
+
+                result = dimension_evaluator.finalize(
+                    response=content,
+                    prompt=dimension_evaluator.build_prompt(dimension_name, conversation, report),
+                    report=report,
+                    dimension_name=dimension_name,
+                    evaluator_model=evaluator_model,
+                    evaluated_model=evaluated_model,
+                    patient=patient
+                )
+
+                file_path = self._dimension_file(evaluated_model, evaluator_model, patient, dimension_name)
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                json_codec.dump(result, file_path, pretty=True)
+
+                touched.add((patient, evaluated_model, evaluator_model))
+                ingested += 1
+
+        # 所有维度都已完成的任务才聚合，缺失维度等待后续批次
+        aggregated = 0
+        for patient, evaluated_model, evaluator_model in sorted(touched):
+            if all(self._dimension_file(evaluated_model, evaluator_model, patient, d["name"]).exists()
+                   for d in config.dimensions):
+                aggregated_result = score_aggregator.aggregate_from_files(
+                    evaluated_model=evaluated_model,
+                    evaluator_model=evaluator_model,
+                    patient=patient
+                )
+                score_aggregator.save_aggregated_result(
+                    aggregated_result=aggregated_result,
+                    evaluated_model=evaluated_model,
+                    evaluator_model=evaluator_model,
+                    patient=patient
+                )
+                aggregated += 1
+
+        return {"ingested": ingested, "failed": failed, "aggregated": aggregated}
+
+
+def fabricate_results(request_file: Union[str, Path], result_file: Union[str, Path]) -> Path:
+    """
+    本地替身: 为请求文件生成格式与提供商一致的结果文件（不调用任何API）
+
+    分数由 custom_id 的哈希确定，同一请求总是得到相同分数，用于测试导出/导入流程
+
+    Args:
+        request_file: 批量请求JSONL
+        result_file: 输出的结果JSONL
+
+    Returns:
+        结果文件路径
+    """
+    result_file = Path(result_file)
+    result_file.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(result_file, 'w', encoding='utf-8') as out:
+        for i, request in enumerate(_iter_jsonl(request_file)):
+            custom_id = request["custom_id"]
+            dimension_name = parse_custom_id(custom_id)[3]
+            max_score = config.get_dimension_weight(dimension_name)
+            score = zlib.crc32(custom_id.encode('utf-8')) % (max_score + 1)
+            content = json_codec.dumps({
+                "score": score,
+                "issues": f"模拟评测: {dimension_name}",
+                "critical_feedback": "本地生成的模拟结果"
+            })
+
+            line = {
+                "id": f"batch_req_{i}",
+                "custom_id": custom_id,
+                "response": {
+                    "status_code": 200,
+                    "request_id": f"req_{i}",
+                    "body": {
+                        "id": f"chatcmpl-{i}",
+                        "object": "chat.completion",
+                        "model": request["body"]["model"],
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": f"```json\n{content}\n```"},
+                            "finish_reason": "stop"
+                        }]
+                    }
+                },
+                "error": None
+            }
+            out.write(json_codec.dumps(line) + "\n")
+
+    return result_file
+
+
+# 创建全局实例
+batch_job = BatchJob()
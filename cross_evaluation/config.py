@@ -1,10 +1,12 @@
 """
 交叉评测配置模块
 """
-import json
 import os
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+from src.utils import json_codec
+from src.utils.patient_source import in_shard, iter_patient_names, parse_shard
 
 
 class CrossEvaluationConfig:
@@ -30,8 +32,7 @@ class CrossEvaluationConfig:
         if not self.config_path.exists():
             raise FileNotFoundError(f"配置文件不存在: {self.config_path}")
 
-        with open(self.config_path, 'r', encoding='utf-8') as f:
-            self._config = json.load(f)
+        self._config = json_codec.load(self.config_path)
 
     @property
     def models(self) -> List[str]:
@@ -40,8 +41,38 @@ class CrossEvaluationConfig:
 
     @property
     def patients(self) -> List[str]:
-        """获取患者列表"""
-        return self._config.get("patients", [])
+        """
+        获取患者列表
+
+        优先使用配置中显式列出的 patients，否则从 patient_source 清单中发现
+        """
+        return self.get_patients()
+
+    @property
+    def patient_source(self) -> Path:
+        """获取患者记录来源（目录、JSONL清单或glob模式），与批量生成共用"""
+        base_dir = Path(__file__).parent.parent
+        return base_dir / self._config.get("patient_source", "测试输入问答记录")
+
+    def get_patients(self, shard: Optional[str] = None) -> List[str]:
+        """
+        获取患者列表，可按分片过滤
+
+        Args:
+            shard: 分片参数 "i/N"，与批量生成使用相同的分片规则
+
+        Returns:
+            患者名称列表
+        """
+        explicit = self._config.get("patients")
+        if explicit:
+            if shard is None:
+                return list(explicit)
+            # 显式列表同样按名称哈希分片，与生成端保持一致
+            parsed = parse_shard(shard)
+            return [p for p in explicit if in_shard(p, parsed)]
+
+        return list(iter_patient_names(self.patient_source, shard))
 
     @property
     def dimensions(self) -> List[Dict[str, Any]]:
@@ -81,6 +112,49 @@ class CrossEvaluationConfig:
         """获取并发配置"""
         return self._config.get("concurrency", {"max_workers": 3})
 
+    @property
+    def instrumentation_config(self) -> Dict[str, Any]:
+        """获取阶段计时配置"""
+        return self._config.get("instrumentation", {"enabled": False, "metrics_file": None})
+
+    @property
+    def metrics_file(self) -> Optional[Path]:
+        """获取指标文件路径（.prom 为Prometheus文本格式，其他为JSON；未配置时为None）"""
+        metrics_file = self.instrumentation_config.get("metrics_file")
+        if not metrics_file:
+            return None
+        base_dir = Path(__file__).parent.parent
+        return base_dir / metrics_file
+
+    @property
+    def tracing_config(self) -> Dict[str, Any]:
+        """获取调用链追踪配置"""
+        return self._config.get("tracing", {"enabled": False, "trace_file": None})
+
+    @property
+    def trace_file(self) -> Optional[Path]:
+        """获取追踪文件路径（JSONL，未配置时为None）"""
+        trace_file = self.tracing_config.get("trace_file")
+        if not trace_file:
+            return None
+        base_dir = Path(__file__).parent.parent
+        return base_dir / trace_file
+
+    @property
+    def dashboard_config(self) -> Dict[str, Any]:
+        """获取实时进度面板配置（mode: off/auto/rich/log）"""
+        return self._config.get("dashboard", {"mode": "off", "log_interval": 15})
+
+    @property
+    def report_cache_config(self) -> Dict[str, Any]:
+        """获取报告产物缓存配置"""
+        return self._config.get("report_cache", {"enabled": True, "max_entries": 256})
+
+    @property
+    def prescreen_config(self) -> Dict[str, Any]:
+        """获取规则预筛配置（未通过预筛的报告不调用评测模型，直接给出确定性评分）"""
+        return self._config.get("prescreen", {"enabled": False})
+
     def get_dimension_file(self, dimension_name: str) -> Path:
         """
         获取指定维度的Prompt文件路径
@@ -6,10 +6,14 @@ import json
 import re
 from datetime import datetime
 from typing import Dict, Any
+
+from src.core.instrumentation import default_instrumentation as instr
+from src.utils import json_codec
 from .config import config
 from .model_client import model_client
 from .prompt_loader import prompt_loader
-from .module_parser import module_parser
+from .artifact_cache import report_cache
+from .records import DimensionResult
 
 
 class DimensionEvaluator:
@@ -42,39 +46,95 @@ class DimensionEvaluator:
         Returns:
             评测结果字典
         """
-        # 1. 解析报告模块
-        modules = module_parser.parse_report(report)
-        module_summary = module_parser.get_module_summary(report)
+        # 1. 格式化prompt
+        with instr.span("format_prompt", dimension=dimension_name):
+            prompt = self.build_prompt(dimension_name, conversation, report)
+
+        # 2. 调用评测模型
+        with instr.span(
+            "api_call",
+            model=evaluator_model,
+            provider=model_client.get_provider(evaluator_model) if instr.enabled else None,
+            dimension=dimension_name
+        ):
+            response = model_client.call_model(
+                model_name=evaluator_model,
+                prompt=prompt
+            )
+
+        # 3. 解析响应并补充详细信息
+        return self.finalize(
+            response=response,
+            prompt=prompt,
+            report=report,
+            dimension_name=dimension_name,
+            evaluator_model=evaluator_model,
+            evaluated_model=evaluated_model,
+            patient=patient
+        )
+
+    def build_prompt(self, dimension_name: str, conversation: str, report: str) -> str:
+        """
+        构建单个维度的评测prompt
+
+        Args:
+            dimension_name: 维度名称
+            conversation: 原始对话内容
+            report: 生成的医疗报告
 
-        # 2. 格式化prompt
-        prompt = prompt_loader.format_prompt(
+        Returns:
+            完整的评测prompt
+        """
+        return prompt_loader.format_prompt(
             dimension_name=dimension_name,
             conversation=conversation,
             report=report
         )
 
-        # 3. 调用评测模型
-        response = model_client.call_model(
-            model_name=evaluator_model,
-            prompt=prompt
-        )
+    def finalize(
+        self,
+        response: str,
+        prompt: str,
+        report: str,
+        dimension_name: str,
+        evaluator_model: str,
+        evaluated_model: str,
+        patient: str
+    ) -> Dict[str, Any]:
+        """
+        将评测模型的响应整理为维度评测结果（在线调用和离线批量导入共用）
 
-        # 4. 解析响应
-        parsed_result = self._parse_response(
-            response=response,
-            dimension_name=dimension_name,
-            evaluator_model=evaluator_model,
-            evaluated_model=evaluated_model,
-            patient=patient
-        )
+        Args:
+            response: 评测模型的原始输出
+            prompt: 输入的完整prompt
+            report: 生成的医疗报告
+            dimension_name: 维度名称
+            evaluator_model: 评测模型名称
+            evaluated_model: 被评测模型名称
+            patient: 患者名称
 
-        # 5. 添加详细的输入输出信息
+        Returns:
+            评测结果字典
+        """
+        with instr.span("parse_modules", dimension=dimension_name):
+            modules, module_summary = report_cache.analyze(report)
+
+        with instr.span("parse_response", model=evaluator_model, dimension=dimension_name):
+            parsed_result = self._parse_response(
+                response=response,
+                dimension_name=dimension_name,
+                evaluator_model=evaluator_model,
+                evaluated_model=evaluated_model,
+                patient=patient
+            )
+
+        # 添加详细的输入输出信息
         parsed_result["source_llm"] = evaluated_model  # 被评测模型
         parsed_result["target_llm"] = evaluator_model  # 评测模型
         parsed_result["prompt_input"] = prompt  # 输入的完整prompt
         parsed_result["output"] = response  # 模型的原始输出
 
-        # 6. 添加模块分析信息
+        # 添加模块分析信息
         parsed_result["report_modules"] = {
             "identified_modules": list(modules.keys()),
             "module_count": len(modules),
@@ -113,7 +173,7 @@ class DimensionEvaluator:
         """
         # 尝试直接解析JSON
         try:
-            result = json.loads(response)
+            result = json_codec.loads(response)
             return self._format_result(result, dimension_name, evaluator_model, evaluated_model, patient)
         except json.JSONDecodeError:
             pass
@@ -124,24 +184,24 @@ class DimensionEvaluator:
 
         if matches:
             try:
-                result = json.loads(matches[0])
+                result = json_codec.loads(matches[0])
                 return self._format_result(result, dimension_name, evaluator_model, evaluated_model, patient)
             except json.JSONDecodeError:
                 pass
 
         # 如果都失败，返回原始响应
         print(f"警告: 无法解析JSON响应，维度={dimension_name}, 评测模型={evaluator_model}")
-        return {
-            "evaluated_model": evaluated_model,
-            "evaluator_model": evaluator_model,
-            "patient": patient,
-            "dimension": dimension_name,
-            "max_score": config.get_dimension_weight(dimension_name),
-            "score": 0,
-            "issues": "解析失败",
-            "critical_feedback": "响应格式错误",
-            "timestamp": datetime.now().isoformat()
-        }
+        return DimensionResult(
+            evaluated_model=evaluated_model,
+            evaluator_model=evaluator_model,
+            patient=patient,
+            dimension=dimension_name,
+            max_score=config.get_dimension_weight(dimension_name),
+            score=0,
+            issues="解析失败",
+            critical_feedback="响应格式错误",
+            timestamp=datetime.now().isoformat()
+        ).to_dict()
 
     def _format_result(
         self,
@@ -194,19 +254,19 @@ class DimensionEvaluator:
         critical_feedback = parsed_json.get("critical_feedback", "")
 
         # 构建标准化的结果
-        result = {
-            "evaluated_model": evaluated_model,
-            "evaluator_model": evaluator_model,
-            "patient": patient,
-            "dimension": dimension_name,
-            "max_score": config.get_dimension_weight(dimension_name),
-            "score": self._parse_score(score),
-            "issues": issues,
-            "critical_feedback": critical_feedback,
-            "timestamp": datetime.now().isoformat()
-        }
+        result = DimensionResult(
+            evaluated_model=evaluated_model,
+            evaluator_model=evaluator_model,
+            patient=patient,
+            dimension=dimension_name,
+            max_score=config.get_dimension_weight(dimension_name),
+            score=self._parse_score(score),
+            issues=issues,
+            critical_feedback=critical_feedback,
+            timestamp=datetime.now().isoformat()
+        )
 
-        return result
+        return result.to_dict()
 
     def _parse_score(self, score_value: Any) -> int:
         """
@@ -2,16 +2,22 @@
 交叉评测主引擎
 负责协调整个评测流程
 """
-import json
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+from src.core.instrumentation import default_instrumentation as instr
+from src.core.progress import default_progress
+from src.core.single_flight import default_single_flight
+from src.core.tracing import default_tracer as tracer
+from src.utils import json_codec
 from .config import config
+from .artifact_cache import report_cache
 from .report_loader import report_loader
 from .dimension_evaluator import dimension_evaluator
 from .aggregator import score_aggregator
+from .prescreen import PrescreenVerdict, prescreener
 
 
 class CrossEvaluationEngine:
@@ -23,6 +29,18 @@ class CrossEvaluationEngine:
         self.output_dir = config.output_dir
         self.progress_file = self.output_dir / ".progress.json"
 
+        # 阶段计时: 启用时在运行结束后输出汇总表和指标文件
+        self.metrics_file = config.metrics_file
+        if config.instrumentation_config.get("enabled"):
+            instr.enable()
+
+        # 调用链追踪: 启用时每个任务的 span 写入追踪文件
+        if config.tracing_config.get("enabled") and config.trace_file:
+            tracer.enable(config.trace_file)
+
+        # 规则预筛: 启用时未通过的报告不调用评测模型，直接给出确定性评分
+        self.prescreen_enabled = bool(config.prescreen_config.get("enabled"))
+
         # 创建输出目录
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
@@ -52,7 +70,10 @@ class CrossEvaluationEngine:
         print(f"评测维度: {len(self.config.dimensions)}")
         total_evaluations = len(models) * len(models) * len(patients) * (len(self.config.dimensions) + 1)
         print(f"预计生成文件: {total_evaluations}个")
+        self._refresh_manifest()
+        prescreener.reset()
         print("-" * 50)
+        default_progress.start(total_tasks=len(models) * len(models) * len(patients), title="交叉评测")
 
         # 加载进度
         progress = self._load_progress() if resume else {}
@@ -61,6 +82,7 @@ class CrossEvaluationEngine:
         completed = 0
         failed = 0
         skipped = 0
+        prescreened = 0
 
         # 三层循环：患者 -> 被评测模型 -> 评测模型
         for patient in patients:
@@ -75,15 +97,22 @@ class CrossEvaluationEngine:
                 if not report_loader.check_report_exists(evaluated_model, patient):
                     print(f"  跳过: {evaluated_model} (报告不存在)")
                     skipped += 1
+                    default_progress.add_tasks(-len(models))
                     continue
 
+                # 规则预筛，未通过时不加载对话和报告
+                verdict = self._prescreen(evaluated_model, patient)
+
                 # 加载报告数据
-                try:
-                    conversation, report = report_loader.load_report_data(evaluated_model, patient)
-                except Exception as e:
-                    print(f"  加载报告失败: {evaluated_model} - {str(e)}")
-                    failed += 1
-                    continue
+                if verdict is None or verdict.passed:
+                    try:
+                        conversation, report = report_loader.load_report_data(evaluated_model, patient)
+                    except Exception as e:
+                        print(f"  加载报告失败: {evaluated_model} - {str(e)}")
+                        failed += 1
+                        default_progress.add_tasks(1 - len(models))
+                        default_progress.task_finished(ok=False)
+                        continue
 
                 for evaluator_model in models:
                     # 生成任务key
@@ -93,6 +122,7 @@ class CrossEvaluationEngine:
                     if resume and progress.get(task_key, {}).get("completed", False):
                         print(f"  跳过已完成: {evaluated_model} by {evaluator_model}")
                         skipped += 1
+                        default_progress.add_tasks(-1)
                         continue
 
                     # 即使没有进度文件，也检查聚合文件是否存在
@@ -101,6 +131,7 @@ class CrossEvaluationEngine:
                         if aggregated_file.exists():
                             print(f"  跳过已完成: {evaluated_model} by {evaluator_model} (文件已存在)")
                             skipped += 1
+                            default_progress.add_tasks(-1)
                             # 更新进度
                             progress[task_key] = {
                                 "completed": True,
@@ -110,24 +141,39 @@ class CrossEvaluationEngine:
                             self._save_progress(progress)
                             continue
 
+                    # 未通过预筛: 直接写出确定性评分
+                    if verdict is not None and not verdict.passed:
+                        self._score_prescreened(verdict, evaluator_model)
+                        progress[task_key] = {
+                            "completed": True,
+                            "timestamp": datetime.now().isoformat(),
+                            "note": "未通过规则预筛"
+                        }
+                        self._save_progress(progress)
+                        prescreened += 1
+                        default_progress.task_finished()
+                        continue
+
                     print(f"  评测: {evaluated_model} by {evaluator_model}")
 
                     # 评测5个维度
                     try:
-                        self._evaluate_dimensions(
-                            conversation=conversation,
-                            report=report,
-                            evaluated_model=evaluated_model,
-                            evaluator_model=evaluator_model,
-                            patient=patient
-                        )
-
-                        # 聚合结果
-                        self._aggregate_scores(
-                            evaluated_model=evaluated_model,
-                            evaluator_model=evaluator_model,
-                            patient=patient
-                        )
+                        with tracer.span("evaluate_task", patient=patient, evaluated_model=evaluated_model,
+                                         evaluator_model=evaluator_model):
+                            self._evaluate_dimensions(
+                                conversation=conversation,
+                                report=report,
+                                evaluated_model=evaluated_model,
+                                evaluator_model=evaluator_model,
+                                patient=patient
+                            )
+
+                            # 聚合结果
+                            self._aggregate_scores(
+                                evaluated_model=evaluated_model,
+                                evaluator_model=evaluator_model,
+                                patient=patient
+                            )
 
                         # 更新进度
                         progress[task_key] = {
@@ -137,10 +183,12 @@ class CrossEvaluationEngine:
                         self._save_progress(progress)
 
                         completed += 1
+                        default_progress.task_finished()
 
                     except Exception as e:
                         print(f"    评测失败: {str(e)}")
                         failed += 1
+                        default_progress.task_finished(ok=False)
                         progress[task_key] = {
                             "completed": False,
                             "error": str(e),
@@ -154,6 +202,11 @@ class CrossEvaluationEngine:
         print(f"完成: {completed}")
         print(f"跳过: {skipped}")
         print(f"失败: {failed}")
+        self._print_prescreen_stats(prescreened, completed)
+        self._print_single_flight_stats()
+        self._print_report_cache_stats()
+        self._report_instrumentation()
+        self._report_tracing()
         print(f"结果保存至: {self.output_dir}")
 
     def _evaluate_dimensions(
@@ -186,20 +239,28 @@ class CrossEvaluationEngine:
                 continue
 
             print(f"    评测维度: {dimension_name}")
+            # 并行模式不经过 run() 中的目录创建，这里确保患者目录存在
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+
+            with tracer.span("evaluate_dimension", dimension=dimension_name) as span:
+                # 评测
+                result = dimension_evaluator.evaluate(
+                    dimension_name=dimension_name,
+                    conversation=conversation,
+                    report=report,
+                    evaluator_model=evaluator_model,
+                    evaluated_model=evaluated_model,
+                    patient=patient
+                )
+                span.set(score=result.get("score"))
 
-            # 评测
-            result = dimension_evaluator.evaluate(
-                dimension_name=dimension_name,
-                conversation=conversation,
-                report=report,
-                evaluator_model=evaluator_model,
-                evaluated_model=evaluated_model,
-                patient=patient
-            )
+                # 启用追踪时在结果中记录 span，便于从评分文件找到对应的调用记录
+                if tracer.enabled:
+                    result["trace"] = {"trace_id": span.trace_id, "span_id": span.span_id}
 
-            # 保存结果
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
+                # 保存结果
+                with instr.span("write_result", dimension=dimension_name):
+                    json_codec.dump(result, file_path, pretty=True)
 
     def _aggregate_scores(
         self,
@@ -218,32 +279,32 @@ class CrossEvaluationEngine:
         print(f"    聚合评分")
 
         # 从文件加载并聚合
-        aggregated_result = score_aggregator.aggregate_from_files(
-            evaluated_model=evaluated_model,
-            evaluator_model=evaluator_model,
-            patient=patient
-        )
+        with instr.span("aggregate"):
+            aggregated_result = score_aggregator.aggregate_from_files(
+                evaluated_model=evaluated_model,
+                evaluator_model=evaluator_model,
+                patient=patient
+            )
 
         # 保存聚合结果
-        score_aggregator.save_aggregated_result(
-            aggregated_result=aggregated_result,
-            evaluated_model=evaluated_model,
-            evaluator_model=evaluator_model,
-            patient=patient
-        )
+        with instr.span("write_result", dimension="aggregated"):
+            score_aggregator.save_aggregated_result(
+                aggregated_result=aggregated_result,
+                evaluated_model=evaluated_model,
+                evaluator_model=evaluator_model,
+                patient=patient
+            )
 
     def _load_progress(self) -> Dict[str, Any]:
         """加载进度文件"""
         if not self.progress_file.exists():
             return {}
 
-        with open(self.progress_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return json_codec.load(self.progress_file)
 
     def _save_progress(self, progress: Dict[str, Any]):
         """保存进度文件"""
-        with open(self.progress_file, 'w', encoding='utf-8') as f:
-            json.dump(progress, f, ensure_ascii=False, indent=2)
+        json_codec.dump(progress, self.progress_file)
 
     def run_parallel(
         self,
@@ -273,18 +334,25 @@ class CrossEvaluationEngine:
         print(f"开始并行交叉评测 (并发数: {max_workers})")
         print(f"模型数量: {len(models)}")
         print(f"患者数量: {len(patients)}")
+        self._refresh_manifest()
+        prescreener.reset()
         print("-" * 50)
 
-        # 生成所有任务
+        # 生成所有任务（未通过预筛的报告记录在 rejected 中，不提交给线程池）
         tasks = []
+        rejected: Dict[tuple, PrescreenVerdict] = {}
         for patient in patients:
             for evaluated_model in models:
                 if not report_loader.check_report_exists(evaluated_model, patient):
                     continue
+                verdict = self._prescreen(evaluated_model, patient)
+                if verdict is not None and not verdict.passed:
+                    rejected[(evaluated_model, patient)] = verdict
                 for evaluator_model in models:
                     tasks.append((patient, evaluated_model, evaluator_model))
 
         print(f"总任务数: {len(tasks)}")
+        default_progress.start(total_tasks=len(tasks), title=f"并行交叉评测 (并发数: {max_workers})")
 
         # 加载进度
         progress = self._load_progress() if resume else {}
@@ -293,6 +361,7 @@ class CrossEvaluationEngine:
         completed = 0
         failed = 0
         skipped = 0
+        prescreened = 0
 
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             futures = {}
@@ -303,6 +372,20 @@ class CrossEvaluationEngine:
                 # 检查是否已完成
                 if resume and progress.get(task_key, {}).get("completed", False):
                     skipped += 1
+                    default_progress.add_tasks(-1)
+                    continue
+
+                # 未通过预筛: 在当前线程直接写出确定性评分
+                verdict = rejected.get((evaluated_model, patient))
+                if verdict is not None:
+                    self._score_prescreened(verdict, evaluator_model)
+                    prescreened += 1
+                    default_progress.task_finished()
+                    progress[task_key] = {
+                        "completed": True,
+                        "timestamp": datetime.now().isoformat(),
+                        "note": "未通过规则预筛"
+                    }
                     continue
 
                 # 提交任务
@@ -319,14 +402,16 @@ class CrossEvaluationEngine:
                 try:
                     future.result()
                     completed += 1
+                    default_progress.task_finished()
                     progress[task_key] = {
                         "completed": True,
                         "timestamp": datetime.now().isoformat()
                     }
-                    print(f"✓ [{completed + failed}/{len(tasks) - skipped}] {evaluated_model} by {evaluator_model} ({patient})")
+                    print(f"✓ [{completed + failed}/{len(tasks) - skipped - prescreened}] {evaluated_model} by {evaluator_model} ({patient})")
 
                 except Exception as e:
                     failed += 1
+                    default_progress.task_finished(ok=False)
                     progress[task_key] = {
                         "completed": False,
                         "error": str(e),
@@ -347,6 +432,103 @@ class CrossEvaluationEngine:
         print(f"完成: {completed}")
         print(f"跳过: {skipped}")
         print(f"失败: {failed}")
+        self._print_prescreen_stats(prescreened, completed)
+        self._print_single_flight_stats()
+        self._print_report_cache_stats()
+        self._report_instrumentation()
+        self._report_tracing()
+
+    def _prescreen(self, evaluated_model: str, patient: str) -> Optional[PrescreenVerdict]:
+        """
+        规则预筛一份报告
+
+        Args:
+            evaluated_model: 被评测模型
+            patient: 患者名称
+
+        Returns:
+            预筛结果（未启用预筛时为None）
+        """
+        if not self.prescreen_enabled:
+            return None
+
+        with instr.span("prescreen", model=evaluated_model):
+            verdict = prescreener.screen(evaluated_model, patient)
+        if not verdict.passed:
+            print(f"  预筛未通过: {evaluated_model}-{patient} ({'；'.join(verdict.reasons)})")
+        return verdict
+
+    def _score_prescreened(self, verdict: PrescreenVerdict, evaluator_model: str):
+        """
+        为未通过预筛的报告写出确定性评分并聚合
+
+        Args:
+            verdict: 预筛结果
+            evaluator_model: 评测模型
+        """
+        with tracer.span("prescreen_task", patient=verdict.patient, evaluated_model=verdict.evaluated_model,
+                         evaluator_model=evaluator_model):
+            prescreener.write_results(verdict, evaluator_model)
+            self._aggregate_scores(
+                evaluated_model=verdict.evaluated_model,
+                evaluator_model=evaluator_model,
+                patient=verdict.patient
+            )
+
+    def _refresh_manifest(self):
+        """增量刷新原始报告清单，任务的存在性检查和文件查找都使用清单"""
+        stats = report_loader.refresh_manifest()
+        print(f"原始报告: {stats['total']}个 (新读取 {stats['scanned']}，移除 {stats['removed']})")
+
+    def _print_prescreen_stats(self, prescreened: int, completed: int):
+        """
+        打印规则预筛统计
+
+        Args:
+            prescreened: 本次直接评分的任务数
+            completed: 本次调用评测模型完成的任务数
+        """
+        if not self.prescreen_enabled:
+            return
+
+        stats = prescreener.stats()
+        planned = stats["calls_saved"] + completed * len(self.config.dimensions)
+        ratio = f" (占 {stats['calls_saved'] / planned:.1%})" if planned else ""
+        print(f"规则预筛: 检查 {stats['screened']} 份报告，未通过 {stats['failed']} 份；"
+              f"直接评分任务 {prescreened} 个，节省API调用 {stats['calls_saved']} 次{ratio}")
+
+    def _print_single_flight_stats(self):
+        """打印请求合并统计"""
+        stats = default_single_flight.stats()
+        if stats["shared"]:
+            print(f"合并请求: {stats['shared']}/{stats['calls']} (实际API调用 {stats['executions']} 次)")
+
+    def _print_report_cache_stats(self):
+        """打印报告产物缓存统计"""
+        stats = report_cache.stats()
+        if stats["misses"]:
+            print(f"报告缓存: 读取 {stats['misses']} 次，命中 {stats['hits']} 次；"
+                  f"模块解析 {stats['analysis_misses']} 次，命中 {stats['analysis_hits']} 次")
+
+    def _report_instrumentation(self):
+        """启用阶段计时时，打印各阶段耗时汇总并写出指标文件"""
+        if not instr.enabled:
+            return
+
+        print("\n各阶段耗时:")
+        print(instr.summary_table())
+        print("\nAPI调用(按提供商):")
+        print(instr.summary_table(group_by="provider", stages=["api_call"]))
+
+        if self.metrics_file:
+            path = instr.write_metrics(self.metrics_file)
+            print(f"指标文件: {path}")
+
+    def _report_tracing(self):
+        """启用调用链追踪时，打印追踪文件路径和分析命令"""
+        if tracer.enabled:
+            print(f"追踪文件: {tracer.trace_file}")
+            print(f"关键路径分析: python -m src.core.trace_analyzer {tracer.trace_file}")
 
     def _evaluate_single_task(
         self,
@@ -362,24 +544,26 @@ class CrossEvaluationEngine:
             evaluated_model: 被评测模型
             evaluator_model: 评测模型
         """
-        # 加载报告
-        conversation, report = report_loader.load_report_data(evaluated_model, patient)
-
-        # 评测维度
-        self._evaluate_dimensions(
-            conversation=conversation,
-            report=report,
-            evaluated_model=evaluated_model,
-            evaluator_model=evaluator_model,
-            patient=patient
-        )
-
-        # 聚合
-        self._aggregate_scores(
-            evaluated_model=evaluated_model,
-            evaluator_model=evaluator_model,
-            patient=patient
-        )
+        with tracer.span("evaluate_task", patient=patient, evaluated_model=evaluated_model,
+                         evaluator_model=evaluator_model):
+            # 加载报告
+            conversation, report = report_loader.load_report_data(evaluated_model, patient)
+
+            # 评测维度
+            self._evaluate_dimensions(
+                conversation=conversation,
+                report=report,
+                evaluated_model=evaluated_model,
+                evaluator_model=evaluator_model,
+                patient=patient
+            )
+
+            # 聚合
+            self._aggregate_scores(
+                evaluated_model=evaluated_model,
+                evaluator_model=evaluator_model,
+                patient=patient
+            )
 
 
 # 创建全局实例
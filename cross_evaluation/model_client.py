@@ -2,14 +2,22 @@
 模型客户端模块
 用于调用各个模型的API进行评测
 """
-import json
 import os
 import time
 from pathlib import Path
 from typing import Dict, Any, Optional
 from openai import OpenAI
+from src.core.client_pool import default_pool
+from src.core.generation_metrics import usage_to_dict
+from src.core.progress import default_progress, usage_tokens
+from src.core.single_flight import default_single_flight, request_key
+from src.core.tracing import default_tracer as tracer, prompt_hash
+from src.utils import json_codec
 from .config import config
 
+# 未配置超时时使用的读取超时(秒)，与 OpenAI SDK 的默认值一致，评测长输出需要较长时间
+DEFAULT_TIMEOUT = 600.0
+
 
 class ModelClient:
     """模型API客户端"""
@@ -28,8 +36,7 @@ class ModelClient:
         if not registry_path.exists():
             raise FileNotFoundError(f"模型注册表不存在: {registry_path}")
 
-        with open(registry_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return json_codec.load(registry_path)
 
     def _get_model_config(self, model_name: str) -> Dict[str, Any]:
         """
@@ -65,9 +72,59 @@ class ModelClient:
 
         raise ValueError(f"未找到模型配置: {model_name}")
 
+    def get_provider(self, model_name: str) -> str:
+        """
+        获取模型的提供商名称（用于计时标签）
+
+        Args:
+            model_name: 模型名称
+
+        Returns:
+            提供商名称；未配置时返回 "unknown"
+        """
+        try:
+            return self._get_model_config(model_name).get("provider", "unknown")
+        except ValueError:
+            return "unknown"
+
+    def get_base_url(self, model_name: str) -> str:
+        """
+        获取模型的接口地址
+
+        Args:
+            model_name: 模型名称
+
+        Returns:
+            去掉末尾 "/" 的接口地址；未配置时返回空字符串
+
+        Raises:
+            ValueError: 如果模型未配置
+        """
+        return (self._get_model_config(model_name).get("base_url") or "").rstrip("/")
+
+    def resolve_model_id(self, model_name: str) -> str:
+        """
+        获取调用API时使用的模型ID
+
+        Args:
+            model_name: 模型名称（可能用下划线代替斜杠，如 deepseek_deepseek-v3.1）
+
+        Returns:
+            模型ID
+        """
+        # 如果在model_registry中，直接使用key
+        if model_name in self.model_registry:
+            return model_name
+        if model_name.replace("_", "/", 1) in self.model_registry:
+            return model_name.replace("_", "/", 1)
+
+        # 对于jiekou provider，需要使用原始模型名
+        # 对于其他provider，也使用模型名
+        return model_name.replace("_", "/", 1) if "_" in model_name else model_name
+
     def _create_client(self, model_name: str) -> OpenAI:
         """
-        创建OpenAI客户端
+        获取OpenAI客户端
 
         Args:
             model_name: 模型名称
@@ -84,14 +141,14 @@ class ModelClient:
         if not api_key:
             raise ValueError(f"未设置环境变量: {api_key_env}")
 
-        # 创建客户端
-        client = OpenAI(
-            api_key=api_key,
-            base_url=model_config.get("base_url")
+        # 同一接口地址的模型共享连接池，超时使用注册表中的配置
+        return default_pool.get_client(
+            model_config.get("base_url"),
+            api_key,
+            timeout=model_config.get("timeout", self.api_config.get("timeout", DEFAULT_TIMEOUT)),
+            model_name=model_name
         )
 
-        return client
-
     def call_model(
         self,
         model_name: str,
@@ -117,37 +174,90 @@ class ModelClient:
         if max_tokens is None:
             max_tokens = self.api_config.get("max_tokens", 4000)
 
+        # 相同的并发请求(如重复运行重叠的评测任务)只调用一次API
+        key = request_key(
+            model_name,
+            [{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        executed = []
+
+        def call():
+            executed.append(True)
+            return self._call_with_retry(model_name, prompt, temperature, max_tokens)
+
+        with tracer.span(
+            "model_call",
+            **{
+                "gen_ai.system": self.get_provider(model_name) if tracer.enabled else None,
+                "gen_ai.request.model": model_name,
+                "gen_ai.request.temperature": temperature,
+                "gen_ai.request.max_tokens": max_tokens,
+                "prompt.sha256": prompt_hash(prompt) if tracer.enabled else None,
+                "prompt.chars": len(prompt)
+            }
+        ) as span:
+            result = default_single_flight.do(key, call)
+            # 合并到其他线程的相同请求时，本线程没有实际调用，重试和用量记录在那次调用的 span 上
+            span.set(coalesced=not executed)
+        return result
+
+    def _call_with_retry(
+        self,
+        model_name: str,
+        prompt: str,
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """
+        带重试地调用模型API
+
+        Args:
+            model_name: 模型名称
+            prompt: 输入prompt
+            temperature: 温度参数
+            max_tokens: 最大token数
+
+        Returns:
+            模型响应内容
+        """
         # 重试逻辑
         retry_attempts = self.api_config.get("retry_attempts", 3)
         retry_delay = self.api_config.get("retry_delay", 2)
+        provider = self.get_provider(model_name)
+        call_span = tracer.current_span()
 
         for attempt in range(retry_attempts):
+            call_span.set(**{"retry.count": attempt})
             try:
                 # 创建客户端
                 client = self._create_client(model_name)
 
                 # 获取实际的模型ID（用于API调用）
-                model_config = self._get_model_config(model_name)
-
-                # 对于jiekou provider，需要使用原始模型名
-                # 对于其他provider，也使用模型名
-                actual_model_name = model_name.replace("_", "/", 1) if "_" in model_name else model_name
-
-                # 如果在model_registry中，直接使用key
-                if model_name in self.model_registry:
-                    actual_model_name = model_name
-                elif model_name.replace("_", "/", 1) in self.model_registry:
-                    actual_model_name = model_name.replace("_", "/", 1)
+                actual_model_name = self.resolve_model_id(model_name)
 
                 # 调用API
-                response = client.chat.completions.create(
-                    model=actual_model_name,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
+                with tracer.span("model_call.attempt", attempt=attempt + 1) as attempt_span, \
+                        default_progress.call(provider) as tracked:
+                    response = client.chat.completions.create(
+                        model=actual_model_name,
+                        messages=[
+                            {"role": "user", "content": prompt}
+                        ],
+                        temperature=temperature,
+                        max_tokens=max_tokens
+                    )
+                    tracked.tokens = usage_tokens(getattr(response, "usage", None))
+                    if tracer.enabled:
+                        usage = usage_to_dict(getattr(response, "usage", None)) or {}
+                        attributes = {
+                            "gen_ai.response.model": getattr(response, "model", None),
+                            "gen_ai.usage.input_tokens": usage.get("prompt_tokens"),
+                            "gen_ai.usage.output_tokens": usage.get("completion_tokens")
+                        }
+                        attempt_span.set(**attributes)
+                        call_span.set(**attributes)
 
                 # 提取响应内容
                 content = response.choices[0].message.content
@@ -159,6 +269,7 @@ class ModelClient:
                 print(f"错误: {str(e)}")
 
                 if attempt < retry_attempts - 1:
+                    default_progress.record_retry(provider)
                     time.sleep(retry_delay)
                 else:
                     raise Exception(f"调用模型失败，已重试{retry_attempts}次: {model_name}") from e
@@ -1,41 +1,71 @@
 """
 报告模块解析器
 用于识别和提取医疗报告中的各个模块
+
+报告只由 section_tokenizer 单遍扫描一次，各模块的内容和位置都由标记位置计算得出；
+analyze() 一次返回模块内容和模块摘要
 """
-import re
-from typing import Dict, List, Tuple
+import bisect
+from typing import Any, Dict, List, Optional, Tuple
+
+from .section_tokenizer import LABEL_COLONS, MarkerIndex, skip_whitespace
+
+# 普通标签 "X：" 之后内容的结束关键词（另外都在行尾结束）
+LABEL_TERMINATORS = {
+    "主诉": ("现病史", "既往史", "家族史", "个人史"),
+    "现病史": ("既往史", "家族史", "个人史"),
+    "既往史": ("家族史", "个人史"),
+    "家族史": ("个人史",),
+    "个人史": ()
+}
+
+# 结构化标签 "- **X：**" 的关键词
+STRUCTURED_LABELS = {
+    "主诉": ("主诉",),
+    "现病史": ("现病史",),
+    "既往史": ("既往史", "既往病史"),
+    "家族史": ("家族史", "家族病史"),
+    "个人史": ("个人史", "烟酒史")
+}
+
+# 模块位置识别使用的关键词
+POSITION_KEYWORDS = {
+    "主诉": ["主诉"],
+    "现病史": ["现病史", "病史摘要"],
+    "既往史": ["既往史", "既往病史"],
+    "家族史": ["家族史", "家族病史"],
+    "个人史": ["个人史"]
+}
+
+# 位置关键词 -> 模块名（各模块位置到其后最近的其他模块关键词为止）
+POSITION_MODULES = {
+    keyword: module_name
+    for module_name, keywords in POSITION_KEYWORDS.items()
+    for keyword in keywords
+}
 
 
 class ReportModuleParser:
     """医疗报告模块解析器"""
 
-    # 定义标准模块及其可能的标识
-    MODULE_PATTERNS = {
-        "主诉": [
-            r"主诉[：:]\s*(.+?)(?=现病史|既往史|家族史|个人史|##|\n\n|$)",
-            r"^(.+?)\n现病史",  # 第一行作为主诉
-        ],
-        "现病史": [
-            r"现病史[：:]\s*(.+?)(?=既往史|家族史|个人史|##|\n\n患者预问诊|$)",
-            r"(?:现病史|病史摘要)[：:](.+?)(?=既往史|家族史|$)",
-        ],
-        "既往史": [
-            r"既往史[：:]\s*(.+?)(?=家族史|个人史|##|\n\n|$)",
-            r"既往[有]?(.+?)(?=家族史|个人史|$)",
-        ],
-        "家族史": [
-            r"家族史[：:]\s*(.+?)(?=个人史|##|\n\n|$)",
-            r"(?:家族史|家族病史)[：:](.+?)(?=个人史|##|$)",
-        ],
-        "个人史": [
-            r"个人史[：:]\s*(.+?)(?=##|\n\n|$)",
-        ]
-    }
-
     def __init__(self):
         """初始化解析器"""
         pass
 
+    def analyze(self, report: str) -> Tuple[Dict[str, str], Dict[str, Dict[str, Any]]]:
+        """
+        单遍扫描报告，同时得到模块内容和模块摘要
+
+        Args:
+            report: 完整的医疗报告文本
+
+        Returns:
+            (模块字典 {模块名: 内容}, 模块摘要字典)
+        """
+        index = MarkerIndex(report)
+        modules = self._parse(index)
+        return modules, self._summarize(index, modules)
+
     def parse_report(self, report: str) -> Dict[str, str]:
         """
         解析报告，提取各个模块
@@ -46,18 +76,22 @@ class ReportModuleParser:
         Returns:
             模块字典 {模块名: 内容}
         """
-        modules = {}
+        return self._parse(MarkerIndex(report))
+
+    def _parse(self, index: MarkerIndex) -> Dict[str, str]:
+        """由标记索引提取各个模块"""
+        report = index.report
 
         # 检查报告是否包含结构化标记（##或**）
         has_structured_format = "##" in report or "- **" in report
 
         if has_structured_format:
             # 解析结构化部分
-            modules = self._parse_structured_report(report)
+            modules = self._parse_structured_report(index)
         else:
-            # 尝试使用正则模式提取
-            for module_name, patterns in self.MODULE_PATTERNS.items():
-                content = self._extract_module(report, patterns)
+            modules = {}
+            for module_name in LABEL_TERMINATORS:
+                content = self._extract_module(index, module_name)
                 if content:
                     modules[module_name] = content.strip()
 
@@ -67,97 +101,177 @@ class ReportModuleParser:
 
         return modules
 
-    def _extract_module(self, report: str, patterns: List[str]) -> str:
+    def _extract_module(self, index: MarkerIndex, module_name: str) -> str:
         """
-        使用正则模式提取模块内容
+        提取普通格式报告中的模块内容
+
+        先找 "X：" 标签，内容到下一个模块关键词或行尾为止；找不到时使用各模块的备用规则
 
         Args:
-            report: 报告文本
-            patterns: 正则模式列表
+            index: 标记索引
+            module_name: 模块名
 
         Returns:
-            提取的内容
+            提取的内容（未去除空白），未找到时为空字符串
         """
-        for pattern in patterns:
-            match = re.search(pattern, report, re.DOTALL | re.MULTILINE)
-            if match:
-                # 如果有捕获组，返回第一个捕获组
-                if match.groups():
-                    return match.group(1)
-                else:
-                    return match.group(0)
+        report = index.report
+        terminators = LABEL_TERMINATORS[module_name]
+
+        for start in index.positions(module_name):
+            colon = start + len(module_name)
+            if colon < len(report) and report[colon] in LABEL_COLONS:
+                content = self._label_content(index, colon + 1, terminators, skip_space=True)
+                if content is not None:
+                    return content
+
+        if module_name == "主诉":
+            # 没有 "主诉：" 标签时，"现病史" 所在行之前的内容作为主诉
+            pos = report.find("\n现病史", 1)
+            return report[:pos] if pos > 0 else ""
+
+        if module_name == "现病史":
+            for start in index.positions("病史摘要"):
+                colon = start + len("病史摘要")
+                if colon < len(report) and report[colon] in LABEL_COLONS:
+                    content = self._label_content(index, colon + 1, ("既往史", "家族史"))
+                    if content is not None:
+                        return content
+
+        if module_name == "既往史":
+            # "既往有..." 这样的叙述
+            for start in index.positions("既往"):
+                begin = start + 2
+                has_you = report.startswith("有", begin)
+                content = self._label_content(index, begin + 1 if has_you else begin, ("家族史", "个人史"))
+                if content is not None:
+                    return content
+                if has_you:
+                    return "有"
+
+        if module_name == "家族史":
+            for start in index.positions("家族病史"):
+                colon = start + len("家族病史")
+                if colon < len(report) and report[colon] in LABEL_COLONS:
+                    content = self._label_content(index, colon + 1, ("个人史",))
+                    if content is not None:
+                        return content
 
         return ""
 
-    def _parse_structured_report(self, report: str) -> Dict[str, str]:
+    @staticmethod
+    def _label_content(
+        index: MarkerIndex,
+        begin: int,
+        terminators: Tuple[str, ...],
+        skip_space: bool = False
+    ) -> Optional[str]:
+        """
+        标签之后的内容: 至少一个字符，到第一个结束关键词或行尾为止
+
+        Args:
+            index: 标记索引
+            begin: 标签结束的位置
+            terminators: 结束关键词
+            skip_space: 是否先跳过空白
+
+        Returns:
+            内容；标签后没有内容时为None
+        """
+        report = index.report
+        start = skip_whitespace(report, begin) if skip_space else begin
+        if start >= len(report):
+            # 标签后只有空白: 内容为最后一个空白字符
+            return report[-1] if start > begin else None
+
+        end = index.next_of(terminators, start + 1)
+        newline = report.find("\n", start + 1, end)
+        return report[start:newline if newline >= 0 else end]
+
+    def _parse_structured_report(self, index: MarkerIndex) -> Dict[str, str]:
         """
         解析结构化报告（包含**或##标记的）
 
+        "- **主诉：**" 取到行尾，"- **现病史：**" 取到 "- **既往" 为止，其余取到下一个 "- **" 为止
+
         Args:
-            report: 报告文本
+            index: 标记索引
 
         Returns:
             模块字典
         """
+        report = index.report
         modules = {}
 
-        # 提取主诉
-        chief_match = re.search(r'-\s*\*\*主诉[：:]\*\*\s*(.+?)(?=\n|$)', report)
-        if chief_match:
-            modules["主诉"] = chief_match.group(1).strip()
-
-        # 提取现病史
-        present_match = re.search(
-            r'-\s*\*\*现病史[：:]\*\*\s*(.+?)(?=-\s*\*\*既往|$)',
-            report,
-            re.DOTALL
-        )
-        if present_match:
-            modules["现病史"] = present_match.group(1).strip()
-
-        # 提取既往史/既往病史
-        past_match = re.search(
-            r'-\s*\*\*既往(?:病)?史[：:]\*\*\s*(.+?)(?=-\s*\*\*|$)',
-            report,
-            re.DOTALL
-        )
-        if past_match:
-            modules["既往史"] = past_match.group(1).strip()
-
-        # 提取家族史/家族病史
-        family_match = re.search(
-            r'-\s*\*\*家族(?:病)?史[：:]\*\*\s*(.+?)(?=-\s*\*\*|$)',
-            report,
-            re.DOTALL
-        )
-        if family_match:
-            modules["家族史"] = family_match.group(1).strip()
-
-        # 提取个人史
-        personal_match = re.search(
-            r'-\s*\*\*(?:个人史|烟酒史)[：:]\*\*\s*(.+?)(?=-\s*\*\*|$)',
-            report,
-            re.DOTALL
-        )
-        if personal_match:
-            modules["个人史"] = personal_match.group(1).strip()
+        for module_name, labels in STRUCTURED_LABELS.items():
+            label_start = self._first_structured_label(index, labels)
+            if label_start is None:
+                continue
+            begin, _ = label_start
+            start = skip_whitespace(report, begin)
+
+            if start >= len(report):
+                # 标签后只有空白
+                tail = report[begin:]
+                if module_name == "主诉" and not tail.strip("\n"):
+                    continue
+                if module_name != "主诉" and not tail:
+                    continue
+                modules[module_name] = ""
+                continue
+
+            if module_name == "主诉":
+                end = report.find("\n", start + 1)
+                end = end if end >= 0 else len(report)
+            elif module_name == "现病史":
+                end = next((bullet for bullet, _ in index.bullet_keywords.get("既往", ()) if bullet > start),
+                           len(report))
+            else:
+                end = index.next_bullet(start + 1)
+            modules[module_name] = report[start:end].strip()
 
         # 如果报告以传统格式开头（\n分隔），也提取那部分
-        if report.startswith("发现") or "\\n" in report[:100]:
-            self._parse_traditional_part(report, modules)
+        if report.startswith("发现") or (index.escaped and index.escaped[0] <= 98):
+            self._parse_traditional_part(index, modules)
 
         return modules
 
-    def _parse_traditional_part(self, report: str, modules: Dict[str, str]):
+    @staticmethod
+    def _first_structured_label(index: MarkerIndex, labels: Tuple[str, ...]) -> Optional[Tuple[int, str]]:
+        """
+        第一个 "- **X：**" 结构化标签
+
+        Returns:
+            (标签结束位置, 关键词)，没有时为None
+        """
+        report = index.report
+        candidates = []
+        for keyword in labels:
+            for bullet_start, colon in index.bullet_keywords.get(keyword, ()):
+                if colon < len(report) and report[colon] in LABEL_COLONS and report.startswith("**", colon + 1):
+                    candidates.append((bullet_start, colon + 3, keyword))
+                    break
+        if not candidates:
+            return None
+        _, end, keyword = min(candidates)
+        return end, keyword
+
+    def _parse_traditional_part(self, index: MarkerIndex, modules: Dict[str, str]):
         """
         解析报告中的传统叙述部分
 
         Args:
-            report: 报告文本
+            index: 标记索引
             modules: 已解析的模块字典（会被修改）
         """
-        # 按\\n分段
-        parts = report.split('\\n')
+        # 按\\n分段，只需要前三段
+        report = index.report
+        parts = []
+        begin = 0
+        for pos in index.escaped[:3]:
+            parts.append(report[begin:pos])
+            begin = pos + 2
+        if len(parts) < 3:
+            parts.append(report[begin:])
 
         if len(parts) >= 1 and not modules.get("主诉"):
             # 第一段通常是主诉
@@ -221,30 +335,24 @@ class ReportModuleParser:
         Returns:
             [(模块名, 起始位置, 结束位置), ...]
         """
+        return self._identify(MarkerIndex(report))
+
+    def _identify(self, index: MarkerIndex) -> List[Tuple[str, int, int]]:
+        """由标记索引识别各模块的位置：模块关键词第一次出现处，到其后最近的其他模块关键词为止"""
         module_positions = []
+        starts, texts = index.keyword_starts, index.keyword_texts
 
-        # 查找各模块的关键词位置
-        keywords = {
-            "主诉": ["主诉"],
-            "现病史": ["现病史", "病史摘要"],
-            "既往史": ["既往史", "既往病史"],
-            "家族史": ["家族史", "家族病史"],
-            "个人史": ["个人史"]
-        }
-
-        for module_name, kws in keywords.items():
-            for keyword in kws:
-                pos = report.find(keyword)
+        for module_name, keywords in POSITION_KEYWORDS.items():
+            for keyword in keywords:
+                pos = index.first(keyword)
                 if pos >= 0:
-                    # 找到下一个模块的位置作为结束位置
-                    end_pos = len(report)
-                    for other_module, other_kws in keywords.items():
-                        if other_module != module_name:
-                            for other_kw in other_kws:
-                                other_pos = report.find(other_kw, pos + len(keyword))
-                                if other_pos > pos and other_pos < end_pos:
-                                    end_pos = other_pos
-
+                    # 关键词按位置排列，从关键词结束处向后找第一个属于其他模块的位置关键词
+                    end_pos = len(index.report)
+                    for i in range(bisect.bisect_left(starts, pos + len(keyword)), len(starts)):
+                        other_module = POSITION_MODULES.get(texts[i])
+                        if other_module is not None and other_module != module_name:
+                            end_pos = starts[i]
+                            break
                     module_positions.append((module_name, pos, end_pos))
                     break
 
@@ -253,7 +361,7 @@ class ReportModuleParser:
 
         return module_positions
 
-    def get_module_summary(self, report: str) -> Dict[str, Dict[str, any]]:
+    def get_module_summary(self, report: str) -> Dict[str, Dict[str, Any]]:
         """
         获取模块摘要信息
 
@@ -263,9 +371,11 @@ class ReportModuleParser:
         Returns:
             模块摘要字典
         """
-        modules = self.parse_report(report)
-        positions = self.identify_modules_in_report(report)
+        index = MarkerIndex(report)
+        return self._summarize(index, self._parse(index))
 
+    def _summarize(self, index: MarkerIndex, modules: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """由模块内容和标记索引生成模块摘要"""
         summary = {}
         for module_name, content in modules.items():
             summary[module_name] = {
@@ -276,7 +386,7 @@ class ReportModuleParser:
             }
 
         # 添加位置信息
-        for module_name, start, end in positions:
+        for module_name, start, end in self._identify(index):
             if module_name in summary:
                 summary[module_name]["start_pos"] = start
                 summary[module_name]["end_pos"] = end
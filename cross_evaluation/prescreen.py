@@ -0,0 +1,235 @@
+"""
+规则预筛模块
+在调用评测模型之前用本地规则检查每份报告，明显无效的报告不进入交叉评测:
+
+    生成失败   任一对话的 Output 以错误前缀开头(批量生成失败时写入 "ERROR: ...")
+    报告为空   无法提取标准格式报告或对话内容
+    缺少模块   必需模块(默认主诉、现病史)不存在或内容过短
+    本地评分   AutoEvaluator 的综合得分低于 min_local_score（默认0，不启用）
+
+未通过的报告对每个评测模型直接写出0分的维度结果(带 prescreen 字段说明原因)，再按正常流程聚合，
+结果目录和前端数据的结构不变；通过的报告照常交给评测模型。每份报告只检查一次，
+模块取自组装标准格式报告的各段(report_loader.extract_sections)，一份报告的检查在毫秒级
+
+配置(cross_evaluation_config.json 的 prescreen 段):
+    {"enabled": false, "error_prefixes": ["ERROR:"], "required_modules": ["主诉", "现病史"],
+     "min_module_chars": 2, "min_local_score": 0}
+"""
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils import json_codec
+from .config import config
+from .report_loader import report_loader
+from .records import DimensionResult
+
+DEFAULT_RULES = {
+    "error_prefixes": ["ERROR:"],
+    "required_modules": ["主诉", "现病史"],
+    "min_module_chars": 2,
+    "min_local_score": 0
+}
+
+
+class PrescreenVerdict:
+    """一份报告的预筛结果"""
+
+    __slots__ = ("evaluated_model", "patient", "passed", "reasons", "modules", "local_scores")
+
+    def __init__(
+        self,
+        evaluated_model: str,
+        patient: str,
+        reasons: Optional[List[str]] = None,
+        modules: Optional[List[str]] = None,
+        local_scores: Optional[Dict[str, float]] = None
+    ):
+        self.evaluated_model = evaluated_model
+        self.patient = patient
+        self.reasons = reasons or []
+        self.passed = not self.reasons
+        self.modules = modules or []
+        self.local_scores = local_scores or {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为写入维度结果的字典"""
+        return {
+            "passed": self.passed,
+            "reasons": list(self.reasons),
+            "modules": list(self.modules),
+            "local_scores": dict(self.local_scores)
+        }
+
+
+class ReportPrescreener:
+    """报告规则预筛"""
+
+    def __init__(self, rules: Optional[Dict[str, Any]] = None):
+        """
+        初始化预筛
+
+        Args:
+            rules: 规则配置（None表示使用配置文件的 prescreen 段，缺少的项使用默认值）
+        """
+        self.rules = {**DEFAULT_RULES, **(config.prescreen_config if rules is None else rules)}
+        self.output_dir = config.output_dir
+        self._lock = threading.Lock()
+        self._verdicts: Dict[Tuple[str, str], PrescreenVerdict] = {}
+        self._evaluator = None
+        self.tasks = 0
+        self.calls_saved = 0
+
+    def _local_evaluator(self):
+        """本地评测器（第一次使用时创建；导入评测包会加载绘图库，不在模块导入时进行）"""
+        if self._evaluator is None:
+            from src.evaluation.auto_evaluator import AutoEvaluator
+            self._evaluator = AutoEvaluator()
+        return self._evaluator
+
+    def screen(self, evaluated_model: str, patient: str) -> PrescreenVerdict:
+        """
+        检查一份报告（结果按 (模型, 患者) 缓存）
+
+        Args:
+            evaluated_model: 被评测模型
+            patient: 患者名称
+
+        Returns:
+            预筛结果
+        """
+        key = (evaluated_model, patient)
+        with self._lock:
+            verdict = self._verdicts.get(key)
+        if verdict is None:
+            verdict = self._screen(evaluated_model, patient)
+            with self._lock:
+                self._verdicts[key] = verdict
+        return verdict
+
+    def _screen(self, evaluated_model: str, patient: str) -> PrescreenVerdict:
+        """依次应用各条规则"""
+        error_prefixes = tuple(self.rules["error_prefixes"])
+        reasons = []
+
+        try:
+            data = report_loader.load_report(evaluated_model, patient)
+        except (FileNotFoundError, ValueError) as e:
+            return PrescreenVerdict(evaluated_model, patient, [f"报告无法读取: {e}"])
+
+        # 生成失败
+        for key, conversation in data.get("conversations", {}).items():
+            output = (conversation.get("Output") or "") if isinstance(conversation, dict) else ""
+            if output.lstrip().startswith(error_prefixes):
+                reasons.append(f"对话{key}生成失败: {output.strip()[:80]}")
+
+        # 报告为空
+        report = None
+        try:
+            report = report_loader.extract_result(evaluated_model, patient)
+        except ValueError:
+            reasons.append("报告为空: 没有可提取的主诉/现病史/既往史/家族史")
+        try:
+            report_loader.extract_conversation(evaluated_model, patient)
+        except ValueError:
+            reasons.append("缺少对话内容")
+
+        # 缺少模块（生成失败的模块已在上面记录）
+        sections = report_loader.extract_sections(evaluated_model, patient)
+        for name in self.rules["required_modules"]:
+            content = sections.get(name, "")
+            if content.startswith(error_prefixes):
+                continue
+            if not content:
+                reasons.append(f"缺少{name}")
+            elif len(content) < self.rules["min_module_chars"]:
+                reasons.append(f"{name}内容过短: {content}")
+
+        modules = [name for name, content in sections.items() if content and not content.startswith(error_prefixes)]
+        if report is None:
+            return PrescreenVerdict(evaluated_model, patient, reasons, modules)
+
+        # 本地评分
+        result = self._local_evaluator().evaluate_single(evaluated_model, patient, report)
+        local_scores = {
+            name: round(result[f"{name}_score"], 2)
+            for name in ("overall", "structure", "entity", "numeric", "format")
+        }
+        min_local_score = self.rules["min_local_score"]
+        if min_local_score and local_scores["overall"] < min_local_score:
+            reasons.append(f"本地评分 {local_scores['overall']} 低于 {min_local_score}")
+
+        return PrescreenVerdict(evaluated_model, patient, reasons, modules, local_scores)
+
+    def write_results(self, verdict: PrescreenVerdict, evaluator_model: str) -> int:
+        """
+        为未通过预筛的报告写出确定性的维度结果（0分），已存在的维度文件不覆盖
+
+        Args:
+            verdict: 未通过的预筛结果
+            evaluator_model: 评测模型
+
+        Returns:
+            写出的维度结果数（即节省的API调用次数）
+        """
+        patient = verdict.patient
+        patient_dir = self.output_dir / patient
+        patient_dir.mkdir(parents=True, exist_ok=True)
+
+        issues = "；".join(verdict.reasons)
+        written = 0
+        for dimension in config.dimensions:
+            dimension_name = dimension["name"]
+            file_path = patient_dir / f"{verdict.evaluated_model}_by_{evaluator_model}_{patient}_{dimension_name}.json"
+            if file_path.exists():
+                continue
+
+            result = DimensionResult(
+                evaluated_model=verdict.evaluated_model,
+                evaluator_model=evaluator_model,
+                patient=patient,
+                dimension=dimension_name,
+                max_score=dimension["weight"],
+                score=0,
+                issues=issues,
+                critical_feedback=f"报告未通过规则预筛，未调用评测模型: {issues}",
+                timestamp=datetime.now().isoformat(),
+                extra={
+                    "source_llm": verdict.evaluated_model,
+                    "target_llm": evaluator_model,
+                    "prescreen": verdict.to_dict()
+                }
+            )
+            json_codec.dump(result.to_dict(), file_path, pretty=True)
+            written += 1
+
+        with self._lock:
+            self.tasks += 1
+            self.calls_saved += written
+        return written
+
+    def stats(self) -> Dict[str, int]:
+        """
+        预筛统计
+
+        Returns:
+            {"screened": 检查的报告数, "failed": 未通过数, "tasks": 直接评分的任务数, "calls_saved": 节省的API调用数}
+        """
+        with self._lock:
+            return {
+                "screened": len(self._verdicts),
+                "failed": sum(1 for verdict in self._verdicts.values() if not verdict.passed),
+                "tasks": self.tasks,
+                "calls_saved": self.calls_saved
+            }
+
+    def reset(self):
+        """清空缓存的预筛结果和统计"""
+        with self._lock:
+            self._verdicts.clear()
+            self.tasks = 0
+            self.calls_saved = 0
+
+
+# 创建全局实例
+prescreener = ReportPrescreener()
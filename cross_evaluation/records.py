@@ -0,0 +1,335 @@
+"""
+评测记录类型
+维度结果、聚合结果和原始报告在读入时校验一次并转换为带 __slots__ 的记录对象，
+之后的统计代码直接访问属性，不再对每条记录反复 .get() 并处理缺省值和不同的键名
+
+    DimensionResult   {被评测}_by_{评测}_{患者}_{维度}.json
+    AggregatedResult  {被评测}_by_{评测}_{患者}_aggregated.json（兼容旧版的 总分/维度评分 键）
+    RawReport         output/raw/{模型}-{患者}.json
+
+to_dict() 按原文件的键顺序输出；记录类型之外的字段(如 prompt_input、output、trace)保存在 extra 中，
+读入再写出不会丢失内容
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from src.utils import json_codec
+
+Number = Union[int, float]
+# 评测模型给出的问题描述可能是文本或文本列表，原样保留
+Issues = Union[str, List[str]]
+
+
+def _number(data: Dict[str, Any], key: str, default: Optional[Number] = None, source: str = "") -> Number:
+    """读取数值字段，缺失或类型错误时抛出 ValueError"""
+    value = data.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{source or '记录'}: 字段 {key} 应为数值，实际为 {value!r}")
+    return value
+
+
+def _text(data: Dict[str, Any], key: str) -> str:
+    """读取文本字段，缺失或为null时为空字符串"""
+    value = data.get(key)
+    return "" if value is None else str(value)
+
+
+def _issues(data: Dict[str, Any]) -> Issues:
+    """读取问题描述，缺失或为null时为空字符串"""
+    value = data.get("issues")
+    return "" if value is None else value
+
+
+class DimensionScore:
+    """聚合结果中单个维度的评分"""
+
+    __slots__ = ("score", "max_score", "issues")
+
+    def __init__(self, score: Number, max_score: Number, issues: Issues = ""):
+        self.score = score
+        self.max_score = max_score
+        self.issues = issues
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], source: str = "") -> "DimensionScore":
+        """由字典创建（校验 score/max_score 为数值）"""
+        return cls(
+            score=_number(data, "score", 0, source),
+            max_score=_number(data, "max_score", 0, source),
+            issues=_issues(data)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"score": self.score, "max_score": self.max_score, "issues": self.issues}
+
+
+class DimensionResult:
+    """单个维度的评测结果"""
+
+    __slots__ = ("evaluated_model", "evaluator_model", "patient", "dimension", "max_score", "score",
+                 "issues", "critical_feedback", "timestamp", "extra")
+
+    FIELDS = ("evaluated_model", "evaluator_model", "patient", "dimension", "max_score", "score",
+              "issues", "critical_feedback", "timestamp")
+
+    def __init__(
+        self,
+        dimension: str,
+        score: Number,
+        max_score: Number,
+        evaluated_model: str = "",
+        evaluator_model: str = "",
+        patient: str = "",
+        issues: Issues = "",
+        critical_feedback: str = "",
+        timestamp: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None
+    ):
+        self.evaluated_model = evaluated_model
+        self.evaluator_model = evaluator_model
+        self.patient = patient
+        self.dimension = dimension
+        self.max_score = max_score
+        self.score = score
+        self.issues = issues
+        self.critical_feedback = critical_feedback
+        self.timestamp = timestamp
+        self.extra = extra or {}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], source: str = "") -> "DimensionResult":
+        """
+        由结果字典创建并校验
+
+        Args:
+            data: 维度结果字典
+            source: 数据来源（用于错误信息，如文件名）
+
+        Returns:
+            维度结果
+
+        Raises:
+            ValueError: 如果缺少维度名或评分不是数值
+        """
+        dimension = data.get("dimension")
+        if not dimension:
+            raise ValueError(f"{source or '维度结果'}: 缺少 dimension 字段")
+        return cls(
+            dimension=dimension,
+            score=_number(data, "score", 0, source),
+            max_score=_number(data, "max_score", 0, source),
+            evaluated_model=_text(data, "evaluated_model"),
+            evaluator_model=_text(data, "evaluator_model"),
+            patient=_text(data, "patient"),
+            issues=_issues(data),
+            critical_feedback=data.get("critical_feedback") or "",
+            timestamp=data.get("timestamp"),
+            extra={key: value for key, value in data.items() if key not in cls.FIELDS}
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "DimensionResult":
+        """读取并校验维度结果文件"""
+        return cls.from_dict(json_codec.load(path), source=Path(path).name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为结果文件的字典结构"""
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        data.update(self.extra)
+        return data
+
+
+class AggregatedResult:
+    """一个 (被评测模型, 评测模型, 患者) 的聚合结果"""
+
+    __slots__ = ("evaluated_model", "evaluator_model", "patient", "total_score", "max_total_score",
+                 "dimensions", "critical_feedbacks", "timestamp", "extra")
+
+    FIELDS = ("evaluated_model", "evaluator_model", "patient", "total_score", "max_total_score",
+              "dimensions", "critical_feedbacks", "timestamp")
+
+    # 旧版聚合文件的键名
+    LEGACY_KEYS = {"总分": "total_score", "维度评分": "dimensions"}
+
+    def __init__(
+        self,
+        evaluated_model: str,
+        evaluator_model: str,
+        patient: str,
+        total_score: Number,
+        max_total_score: Number = 100,
+        dimensions: Optional[Dict[str, DimensionScore]] = None,
+        critical_feedbacks: Optional[List[str]] = None,
+        timestamp: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None
+    ):
+        self.evaluated_model = evaluated_model
+        self.evaluator_model = evaluator_model
+        self.patient = patient
+        self.total_score = total_score
+        self.max_total_score = max_total_score
+        self.dimensions = dimensions if dimensions is not None else {}
+        self.critical_feedbacks = critical_feedbacks if critical_feedbacks is not None else []
+        self.timestamp = timestamp
+        self.extra = extra or {}
+
+    @classmethod
+    def from_dimensions(
+        cls,
+        results: List[DimensionResult],
+        evaluated_model: str,
+        evaluator_model: str,
+        patient: str,
+        max_total_score: Number,
+        timestamp: Optional[str] = None
+    ) -> "AggregatedResult":
+        """
+        聚合各维度结果: 总分为各维度评分之和，收集非空的 critical_feedback
+
+        Args:
+            results: 维度结果列表
+            evaluated_model: 被评测模型
+            evaluator_model: 评测模型
+            patient: 患者名称
+            max_total_score: 满分
+            timestamp: 聚合时间
+
+        Returns:
+            聚合结果
+        """
+        return cls(
+            evaluated_model=evaluated_model,
+            evaluator_model=evaluator_model,
+            patient=patient,
+            total_score=sum(result.score for result in results),
+            max_total_score=max_total_score,
+            dimensions={
+                result.dimension: DimensionScore(result.score, result.max_score, result.issues)
+                for result in results
+            },
+            critical_feedbacks=[result.critical_feedback for result in results if result.critical_feedback],
+            timestamp=timestamp
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], patient: Optional[str] = None, source: str = "") -> "AggregatedResult":
+        """
+        由聚合结果字典创建并校验
+
+        Args:
+            data: 聚合结果字典（也接受旧版的 总分/维度评分 键）
+            patient: 患者名称（None表示使用字典中的 patient）
+            source: 数据来源（用于错误信息，如文件名）
+
+        Returns:
+            聚合结果
+
+        Raises:
+            ValueError: 如果缺少模型名、总分或维度评分不是数值
+        """
+        for legacy_key, key in cls.LEGACY_KEYS.items():
+            if key not in data and legacy_key in data:
+                data = {**data, key: data[legacy_key]}
+
+        evaluated_model = data.get("evaluated_model")
+        evaluator_model = data.get("evaluator_model")
+        if not evaluated_model or not evaluator_model:
+            raise ValueError(f"{source or '聚合结果'}: 缺少 evaluated_model/evaluator_model 字段")
+        if "total_score" not in data:
+            raise ValueError(f"{source or '聚合结果'}: 缺少 total_score 字段")
+
+        return cls(
+            evaluated_model=evaluated_model,
+            evaluator_model=evaluator_model,
+            patient=patient if patient is not None else _text(data, "patient"),
+            total_score=_number(data, "total_score", source=source),
+            max_total_score=_number(data, "max_total_score", 100, source),
+            dimensions={
+                name: DimensionScore.from_dict(score, source)
+                for name, score in (data.get("dimensions") or {}).items()
+            },
+            critical_feedbacks=list(data.get("critical_feedbacks") or []),
+            timestamp=data.get("timestamp"),
+            extra={key: value for key, value in data.items()
+                   if key not in cls.FIELDS and key not in cls.LEGACY_KEYS}
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path], patient: Optional[str] = None) -> "AggregatedResult":
+        """读取并校验聚合结果文件"""
+        return cls.from_dict(json_codec.load(path), patient=patient, source=Path(path).name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为聚合结果文件的字典结构"""
+        data = {
+            "evaluated_model": self.evaluated_model,
+            "evaluator_model": self.evaluator_model,
+            "patient": self.patient,
+            "total_score": self.total_score,
+            "max_total_score": self.max_total_score,
+            "dimensions": {name: score.to_dict() for name, score in self.dimensions.items()},
+            "critical_feedbacks": list(self.critical_feedbacks),
+            "timestamp": self.timestamp
+        }
+        data.update(self.extra)
+        return data
+
+
+class RawReport:
+    """一份原始报告（v1 结构）"""
+
+    __slots__ = ("model", "patient", "people", "conversations", "result", "extra")
+
+    FIELDS = ("model", "people", "conversations", "result")
+
+    def __init__(
+        self,
+        model: str,
+        patient: str,
+        conversations: Dict[str, Dict[str, Any]],
+        result: str = "",
+        people: Any = None,
+        extra: Optional[Dict[str, Any]] = None
+    ):
+        self.model = model
+        self.patient = patient
+        self.people = people
+        self.conversations = conversations
+        self.result = result
+        self.extra = extra or {}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], model: Optional[str] = None, patient: Optional[str] = None,
+                  source: str = "") -> "RawReport":
+        """
+        由报告字典创建并校验
+
+        Args:
+            data: v1 结构的报告字典
+            model: 模型名（None表示使用报告中的 model 字段；文件名中的模型名可能与之不同）
+            patient: 患者名（None表示使用报告中的 people 字段）
+            source: 数据来源（用于错误信息）
+
+        Returns:
+            原始报告
+
+        Raises:
+            ValueError: 如果 conversations 不是字典
+        """
+        conversations = data.get("conversations") or {}
+        if not isinstance(conversations, dict):
+            raise ValueError(f"{source or '原始报告'}: conversations 应为字典")
+        return cls(
+            model=model if model is not None else _text(data, "model"),
+            patient=patient if patient is not None else _text(data, "people"),
+            conversations=conversations,
+            result=_text(data, "result"),
+            people=data.get("people"),
+            extra={key: value for key, value in data.items() if key not in cls.FIELDS}
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为 v1 报告字典（model 为记录的模型名）"""
+        data = {"model": self.model, "people": self.people, "conversations": self.conversations, "result": self.result}
+        data.update(self.extra)
+        return data
@@ -2,11 +2,24 @@
 报告加载器模块
 用于从output/raw目录加载医疗报告
 """
-import json
+import re
 from pathlib import Path
 from typing import Dict, Any, Tuple
+
+from src.core.instrumentation import default_instrumentation as instr
+from src.utils.raw_manifest import RawManifest, load_manifest
+from src.utils.raw_report import load_raw_report
+from .artifact_cache import ReportArtifacts, report_cache
 from .config import config
 
+# 标准格式报告的段落: {段名: 英文标题}，按报告中的顺序
+STANDARD_SECTIONS = {
+    "主诉": "Chief Complaint",
+    "现病史": "Present Illness History",
+    "既往史": "Past Medical History",
+    "家族史": "Family History"
+}
+
 
 class ReportLoader:
     """报告加载器"""
@@ -27,8 +40,21 @@ class ReportLoader:
             报告文件路径
         """
         # 文件命名格式: {模型名称}-{患者}.json
-        filename = f"{model_name}-{patient}.json"
-        return self.raw_reports_dir / filename
+        return self.manifest.path(model_name, patient)
+
+    @property
+    def manifest(self) -> RawManifest:
+        """原始报告目录的清单（每个目录在进程内只扫描一次）"""
+        return load_manifest(self.raw_reports_dir)
+
+    def refresh_manifest(self) -> Dict[str, int]:
+        """
+        增量刷新清单（只读取新增或修改过的报告文件）
+
+        Returns:
+            刷新统计 {"total", "scanned", "reused", "removed"}
+        """
+        return self.manifest.refresh()
 
     def load_report(self, model_name: str, patient: str) -> Dict[str, Any]:
         """
@@ -39,15 +65,18 @@ class ReportLoader:
             patient: 患者名称
 
         Returns:
-            报告JSON数据
+            报告JSON数据（v1/v2格式统一返回v1结构）
         """
-        report_path = self.get_report_path(model_name, patient)
+        return self._artifacts(model_name, patient).data
 
-        if not report_path.exists():
-            raise FileNotFoundError(f"报告文件不存在: {report_path}")
+    def _artifacts(self, model_name: str, patient: str) -> ReportArtifacts:
+        """获取报告文件的缓存产物（文件只在第一次或修改后读取）"""
+        report_path = self.get_report_path(model_name, patient)
 
-        with open(report_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        try:
+            return report_cache.get(report_path, load_raw_report)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"报告文件不存在: {report_path}") from None
 
     def extract_result(self, model_name: str, patient: str) -> str:
         """
@@ -60,7 +89,26 @@ class ReportLoader:
         Returns:
             标准格式的完整病历报告
         """
-        report_data = self.load_report(model_name, patient)
+        artifacts = self._artifacts(model_name, patient)
+        if artifacts.report is None:
+            artifacts.report = self._standardize(artifacts.data, model_name, patient)
+        return artifacts.report
+
+    def extract_sections(self, model_name: str, patient: str) -> Dict[str, str]:
+        """
+        提取标准格式报告的各段内容
+
+        Args:
+            model_name: 模型名称
+            patient: 患者名称
+
+        Returns:
+            {段名: 内容}，按 STANDARD_SECTIONS 顺序，内容可能为空字符串
+        """
+        return self._sections(self._artifacts(model_name, patient).data)
+
+    def _sections(self, report_data: Dict[str, Any]) -> Dict[str, str]:
+        """由报告JSON提取主诉/现病史/既往史/家族史各段"""
         conversations = report_data.get("conversations", {})
 
         # 从conversations中提取各段Output
@@ -89,7 +137,6 @@ class ReportLoader:
         if conv4:
             output4 = conv4.get("Output", "")
             # 提取家族病史部分
-            import re
             family_match = re.search(
                 r'-\s*\*\*家族(?:病)?史[：:]\*\*\s*(.+?)(?=-\s*\*\*|$)',
                 output4,
@@ -98,20 +145,16 @@ class ReportLoader:
             if family_match:
                 family_history = family_match.group(1).strip()
 
-        # 组装标准格式报告
-        report_parts = []
+        return dict(zip(STANDARD_SECTIONS, (chief_complaint, present_illness, past_history, family_history)))
 
-        if chief_complaint:
-            report_parts.append(f"1. 主诉 (Chief Complaint)\n{chief_complaint}")
-
-        if present_illness:
-            report_parts.append(f"2. 现病史 (Present Illness History)\n{present_illness}")
-
-        if past_history:
-            report_parts.append(f"3. 既往史 (Past Medical History)\n{past_history}")
-
-        if family_history:
-            report_parts.append(f"4. 家族史 (Family History)\n{family_history}")
+    def _standardize(self, report_data: Dict[str, Any], model_name: str, patient: str) -> str:
+        """由报告JSON组装标准格式报告"""
+        # 组装标准格式报告
+        report_parts = [
+            f"{number}. {name} ({STANDARD_SECTIONS[name]})\n{content}"
+            for number, (name, content) in enumerate(self._sections(report_data).items(), 1)
+            if content
+        ]
 
         result = "\n\n".join(report_parts)
 
@@ -133,7 +176,13 @@ class ReportLoader:
         Returns:
             原始对话内容
         """
-        report_data = self.load_report(model_name, patient)
+        artifacts = self._artifacts(model_name, patient)
+        if artifacts.conversation is None:
+            artifacts.conversation = self._join_conversation(artifacts.data, model_name, patient)
+        return artifacts.conversation
+
+    def _join_conversation(self, report_data: Dict[str, Any], model_name: str, patient: str) -> str:
+        """由报告JSON提取对话内容"""
         conversations = report_data.get("conversations", {})
 
         # 提取对话内容
@@ -182,8 +231,9 @@ class ReportLoader:
         Returns:
             (原始对话, 生成的报告) 元组
         """
-        conversation = self.extract_conversation(model_name, patient)
-        report = self.extract_result(model_name, patient)
+        with instr.span("load_report", model=model_name):
+            conversation = self.extract_conversation(model_name, patient)
+            report = self.extract_result(model_name, patient)
 
         return conversation, report
 
@@ -198,8 +248,10 @@ class ReportLoader:
         Returns:
             是否存在
         """
-        report_path = self.get_report_path(model_name, patient)
-        return report_path.exists()
+        # 清单中没有时再检查文件，清单生成之后新写入的报告同样可以找到
+        if self.manifest.exists(model_name, patient):
+            return True
+        return self.get_report_path(model_name, patient).exists()
 
 
 # 创建全局实例
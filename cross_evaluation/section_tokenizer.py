@@ -0,0 +1,232 @@
+"""
+报告分段扫描器
+用一个编译好的交替正则单遍扫描报告，找出所有标题/标签标记及其位置:
+
+    bullet    "- **"   结构化条目的起始(如 "- **主诉：**")
+    heading   "##"     markdown 标题
+    keyword   主诉/现病史/病史摘要/既往史/既往/家族史/家族病史/个人史/烟酒史
+    escaped   字面量 "\\n"(部分模型输出中未转义的换行)
+
+模块解析(module_parser)基于这些标记的位置切分内容，不再对每个模块分别做正则搜索
+"""
+import bisect
+import re
+from typing import Dict, List, Optional, Tuple
+
+# 各分支都以字面字符开头，re 可以按首字符集合快速跳过无关文本；
+# 不使用命名分组(会使扫描慢数倍)，标记类型由首字符判断
+MARKER_PATTERN = re.compile(
+    r"-\s*\*\*"
+    r"|##+"
+    r"|主诉|现病史|病史摘要|既往史|既往|家族史|家族病史|个人史|烟酒史"
+    r"|\\n"
+)
+
+# 建立索引时使用的模式: 不需要标题；"- **" 只取紧跟关键词的(其余条目的位置用 BULLET_PATTERN 按需查找)，
+# 报告中大部分标记是普通条目和标题，跳过它们可以减少大半的Python循环
+INDEX_PATTERN = re.compile(
+    r"-\s*\*\*(?=[主现病既家个烟])"
+    r"|主诉|现病史|病史摘要|既往史|既往|家族史|家族病史|个人史|烟酒史"
+    r"|\\n"
+)
+
+BULLET_PATTERN = re.compile(r"-\s*\*\*")
+
+MARKER_KINDS = {"-": "bullet", "#": "heading", "\\": "escaped"}
+
+WHITESPACE_PATTERN = re.compile(r"\s*")
+
+LABEL_COLONS = "：:"
+
+# 标签关键词 -> 模块名
+LABEL_MODULES = {
+    "主诉": "主诉",
+    "现病史": "现病史",
+    "病史摘要": "现病史",
+    "既往史": "既往史",
+    "既往病史": "既往史",
+    "家族史": "家族史",
+    "家族病史": "家族史",
+    "个人史": "个人史",
+    "烟酒史": "个人史"
+}
+
+# 标记: (类型, 文本, 起始位置, 结束位置)
+Marker = Tuple[str, str, int, int]
+
+
+class Section:
+    """报告中的一个带标签的段落"""
+
+    __slots__ = ("module", "label", "start", "content_start", "end", "structured")
+
+    def __init__(self, module: str, label: str, start: int, content_start: int, end: int, structured: bool):
+        self.module = module
+        self.label = label
+        self.start = start
+        self.content_start = content_start
+        self.end = end
+        self.structured = structured
+
+    def content(self, report: str) -> str:
+        """段落内容(去除首尾空白)"""
+        return report[self.content_start:self.end].strip()
+
+    def __repr__(self) -> str:
+        return f"Section({self.module!r}, label={self.label!r}, {self.start}:{self.content_start}:{self.end})"
+
+
+def tokenize(report: str) -> List[Marker]:
+    """
+    单遍扫描报告中的所有标记
+
+    Args:
+        report: 报告文本
+
+    Returns:
+        标记列表，按位置排序
+    """
+    markers = []
+    append = markers.append
+    kinds = MARKER_KINDS
+    for match in MARKER_PATTERN.finditer(report):
+        text = match[0]
+        start, end = match.span()
+        kind = kinds.get(text[0], "keyword")
+        append((kind, text, start, end))
+        # "现病史摘要"/"家族病史摘要" 中的 "病史摘要" 与前一个关键词重叠，单独补上
+        if text[-1] == "史" and text.endswith("病史") and report.startswith("摘要", end):
+            append((kind, "病史摘要", end - 2, end + 2))
+    return markers
+
+
+class MarkerIndex:
+    """按关键词和类型索引的标记位置，用于查找某位置之后的第一个标记"""
+
+    def __init__(self, report: str):
+        """
+        扫描报告并建立索引
+
+        Args:
+            report: 报告文本
+        """
+        self.report = report
+        self.keywords: Dict[str, List[int]] = {}
+        # 紧跟在 "- **" 之后的关键词: 关键词 -> [(条目起始位置, 关键词结束位置)]
+        self.bullet_keywords: Dict[str, List[Tuple[int, int]]] = {}
+        self.escaped: List[int] = []
+        # 全部关键词出现(含重叠补上的)按位置排列: 位置列表和对应的关键词列表
+        self.keyword_starts: List[int] = []
+        self.keyword_texts: List[str] = []
+
+        # 扫描和建索引在同一个循环中完成，不生成中间的标记列表；循环内只用局部变量
+        keywords = self.keywords
+        bullet_keywords = self.bullet_keywords
+        starts_append = self.keyword_starts.append
+        texts_append = self.keyword_texts.append
+        bullet_start = bullet_end = -1
+        for match in INDEX_PATTERN.finditer(report):
+            text = match[0]
+            start, end = match.span()
+            first = text[0]
+            if first == "-":
+                bullet_start, bullet_end = start, end
+                continue
+            if first == "\\":
+                self.escaped.append(start)
+                continue
+            for keyword in self._expand_keyword(text, end) if first == "既" else (text,):
+                positions = keywords.get(keyword)
+                if positions is None:
+                    keywords[keyword] = [start]
+                else:
+                    positions.append(start)
+                starts_append(start)
+                texts_append(keyword)
+                if bullet_end == start:
+                    bullet_keywords.setdefault(keyword, []).append((bullet_start, start + len(keyword)))
+            # "现病史摘要"/"家族病史摘要" 中的 "病史摘要" 与前一个关键词重叠，单独补上
+            if text[-1] == "史" and text.endswith("病史") and report.startswith("摘要", end):
+                keywords.setdefault("病史摘要", []).append(end - 2)
+                starts_append(end - 2)
+                texts_append("病史摘要")
+
+    def _expand_keyword(self, text: str, end: int) -> List[str]:
+        """一个关键词标记同时代表的关键词(如 "既往史" 也是 "既往" 的一次出现)"""
+        if text == "既往史":
+            return ["既往史", "既往"]
+        if text == "既往" and self.report.startswith("病史", end):
+            return ["既往", "既往病史"]
+        return [text]
+
+    def positions(self, keyword: str) -> List[int]:
+        """关键词的所有出现位置"""
+        return self.keywords.get(keyword, [])
+
+    def first(self, keyword: str, start: int = 0) -> int:
+        """关键词在 start 及之后第一次出现的位置，没有时为 -1"""
+        positions = self.keywords.get(keyword)
+        if not positions:
+            return -1
+        i = bisect.bisect_left(positions, start)
+        return positions[i] if i < len(positions) else -1
+
+    def next_of(self, keywords: Tuple[str, ...], start: int) -> int:
+        """多个关键词中在 start 及之后最早出现的位置，没有时为报告长度"""
+        best = len(self.report)
+        for keyword in keywords:
+            pos = self.first(keyword, start)
+            if 0 <= pos < best:
+                best = pos
+        return best
+
+    def next_bullet(self, start: int) -> int:
+        """start 及之后第一个 "- **" 的位置，没有时为报告长度"""
+        match = BULLET_PATTERN.search(self.report, start)
+        return match.start() if match else len(self.report)
+
+
+def skip_whitespace(report: str, pos: int) -> int:
+    """跳过 pos 开始的空白字符，返回第一个非空白字符的位置"""
+    return WHITESPACE_PATTERN.match(report, pos).end()
+
+
+def split_sections(report: str, markers: Optional[List[Marker]] = None) -> List[Section]:
+    """
+    按标签把报告切分为段落，每个段落到下一个标签为止
+
+    识别 "- **主诉：**" 形式的结构化标签和 "主诉：" 形式的普通标签
+
+    Args:
+        report: 报告文本
+        markers: tokenize 的结果（None表示现在扫描）
+
+    Returns:
+        段落列表，按位置排序
+    """
+    if markers is None:
+        markers = tokenize(report)
+
+    labels = []
+    previous = None
+    for marker in markers:
+        kind, text, start, end = marker
+        if kind == "keyword":
+            label = text
+            if text == "既往" and report.startswith("病史", end):
+                label, end = "既往病史", end + 2
+            module = LABEL_MODULES.get(label)
+            structured = previous is not None and previous[0] == "bullet" and previous[3] == start
+            if module and end < len(report) and report[end] in LABEL_COLONS:
+                end += 1
+                if structured and report.startswith("**", end):
+                    labels.append((module, label, previous[2], end + 2, True))
+                elif not structured:
+                    labels.append((module, label, start, end, False))
+        previous = marker
+
+    sections = []
+    for i, (module, label, start, content_start, structured) in enumerate(labels):
+        end = labels[i + 1][2] if i + 1 < len(labels) else len(report)
+        sections.append(Section(module, label, start, skip_whitespace(report, content_start), end, structured))
+    return sections
@@ -145,9 +145,9 @@ def demo_5_batch_processing():
             max_tokens=100
         )
 
-        for i, (question, answer) in enumerate(zip(questions, results), 1):
+        for i, (question, result) in enumerate(zip(questions, results), 1):
             print(f"{i}. {question}")
-            print(f"   → {answer}")
+            print(f"   → {result.output if result.ok else '失败: ' + result.error}")
             print()
 
     except Exception as e:
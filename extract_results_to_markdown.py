@@ -8,6 +8,8 @@ import os
 from pathlib import Path
 from typing import Dict
 
+from src.utils.raw_report import load_raw_report
+
 
 def extract_results_to_markdown(
     input_dir: str = "./output/raw",
@@ -37,8 +39,7 @@ def extract_results_to_markdown(
         print(f"  处理: {json_file.name}")
 
         # 读取JSON
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load_raw_report(json_file)
 
         # 提取信息
         model = data.get('model', 'unknown')
@@ -1,68 +1,70 @@
 #!/usr/bin/env python3
-import json
 from pathlib import Path
 
+from src.utils.result_loader import ResultLoader, summarize_aggregated
+
 results_dir = Path("output/cross_evaluation_results")
 
-print("=" * 80)
-print("📊 最终数据质量报告")
-print("=" * 80)
 
-# 统计所有聚合文件
-agg_files = list(results_dir.glob("**/*_aggregated.json"))
-dim_files = [f for f in results_dir.glob("**/*.json") 
-             if "_aggregated" not in f.name and f.name != ".progress.json"]
+def main():
+    print("=" * 80)
+    print("📊 最终数据质量报告")
+    print("=" * 80)
+
+    # 统计所有聚合文件
+    agg_files = list(results_dir.glob("**/*_aggregated.json"))
+    dim_files = [f for f in results_dir.glob("**/*.json") 
+                 if "_aggregated" not in f.name and f.name != ".progress.json"]
+
+    print(f"\n【文件统计】")
+    print(f"  ✅ 聚合文件: {len(agg_files)}/640 (100%)")
+    print(f"  ✅ 维度文件: {len(dim_files)}/3200 (100%)")
+    print(f"  ✅ 总文件数: {len(agg_files) + len(dim_files)}/3840 (100%)")
+
+    # 检查JSON格式和评分
+    print(f"\n【数据质量】")
+    valid_count = 0
+    invalid_count = 0
+    warnings = []
 
-print(f"\n【文件统计】")
-print(f"  ✅ 聚合文件: {len(agg_files)}/640 (100%)")
-print(f"  ✅ 维度文件: {len(dim_files)}/3200 (100%)")
-print(f"  ✅ 总文件数: {len(agg_files) + len(dim_files)}/3840 (100%)")
+    loader = ResultLoader()
+    for item in loader.iter_files(results_dir, "*_aggregated.json", summarize_aggregated):
+        summary = item.record
+        if item.ok and summary["error_type"] is None and summary["total_score"] is not None \
+                and summary["dimension_count"] == 5:
+            valid_count += 1
+        else:
+            invalid_count += 1
+            warnings.append(item.path.name)
+    print(f"  {loader.format_stats()}")
 
-# 检查JSON格式和评分
-print(f"\n【数据质量】")
-valid_count = 0
-invalid_count = 0
-warnings = []
+    print(f"  ✅ 有效数据: {valid_count}/640 ({valid_count/640*100:.1f}%)")
+    if invalid_count > 0:
+        print(f"  ⚠️  问题数据: {invalid_count}/640")
+        for w in warnings[:5]:
+            print(f"     - {w}")
 
-for agg_file in agg_files:
-    try:
-        with open(agg_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            total_score = data.get("总分") or data.get("total_score")
-            dimensions = data.get("维度评分") or data.get("dimensions")
-            
-            if total_score is not None and dimensions and len(dimensions) == 5:
-                valid_count += 1
-            else:
-                invalid_count += 1
-                warnings.append(agg_file.name)
-    except:
-        invalid_count += 1
-        warnings.append(agg_file.name)
+    # 检查日志中的警告
+    print(f"\n【已知问题】")
+    print(f"  ⚠️  gemini-3-pro-preview 有4次JSON解析警告")
+    print(f"     (但聚合文件已正常生成，不影响最终结果)")
+    print(f"  ✅ 已清理测试残留文件 (deepseek-chat)")
 
-print(f"  ✅ 有效数据: {valid_count}/640 ({valid_count/640*100:.1f}%)")
-if invalid_count > 0:
-    print(f"  ⚠️  问题数据: {invalid_count}/640")
-    for w in warnings[:5]:
-        print(f"     - {w}")
+    print(f"\n【评测统计】")
+    print(f"  ✓ 8个模型 × 8个评测者 × 10个患者 = 640个完整评测")
+    print(f"  ✓ 每个评测包含5个维度评分")
+    print(f"  ✓ 所有评测任务100%完成")
 
-# 检查日志中的警告
-print(f"\n【已知问题】")
-print(f"  ⚠️  gemini-3-pro-preview 有4次JSON解析警告")
-print(f"     (但聚合文件已正常生成，不影响最终结果)")
-print(f"  ✅ 已清理测试残留文件 (deepseek-chat)")
+    print(f"\n【数据位置】")
+    print(f"  📁 输出目录: output/cross_evaluation_results/")
+    print(f"  📁 按患者分组: 患者1-10/")
+    print(f"  📄 文件命名: {{被评测模型}}_by_{{评测模型}}_{{患者}}_{{维度}}.json")
+    print(f"  📄 聚合文件: {{被评测模型}}_by_{{评测模型}}_{{患者}}_aggregated.json")
 
-print(f"\n【评测统计】")
-print(f"  ✓ 8个模型 × 8个评测者 × 10个患者 = 640个完整评测")
-print(f"  ✓ 每个评测包含5个维度评分")
-print(f"  ✓ 所有评测任务100%完成")
+    print("\n" + "=" * 80)
+    print("✅ 数据完整性检查通过！所有评测数据完整有效。")
+    print("=" * 80)
 
-print(f"\n【数据位置】")
-print(f"  📁 输出目录: output/cross_evaluation_results/")
-print(f"  📁 按患者分组: 患者1-10/")
-print(f"  📄 文件命名: {{被评测模型}}_by_{{评测模型}}_{{患者}}_{{维度}}.json")
-print(f"  📄 聚合文件: {{被评测模型}}_by_{{评测模型}}_{{患者}}_aggregated.json")
 
-print("\n" + "=" * 80)
-print("✅ 数据完整性检查通过！所有评测数据完整有效。")
-print("=" * 80)
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,8 @@ from pathlib import Path
 from typing import Dict, List
 from collections import defaultdict
 
+from src.utils.raw_report import load_raw_report
+
 
 def load_all_results(output_dir: str = "./output/raw") -> Dict[str, Dict[str, dict]]:
     """
@@ -31,8 +33,7 @@ def load_all_results(output_dir: str = "./output/raw") -> Dict[str, Dict[str, di
     for file_path in sorted(output_path.glob("*.json")):
         print(f"  读取: {file_path.name}")
 
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load_raw_report(file_path)
 
         model = data.get('model', '')
         people = data.get('people', '')
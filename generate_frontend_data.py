@@ -2,13 +2,23 @@
 """
 生成前端所需的数据文件
 从交叉评测结果和原始报告生成前端JSON文件
+
+评测结果通过 iter_evaluation_results() 逐条流式读取，原始报告通过 RawReportStore 按需加载，
+详细评测数据和模型对比数据逐条/逐患者写出，内存占用不随模型数和患者数增长
 """
-import json
 from pathlib import Path
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from datetime import datetime
 import statistics
 
+from cross_evaluation.records import AggregatedResult, RawReport
+from src.utils.patient_source import iter_patient_names
+from src.utils import json_codec
+from src.utils.raw_manifest import load_manifest
+from src.utils.raw_report import load_raw_report
+from src.utils.result_loader import ResultLoader
+from src.core.generation_metrics import build_latency_leaderboard
+
 # 配置
 RESULTS_DIR = Path("output/cross_evaluation_results")
 RAW_DIR = Path("output/raw")
@@ -17,66 +27,129 @@ CONFIG_FILE = Path("config/cross_evaluation_config.json")
 
 def load_config():
     """加载配置文件"""
-    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def load_raw_reports():
-    """加载所有原始报告"""
-    reports = {}
-    for report_file in RAW_DIR.glob("*.json"):
-        # 文件名格式: {模型}-{患者}.json
-        parts = report_file.stem.split('-')
-        if len(parts) < 2:
-            continue
-
-        patient = parts[-1]  # 最后一部分是患者
-        model = '-'.join(parts[:-1])  # 前面的部分是模型名
-
+    return json_codec.load(CONFIG_FILE)
+
+class RawReportStore:
+    """
+    原始报告的惰性存储
+    按 {模型}_{患者} 键访问，键来自原始报告清单，读取时才加载文件，只缓存最近使用的少量报告
+    """
+
+    def __init__(self, raw_dir, cache_size=16):
+        """
+        初始化存储
+
+        Args:
+            raw_dir: 原始报告目录
+            cache_size: 缓存的报告数
+        """
+        self.raw_dir = Path(raw_dir)
+        self.cache_size = cache_size
+        # 清单按文件名 {模型}-{患者}.json 记录模型和患者，只读取新增或修改过的文件的元数据
+        self._entries = {
+            f"{entry['model']}_{entry['patient']}": entry
+            for entry in load_manifest(self.raw_dir, refresh=True).entries()
+        }
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def keys(self):
+        return list(self._entries)
+
+    def get(self, key, default=None):
+        """
+        获取一份报告
+
+        Args:
+            key: {模型}_{患者}
+            default: 报告不存在或加载失败时的返回值
+
+        Returns:
+            RawReport
+        """
+        report = self._cache.get(key)
+        if report is not None:
+            self._cache.move_to_end(key)
+            return report
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        report_file = self.raw_dir / entry["file"]
         try:
-            with open(report_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            # 提取关键信息
-            reports[f"{model}_{patient}"] = {
-                "model": model,
-                "patient": patient,
-                "conversations": data.get("conversations", {}),
-                "result": data.get("result", ""),
-                "people": data.get("people", {})
-            }
+            report = RawReport.from_dict(
+                load_raw_report(report_file), model=entry["model"], patient=entry["patient"], source=entry["file"]
+            )
         except Exception as e:
+            # 加载失败的报告从存储中移除，只提示一次
             print(f"⚠️  加载报告失败 {report_file}: {e}")
+            del self._entries[key]
+            return default
+
+        self._cache[key] = report
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return report
+
+    def values(self):
+        """按清单顺序逐份加载报告"""
+        for key in self.keys():
+            report = self.get(key)
+            if report is not None:
+                yield report
+
+    def iter_by_patient(self):
+        """
+        按患者分组逐组加载报告，患者按在清单中首次出现的顺序
+
+        Yields:
+            (患者, 该患者的报告列表)
+        """
+        keys_by_patient = defaultdict(list)
+        for key, entry in self._entries.items():
+            keys_by_patient[entry["patient"]].append(key)
+        for patient, keys in keys_by_patient.items():
+            reports = [report for report in map(self.get, keys) if report is not None]
+            if reports:
+                yield patient, reports
 
-    return reports
+def load_raw_reports():
+    """原始报告存储（按需加载，可按 {模型_患者} 键访问或逐份遍历）"""
+    return RawReportStore(RAW_DIR)
+
+def collect_call_metrics(reports):
+    """收集原始报告中每次生成调用的时延指标，按模型分组"""
+    metrics_by_model = defaultdict(list)
+    for report in reports.values():
+        for conv_data in report.conversations.values():
+            if conv_data.get("metrics"):
+                metrics_by_model[report.model].append(conv_data["metrics"])
+    return metrics_by_model
+
+def _load_aggregated(path):
+    """在加载器的工作进程中读取并校验一个聚合结果（患者取目录名）"""
+    return AggregatedResult.load(path, patient=path.parent.name)
+
+def iter_evaluation_results():
+    """逐条读取评测结果，生成 AggregatedResult（读入时校验，字段缺失或类型错误的文件跳过）"""
+    # 各患者目录的聚合文件分片交给进程池解码，按患者目录顺序返回
+    loader = ResultLoader()
+    for item in loader.iter_files(RESULTS_DIR, "*_aggregated.json", _load_aggregated, dir_pattern="患者*"):
+        if item.error:
+            print(f"⚠️  加载评测失败 {item.path}: {item.error}")
+            continue
+        yield item.record
+
+    print(f"   - {loader.format_stats()}")
 
 def load_evaluation_results():
-    """加载所有评测结果"""
-    evaluations = []
-
-    # 遍历所有患者目录
-    for patient_dir in sorted(RESULTS_DIR.glob("患者*")):
-        patient = patient_dir.name
-
-        # 查找所有聚合文件
-        for agg_file in patient_dir.glob("*_aggregated.json"):
-            try:
-                with open(agg_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
-                evaluations.append({
-                    "evaluated_model": data.get("evaluated_model"),
-                    "evaluator_model": data.get("evaluator_model"),
-                    "patient": patient,
-                    "total_score": data.get("total_score", 0),
-                    "max_total_score": data.get("max_total_score", 100),
-                    "dimensions": data.get("dimensions", {}),
-                    "critical_feedbacks": data.get("critical_feedbacks", []),
-                    "timestamp": data.get("timestamp")
-                })
-            except Exception as e:
-                print(f"⚠️  加载评测失败 {agg_file}: {e}")
-
-    return evaluations
+    """加载所有评测结果，返回 AggregatedResult 列表"""
+    return list(iter_evaluation_results())
 
 def generate_cross_evaluation_matrix(evaluations, models, patients):
     """生成交叉评测矩阵数据"""
@@ -94,12 +167,14 @@ def generate_cross_evaluation_matrix(evaluations, models, patients):
         "count": 0
     })))
 
-    # 聚合数据
+    # 聚合数据（一次遍历，评测结果可以是流式迭代器）
+    total_evaluations = 0
     for eval_data in evaluations:
-        evaluated = eval_data["evaluated_model"]
-        evaluator = eval_data["evaluator_model"]
-        patient = eval_data["patient"]
-        score = eval_data["total_score"]
+        total_evaluations += 1
+        evaluated = eval_data.evaluated_model
+        evaluator = eval_data.evaluator_model
+        patient = eval_data.patient
+        score = eval_data.total_score
 
         # 全局矩阵
         global_matrix[evaluator][evaluated]["scores"].append(score)
@@ -134,7 +209,7 @@ def generate_cross_evaluation_matrix(evaluations, models, patients):
     matrix_data = {
         "metadata": {
             "generated_at": datetime.now().isoformat(),
-            "total_evaluations": len(evaluations),
+            "total_evaluations": total_evaluations,
             "evaluation_type": "100-point",
             "dimensions": [
                 {"name": "准确性", "max_points": 40, "weight": 0.4},
@@ -152,164 +227,144 @@ def generate_cross_evaluation_matrix(evaluations, models, patients):
 
     # 保存文件
     output_file = OUTPUT_DIR / "cross_evaluation_matrix.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(matrix_data, f, ensure_ascii=False, indent=2)
+    json_codec.dump(matrix_data, output_file)
 
     print(f"✅ 交叉评测矩阵已保存: {output_file}")
-    print(f"   - 总评测数: {len(evaluations)}")
+    print(f"   - 总评测数: {total_evaluations}")
     print(f"   - 模型数: {len(models)}")
     print(f"   - 患者数: {len(patients)}")
 
     return matrix_data
 
+def _reference_titles(reports, reference_model):
+    """从参考模型的报告中提取每轮对话的标题 {conv_id: title}"""
+    titles = {}
+    for report in reports:
+        if report.model != reference_model:
+            continue
+        for conv_id, conv_data in report.conversations.items():
+            # 从Output字段提取标题（Output的第一行通常是标题）
+            output = conv_data.get("Output", "")
+            # 清理所有换行符，然后获取第一行
+            cleaned_output = output.replace('\\n', '').replace('\n', ' ').strip() if output else ""
+
+            # 如果清理后的文本太长（超过30字），截取前30字并添加省略号
+            if cleaned_output and len(cleaned_output) <= 30:
+                title = cleaned_output
+            elif cleaned_output and len(cleaned_output) > 30:
+                title = cleaned_output[:30] + "..."
+            else:
+                title = f"对话{conv_id}"
+
+            titles[conv_id] = title
+    return titles
+
 def generate_comparison_data(reports, models, patients):
-    """生成模型对比数据"""
+    """生成模型对比数据（按患者逐组加载报告并写出）"""
     print("\n📊 生成模型对比数据...")
 
     # 参考模型（用于提取标题）
     REFERENCE_MODEL = "gemini-3-pro-preview"
 
-    # 重组数据结构
-    comparison_data = {
-        "metadata": {
-            "generated_at": datetime.now().isoformat(),
-            "total_reports": len(reports),
-            "models_count": len(models),
-            "patients_count": len(patients),
-            "reference_model": REFERENCE_MODEL
-        },
-        "models": models,
-        "patients": patients,
-        "data": {}
+    metadata = {
+        "generated_at": datetime.now().isoformat(),
+        "total_reports": len(reports),
+        "models_count": len(models),
+        "patients_count": len(patients),
+        "reference_model": REFERENCE_MODEL
     }
+    metrics_by_model = defaultdict(list)
 
-    # 第一步：收集参考模型的标题
-    reference_titles = {}  # {patient: {conv_id: title}}
-
-    for key, report in reports.items():
-        patient = report["patient"]
-        model = report["model"]
-
-        # 从参考模型提取标题
-        if model == REFERENCE_MODEL:
-            conversations = report["conversations"]
-            if patient not in reference_titles:
-                reference_titles[patient] = {}
-
-            for conv_id, conv_data in conversations.items():
-                # 从Output字段提取标题（Output的第一行通常是标题）
-                output = conv_data.get("Output", "")
-                # 清理所有换行符，然后获取第一行
-                cleaned_output = output.replace('\\n', '').replace('\n', ' ').strip() if output else ""
-
-                # 如果清理后的文本太长（超过30字），截取前30字并添加省略号
-                if cleaned_output and len(cleaned_output) <= 30:
-                    title = cleaned_output
-                elif cleaned_output and len(cleaned_output) > 30:
-                    title = cleaned_output[:30] + "..."
-                else:
-                    title = f"对话{conv_id}"
+    output_file = OUTPUT_DIR / "comparison_data.json"
+    with json_codec.JsonStreamWriter(output_file) as writer:
+        writer.field("metadata", metadata)
+        writer.field("models", models)
+        writer.field("patients", patients)
+
+        # 每个患者: 先从参考模型提取标题，再按对话轮次组织各模型的输出
+        writer.begin("data", container="object")
+        for patient, patient_reports in reports.iter_by_patient():
+            titles = _reference_titles(patient_reports, REFERENCE_MODEL)
+            patient_data = {}
+            for report in patient_reports:
+                for conv_id, conv_data in report.conversations.items():
+                    # 使用参考模型的标题，如果没有则使用默认标题
+                    entry = {
+                        "title": titles.get(conv_id, f"对话{conv_id}"),
+                        "output": conv_data.get("Output", ""),
+                        "chat": conv_data.get("chat", "")
+                    }
+                    if conv_data.get("metrics"):
+                        entry["metrics"] = conv_data["metrics"]
+                        metrics_by_model[report.model].append(conv_data["metrics"])
+                    patient_data.setdefault(conv_id, {})[report.model] = entry
+            writer.item(patient_data, key=patient)
+        writer.end()
 
-                reference_titles[patient][conv_id] = title
+        # 生成时延排行榜（仅当原始报告带有流式调用指标时）
+        writer.field("latency_leaderboard", build_latency_leaderboard(metrics_by_model))
 
     print(f"✅ 从参考模型 {REFERENCE_MODEL} 提取了标题")
-
-    # 第二步：按患者分组，使用参考标题
-    for key, report in reports.items():
-        patient = report["patient"]
-        model = report["model"]
-        conversations = report["conversations"]
-
-        if patient not in comparison_data["data"]:
-            comparison_data["data"][patient] = {}
-
-        # 按对话轮次组织
-        for conv_id, conv_data in conversations.items():
-            if conv_id not in comparison_data["data"][patient]:
-                comparison_data["data"][patient][conv_id] = {}
-
-            # 使用参考模型的标题，如果没有则使用默认标题
-            title = reference_titles.get(patient, {}).get(conv_id, f"对话{conv_id}")
-
-            comparison_data["data"][patient][conv_id][model] = {
-                "title": title,
-                "output": conv_data.get("Output", ""),
-                "chat": conv_data.get("chat", "")
-            }
-
-    # 保存文件
-    output_file = OUTPUT_DIR / "comparison_data.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(comparison_data, f, ensure_ascii=False, indent=2)
-
     print(f"✅ 模型对比数据已保存: {output_file}")
     print(f"   - 报告数: {len(reports)}")
 
-    return comparison_data
+    return metadata
 
 def generate_evaluation_details(evaluations, reports):
-    """生成详细评测数据（用于评测页面）"""
+    """生成详细评测数据（用于评测页面，逐条写出）"""
     print("\n📊 生成详细评测数据...")
 
-    details_data = {
-        "metadata": {
-            "generated_at": datetime.now().isoformat(),
-            "total_evaluations": len(evaluations)
-        },
-        "evaluations": []
-    }
-
-    for eval_data in evaluations:
-        model = eval_data["evaluated_model"]
-        patient = eval_data["patient"]
-
-        # 查找对应的报告
-        report_key = f"{model}_{patient}"
-        report = reports.get(report_key, {})
-
-        details_data["evaluations"].append({
-            "model": model,
-            "patient": patient,
-            "evaluator": eval_data["evaluator_model"],
-            "scores": {
-                "dimensions": [
-                    {
-                        "name": dim_name,
-                        "score": dim_data.get("score", 0),
-                        "max_score": dim_data.get("max_score", 0),
-                        "issues": dim_data.get("issues", "")
-                    }
-                    for dim_name, dim_data in eval_data["dimensions"].items()
-                ],
-                "total_score": eval_data["total_score"],
-                "max_total_score": eval_data["max_total_score"]
-            },
-            "feedbacks": eval_data.get("critical_feedbacks", []),
-            "report": report.get("result", ""),
-            "conversations": report.get("conversations", {}),
-            "timestamp": eval_data.get("timestamp")
-        })
+    metadata = {"generated_at": datetime.now().isoformat()}
 
-    # 保存文件
     output_file = OUTPUT_DIR / "evaluation_details.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(details_data, f, ensure_ascii=False, indent=2)
+    with json_codec.JsonStreamWriter(output_file) as writer:
+        # 条数在写完后才知道，metadata 放在 evaluations 之后
+        writer.begin("evaluations")
+        for eval_data in evaluations:
+            model = eval_data.evaluated_model
+            patient = eval_data.patient
+
+            # 查找对应的报告
+            report = reports.get(f"{model}_{patient}")
+
+            writer.item({
+                "model": model,
+                "patient": patient,
+                "evaluator": eval_data.evaluator_model,
+                "scores": {
+                    "dimensions": [
+                        {"name": dim_name, **dim_score.to_dict()}
+                        for dim_name, dim_score in eval_data.dimensions.items()
+                    ],
+                    "total_score": eval_data.total_score,
+                    "max_total_score": eval_data.max_total_score
+                },
+                "feedbacks": eval_data.critical_feedbacks,
+                "report": report.result if report else "",
+                "conversations": report.conversations if report else {},
+                "timestamp": eval_data.timestamp
+            })
+        metadata["total_evaluations"] = writer.end()
+        writer.field("metadata", metadata)
 
     print(f"✅ 详细评测数据已保存: {output_file}")
 
-    return details_data
+    return metadata
 
-def generate_statistics(evaluations, models, patients):
+def generate_statistics(evaluations, models, patients, reports=None):
     """生成统计数据（用于首页）"""
     print("\n📊 生成统计数据...")
 
-    # 计算各种统计指标
-    all_scores = [e["total_score"] for e in evaluations]
-
-    # 模型排名
+    # 计算各种统计指标（一次遍历，评测结果可以是流式迭代器）
+    all_scores = []
     model_scores = defaultdict(list)
+    evaluator_stats = defaultdict(list)
     for eval_data in evaluations:
-        model_scores[eval_data["evaluated_model"]].append(eval_data["total_score"])
+        all_scores.append(eval_data.total_score)
+        model_scores[eval_data.evaluated_model].append(eval_data.total_score)
+        evaluator_stats[eval_data.evaluator_model].append(eval_data.total_score)
+
+    # 模型排名
 
     model_rankings = []
     for model, scores in model_scores.items():
@@ -326,10 +381,6 @@ def generate_statistics(evaluations, models, patients):
     model_rankings.sort(key=lambda x: x["avg_score"], reverse=True)
 
     # 评测者特征
-    evaluator_stats = defaultdict(list)
-    for eval_data in evaluations:
-        evaluator_stats[eval_data["evaluator_model"]].append(eval_data["total_score"])
-
     evaluator_features = []
     for evaluator, scores in evaluator_stats.items():
         if scores:
@@ -372,8 +423,8 @@ def generate_statistics(evaluations, models, patients):
         "overview": {
             "total_models": len(models),
             "total_patients": len(patients),
-            "total_evaluations": len(evaluations),
-            "total_files": len(evaluations) * 6,  # 每个评测6个文件
+            "total_evaluations": len(all_scores),
+            "total_files": len(all_scores) * 6,  # 每个评测6个文件
             "completion_rate": 100.0
         },
         "scores": {
@@ -385,13 +436,13 @@ def generate_statistics(evaluations, models, patients):
         },
         "distribution": score_distribution,
         "model_rankings": model_rankings,
-        "evaluator_features": evaluator_features
+        "evaluator_features": evaluator_features,
+        "latency_leaderboard": build_latency_leaderboard(collect_call_metrics(reports or {}))
     }
 
     # 保存文件
     output_file = OUTPUT_DIR / "statistics.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(statistics_data, f, ensure_ascii=False, indent=2)
+    json_codec.dump(statistics_data, output_file)
 
     print(f"✅ 统计数据已保存: {output_file}")
     print(f"   - 平均分: {statistics_data['scores']['average']}")
@@ -408,25 +459,25 @@ def main():
     # 加载配置
     config = load_config()
     models = config["models"]
-    patients = config["patients"]
+    patients = config.get("patients") or list(
+        iter_patient_names(config.get("patient_source", "测试输入问答记录"))
+    )
 
     print(f"\n📋 配置信息:")
     print(f"   - 模型数: {len(models)}")
     print(f"   - 患者数: {len(patients)}")
 
-    # 加载原始数据
+    # 原始报告按需加载，评测结果每个生成步骤各流式读取一遍
     print("\n📂 加载原始数据...")
     reports = load_raw_reports()
-    evaluations = load_evaluation_results()
 
     print(f"   - 原始报告: {len(reports)}")
-    print(f"   - 评测结果: {len(evaluations)}")
 
     # 生成各种数据文件
-    generate_cross_evaluation_matrix(evaluations, models, patients)
+    generate_cross_evaluation_matrix(iter_evaluation_results(), models, patients)
     generate_comparison_data(reports, models, patients)
-    generate_evaluation_details(evaluations, reports)
-    generate_statistics(evaluations, models, patients)
+    generate_evaluation_details(iter_evaluation_results(), reports)
+    generate_statistics(iter_evaluation_results(), models, patients, reports)
 
     print("\n" + "=" * 80)
     print("✅ 所有前端数据文件生成完成！")
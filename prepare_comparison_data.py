@@ -7,6 +7,8 @@ import re
 from pathlib import Path
 from collections import defaultdict
 
+from src.utils.raw_report import load_raw_report
+
 
 def parse_markdown_file(md_file):
     """解析单个 Markdown 文件"""
@@ -49,8 +51,7 @@ def load_raw_conversations(raw_dir):
 
     for json_file in raw_path.glob("*.json"):
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_raw_report(json_file)
 
             model = data.get("model", "")
             patient = data.get("people", "")
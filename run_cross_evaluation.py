@@ -23,6 +23,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from cross_evaluation.engine import engine
 from cross_evaluation.config import config
+from src.core.progress import ProgressDashboard, default_progress
 
 
 def main():
@@ -41,6 +42,12 @@ def main():
         help="指定要评测的患者列表（留空使用配置中的所有患者）"
     )
 
+    parser.add_argument(
+        "--shard",
+        default=None,
+        help="只评测指定分片的患者，格式 i/N (0 <= i < N)，与批量生成的分片规则一致"
+    )
+
     parser.add_argument(
         "--resume",
         action="store_true",
@@ -60,6 +67,57 @@ def main():
         help="并行模式下的最大并发数（默认使用配置中的值）"
     )
 
+    parser.add_argument(
+        "--metrics",
+        nargs="?",
+        const="",
+        metavar="FILE",
+        help="启用阶段计时，结束时打印各阶段耗时汇总并写出指标文件(.prom 为Prometheus格式，其他为JSON；默认使用配置中的路径)"
+    )
+
+    parser.add_argument(
+        "--trace",
+        nargs="?",
+        const="",
+        metavar="FILE",
+        help="启用调用链追踪，任务/维度/模型调用/重试的span追加写入JSONL文件(默认使用配置中的路径)，"
+             "可用 python -m src.core.trace_analyzer FILE 分析关键路径"
+    )
+
+    parser.add_argument(
+        "--dashboard",
+        nargs="?",
+        const="auto",
+        choices=["off", "auto", "rich", "log"],
+        help="实时进度面板: 各提供商在途调用、调用速率、错误/重试率、p95时延、tokens和预计剩余时间"
+             "(auto 在终端中使用rich面板，否则定期输出一行日志；默认使用配置中的值)"
+    )
+
+    parser.add_argument(
+        "--prescreen",
+        action="store_true",
+        help="启用规则预筛: 生成失败、报告为空或缺少主诉/现病史的报告不调用评测模型，直接给出0分(默认使用配置中的值)"
+    )
+
+    parser.add_argument(
+        "--export-batch",
+        metavar="DIR",
+        help="离线批量模式: 将任务计划导出为批量请求JSONL（按接口地址分文件），不调用API"
+    )
+
+    parser.add_argument(
+        "--ingest-batch",
+        nargs="+",
+        metavar="FILE",
+        help="离线批量模式: 导入完成的批量结果JSONL并聚合评分"
+    )
+
+    parser.add_argument(
+        "--fabricate-batch",
+        action="store_true",
+        help="与 --export-batch 同用: 用本地替身为导出的请求生成模拟结果（测试导入流程）"
+    )
+
     parser.add_argument(
         "--list-models",
         action="store_true",
@@ -90,25 +148,52 @@ def main():
     # 列出患者
     if args.list_patients:
         print("配置中的患者列表:")
-        for i, patient in enumerate(config.patients, 1):
+        for i, patient in enumerate(config.get_patients(args.shard), 1):
             print(f"  {i}. {patient}")
         return
 
+    # 离线批量模式
+    if args.export_batch or args.ingest_batch:
+        from cross_evaluation.batch_job import batch_job, fabricate_results
+
+        if args.export_batch:
+            models = args.models if args.models else config.models
+            patients = args.patients if args.patients else config.get_patients(args.shard)
+            print(f"导出批量请求: {args.export_batch}")
+            files = batch_job.export_requests(args.export_batch, models, patients, resume=args.resume)
+            if args.fabricate_batch:
+                for request_file in files.values():
+                    result_file = request_file.parent / "results" / request_file.name
+                    fabricate_results(request_file, result_file)
+                    print(f"  模拟结果: {result_file}")
+
+        if args.ingest_batch:
+            print(f"导入批量结果: {len(args.ingest_batch)} 个文件")
+            stats = batch_job.ingest_results(args.ingest_batch)
+            print(f"  导入: {stats['ingested']}, 失败: {stats['failed']}, 聚合: {stats['aggregated']}")
+        return
+
     # 打印配置信息
     print("=" * 60)
     print("交叉评测系统")
     print("=" * 60)
 
     models = args.models if args.models else config.models
-    patients = args.patients if args.patients else config.patients
+    patients = args.patients if args.patients else config.get_patients(args.shard)
 
     print(f"\n配置信息:")
     print(f"  模型数量: {len(models)}")
     print(f"  患者数量: {len(patients)}")
+    if args.shard:
+        print(f"  分片: {args.shard}")
     print(f"  评测维度: {len(config.dimensions)}")
     print(f"  并行模式: {'是' if args.parallel else '否'}")
     print(f"  断点续传: {'是' if args.resume else '否'}")
 
+    if args.prescreen:
+        engine.prescreen_enabled = True
+    print(f"  规则预筛: {'是' if engine.prescreen_enabled else '否'}")
+
     if args.parallel and args.max_workers:
         print(f"  最大并发数: {args.max_workers}")
 
@@ -123,23 +208,47 @@ def main():
             print("已取消")
             return
 
+    # 阶段计时
+    if args.metrics is not None:
+        from src.core.instrumentation import default_instrumentation
+        default_instrumentation.enable()
+        if args.metrics:
+            engine.metrics_file = Path(args.metrics)
+
+    # 调用链追踪
+    if args.trace is not None:
+        from src.core.tracing import default_tracer
+        trace_file = Path(args.trace) if args.trace else config.trace_file
+        if trace_file is None:
+            print("未指定追踪文件，请使用 --trace FILE 或在配置中设置 tracing.trace_file")
+            sys.exit(1)
+        default_tracer.enable(trace_file)
+
+    # 实时进度面板
+    dashboard = ProgressDashboard(
+        default_progress,
+        mode=args.dashboard or config.dashboard_config.get("mode", "off"),
+        log_interval_s=config.dashboard_config.get("log_interval", 15)
+    )
+
     # 运行评测
     print("\n" + "=" * 60)
 
     try:
-        if args.parallel:
-            engine.run_parallel(
-                models=models,
-                patients=patients,
-                resume=args.resume,
-                max_workers=args.max_workers
-            )
-        else:
-            engine.run(
-                models=models,
-                patients=patients,
-                resume=args.resume
-            )
+        with dashboard:
+            if args.parallel:
+                engine.run_parallel(
+                    models=models,
+                    patients=patients,
+                    resume=args.resume,
+                    max_workers=args.max_workers
+                )
+            else:
+                engine.run(
+                    models=models,
+                    patients=patients,
+                    resume=args.resume
+                )
 
         print("\n" + "=" * 60)
         print("评测完成!")
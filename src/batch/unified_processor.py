@@ -9,14 +9,19 @@
 - 自动模型路由
 - 完整的错误处理和重试机制
 """
-import json
 import asyncio
 import os
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
+import argparse
 import logging
 from src.core.model_service import UniversalModelService
+from src.core.partial_output import load_partial_meta, wasted_attempts
+from src.core.progress import ProgressDashboard, default_progress
+from src.utils.patient_source import iter_patient_names, iter_patient_records, parse_shard
+from src.utils.raw_report import FORMAT_V2, save_raw_report
+from src.utils import json_codec
 
 logger = logging.getLogger(__name__)
 
@@ -47,27 +52,46 @@ class UnifiedBatchProcessor:
         max_retries: int = 3,
         max_tokens: int = 2000,
         temperature: float = 0.3,
-        model_registry_file: str = "model_registry.json"
+        model_registry_file: str = "model_registry.json",
+        shard: Optional[str] = None,
+        raw_format_version: int = FORMAT_V2,
+        stream_metrics: bool = False,
+        partial_dir: Optional[str] = None,
+        dashboard: str = "off",
+        dashboard_interval: float = 30.0
     ):
         """
         初始化统一批量处理器
 
         Args:
             prompts_file: Prompt文件路径
-            records_dir: 患者记录目录
+            records_dir: 患者记录来源(目录、JSONL清单或glob模式)
             output_dir: 输出目录
             models: 要使用的模型列表(模型名称)
             max_retries: 最大重试次数
             max_tokens: 最大Token数
             temperature: 温度参数
             model_registry_file: 模型注册表文件
+            shard: 分片参数 "i/N"，仅处理属于该分片的患者
+            raw_format_version: 输出文件格式版本(2为紧凑格式，问答记录和Prompt只存一份)
+            stream_metrics: 是否以流式调用并记录TTFT、吞吐和usage等时延指标
+            partial_dir: 部分输出目录，设置后以流式调用并将生成内容实时写入
+                {partial_dir}/{模型}/{患者}/{对话编号}.partial，失败的尝试记录为诊断信息
+            dashboard: 实时进度面板模式 off/auto/rich/log（log 模式定期写一行进度日志）
+            dashboard_interval: log 模式的输出间隔(秒)
         """
         self.prompts_file = prompts_file
         self.records_dir = records_dir
+        self.shard = parse_shard(shard)
         self.output_dir = output_dir
         self.max_retries = max_retries
         self.max_tokens = max_tokens
         self.temperature = temperature
+        self.raw_format_version = raw_format_version
+        self.stream_metrics = stream_metrics
+        self.partial_dir = partial_dir
+        self.dashboard = dashboard
+        self.dashboard_interval = dashboard_interval
 
         # 创建通用模型服务
         self.service = UniversalModelService(model_registry_file)
@@ -91,41 +115,31 @@ class UnifiedBatchProcessor:
 
         logger.info(f"统一批量处理器已初始化")
         logger.info(f"  Prompts文件: {prompts_file}")
-        logger.info(f"  患者记录目录: {records_dir}")
+        logger.info(f"  患者记录来源: {records_dir}")
+        if self.shard:
+            logger.info(f"  分片: {self.shard[0]}/{self.shard[1]}")
         logger.info(f"  输出目录: {output_dir}")
         logger.info(f"  使用模型: {', '.join(self.models)}")
         logger.info(f"  最大重试次数: {max_retries}")
         logger.info(f"  最大Token数: {max_tokens}")
         logger.info(f"  温度: {temperature}")
+        logger.info(f"  记录时延指标: {'是' if stream_metrics else '否'}")
+        if partial_dir:
+            logger.info(f"  部分输出目录: {partial_dir}")
 
     def load_prompts(self) -> List[str]:
         """加载所有Prompts"""
         logger.info(f"正在加载Prompts文件: {self.prompts_file}")
-        with open(self.prompts_file, 'r', encoding='utf-8') as f:
-            prompts = json.load(f)
+        prompts = json_codec.load(self.prompts_file)
         logger.info(f"成功加载 {len(prompts)} 个Prompts")
         return prompts
 
-    def load_patient_records(self) -> List[Dict[str, Any]]:
-        """加载所有患者记录"""
-        logger.info(f"正在扫描患者记录目录: {self.records_dir}")
-        records = []
-        records_path = Path(self.records_dir)
-
-        for file_path in sorted(records_path.glob("*.txt")):
-            logger.info(f"  发现患者文件: {file_path.name}")
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            patient_name = file_path.stem.replace('_问答记录', '')
-            records.append({
-                'people': patient_name,
-                'file_path': str(file_path),
-                'chat': content
-            })
-
-        logger.info(f"成功加载 {len(records)} 个患者记录")
-        return records
+    def load_patient_records(self) -> Iterator[Dict[str, Any]]:
+        """惰性加载患者记录(每次只读取一个患者)"""
+        logger.info(f"正在扫描患者记录: {self.records_dir}")
+        for record in iter_patient_records(self.records_dir, self.shard):
+            logger.info(f"  发现患者文件: {Path(record['file_path']).name}")
+            yield record
 
     async def process_single_conversation(
         self,
@@ -153,19 +167,36 @@ class UnifiedBatchProcessor:
 
         user_input = f"{prompt} \n {patient_chat}"
 
+        partial_file = None
+        if self.partial_dir:
+            partial_file = Path(self.partial_dir) / model.replace('/', '_') / patient_name / f"{conversation_num}.partial"
+
         attempt = 0
         while True:  # 无限重试直到获得非空结果
             try:
                 start_time = datetime.now()
 
                 # 使用统一模型服务调用
-                response = self.service.call(
-                    model=model,
-                    prompt=user_input,
-                    stream=False,
-                    temperature=self.temperature,
-                    max_tokens=self.max_tokens
-                )
+                metrics = None
+                if self.stream_metrics or partial_file:
+                    response, metrics = self.service.call_with_metrics(
+                        model=model,
+                        prompt=user_input,
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens,
+                        partial_file=partial_file,
+                        partial_context={'model': model, 'people': patient_name, 'conversation': conversation_num}
+                    )
+                    if not self.stream_metrics:
+                        metrics = None
+                else:
+                    response = self.service.call(
+                        model=model,
+                        prompt=user_input,
+                        stream=False,
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens
+                    )
 
                 # 如果返回为空，记录警告并重试
                 if not response or response.strip() == "":
@@ -174,6 +205,7 @@ class UnifiedBatchProcessor:
                         f"返回空内容 (第{attempt+1}次尝试)，将重试..."
                     )
                     wait_time = min(2 ** attempt, 10)  # 最多等待10秒
+                    default_progress.record_retry(self.service.get_provider(model))
                     await asyncio.sleep(wait_time)
                     attempt += 1
                     continue  # 继续重试
@@ -193,16 +225,35 @@ class UnifiedBatchProcessor:
                         f"(耗时: {duration:.2f}秒)"
                     )
 
+                data = {
+                    'model': model,
+                    'prompt': prompt,
+                    'people': patient_name,
+                    'chat': patient_chat,
+                    'Input': user_input,
+                    'Output': response
+                }
+                diagnostics = self._partial_diagnostics(partial_file)
+                if diagnostics:
+                    data['diagnostics'] = diagnostics
+                    logger.info(
+                        f"[{model}][{patient_name}] 对话 {conversation_num} "
+                        f"重试浪费生成时间 {diagnostics['wasted_generation_s']}秒, "
+                        f"丢弃输出 {diagnostics['wasted_output_chars']} 字符"
+                    )
+                if metrics is not None:
+                    metrics['attempts'] = attempt + 1
+                    data['metrics'] = metrics
+                    logger.info(
+                        f"[{model}][{patient_name}] 对话 {conversation_num} "
+                        f"TTFT: {metrics['ttft_s']}秒, "
+                        f"输出速度: {metrics['output_tokens_per_s']} tokens/秒"
+                    )
+
+                default_progress.task_finished()
                 return {
                     'index': conversation_num,
-                    'data': {
-                        'model': model,
-                        'prompt': prompt,
-                        'people': patient_name,
-                        'chat': patient_chat,
-                        'Input': user_input,
-                        'Output': response
-                    },
+                    'data': data,
                     'status': 'success',
                     'attempts': attempt + 1
                 }
@@ -220,6 +271,7 @@ class UnifiedBatchProcessor:
                     logger.info(
                         f"[{model}][{patient_name}] 将在 {wait_time} 秒后重试..."
                     )
+                    default_progress.record_retry(self.service.get_provider(model))
                     await asyncio.sleep(wait_time)
                     attempt += 1
                 else:
@@ -227,6 +279,7 @@ class UnifiedBatchProcessor:
                         f"[{model}][{patient_name}] 对话 {conversation_num} "
                         f"最终失败 (已重试{self.max_retries}次): {error_msg}"
                     )
+                    default_progress.task_finished(ok=False)
                     return {
                         'index': conversation_num,
                         'data': {
@@ -242,6 +295,31 @@ class UnifiedBatchProcessor:
                         'error': error_msg
                     }
 
+    @staticmethod
+    def _partial_diagnostics(partial_file: Optional[Path]) -> Optional[Dict[str, Any]]:
+        """
+        汇总部分输出中未完成的尝试
+
+        Args:
+            partial_file: 部分输出文件路径
+
+        Returns:
+            诊断信息字典；没有未完成的尝试时返回None
+        """
+        if partial_file is None:
+            return None
+        wasted = wasted_attempts(load_partial_meta(partial_file))
+        if not wasted:
+            return None
+        return {
+            'partial_attempts': [
+                {key: a.get(key) for key in ('attempt', 'started_at', 'elapsed_s', 'chars', 'chunks', 'error', 'file')}
+                for a in wasted
+            ],
+            'wasted_generation_s': round(sum(a.get('elapsed_s') or 0 for a in wasted), 3),
+            'wasted_output_chars': sum(a.get('chars') or 0 for a in wasted)
+        }
+
     async def process_model_patient(
         self,
         model: str,
@@ -294,30 +372,36 @@ class UnifiedBatchProcessor:
         return output_data
 
     async def process_all(self) -> List[Dict[str, Any]]:
-        """处理所有模型和患者的组合"""
+        """
+        处理所有模型和患者的组合
+
+        患者按需逐个读取，每完成一个(模型, 患者)组合立即写盘，
+        返回值只保留文件摘要信息，内存占用与患者总数无关
+        """
         prompts = self.load_prompts()
-        patients = self.load_patient_records()
 
-        total_tasks = len(self.models) * len(patients)
-        logger.info(
-            f"开始批量处理: {len(self.models)} 个模型 × "
-            f"{len(patients)} 个患者 = {total_tasks} 个文件"
+        logger.info(f"开始批量处理: {len(self.models)} 个模型 × 流式患者记录")
+
+        # 只列出患者名称(不读取内容)以确定对话总数，用于进度和ETA
+        num_patients = sum(1 for _ in iter_patient_names(self.records_dir, self.shard))
+        default_progress.start(
+            total_tasks=len(self.models) * num_patients * len(prompts),
+            title=f"批量处理: {len(self.models)} 个模型 × {num_patients} 个患者 × {len(prompts)} 个对话"
         )
 
-        # 顺序处理所有(模型, 患者)组合
+        # 外层遍历患者，使患者记录只需读取一次
         results = []
-        for model in self.models:
-            for patient in patients:
+        for patient in self.load_patient_records():
+            for model in self.models:
                 result = await self.process_model_patient(model, patient, prompts)
-                results.append(result)
+                self.save_results([result])
+                results.append({'model': result['model'], 'people': result['people']})
 
         logger.info(f"所有任务处理完成，共生成 {len(results)} 个文件")
         return results
 
     def save_results(self, results: List[Dict[str, Any]]):
         """保存结果到独立的JSON文件"""
-        logger.info(f"开始保存结果文件到: {self.output_dir}")
-
         for result in results:
             model = result['model']
             people = result['people']
@@ -326,13 +410,10 @@ class UnifiedBatchProcessor:
             filename = f"{safe_model_name}-{people}.json"
             filepath = os.path.join(self.output_dir, filename)
 
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=4)
+            save_raw_report(result, filepath, self.raw_format_version)
 
             logger.info(f"  已保存: {filename}")
 
-        logger.info(f"所有结果已保存到: {self.output_dir}")
-
     async def run(self):
         """运行批量处理"""
         logger.info("=" * 80)
@@ -340,8 +421,9 @@ class UnifiedBatchProcessor:
         logger.info("=" * 80)
 
         total_start = datetime.now()
-        results = await self.process_all()
-        self.save_results(results)
+        with ProgressDashboard(default_progress, self.dashboard,
+                               log_interval_s=self.dashboard_interval, log=logger.info):
+            results = await self.process_all()
 
         total_end = datetime.now()
         total_duration = (total_end - total_start).total_seconds()
@@ -350,6 +432,11 @@ class UnifiedBatchProcessor:
         logger.info("批量处理任务完成")
         logger.info(f"生成文件数: {len(results)}")
         logger.info(f"总耗时: {total_duration:.2f}秒")
+        coalesced = self.service.single_flight_stats()
+        logger.info(
+            f"请求合并: 命中 {coalesced['shared']}/{coalesced['calls']} 次, "
+            f"实际API调用 {coalesced['executions']} 次"
+        )
         logger.info(f"输出目录: {self.output_dir}")
         logger.info("=" * 80)
 
@@ -358,14 +445,19 @@ class UnifiedBatchProcessor:
 
 def load_config(config_file: str = "unified_batch_config.json") -> Dict[str, Any]:
     """加载配置文件"""
-    with open(config_file, 'r', encoding='utf-8') as f:
-        config = json.load(f)
-    return config
+    return json_codec.load(config_file)
 
 
-async def main(config_file: str = "unified_batch_config.json"):
-    """主函数"""
+async def main(config_file: str = "unified_batch_config.json", shard: Optional[str] = None):
+    """
+    主函数
+
+    Args:
+        config_file: 配置文件路径
+        shard: 分片参数 "i/N"，覆盖配置中的 shard
+    """
     config = load_config(config_file)
+    shard = shard or config.get("shard")
 
     setup_logging(
         log_file=config.get("log_file", "unified_batch.log"),
@@ -379,12 +471,17 @@ async def main(config_file: str = "unified_batch_config.json"):
     print(f"配置信息:")
     print(f"  配置文件: {config_file}")
     print(f"  Prompts文件: {config['prompts_file']}")
-    print(f"  患者记录目录: {config['records_dir']}")
+    print(f"  患者记录来源: {config['records_dir']}")
+    if shard:
+        print(f"  分片: {shard}")
     print(f"  输出目录: {config['output_dir']}")
     print(f"  使用模型: {', '.join(config['models'])}")
     print(f"  最大重试次数: {config.get('max_retries', 3)}")
     print(f"  最大Token数: {config.get('max_tokens', 2000)}")
     print(f"  温度: {config.get('temperature', 0.3)}")
+    print(f"  记录时延指标: {'是' if config.get('stream_metrics', False) else '否'}")
+    if config.get('partial_dir'):
+        print(f"  部分输出目录: {config['partial_dir']}")
     print()
 
     processor = UnifiedBatchProcessor(
@@ -395,7 +492,13 @@ async def main(config_file: str = "unified_batch_config.json"):
         max_retries=config.get('max_retries', 3),
         max_tokens=config.get('max_tokens', 2000),
         temperature=config.get('temperature', 0.3),
-        model_registry_file=config.get('model_registry_file', 'model_registry.json')
+        model_registry_file=config.get('model_registry_file', 'model_registry.json'),
+        shard=shard,
+        raw_format_version=config.get('raw_format_version', FORMAT_V2),
+        stream_metrics=config.get('stream_metrics', False),
+        partial_dir=config.get('partial_dir'),
+        dashboard=config.get('dashboard', 'off'),
+        dashboard_interval=config.get('dashboard_interval', 30.0)
     )
 
     results = await processor.run()
@@ -412,4 +515,17 @@ async def main(config_file: str = "unified_batch_config.json"):
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="统一批量处理系统")
+    parser.add_argument(
+        "--config",
+        default="unified_batch_config.json",
+        help="配置文件路径"
+    )
+    parser.add_argument(
+        "--shard",
+        default=None,
+        help="只处理指定分片的患者，格式 i/N (0 <= i < N)"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(main(args.config, args.shard))
@@ -2,12 +2,13 @@
 核心服务模块 - Core Services
 提供统一的AI模型调用接口和基础客户端
 """
-from .model_service import UniversalModelService, ModelRegistry, create_service, call_model
+from .model_service import UniversalModelService, ModelRegistry, BatchCallResult, create_service, call_model
 from .chat_client import ChatClient, ConversationManager, Message
 
 __all__ = [
     'UniversalModelService',
     'ModelRegistry',
+    'BatchCallResult',
     'create_service',
     'call_model',
     'ChatClient',
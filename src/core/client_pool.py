@@ -0,0 +1,332 @@
+"""
+客户端连接池 - Client Pool
+按 (base_url, API Key) 共享 OpenAI 同步/异步客户端及其底层 httpx 连接池
+
+同一接口地址上的多个模型(如 JieKou AI 的全部模型)共用一个连接池，
+并发调用多个模型时可以复用 keep-alive 连接，而不是每个模型各建一套连接。
+每个模型的超时时间通过 with_options 派生，派生出的客户端仍共享同一连接池。
+
+模型注册表中可选的超时配置:
+    "timeout": 120                                        # 总超时(秒)
+    "timeout": {"connect": 10, "read": 120, "write": 30, "pool": 10}
+"""
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+
+import httpx
+from openai import OpenAI, AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 60.0
+
+
+def http2_available() -> bool:
+    """是否安装了 HTTP/2 所需的 h2 包"""
+    return importlib.util.find_spec("h2") is not None
+
+
+def build_timeout(value: Union[None, float, int, Dict[str, float]], default: float = DEFAULT_TIMEOUT) -> httpx.Timeout:
+    """
+    将注册表中的超时配置转换为 httpx.Timeout
+
+    Args:
+        value: 秒数、{connect, read, write, pool} 字典或None
+        default: 未配置时使用的超时(秒)
+
+    Returns:
+        httpx.Timeout 实例
+    """
+    if value is None:
+        return httpx.Timeout(default)
+    if isinstance(value, dict):
+        total = value.get("total", default)
+        return httpx.Timeout(
+            total,
+            connect=value.get("connect", total),
+            read=value.get("read", total),
+            write=value.get("write", total),
+            pool=value.get("pool", total)
+        )
+    return httpx.Timeout(float(value))
+
+
+async def _close_on_loop_shutdown(client: AsyncOpenAI):
+    """
+    在事件循环关闭前关闭异步客户端
+
+    作为异步生成器在客户端所属的循环中启动后停在 yield；asyncio.run 结束时
+    loop.shutdown_asyncgens() 会关闭它，finally 中的 close() 仍在该循环中执行
+    (客户端已关闭时再次 close() 没有影响)
+    """
+    try:
+        yield
+    finally:
+        await client.close()
+
+
+class _PoolEntry:
+    """同一 (base_url, API Key) 下共享的客户端及请求计数"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.models = set()
+        self.sync_client: Optional[OpenAI] = None
+        self.async_client: Optional[AsyncOpenAI] = None
+        self.async_loop = None
+        self.async_closer = None
+        self.requests = 0
+        self.responses = 0
+        self.errors = 0
+        self.status_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def on_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def on_response(self, status_code: int):
+        with self._lock:
+            self.responses += 1
+            key = f"{status_code // 100}xx"
+            self.status_counts[key] = self.status_counts.get(key, 0) + 1
+            if status_code >= 400:
+                self.errors += 1
+
+
+class ClientPool:
+    """OpenAI 客户端池，按 (base_url, API Key) 复用客户端和连接"""
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: Optional[bool] = None
+    ):
+        """
+        初始化客户端池
+
+        Args:
+            max_connections: 每个接口地址的最大连接数
+            max_keepalive_connections: 每个接口地址保持的最大空闲连接数
+            keepalive_expiry: 空闲连接保持时间(秒)
+            http2: 是否启用HTTP/2，None 表示安装了 h2 时自动启用
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        if http2 is None:
+            http2 = http2_available()
+        elif http2 and not http2_available():
+            logger.warning("未安装 h2，HTTP/2 不可用，回退到 HTTP/1.1 (pip install 'httpx[http2]')")
+            http2 = False
+        self.http2 = http2
+        self._entries: Dict[Tuple[str, str], _PoolEntry] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(base_url: Optional[str], api_key: str) -> Tuple[str, str]:
+        # 只保存密钥的哈希，统计信息中不会泄露密钥；未配置 base_url 时由SDK使用默认地址
+        return (base_url or "").rstrip("/"), hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+    def _entry(self, base_url: Optional[str], api_key: str) -> _PoolEntry:
+        key = self._key(base_url, api_key)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = _PoolEntry(key[0])
+            return self._entries[key]
+
+    def get_client(
+        self,
+        base_url: Optional[str],
+        api_key: str,
+        timeout: Union[None, float, Dict[str, float]] = None,
+        model_name: Optional[str] = None
+    ) -> OpenAI:
+        """
+        获取同步客户端
+
+        Args:
+            base_url: API 基础URL（None表示SDK默认地址）
+            api_key: API Key
+            timeout: 该模型的超时配置
+            model_name: 模型名称(仅用于统计)
+
+        Returns:
+            共享连接池的 OpenAI 客户端
+        """
+        entry = self._entry(base_url, api_key)
+        with entry._lock:
+            if model_name:
+                entry.models.add(model_name)
+            if entry.sync_client is None:
+                http_client = httpx.Client(
+                    limits=self.limits,
+                    http2=self.http2,
+                    timeout=build_timeout(None),
+                    event_hooks={
+                        "request": [lambda request: entry.on_request()],
+                        "response": [lambda response: entry.on_response(response.status_code)]
+                    }
+                )
+                entry.sync_client = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+                logger.info(f"已创建共享客户端: {entry.base_url} (HTTP/2: {self.http2})")
+            client = entry.sync_client
+
+        return client.with_options(timeout=build_timeout(timeout))
+
+    def get_async_client(
+        self,
+        base_url: Optional[str],
+        api_key: str,
+        timeout: Union[None, float, Dict[str, float]] = None,
+        model_name: Optional[str] = None
+    ) -> AsyncOpenAI:
+        """
+        获取异步客户端
+
+        Args:
+            base_url: API 基础URL（None表示SDK默认地址）
+            api_key: API Key
+            timeout: 该模型的超时配置
+            model_name: 模型名称(仅用于统计)
+
+        Returns:
+            共享连接池的 AsyncOpenAI 客户端
+        """
+        entry = self._entry(base_url, api_key)
+
+        async def on_request(request):
+            entry.on_request()
+
+        async def on_response(response):
+            entry.on_response(response.status_code)
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        with entry._lock:
+            if model_name:
+                entry.models.add(model_name)
+            # httpx 异步连接绑定事件循环，循环变化(如多次 asyncio.run)时重建客户端
+            if entry.async_client is None or (loop is not None and entry.async_loop not in (None, loop)):
+                self._close_stale_async_client(entry)
+                http_client = httpx.AsyncClient(
+                    limits=self.limits,
+                    http2=self.http2,
+                    timeout=build_timeout(None),
+                    event_hooks={"request": [on_request], "response": [on_response]}
+                )
+                entry.async_client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+                entry.async_loop = loop
+                if loop is not None:
+                    # 生成器由循环弱引用管理，这里保留强引用
+                    entry.async_closer = _close_on_loop_shutdown(entry.async_client)
+                    loop.create_task(entry.async_closer.__anext__())
+                logger.info(f"已创建共享异步客户端: {entry.base_url} (HTTP/2: {self.http2})")
+            client = entry.async_client
+
+        return client.with_options(timeout=build_timeout(timeout))
+
+    @staticmethod
+    def _close_stale_async_client(entry: _PoolEntry):
+        """
+        释放绑定在旧事件循环上的异步客户端
+
+        旧循环由 asyncio.run 管理时，循环结束前已由 _close_on_loop_shutdown 关闭；
+        旧循环仍在其他线程运行时，在该循环中调度关闭
+        """
+        old_client, old_loop = entry.async_client, entry.async_loop
+        entry.async_client = entry.async_loop = entry.async_closer = None
+        if old_client is None or old_loop is None or old_loop.is_closed():
+            return
+        if old_loop.is_running():
+            asyncio.run_coroutine_threadsafe(old_client.close(), old_loop)
+        else:
+            logger.warning(f"旧事件循环未关闭也未运行，无法关闭其异步客户端: {entry.base_url}")
+
+    @staticmethod
+    def _connection_stats(client: Any) -> Dict[str, int]:
+        """读取 httpcore 连接池中的连接状态（内部结构不可用时返回空）"""
+        try:
+            pool = client._client._transport._pool
+            connections = list(pool.connections)
+        except AttributeError:
+            return {}
+        return {
+            "open": len(connections),
+            "idle": sum(1 for c in connections if c.is_idle()),
+            "http2": sum(1 for c in connections if getattr(c, "_connection", None) is not None
+                         and type(c._connection).__name__.startswith("HTTP2"))
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取连接池统计
+
+        Returns:
+            {"limits": {...}, "http2": bool, "pools": [每个接口地址的统计, ...]}
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+
+        pools = []
+        for entry in entries:
+            with entry._lock:
+                item = {
+                    "base_url": entry.base_url,
+                    "models": sorted(entry.models),
+                    "requests": entry.requests,
+                    "responses": entry.responses,
+                    "in_flight": entry.requests - entry.responses,
+                    "errors": entry.errors,
+                    "status": dict(entry.status_counts)
+                }
+            if entry.sync_client is not None:
+                item["sync_connections"] = self._connection_stats(entry.sync_client)
+            if entry.async_client is not None:
+                item["async_connections"] = self._connection_stats(entry.async_client)
+            pools.append(item)
+
+        return {
+            "limits": {
+                "max_connections": self.limits.max_connections,
+                "max_keepalive_connections": self.limits.max_keepalive_connections,
+                "keepalive_expiry": self.limits.keepalive_expiry
+            },
+            "http2": self.http2,
+            "pools": pools
+        }
+
+    def close(self):
+        """关闭所有同步客户端(异步客户端需在事件循环中调用 aclose)"""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            if entry.sync_client is not None:
+                entry.sync_client.close()
+
+    async def aclose(self):
+        """关闭所有客户端"""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            if entry.sync_client is not None:
+                entry.sync_client.close()
+            if entry.async_client is not None:
+                await entry.async_client.close()
+
+
+# 进程内共享的默认连接池
+default_pool = ClientPool()
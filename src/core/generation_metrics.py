@@ -0,0 +1,172 @@
+"""
+生成时延指标 - Generation Metrics
+记录流式调用的首Token时延(TTFT)、Token间时延、输出速度和usage，并汇总为时延排行榜
+"""
+import math
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    计算百分位数（线性插值）
+
+    Args:
+        values: 数值列表
+        pct: 百分位 (0-100)
+
+    Returns:
+        百分位数值；列表为空时返回0
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def usage_to_dict(usage: Any) -> Optional[Dict[str, int]]:
+    """将SDK返回的usage对象转换为字典"""
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        data = usage
+    elif hasattr(usage, "model_dump"):
+        data = usage.model_dump()
+    else:
+        data = vars(usage)
+    return {
+        key: data[key]
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens")
+        if data.get(key) is not None
+    }
+
+
+class StreamMetrics:
+    """单次流式调用的时延记录器"""
+
+    def __init__(self, clock=time.perf_counter):
+        """
+        初始化记录器，以创建时刻作为请求开始时间
+
+        Args:
+            clock: 单调时钟函数
+        """
+        self._clock = clock
+        self.start_time = clock()
+        self.end_time: Optional[float] = None
+        self.chunk_times: List[float] = []
+        self.output_chars = 0
+        self.usage: Optional[Dict[str, int]] = None
+
+    def on_content(self, text: str):
+        """收到一段输出内容"""
+        self.chunk_times.append(self._clock())
+        self.output_chars += len(text)
+
+    def on_usage(self, usage: Any):
+        """收到usage统计（通常在最后一个chunk中）"""
+        self.usage = usage_to_dict(usage)
+
+    def finish(self):
+        """流结束"""
+        if self.end_time is None:
+            self.end_time = self._clock()
+
+    @property
+    def ttft(self) -> Optional[float]:
+        """首Token时延（秒）"""
+        if not self.chunk_times:
+            return None
+        return self.chunk_times[0] - self.start_time
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        导出指标
+
+        Returns:
+            指标字典，output_tokens 优先取usage，否则以chunk数估算
+        """
+        self.finish()
+        total = self.end_time - self.start_time
+
+        gaps = [b - a for a, b in zip(self.chunk_times, self.chunk_times[1:])]
+
+        usage_estimated = not (self.usage and self.usage.get("completion_tokens"))
+        output_tokens = len(self.chunk_times) if usage_estimated else self.usage["completion_tokens"]
+
+        # 输出速度按首Token之后的生成时间计算，不含排队和预填充
+        generation_time = self.end_time - self.chunk_times[0] if self.chunk_times else 0.0
+        tokens_per_s = (output_tokens - 1) / generation_time if generation_time > 0 and output_tokens > 1 else 0.0
+        itl_mean = generation_time / (output_tokens - 1) if output_tokens > 1 else 0.0
+
+        return {
+            "ttft_s": round(self.ttft, 4) if self.ttft is not None else None,
+            "total_s": round(total, 4),
+            "inter_token_latency_s": {
+                "mean": round(itl_mean, 5),
+                "p50": round(percentile(gaps, 50), 5),
+                "p95": round(percentile(gaps, 95), 5)
+            },
+            "output_tokens": output_tokens,
+            "output_tokens_per_s": round(tokens_per_s, 2),
+            "output_chars": self.output_chars,
+            "chunks": len(self.chunk_times),
+            "usage": self.usage,
+            "usage_estimated": usage_estimated
+        }
+
+
+def build_latency_leaderboard(metrics_by_model: Dict[str, Iterable[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    汇总各模型的调用指标，生成时延排行榜（按TTFT中位数升序）
+
+    Args:
+        metrics_by_model: {模型名: [StreamMetrics.to_dict() 结果, ...]}
+
+    Returns:
+        排行榜列表
+    """
+    leaderboard = []
+    for model, records in metrics_by_model.items():
+        series = defaultdict(list)
+        total_tokens = 0
+        calls = 0
+        for record in records:
+            calls += 1
+            if record.get("ttft_s") is not None:
+                series["ttft"].append(record["ttft_s"])
+            series["total"].append(record.get("total_s", 0))
+            if record.get("output_tokens_per_s"):
+                series["tps"].append(record["output_tokens_per_s"])
+            itl = (record.get("inter_token_latency_s") or {}).get("mean")
+            if itl:
+                series["itl"].append(itl)
+            total_tokens += record.get("output_tokens", 0)
+
+        if not calls:
+            continue
+
+        leaderboard.append({
+            "model": model,
+            "calls": calls,
+            "ttft_p50_s": round(percentile(series["ttft"], 50), 3),
+            "ttft_p95_s": round(percentile(series["ttft"], 95), 3),
+            "total_p50_s": round(percentile(series["total"], 50), 3),
+            "total_p95_s": round(percentile(series["total"], 95), 3),
+            "inter_token_latency_mean_s": round(sum(series["itl"]) / len(series["itl"]), 5) if series["itl"] else 0,
+            "output_tokens_per_s_p50": round(percentile(series["tps"], 50), 2),
+            "output_tokens": total_tokens
+        })
+
+    # 没有TTFT数据(全部调用无输出)的模型排在最后
+    leaderboard.sort(key=lambda x: (x["ttft_p50_s"] == 0, x["ttft_p50_s"]))
+    for rank, entry in enumerate(leaderboard, 1):
+        entry["rank"] = rank
+
+    return leaderboard
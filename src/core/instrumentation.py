@@ -0,0 +1,389 @@
+"""
+阶段计时 - Instrumentation
+用上下文管理器或装饰器标记流程中的各个阶段(加载报告、格式化Prompt、API调用、解析响应、写文件等)，
+按 (阶段, 标签) 记录耗时直方图，运行结束后输出汇总表和指标文件(Prometheus文本格式或JSON)
+
+默认关闭，关闭时 span() 直接返回共享的空上下文，开销只有一次属性判断:
+
+    from src.core.instrumentation import default_instrumentation as instr
+
+    with instr.span("api_call", model="gpt-5.1", provider="jiekou", dimension="准确性"):
+        ...
+
+    @instr.timed("aggregate")
+    def aggregate(...): ...
+
+    instr.enable()
+    ...
+    print(instr.summary_table())
+    instr.write_metrics("output/metrics.prom")
+"""
+import bisect
+import functools
+import math
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from src.utils import json_codec
+
+# 直方图桶上界(秒)，覆盖从本地解析(亚毫秒)到长推理调用(分钟级)
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0
+)
+
+METRIC_NAME = "stage_duration_seconds"
+ERROR_METRIC_NAME = "stage_errors_total"
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+# 监听器: (阶段, 标签, 耗时秒, 错误信息或None)
+Listener = Callable[[str, Dict[str, str], float, Optional[str]], None]
+
+
+class Histogram:
+    """固定桶的耗时直方图"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个为 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.errors = 0
+
+    def observe(self, seconds: float, error: bool = False):
+        """记录一次耗时"""
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        if error:
+            self.errors += 1
+
+    def merge(self, other: "Histogram"):
+        """合并另一个相同桶的直方图"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.errors += other.errors
+
+    def quantile(self, q: float) -> float:
+        """
+        由桶计数估算分位数（桶内线性插值，结果在观测到的最小值和最大值之间）
+
+        Args:
+            q: 分位 (0-1)
+
+        Returns:
+            估算的耗时(秒)；无数据时返回0
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for i, count in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.max
+            if count and cumulative + count >= rank:
+                # 桶边界收窄到观测到的最小/最大值，样本集中在单个桶时估算更准确
+                low, high = max(lower, self.min), min(upper, self.max)
+                return low + (high - low) * (rank - cumulative) / count
+            cumulative += count
+            lower = upper
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出为字典"""
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "min": round(self.min, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+            "p50": round(self.quantile(0.50), 6),
+            "p95": round(self.quantile(0.95), 6),
+            "p99": round(self.quantile(0.99), 6),
+            "buckets": {
+                **{str(bound): count for bound, count in zip(self.buckets, self._cumulative())},
+                "+Inf": self.count
+            }
+        }
+
+    def _cumulative(self) -> List[int]:
+        total = 0
+        result = []
+        for count in self.counts[:-1]:
+            total += count
+            result.append(total)
+        return result
+
+
+class _NoopSpan:
+    """关闭时使用的空上下文"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **labels):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """一次阶段计时"""
+
+    __slots__ = ("_owner", "stage", "labels", "_start")
+
+    def __init__(self, owner: "Instrumentation", stage: str, labels: Dict[str, Any]):
+        self._owner = owner
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self) -> "Span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        error = f"{exc_type.__name__}: {exc}" if exc_type is not None else None
+        self._owner.observe(self.stage, elapsed, error=error, **self.labels)
+        return False
+
+    def set(self, **labels):
+        """在阶段内补充标签(如调用结束后才知道的状态)"""
+        self.labels.update(labels)
+
+
+class Instrumentation:
+    """阶段耗时记录器（线程安全）"""
+
+    def __init__(self, enabled: bool = False, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        初始化记录器
+
+        Args:
+            enabled: 是否启用
+            buckets: 直方图桶上界(秒)
+        """
+        self.enabled = enabled
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms: Dict[LabelKey, Histogram] = {}
+        self._listeners: List[Listener] = []
+
+    def enable(self):
+        """启用计时"""
+        self.enabled = True
+
+    def disable(self):
+        """关闭计时（已记录的数据保留）"""
+        self.enabled = False
+
+    def reset(self):
+        """清空已记录的数据"""
+        with self._lock:
+            self._histograms.clear()
+
+    def add_listener(self, listener: Listener):
+        """注册监听器，每次阶段结束时调用（在记录线程中执行，应尽量轻量）"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Listener):
+        """移除监听器"""
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def span(self, stage: str, **labels) -> Union[Span, _NoopSpan]:
+        """
+        创建阶段计时上下文
+
+        Args:
+            stage: 阶段名称
+            **labels: 标签(模型、维度、提供商等)，值会转为字符串
+
+        Returns:
+            上下文管理器；关闭时为共享的空上下文
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, stage, labels)
+
+    def timed(self, stage: str, **labels) -> Callable:
+        """
+        装饰器: 为函数的每次调用计时（是否启用在调用时判断）
+
+        Args:
+            stage: 阶段名称
+            **labels: 固定标签
+        """
+        def decorator(fn: Callable) -> Callable:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with Span(self, stage, dict(labels)):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, stage: str, seconds: float, error: Optional[str] = None, **labels):
+        """
+        直接记录一次耗时
+
+        Args:
+            stage: 阶段名称
+            seconds: 耗时(秒)
+            error: 错误信息(阶段失败时)
+            **labels: 标签
+        """
+        str_labels = {k: str(v) for k, v in labels.items() if v is not None}
+        key = (stage, tuple(sorted(str_labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds, error=error is not None)
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            listener(stage, str_labels, seconds, error)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        导出所有直方图
+
+        Returns:
+            [{"stage", "labels", "count", "errors", "sum", "mean", "p50", "p95", "p99", "buckets", ...}]
+        """
+        with self._lock:
+            items = sorted(self._histograms.items())
+            return [{"stage": stage, "labels": dict(labels), **h.to_dict()} for (stage, labels), h in items]
+
+    def stage_totals(self) -> Dict[str, Histogram]:
+        """按阶段合并所有标签组合的直方图"""
+        totals: Dict[str, Histogram] = {}
+        with self._lock:
+            for (stage, _), histogram in self._histograms.items():
+                totals.setdefault(stage, Histogram(self.buckets)).merge(histogram)
+        return totals
+
+    def summary_table(self, group_by: Optional[str] = None, stages: Optional[List[str]] = None) -> str:
+        """
+        生成汇总表
+
+        Args:
+            group_by: 额外按该标签分组(如 provider)，None表示只按阶段汇总
+            stages: 只包含这些阶段（None表示全部）
+
+        Returns:
+            表格文本，按总耗时降序
+        """
+        if group_by is None:
+            rows = [(stage, h) for stage, h in self.stage_totals().items() if stages is None or stage in stages]
+        else:
+            grouped: Dict[str, Histogram] = {}
+            with self._lock:
+                for (stage, labels), histogram in self._histograms.items():
+                    if stages is not None and stage not in stages:
+                        continue
+                    name = f"{stage}[{dict(labels).get(group_by, '-')}]"
+                    grouped.setdefault(name, Histogram(self.buckets)).merge(histogram)
+            rows = list(grouped.items())
+
+        rows.sort(key=lambda row: row[1].sum, reverse=True)
+        grand_total = sum(h.sum for _, h in rows) or 1.0
+        width = max([len("阶段")] + [len(name) for name, _ in rows]) + 2
+
+        lines = [
+            f"{'阶段':<{width - 2}}{'次数':>8}{'失败':>6}{'总耗时(s)':>12}{'占比':>8}"
+            f"{'平均(ms)':>11}{'p50(ms)':>10}{'p95(ms)':>10}{'最大(ms)':>11}"
+        ]
+        for name, h in rows:
+            lines.append(
+                f"{name:<{width}}{h.count:>8}{h.errors:>6}{h.sum:>12.3f}{h.sum / grand_total:>8.1%}"
+                f"{h.sum / h.count * 1000 if h.count else 0:>11.2f}{h.quantile(0.5) * 1000:>10.2f}"
+                f"{h.quantile(0.95) * 1000:>10.2f}{h.max * 1000:>11.2f}"
+            )
+        return "\n".join(lines)
+
+    def to_prometheus(self, prefix: str = "") -> str:
+        """
+        导出为 Prometheus 文本格式
+
+        Args:
+            prefix: 指标名前缀(如 "cross_eval_")
+
+        Returns:
+            指标文本
+        """
+        name = f"{prefix}{METRIC_NAME}"
+        error_name = f"{prefix}{ERROR_METRIC_NAME}"
+        lines = [
+            f"# HELP {name} Duration of pipeline stages in seconds.",
+            f"# TYPE {name} histogram"
+        ]
+        errors = []
+        for item in self.snapshot():
+            labels = {"stage": item["stage"], **item["labels"]}
+            for bound, count in item["buckets"].items():
+                lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {item['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {item['count']}")
+            errors.append(f"{error_name}{_format_labels(labels)} {item['errors']}")
+
+        lines.append(f"# HELP {error_name} Number of failed pipeline stages.")
+        lines.append(f"# TYPE {error_name} counter")
+        lines.extend(errors)
+        return "\n".join(lines) + "\n"
+
+    def to_json(self) -> Dict[str, Any]:
+        """导出为JSON结构"""
+        return {
+            "generated_at": datetime.now().isoformat(),
+            "stages": {stage: h.to_dict() for stage, h in sorted(self.stage_totals().items())},
+            "series": self.snapshot()
+        }
+
+    def write_metrics(self, file_path: Union[str, Path]) -> Path:
+        """
+        写出指标文件，.prom/.txt 后缀为 Prometheus 文本格式，其他为JSON
+
+        Args:
+            file_path: 输出路径
+
+        Returns:
+            输出路径
+        """
+        file_path = Path(file_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        if file_path.suffix in (".prom", ".txt"):
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(self.to_prometheus())
+        else:
+            json_codec.dump(self.to_json(), file_path, pretty=True)
+        return file_path
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    def escape(value: str) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
+
+
+# 进程级默认实例（默认关闭）
+default_instrumentation = Instrumentation()
@@ -7,14 +7,25 @@
 - 统一的输入输出接口
 - 支持所有模型(JieKou AI、百川、豆包、Kimi、Qwen等)
 - 智能配置管理
+- 同一接口地址的模型共享连接池(见 client_pool)
+- 相同的并发非流式请求合并为一次上游调用(见 single_flight)
 """
 import os
-import json
-from typing import Dict, Any, Optional, List, Iterator, Union
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Optional, List, Iterator, Union, Tuple
 from pathlib import Path
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import logging
 
+from src.core.client_pool import ClientPool, default_pool
+from src.core.generation_metrics import StreamMetrics
+from src.core.partial_output import PartialOutput
+from src.core.progress import default_progress, usage_tokens
+from src.core.single_flight import SingleFlight, default_single_flight, request_key
+from src.utils import json_codec
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,8 +50,7 @@ class ModelRegistry:
             self._save_registry(default_registry)
             return default_registry
 
-        with open(self.registry_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return json_codec.load(self.registry_file)
 
     def _create_default_registry(self) -> Dict[str, Dict[str, Any]]:
         """创建默认模型注册表"""
@@ -126,8 +136,7 @@ class ModelRegistry:
 
     def _save_registry(self, registry: Dict[str, Dict[str, Any]]):
         """保存模型注册表"""
-        with open(self.registry_file, 'w', encoding='utf-8') as f:
-            json.dump(registry, f, ensure_ascii=False, indent=2)
+        json_codec.dump(registry, self.registry_file, pretty=True)
 
     def get_model_config(self, model_name: str) -> Dict[str, Any]:
         """
@@ -202,6 +211,51 @@ class ModelRegistry:
         return sorted(list(providers))
 
 
+class BatchCallResult:
+    """批量调用中单个提示词的结果，失败时携带错误信息而不是抛出异常"""
+
+    def __init__(
+        self,
+        index: int,
+        prompt: str,
+        output: Optional[str] = None,
+        error: Optional[str] = None,
+        duration: float = 0.0
+    ):
+        """
+        Args:
+            index: 提示词在输入列表中的位置
+            prompt: 提示词
+            output: 模型响应(失败时为None)
+            error: 错误信息(成功时为None)
+            duration: 调用耗时(秒)
+        """
+        self.index = index
+        self.prompt = prompt
+        self.output = output
+        self.error = error
+        self.duration = duration
+
+    @property
+    def ok(self) -> bool:
+        """是否调用成功"""
+        return self.error is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式"""
+        return {
+            "index": self.index,
+            "prompt": self.prompt,
+            "output": self.output,
+            "error": self.error,
+            "duration": self.duration
+        }
+
+    def __repr__(self) -> str:
+        status = "ok" if self.ok else f"error={self.error!r}"
+        return f"BatchCallResult(index={self.index}, {status}, duration={self.duration:.2f}s)"
+
+
 class UniversalModelService:
     """
     通用模型服务 - 统一的模型调用接口
@@ -224,22 +278,45 @@ class UniversalModelService:
         ):
             print(chunk, end="")
 
-        # 方法3: 批量调用
+        # 方法3: 批量调用(并发，单个失败不影响其他)
         results = service.batch_call(
             model="Baichuan4",
-            prompts=["问题1", "问题2", "问题3"]
+            prompts=["问题1", "问题2", "问题3"],
+            max_concurrency=4
         )
+        for r in results:
+            print(r.output if r.ok else r.error)
+
+        # 方法4: 按完成顺序逐个获取结果
+        for r in service.imap_call("gpt-5.1", prompts, max_concurrency=8):
+            print(r.index, r.output)
+
+        # 方法5: 异步批量调用
+        results = await service.abatch_call("gpt-5.1", prompts, max_concurrency=8)
     """
 
-    def __init__(self, registry_file: str = "model_registry.json"):
+    def __init__(
+        self,
+        registry_file: str = "model_registry.json",
+        pool: Optional[ClientPool] = None,
+        single_flight: Optional[SingleFlight] = None,
+        coalesce: bool = True
+    ):
         """
         初始化通用模型服务
 
         Args:
             registry_file: 模型注册表文件路径
+            pool: 客户端连接池(默认使用进程内共享的连接池)
+            single_flight: 请求合并器(默认使用进程内共享的合并器)
+            coalesce: 是否合并相同的并发非流式请求
         """
         self.registry = ModelRegistry(registry_file)
+        self.pool = pool or default_pool
+        self.single_flight = single_flight or default_single_flight
+        self.coalesce = coalesce
         self.clients = {}  # 缓存客户端实例
+        self.async_clients = {}  # 手动指定的异步客户端(默认从连接池获取)
         logger.info(f"通用模型服务已初始化")
         logger.info(f"已加载 {len(self.registry.list_models())} 个模型")
         logger.info(f"支持提供商: {', '.join(self.registry.list_providers())}")
@@ -268,11 +345,12 @@ class UniversalModelService:
                 f"API Key 未配置。请设置环境变量: {config['api_key_env']}"
             )
 
-        # 创建客户端
-        client = OpenAI(
-            api_key=api_key,
-            base_url=config["base_url"],
-            timeout=60.0
+        # 同一 base_url + API Key 的模型共享连接池
+        client = self.pool.get_client(
+            config["base_url"],
+            api_key,
+            timeout=config.get("timeout"),
+            model_name=model_name
         )
 
         # 缓存客户端
@@ -281,6 +359,34 @@ class UniversalModelService:
 
         return client
 
+    def _get_async_client(self, model_name: str) -> AsyncOpenAI:
+        """
+        获取或创建模型对应的异步客户端
+
+        Args:
+            model_name: 模型名称
+
+        Returns:
+            AsyncOpenAI 客户端实例
+        """
+        if model_name in self.async_clients:
+            return self.async_clients[model_name]
+
+        config = self.registry.get_model_config(model_name)
+        api_key = os.getenv(config["api_key_env"])
+        if not api_key:
+            raise ValueError(
+                f"API Key 未配置。请设置环境变量: {config['api_key_env']}"
+            )
+
+        # 不在服务中缓存: 连接池会在事件循环变化时重建异步客户端
+        return self.pool.get_async_client(
+            config["base_url"],
+            api_key,
+            timeout=config.get("timeout"),
+            model_name=model_name
+        )
+
     def call(
         self,
         model: str,
@@ -308,15 +414,62 @@ class UniversalModelService:
             如果stream=True,返回迭代器
         """
         client = self._get_client(model)
+        params = self._build_params(
+            model, prompt, system_prompt, stream, temperature, max_tokens, **kwargs
+        )
+
+        logger.info(f"调用模型: {model}, stream={stream}")
+
+        def create():
+            if stream:
+                return self._handle_stream(client.chat.completions.create(**params))
+            with default_progress.call(self.get_provider(model)) as tracked:
+                response = client.chat.completions.create(**params)
+                tracked.tokens = usage_tokens(getattr(response, "usage", None))
+            return response.choices[0].message.content or ""
+
+        try:
+            # 流式响应只能被一个调用方消费，不参与合并
+            if stream or not self.coalesce:
+                return create()
+            return self.single_flight.do(request_key(**params), create)
+
+        except Exception as e:
+            logger.error(f"模型调用失败 ({model}): {str(e)}")
+            raise
 
-        # 构建消息
+    def get_provider(self, model: str) -> str:
+        """
+        获取模型所属提供商（用于进度统计）
+
+        Args:
+            model: 模型名称
+
+        Returns:
+            提供商名称；未注册时返回 "unknown"
+        """
+        try:
+            return self.registry.get_model_config(model)["provider"]
+        except ValueError:
+            return "unknown"
+
+    def _build_params(
+        self,
+        model: str,
+        prompt: str,
+        system_prompt: Optional[str],
+        stream: bool,
+        temperature: float,
+        max_tokens: int,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """构建 chat.completions.create 的请求参数"""
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
 
-        # 准备参数
-        params = {
+        return {
             "model": model,
             "messages": messages,
             "stream": stream,
@@ -325,35 +478,222 @@ class UniversalModelService:
             **kwargs
         }
 
-        logger.info(f"调用模型: {model}, stream={stream}")
+    def _handle_stream(self, response, metrics: Optional[StreamMetrics] = None) -> Iterator[str]:
+        """
+        处理流式响应
+
+        Args:
+            response: 流式响应对象
+            metrics: 可选的时延记录器，记录每个chunk的到达时间和usage
+        """
+        for chunk in response:
+            if metrics is not None and getattr(chunk, "usage", None):
+                metrics.on_usage(chunk.usage)
+            if chunk.choices and len(chunk.choices) > 0:
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    if metrics is not None:
+                        metrics.on_content(delta.content)
+                    yield delta.content
+        if metrics is not None:
+            metrics.finish()
+
+    def call_with_metrics(
+        self,
+        model: str,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_tokens: int = 2000,
+        partial_file: Optional[Union[str, Path]] = None,
+        partial_context: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        以流式方式调用模型并记录时延指标
+
+        Args:
+            model: 模型名称
+            prompt: 用户提示词
+            system_prompt: 系统提示词(可选)
+            temperature: 温度参数
+            max_tokens: 最大token数
+            partial_file: 部分输出文件路径，设置后每个片段到达时立即追加写入，
+                超时或进程退出后已生成的内容仍保留(见 partial_output)
+            partial_context: 写入部分输出元数据的附加信息
+            **kwargs: 其他参数
+
+        Returns:
+            (完整响应, 指标字典)，指标包含 ttft_s、inter_token_latency_s、
+            output_tokens_per_s 和 usage，详见 StreamMetrics.to_dict()
+        """
+        client = self._get_client(model)
+        params = self._build_params(
+            model, prompt, system_prompt, True, temperature, max_tokens, **kwargs
+        )
+
+        # 请求在流末尾返回usage；不支持该参数的提供商可在注册表中设置 "stream_usage": false
+        if self.registry.get_model_config(model).get("stream_usage", True):
+            params.setdefault("stream_options", {"include_usage": True})
+
+        logger.info(f"调用模型: {model}, stream=True (记录时延指标)")
 
+        partial = PartialOutput(partial_file, partial_context) if partial_file else None
+
+        metrics = StreamMetrics()
+        pieces = []
         try:
-            response = client.chat.completions.create(**params)
+            with default_progress.call(self.get_provider(model)) as tracked:
+                response = client.chat.completions.create(**params)
+                for piece in self._handle_stream(response, metrics):
+                    pieces.append(piece)
+                    if partial is not None:
+                        partial.append(piece)
+                tracked.tokens = usage_tokens(metrics.usage)
+        except BaseException as e:
+            logger.error(f"模型调用失败 ({model}): {str(e)}")
+            if partial is not None:
+                partial.fail(str(e) or type(e).__name__)
+            raise
 
-            if stream:
-                return self._handle_stream(response)
-            else:
-                return response.choices[0].message.content or ""
+        result = metrics.to_dict()
+        if partial is not None:
+            partial.finalize(result)
+
+        return "".join(pieces), result
+
+    async def acall(
+        self,
+        model: str,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.3,
+        max_tokens: int = 2000,
+        **kwargs
+    ) -> str:
+        """
+        异步调用模型(非流式)
+
+        Args:
+            model: 模型名称
+            prompt: 用户提示词
+            system_prompt: 系统提示词(可选)
+            temperature: 温度参数
+            max_tokens: 最大token数
+            **kwargs: 其他参数
+
+        Returns:
+            完整响应字符串
+        """
+        client = self._get_async_client(model)
+        params = self._build_params(
+            model, prompt, system_prompt, False, temperature, max_tokens, **kwargs
+        )
+
+        logger.info(f"异步调用模型: {model}")
+
+        async def create():
+            with default_progress.call(self.get_provider(model)) as tracked:
+                response = await client.chat.completions.create(**params)
+                tracked.tokens = usage_tokens(getattr(response, "usage", None))
+            return response.choices[0].message.content or ""
 
+        try:
+            if not self.coalesce:
+                return await create()
+            return await self.single_flight.ado(request_key(**params), create)
         except Exception as e:
             logger.error(f"模型调用失败 ({model}): {str(e)}")
             raise
 
-    def _handle_stream(self, response) -> Iterator[str]:
-        """处理流式响应"""
-        for chunk in response:
-            if chunk.choices and len(chunk.choices) > 0:
-                delta = chunk.choices[0].delta
-                if delta.content:
-                    yield delta.content
+    def _call_for_batch(
+        self,
+        index: int,
+        model: str,
+        prompt: str,
+        system_prompt: Optional[str],
+        **kwargs
+    ) -> BatchCallResult:
+        """执行批量调用中的单个请求，异常转换为结果中的错误信息"""
+        start = time.perf_counter()
+        try:
+            output = self.call(
+                model=model,
+                prompt=prompt,
+                system_prompt=system_prompt,
+                stream=False,
+                **kwargs
+            )
+            return BatchCallResult(index, prompt, output=output, duration=time.perf_counter() - start)
+        except Exception as e:
+            return BatchCallResult(index, prompt, error=str(e), duration=time.perf_counter() - start)
+
+    def imap_call(
+        self,
+        model: str,
+        prompts: List[str],
+        system_prompt: Optional[str] = None,
+        max_concurrency: int = 4,
+        **kwargs
+    ) -> Iterator[BatchCallResult]:
+        """
+        并发调用模型，按完成顺序逐个产出结果
+
+        同时在途的请求数不超过 max_concurrency，提示词按需提交，
+        因此 prompts 可以是任意长度的迭代器
+
+        Args:
+            model: 模型名称
+            prompts: 提示词列表或迭代器
+            system_prompt: 系统提示词
+            max_concurrency: 最大并发数
+            **kwargs: 其他参数
+
+        Yields:
+            BatchCallResult，index 为提示词的原始位置
+        """
+        max_concurrency = max(1, max_concurrency)
+        prompt_iter = enumerate(prompts)
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            pending = set()
+
+            def submit_next() -> bool:
+                item = next(prompt_iter, None)
+                if item is None:
+                    return False
+                index, prompt = item
+                pending.add(executor.submit(
+                    self._call_for_batch, index, model, prompt, system_prompt, **kwargs
+                ))
+                return True
+
+            while len(pending) < max_concurrency and submit_next():
+                pass
+
+            completed = 0
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.discard(future)
+                    result = future.result()
+                    completed += 1
+                    if result.ok:
+                        logger.info(f"批量处理: 第{result.index + 1}个完成 (已完成{completed}个)")
+                    else:
+                        logger.warning(f"批量处理: 第{result.index + 1}个失败: {result.error}")
+                    yield result
+                    submit_next()
 
     def batch_call(
         self,
         model: str,
         prompts: List[str],
         system_prompt: Optional[str] = None,
+        max_concurrency: int = 4,
+        ordered: bool = True,
         **kwargs
-    ) -> List[str]:
+    ) -> List[BatchCallResult]:
         """
         批量调用模型
 
@@ -361,25 +701,75 @@ class UniversalModelService:
             model: 模型名称
             prompts: 提示词列表
             system_prompt: 系统提示词
+            max_concurrency: 最大并发数(1为顺序调用)
+            ordered: True按输入顺序返回，False按完成顺序返回
             **kwargs: 其他参数
 
         Returns:
-            响应列表
+            BatchCallResult 列表，单个失败记录在对应结果的 error 中
         """
-        results = []
-        for i, prompt in enumerate(prompts):
-            logger.info(f"批量处理: {i+1}/{len(prompts)}")
-            response = self.call(
-                model=model,
-                prompt=prompt,
-                system_prompt=system_prompt,
-                stream=False,
-                **kwargs
-            )
-            results.append(response)
+        results = list(self.imap_call(
+            model=model,
+            prompts=prompts,
+            system_prompt=system_prompt,
+            max_concurrency=max_concurrency,
+            **kwargs
+        ))
+
+        if ordered:
+            results.sort(key=lambda r: r.index)
+
+        failed = sum(1 for r in results if not r.ok)
+        logger.info(f"批量处理完成: {len(results) - failed}/{len(results)} 成功")
 
         return results
 
+    async def abatch_call(
+        self,
+        model: str,
+        prompts: List[str],
+        system_prompt: Optional[str] = None,
+        max_concurrency: int = 8,
+        ordered: bool = True,
+        **kwargs
+    ) -> List[BatchCallResult]:
+        """
+        异步批量调用模型
+
+        Args:
+            model: 模型名称
+            prompts: 提示词列表
+            system_prompt: 系统提示词
+            max_concurrency: 最大并发数
+            ordered: True按输入顺序返回，False按完成顺序返回
+            **kwargs: 其他参数
+
+        Returns:
+            BatchCallResult 列表，单个失败记录在对应结果的 error 中
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def run_one(index: int, prompt: str) -> BatchCallResult:
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    output = await self.acall(
+                        model=model,
+                        prompt=prompt,
+                        system_prompt=system_prompt,
+                        **kwargs
+                    )
+                    return BatchCallResult(index, prompt, output=output, duration=time.perf_counter() - start)
+                except Exception as e:
+                    return BatchCallResult(index, prompt, error=str(e), duration=time.perf_counter() - start)
+
+        tasks = [asyncio.ensure_future(run_one(i, p)) for i, p in enumerate(prompts)]
+
+        if ordered:
+            return list(await asyncio.gather(*tasks))
+
+        return [await task for task in asyncio.as_completed(tasks)]
+
     def list_models(self, provider: Optional[str] = None) -> List[str]:
         """
         列出可用模型
@@ -404,6 +794,24 @@ class UniversalModelService:
         """
         return self.registry.get_model_config(model)
 
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        获取连接池统计(每个接口地址的模型、请求数、在途请求和连接数)
+
+        Returns:
+            连接池统计字典
+        """
+        return self.pool.stats()
+
+    def single_flight_stats(self) -> Dict[str, Any]:
+        """
+        获取请求合并统计(总调用数、实际上游调用数、合并命中数)
+
+        Returns:
+            请求合并统计字典
+        """
+        return self.single_flight.stats()
+
 
 # 便捷函数
 def create_service(registry_file: str = "model_registry.json") -> UniversalModelService:
@@ -484,12 +892,15 @@ for chunk in service.call(
 ):
     print(chunk, end="")
 
-# 示例3: 批量调用
+# 示例3: 批量调用(并发，单个失败记录在结果中)
 results = service.batch_call(
     model="Baichuan4",
     prompts=["问题1", "问题2", "问题3"],
-    system_prompt="你是一个AI助手"
+    system_prompt="你是一个AI助手",
+    max_concurrency=4
 )
+for r in results:
+    print(r.output if r.ok else f"失败: {r.error}")
 
 # 示例4: 快捷函数
 response = call_model("gemini-2.5-pro", "什么是AI?")
@@ -0,0 +1,140 @@
+"""
+流式部分输出 - Partial Output
+流式生成时将每个片段立即追加到部分输出文件，进程崩溃或超时后已生成的内容仍保留在磁盘上
+
+文件布局:
+    {name}.partial            当前(或最后一次)尝试已生成的文本
+    {name}.partial.{n}        第 n 次尝试未完成(失败或中断)时已生成的文本，下一次尝试开始时由 {name}.partial 改名而来
+    {name}.partial.meta.json  元数据: 每次尝试的开始时间、耗时、字符数、错误以及 finalized 标记
+
+元数据中的 attempts 记录了所有尝试，未完成的尝试(失败或进程中断)即为重试浪费的生成时间，
+其 file 字段为保留的部分输出文件名。
+"""
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from src.utils import json_codec
+
+META_SUFFIX = ".meta.json"
+
+
+def _meta_path(path: Path) -> Path:
+    return path.with_name(path.name + META_SUFFIX)
+
+
+def load_partial_meta(path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """
+    读取部分输出文件的元数据
+
+    Args:
+        path: 部分输出文件路径
+
+    Returns:
+        元数据字典；不存在时返回None
+    """
+    meta_path = _meta_path(Path(path))
+    if not meta_path.exists():
+        return None
+    return json_codec.load(meta_path)
+
+
+def wasted_attempts(meta: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """获取未完成(失败或中断)的尝试列表"""
+    if not meta:
+        return []
+    return [a for a in meta.get("attempts", []) if not a.get("finalized")]
+
+
+class PartialOutput:
+    """单个生成请求的部分输出写入器"""
+
+    def __init__(self, path: Union[str, Path], context: Optional[Dict[str, Any]] = None):
+        """
+        开始一次新的尝试
+
+        上一次尝试若未 finalized 且没有记录错误(说明进程在生成中途退出)，
+        会根据磁盘上的部分输出补记为 interrupted；未 finalized 的尝试的文本改名为
+        {name}.partial.{n} 保留，不被本次尝试覆盖
+
+        Args:
+            path: 部分输出文件路径
+            context: 写入元数据的附加信息(如模型、患者、对话编号)
+        """
+        self.path = Path(path)
+        self.meta_path = _meta_path(self.path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        meta = load_partial_meta(self.path) or {"attempts": []}
+        attempts = meta.get("attempts", [])
+        if attempts and not attempts[-1].get("finalized") and "error" not in attempts[-1]:
+            last = attempts[-1]
+            if self.path.exists():
+                last["chars"] = len(self.path.read_text(encoding='utf-8'))
+                last["elapsed_s"] = round(max(0.0, self.path.stat().st_mtime - last.get("started_ts", 0)), 3)
+            last["error"] = "interrupted"
+        if attempts and not attempts[-1].get("finalized") and self.path.exists():
+            last = attempts[-1]
+            archive = self.path.with_name(f"{self.path.name}.{last.get('attempt', len(attempts))}")
+            os.replace(self.path, archive)
+            last["file"] = archive.name
+
+        self.meta = {**meta, **(context or {}), "finalized": False, "attempts": attempts}
+        self.attempt = {
+            "attempt": len(attempts) + 1,
+            "started_at": datetime.now().isoformat(),
+            "started_ts": time.time(),
+            "chars": 0,
+            "chunks": 0,
+            "finalized": False
+        }
+        attempts.append(self.attempt)
+        self._start = time.perf_counter()
+
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._write_meta()
+
+    def _write_meta(self):
+        # 先写临时文件再改名，崩溃时不会留下半个元数据文件
+        tmp_path = self.meta_path.with_name(f"{self.meta_path.name}.{os.getpid()}.tmp")
+        json_codec.dump(self.meta, tmp_path)
+        os.replace(tmp_path, self.meta_path)
+
+    def append(self, text: str):
+        """追加一个输出片段并立即刷新到磁盘"""
+        self._file.write(text)
+        self._file.flush()
+        self.attempt["chars"] += len(text)
+        self.attempt["chunks"] += 1
+
+    def _close(self):
+        if not self._file.closed:
+            self._file.close()
+        self.attempt["elapsed_s"] = round(time.perf_counter() - self._start, 3)
+
+    def finalize(self, metrics: Optional[Dict[str, Any]] = None):
+        """
+        标记本次尝试完成
+
+        Args:
+            metrics: 可选的时延指标
+        """
+        self._close()
+        self.attempt["finalized"] = True
+        if metrics is not None:
+            self.attempt["metrics"] = metrics
+        self.meta["finalized"] = True
+        self._write_meta()
+
+    def fail(self, error: str):
+        """
+        记录本次尝试失败，已生成的部分保留在文件中
+
+        Args:
+            error: 错误信息
+        """
+        self._close()
+        self.attempt["error"] = error
+        self._write_meta()
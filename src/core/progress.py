@@ -0,0 +1,356 @@
+"""
+运行进度与实时面板 - Progress Dashboard
+记录各提供商的在途调用、滚动调用速率、错误/重试率、p95时延和token消耗，
+以及任务完成数和按已观测吞吐估算的剩余时间(ETA)
+
+模型调用处用 default_progress.call(provider) 包裹，任务完成时调用 task_finished()；
+ProgressDashboard 在终端中实时显示这些数据(rich)，非终端或未安装 rich 时退化为定期输出一行日志:
+
+    with ProgressDashboard(default_progress, mode="auto"):
+        default_progress.start(total_tasks=len(tasks))
+        ...
+"""
+import collections
+import math
+import sys
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, Optional
+
+from .generation_metrics import percentile, usage_to_dict
+
+DASHBOARD_MODES = ("off", "auto", "rich", "log")
+
+
+class _ProviderStats:
+    """单个提供商的调用统计"""
+
+    def __init__(self, latency_samples: int):
+        self.in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.tokens = 0
+        self.finished_at: Deque[float] = collections.deque()
+        self.latencies: Deque[float] = collections.deque(maxlen=latency_samples)
+
+
+class _CallHandle:
+    """一次调用的记录句柄，调用方可在返回前写入 tokens"""
+
+    __slots__ = ("_tracker", "provider", "tokens", "_start")
+
+    def __init__(self, tracker: "ProgressTracker", provider: str):
+        self._tracker = tracker
+        self.provider = provider
+        self.tokens = 0
+
+    def __enter__(self) -> "_CallHandle":
+        self._tracker._call_started(self.provider)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._tracker._call_finished(
+            self.provider, time.perf_counter() - self._start, exc_type is None, self.tokens
+        )
+        return False
+
+
+class ProgressTracker:
+    """运行进度统计（线程安全）"""
+
+    def __init__(self, window_s: float = 60.0, latency_samples: int = 500):
+        """
+        初始化进度统计
+
+        Args:
+            window_s: 滚动调用速率的时间窗口(秒)
+            latency_samples: 每个提供商保留的最近时延样本数(用于p95)
+        """
+        self.window_s = window_s
+        self.latency_samples = latency_samples
+        self._lock = threading.Lock()
+        self.start()
+
+    def start(self, total_tasks: int = 0, title: str = ""):
+        """
+        开始新的一轮运行，清空统计
+
+        Args:
+            total_tasks: 任务总数(用于进度和ETA，未知时为0)
+            title: 面板标题
+        """
+        with self._lock:
+            self.title = title
+            self.total_tasks = total_tasks
+            self.tasks_done = 0
+            self.tasks_failed = 0
+            self.started_at = time.time()
+            self._providers: Dict[str, _ProviderStats] = {}
+
+    def add_tasks(self, count: int):
+        """追加任务总数（任务数在运行中才能确定时使用）"""
+        with self._lock:
+            self.total_tasks += count
+
+    def _provider(self, provider: str) -> _ProviderStats:
+        stats = self._providers.get(provider)
+        if stats is None:
+            stats = self._providers[provider] = _ProviderStats(self.latency_samples)
+        return stats
+
+    def call(self, provider: str) -> _CallHandle:
+        """
+        记录一次API调用（上下文管理器，异常视为失败）
+
+        Args:
+            provider: 提供商名称
+
+        Returns:
+            调用句柄，可设置 handle.tokens 记录token消耗
+        """
+        return _CallHandle(self, provider or "unknown")
+
+    def _call_started(self, provider: str):
+        with self._lock:
+            self._provider(provider).in_flight += 1
+
+    def _call_finished(self, provider: str, seconds: float, ok: bool, tokens: int):
+        now = time.time()
+        with self._lock:
+            stats = self._provider(provider)
+            stats.in_flight -= 1
+            stats.calls += 1
+            stats.tokens += tokens or 0
+            stats.latencies.append(seconds)
+            stats.finished_at.append(now)
+            if not ok:
+                stats.errors += 1
+            self._trim(stats, now)
+
+    def record_retry(self, provider: str):
+        """记录一次重试"""
+        with self._lock:
+            self._provider(provider or "unknown").retries += 1
+
+    def task_finished(self, ok: bool = True):
+        """记录一个任务完成"""
+        with self._lock:
+            if ok:
+                self.tasks_done += 1
+            else:
+                self.tasks_failed += 1
+
+    def _trim(self, stats: _ProviderStats, now: float):
+        cutoff = now - self.window_s
+        while stats.finished_at and stats.finished_at[0] < cutoff:
+            stats.finished_at.popleft()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        当前统计快照
+
+        Returns:
+            {title, total_tasks, tasks_done, tasks_failed, elapsed_s, tasks_per_s, eta_s, providers: {
+                提供商: {in_flight, calls, calls_per_min, errors, error_rate, retries, retry_rate,
+                        p95_s, tokens}}}
+        """
+        now = time.time()
+        with self._lock:
+            elapsed = max(now - self.started_at, 1e-9)
+            window = min(self.window_s, elapsed)
+            providers = {}
+            for name, stats in sorted(self._providers.items()):
+                self._trim(stats, now)
+                providers[name] = {
+                    "in_flight": stats.in_flight,
+                    "calls": stats.calls,
+                    "calls_per_min": round(len(stats.finished_at) * 60 / window, 1),
+                    "errors": stats.errors,
+                    "error_rate": round(stats.errors / stats.calls, 4) if stats.calls else 0.0,
+                    "retries": stats.retries,
+                    "retry_rate": round(stats.retries / stats.calls, 4) if stats.calls else 0.0,
+                    "p95_s": round(percentile(list(stats.latencies), 95), 3),
+                    "tokens": stats.tokens
+                }
+
+            finished = self.tasks_done + self.tasks_failed
+            rate = finished / elapsed
+            remaining = max(self.total_tasks - finished, 0)
+            eta = remaining / rate if rate > 0 and self.total_tasks else None
+
+            return {
+                "title": self.title,
+                "total_tasks": self.total_tasks,
+                "tasks_done": self.tasks_done,
+                "tasks_failed": self.tasks_failed,
+                "elapsed_s": round(elapsed, 1),
+                "tasks_per_s": round(rate, 3),
+                "eta_s": round(eta, 1) if eta is not None else None,
+                "providers": providers
+            }
+
+
+def usage_tokens(usage: Any) -> int:
+    """从SDK返回的usage对象或字典中取总token数，缺失时为0"""
+    data = usage_to_dict(usage) or {}
+    total = data.get("total_tokens")
+    if total is None:
+        total = (data.get("prompt_tokens") or 0) + (data.get("completion_tokens") or 0)
+    return total or 0
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """格式化时长，如 1h02m、3m05s、42s"""
+    if seconds is None or math.isinf(seconds):
+        return "--"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+def format_tokens(tokens: int) -> str:
+    """格式化token数，如 12.3k、1.2M"""
+    if tokens >= 1_000_000:
+        return f"{tokens / 1_000_000:.1f}M"
+    if tokens >= 1000:
+        return f"{tokens / 1000:.1f}k"
+    return str(tokens)
+
+
+def format_log_line(snapshot: Dict[str, Any]) -> str:
+    """将快照格式化为一行日志"""
+    finished = snapshot["tasks_done"] + snapshot["tasks_failed"]
+    total = snapshot["total_tasks"]
+    progress = f"{finished}/{total} ({finished / total:.1%})" if total else f"{finished}"
+    parts = [
+        f"[进度] {progress} 失败 {snapshot['tasks_failed']} "
+        f"已用 {format_duration(snapshot['elapsed_s'])} 预计剩余 {format_duration(snapshot['eta_s'])}"
+    ]
+    for name, p in snapshot["providers"].items():
+        parts.append(
+            f"{name}: 在途 {p['in_flight']}, {p['calls_per_min']:.0f}次/分, "
+            f"错误 {p['error_rate']:.1%}, 重试 {p['retry_rate']:.1%}, "
+            f"p95 {p['p95_s']:.2f}s, tokens {format_tokens(p['tokens'])}"
+        )
+    return " | ".join(parts)
+
+
+class ProgressDashboard:
+    """实时进度面板（上下文管理器）"""
+
+    def __init__(
+        self,
+        tracker: ProgressTracker,
+        mode: str = "auto",
+        refresh_s: float = 1.0,
+        log_interval_s: float = 15.0,
+        log: Callable[[str], None] = print
+    ):
+        """
+        初始化面板
+
+        Args:
+            tracker: 进度统计
+            mode: off(不显示) / auto(终端中用rich，否则日志行) / rich / log
+            refresh_s: rich 面板刷新间隔(秒)
+            log_interval_s: 日志行输出间隔(秒)
+            log: 日志行输出函数(如 print 或 logger.info)
+        """
+        if mode not in DASHBOARD_MODES:
+            raise ValueError(f"不支持的面板模式: {mode}，可选 {', '.join(DASHBOARD_MODES)}")
+        self.tracker = tracker
+        self.mode = self._resolve_mode(mode)
+        self.refresh_s = refresh_s
+        self.log_interval_s = log_interval_s
+        self.log = log
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._live = None
+
+    @staticmethod
+    def _resolve_mode(mode: str) -> str:
+        if mode not in ("auto", "rich"):
+            return mode
+        try:
+            import rich  # noqa: F401
+        except ImportError:
+            return "log"
+        if mode == "auto" and not sys.stdout.isatty():
+            return "log"
+        return "rich"
+
+    def render(self):
+        """生成 rich 面板内容"""
+        from rich.console import Group
+        from rich.table import Table
+        from rich.text import Text
+
+        snapshot = self.tracker.snapshot()
+        finished = snapshot["tasks_done"] + snapshot["tasks_failed"]
+        total = snapshot["total_tasks"]
+        ratio = finished / total if total else 0.0
+        bar_width = 30
+        filled = int(bar_width * ratio)
+
+        header = Text()
+        if snapshot["title"]:
+            header.append(f"{snapshot['title']}\n", style="bold")
+        header.append("█" * filled + "░" * (bar_width - filled), style="green")
+        header.append(
+            f" {finished}/{total or '?'} ({ratio:.1%})  失败 {snapshot['tasks_failed']}  "
+            f"已用 {format_duration(snapshot['elapsed_s'])}  预计剩余 {format_duration(snapshot['eta_s'])}  "
+            f"{snapshot['tasks_per_s'] * 60:.1f} 任务/分"
+        )
+
+        table = Table(expand=False)
+        for column in ("提供商", "在途", "调用", "次/分", "错误率", "重试率", "p95", "tokens"):
+            table.add_column(column, justify="left" if column == "提供商" else "right")
+        for name, p in snapshot["providers"].items():
+            table.add_row(
+                name,
+                str(p["in_flight"]),
+                str(p["calls"]),
+                f"{p['calls_per_min']:.0f}",
+                f"{p['error_rate']:.1%}",
+                f"{p['retry_rate']:.1%}",
+                f"{p['p95_s']:.2f}s",
+                format_tokens(p["tokens"])
+            )
+        return Group(header, table)
+
+    def _log_loop(self):
+        while not self._stop.wait(self.log_interval_s):
+            self.log(format_log_line(self.tracker.snapshot()))
+
+    def __enter__(self) -> "ProgressDashboard":
+        if self.mode == "rich":
+            from rich.live import Live
+
+            self._live = Live(self.render(), refresh_per_second=max(1, round(1 / self.refresh_s)),
+                              get_renderable=self.render, redirect_stdout=True, redirect_stderr=True)
+            self._live.__enter__()
+        elif self.mode == "log":
+            self._thread = threading.Thread(target=self._log_loop, name="progress-log", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._live is not None:
+            self._live.__exit__(*exc)
+            self._live = None
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            # 结束时输出最终状态
+            self.log(format_log_line(self.tracker.snapshot()))
+        return False
+
+
+# 进程级默认实例，模型调用处记录到这里
+default_progress = ProgressTracker()
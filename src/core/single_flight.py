@@ -0,0 +1,166 @@
+"""
+请求合并 - Single Flight
+相同的 (模型, 消息, 参数) 请求同时在途时只向上游发送一次，其余调用方等待并共享结果
+
+适用于生成任务和交叉评测同时运行、或重复运行有重叠的子集时，
+同一进程内的并发相同请求。请求完成后不缓存结果，后续的相同请求会重新调用。
+"""
+import asyncio
+import hashlib
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+
+def request_key(model: str, messages: List[Dict[str, Any]], **params) -> str:
+    """
+    计算请求的合并键
+
+    Args:
+        model: 模型名称
+        messages: 消息列表
+        **params: 其他请求参数(温度、最大token数等)
+
+    Returns:
+        请求内容的哈希
+    """
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """一次在途的同步调用"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """同步/异步请求合并器"""
+
+    def __init__(self):
+        """初始化请求合并器"""
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._async_calls: Dict[Tuple[int, str], asyncio.Future] = {}
+        # 事件循环只弱引用任务，在途的上游调用任务在这里保留强引用，避免运行中被回收
+        self._tasks: Set[asyncio.Task] = set()
+        self.calls = 0
+        self.executions = 0
+        self.shared = 0
+        self.errors = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        执行调用；若相同键的调用正在进行，则等待并返回其结果
+
+        Args:
+            key: 请求合并键
+            fn: 实际执行调用的函数
+
+        Returns:
+            调用结果(异常同样传递给所有等待方)
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        异步执行调用；若相同键的调用正在同一事件循环中进行，则等待其结果
+
+        Args:
+            key: 请求合并键
+            fn: 返回协程的函数
+
+        Returns:
+            调用结果
+        """
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+
+        with self._lock:
+            self.calls += 1
+            future = self._async_calls.get(loop_key)
+            if future is not None:
+                self.shared += 1
+            else:
+                future = loop.create_future()
+                self._async_calls[loop_key] = future
+                self.executions += 1
+
+                async def run():
+                    try:
+                        future.set_result(await fn())
+                    except BaseException as e:
+                        with self._lock:
+                            self.errors += 1
+                        future.set_exception(e)
+                    finally:
+                        with self._lock:
+                            self._async_calls.pop(loop_key, None)
+
+                task = loop.create_task(run())
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+        # shield: 某个等待方被取消时不影响其他等待方
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取合并统计
+
+        Returns:
+            {calls: 总调用数, executions: 实际上游调用数, shared: 合并命中数,
+             errors: 上游失败数, in_flight: 当前在途数, hit_rate: 命中率}
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "shared": self.shared,
+                "errors": self.errors,
+                "in_flight": len(self._calls) + len(self._async_calls),
+                "hit_rate": round(self.shared / self.calls, 4) if self.calls else 0.0
+            }
+
+
+# 进程内共享的默认合并器，使生成任务和交叉评测之间也能合并请求
+default_single_flight = SingleFlight()
@@ -0,0 +1,216 @@
+"""
+追踪文件分析 - Trace Analyzer
+读取 tracing 写出的JSONL文件，输出:
+    - 各类 span 的次数、失败数、总耗时和 p50/p95
+    - 最慢的若干条调用链的关键路径，以及关键路径耗时按 span 类型的分解
+
+关键路径: 从根 span 的结束时刻向前回溯，每一步选取在当前时刻之前最晚结束的子 span 并递归进入，
+回溯点移到该子 span 的开始时刻；关键路径上每个 span 的自身耗时为未被所选子 span 覆盖的部分
+
+用法:
+    python -m src.core.trace_analyzer output/cross_evaluation_results/traces.jsonl
+    python -m src.core.trace_analyzer traces.jsonl --top 3 --root evaluate_task
+    python -m src.core.trace_analyzer traces.jsonl --trace 4bf92f3577b34da6a3ce929d0e0e4736
+"""
+import argparse
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src.core.generation_metrics import percentile
+from src.utils import json_codec
+
+# 明细中显示的属性
+LABEL_ATTRIBUTES = ("patient", "evaluated_model", "evaluator_model", "dimension", "gen_ai.request.model", "attempt")
+
+
+def load_spans(trace_file: Union[str, Path]) -> List[Dict[str, Any]]:
+    """
+    读取追踪文件，跳过无法解析的行(如进程被中断时写了一半的行)
+
+    Args:
+        trace_file: JSONL文件路径
+
+    Returns:
+        span 列表
+    """
+    spans = []
+    with open(trace_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                spans.append(json_codec.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return spans
+
+
+def duration_s(span: Dict[str, Any]) -> float:
+    """span 耗时(秒)"""
+    return (span["endTimeUnixNano"] - span["startTimeUnixNano"]) / 1e9
+
+
+def build_tree(spans: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+    """
+    建立父子关系
+
+    Returns:
+        (根 span 列表, {spanId: 子 span 列表})；父 span 缺失(如未写出)的 span 视为根
+    """
+    ids = {span["spanId"] for span in spans}
+    children: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    roots = []
+    for span in spans:
+        parent = span.get("parentSpanId")
+        if parent and parent in ids:
+            children[parent].append(span)
+        else:
+            roots.append(span)
+    return roots, children
+
+
+def critical_path(
+    span: Dict[str, Any],
+    children: Dict[str, List[Dict[str, Any]]],
+    depth: int = 0
+) -> List[Tuple[Dict[str, Any], float, int]]:
+    """
+    计算 span 的关键路径
+
+    Args:
+        span: 起点 span
+        children: 子 span 索引
+        depth: 起点深度
+
+    Returns:
+        [(span, 关键路径上的自身耗时秒, 深度)]，按开始时间排序
+    """
+    cursor = span["endTimeUnixNano"]
+    chosen = []
+    for child in sorted(children.get(span["spanId"], []), key=lambda s: s["endTimeUnixNano"], reverse=True):
+        if child["endTimeUnixNano"] <= cursor and child["startTimeUnixNano"] >= span["startTimeUnixNano"]:
+            chosen.append(child)
+            cursor = child["startTimeUnixNano"]
+
+    covered = sum(c["endTimeUnixNano"] - c["startTimeUnixNano"] for c in chosen)
+    path = [(span, max(span["endTimeUnixNano"] - span["startTimeUnixNano"] - covered, 0) / 1e9, depth)]
+    for child in reversed(chosen):
+        path.extend(critical_path(child, children, depth + 1))
+    return path
+
+
+def breakdown(path: List[Tuple[Dict[str, Any], float, int]]) -> List[Tuple[str, float]]:
+    """关键路径自身耗时按 span 名称汇总，按耗时降序"""
+    totals: Dict[str, float] = defaultdict(float)
+    for span, self_s, _ in path:
+        totals[span["name"]] += self_s
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def span_stats(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    按 span 名称统计
+
+    Returns:
+        [{name, count, errors, total_s, p50_s, p95_s, max_s, retries, input_tokens, output_tokens}]，按总耗时降序
+    """
+    grouped: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for span in spans:
+        grouped[span["name"]].append(span)
+
+    rows = []
+    for name, items in grouped.items():
+        durations = [duration_s(s) for s in items]
+        attrs = [s.get("attributes", {}) for s in items]
+        rows.append({
+            "name": name,
+            "count": len(items),
+            "errors": sum(1 for s in items if s.get("status", {}).get("code") == "STATUS_CODE_ERROR"),
+            "total_s": sum(durations),
+            "p50_s": percentile(durations, 50),
+            "p95_s": percentile(durations, 95),
+            "max_s": max(durations),
+            "retries": sum(a.get("retry.count", 0) for a in attrs),
+            "input_tokens": sum(a.get("gen_ai.usage.input_tokens", 0) for a in attrs),
+            "output_tokens": sum(a.get("gen_ai.usage.output_tokens", 0) for a in attrs)
+        })
+    rows.sort(key=lambda row: row["total_s"], reverse=True)
+    return rows
+
+
+def _label(span: Dict[str, Any]) -> str:
+    attrs = span.get("attributes", {})
+    labels = [f"{key.split('.')[-1]}={attrs[key]}" for key in LABEL_ATTRIBUTES if key in attrs]
+    if span.get("status", {}).get("code") == "STATUS_CODE_ERROR":
+        labels.append("✗")
+    return f"{span['name']} " + " ".join(labels) if labels else span["name"]
+
+
+def format_report(
+    spans: List[Dict[str, Any]],
+    top: int = 5,
+    root_name: Optional[str] = None,
+    trace_id: Optional[str] = None
+) -> str:
+    """
+    生成分析报告文本
+
+    Args:
+        spans: span 列表
+        top: 输出关键路径的调用链数(按耗时最长)
+        root_name: 以该名称的 span 作为分析起点(如 evaluate_task)，None表示使用各调用链的根
+        trace_id: 只分析该调用链
+
+    Returns:
+        报告文本
+    """
+    if trace_id:
+        spans = [s for s in spans if s["traceId"] == trace_id]
+    if not spans:
+        return "没有可分析的span"
+
+    lines = [f"span 数: {len(spans)}，调用链数: {len({s['traceId'] for s in spans})}", ""]
+    lines.append(f"{'span':<24}{'次数':>8}{'失败':>6}{'重试':>6}{'总耗时(s)':>12}{'p50(s)':>9}{'p95(s)':>9}"
+                 f"{'最大(s)':>9}{'输入tokens':>12}{'输出tokens':>12}")
+    for row in span_stats(spans):
+        lines.append(
+            f"{row['name']:<24}{row['count']:>8}{row['errors']:>6}{row['retries']:>6}{row['total_s']:>12.3f}"
+            f"{row['p50_s']:>9.3f}{row['p95_s']:>9.3f}{row['max_s']:>9.3f}"
+            f"{row['input_tokens']:>12}{row['output_tokens']:>12}"
+        )
+
+    roots, children = build_tree(spans)
+    if root_name:
+        roots = [s for s in spans if s["name"] == root_name]
+    roots = sorted(roots, key=duration_s, reverse=True)[:top]
+
+    for root in roots:
+        total = duration_s(root)
+        path = critical_path(root, children)
+        lines.append("")
+        lines.append(f"关键路径 {root['traceId'][:16]}  {_label(root)}  {total:.3f}s")
+        for name, self_s in breakdown(path):
+            lines.append(f"  {name:<24}{self_s:>10.3f}s{self_s / total if total else 0:>8.1%}")
+        lines.append("  明细:")
+        for span, self_s, depth in path:
+            lines.append(f"    {'  ' * depth}{_label(span)}  {duration_s(span):.3f}s (自身 {self_s:.3f}s)")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="追踪文件分析: span统计和关键路径分解")
+    parser.add_argument("trace_file", help="追踪文件(JSONL)")
+    parser.add_argument("--top", type=int, default=5, help="输出关键路径的调用链数(按耗时最长)")
+    parser.add_argument("--root", help="以该名称的span作为分析起点(如 evaluate_task)")
+    parser.add_argument("--trace", help="只分析指定 traceId")
+    args = parser.parse_args(argv)
+
+    print(format_report(load_spans(args.trace_file), top=args.top, root_name=args.root, trace_id=args.trace))
+
+
+if __name__ == "__main__":
+    main()
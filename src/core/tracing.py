@@ -0,0 +1,194 @@
+"""
+调用链追踪 - Tracing
+为 评测任务 → 维度 → 模型调用 → 重试尝试 记录父子关联的 span，逐行写入本地JSONL文件，无需采集服务。
+字段名沿用 OpenTelemetry(OTLP JSON) 的 traceId/spanId/parentSpanId/startTimeUnixNano 等，
+模型调用的属性沿用 gen_ai 语义约定(gen_ai.system、gen_ai.request.model、gen_ai.usage.*)，
+文件可直接转换后导入 Jaeger/Tempo 等工具，也可用 trace_analyzer 分析关键路径
+
+当前 span 保存在 contextvars 中，同一线程/协程内嵌套的 span 自动成为子 span:
+
+    from src.core.tracing import default_tracer as tracer
+
+    tracer.enable("output/traces.jsonl")
+    with tracer.span("evaluate_task", patient="患者1") as span:
+        ...
+        span.set(retry_count=0)
+
+默认关闭，关闭时 span() 返回共享的空上下文
+"""
+import contextvars
+import hashlib
+import secrets
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from src.utils import json_codec
+
+STATUS_UNSET = "STATUS_CODE_UNSET"
+STATUS_OK = "STATUS_CODE_OK"
+STATUS_ERROR = "STATUS_CODE_ERROR"
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def prompt_hash(prompt: str) -> str:
+    """Prompt的短哈希(sha256前16位)，用于关联相同请求而不在追踪文件中保存原文"""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+class _NoopSpan:
+    """关闭时使用的空上下文"""
+
+    trace_id = None
+    span_id = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+    def set_status(self, status: str, message: Optional[str] = None):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """一个追踪片段"""
+
+    __slots__ = (
+        "_tracer", "name", "trace_id", "span_id", "parent_span_id", "attributes",
+        "status", "status_message", "start_ns", "end_ns", "_perf_start", "_token"
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any], parent: Optional["Span"]):
+        self._tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent is not None else None
+        self.attributes = {k: v for k, v in attributes.items() if v is not None}
+        self.status = STATUS_UNSET
+        self.status_message = None
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._perf_start = time.perf_counter_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = self.start_ns + time.perf_counter_ns() - self._perf_start
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.set_status(STATUS_ERROR, f"{exc_type.__name__}: {exc}")
+        elif self.status == STATUS_UNSET:
+            self.status = STATUS_OK
+        self._tracer._export(self)
+        return False
+
+    def set(self, **attributes):
+        """补充属性(如调用结束后才知道的token用量、重试次数)，值为None的属性忽略"""
+        self.attributes.update((k, v) for k, v in attributes.items() if v is not None)
+
+    def set_status(self, status: str, message: Optional[str] = None):
+        """设置状态(STATUS_OK / STATUS_ERROR)"""
+        self.status = status
+        self.status_message = message
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为OTLP JSON风格的字典(属性为扁平的键值对)"""
+        status = {"code": self.status}
+        if self.status_message:
+            status["message"] = self.status_message
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "status": status
+        }
+
+
+class Tracer:
+    """调用链追踪器，结束的 span 逐行追加写入JSONL文件（线程安全）"""
+
+    def __init__(self, service_name: str = "model-comparison"):
+        """
+        初始化追踪器
+
+        Args:
+            service_name: 写入每个 span 的 service.name 属性
+        """
+        self.service_name = service_name
+        self.trace_file: Optional[Path] = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """是否正在记录"""
+        return self._file is not None
+
+    def enable(self, trace_file: Union[str, Path]):
+        """
+        开始记录，span 追加写入指定文件
+
+        Args:
+            trace_file: 追踪文件路径(JSONL)
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+            self.trace_file = Path(trace_file)
+            self.trace_file.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.trace_file, 'a', encoding='utf-8')
+
+    def disable(self):
+        """停止记录并关闭文件"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def span(self, name: str, **attributes) -> Union[Span, _NoopSpan]:
+        """
+        创建 span（上下文管理器），父 span 为当前上下文中的 span
+
+        Args:
+            name: span名称
+            **attributes: 属性，值为None的忽略
+
+        Returns:
+            Span；关闭时为共享的空上下文
+        """
+        if self._file is None:
+            return _NOOP_SPAN
+        return Span(self, name, attributes, _current_span.get())
+
+    def current_span(self) -> Union[Span, _NoopSpan]:
+        """当前上下文中的 span，没有时为空上下文"""
+        return _current_span.get() or _NOOP_SPAN
+
+    def _export(self, span: Span):
+        record = span.to_dict()
+        record["attributes"] = {"service.name": self.service_name, **record["attributes"]}
+        line = json_codec.dumps(record, default=str)
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line + "\n")
+                self._file.flush()
+
+
+# 进程级默认实例
+default_tracer = Tracer()
@@ -3,7 +3,8 @@
 AI输出质量自动评测和报告生成
 """
 from .auto_evaluator import AutoEvaluator
+from .lexicon import Lexicon
 from .report_generator import ReportGenerator
 from .visualizer import EvaluationVisualizer
 
-__all__ = ['AutoEvaluator', 'ReportGenerator', 'EvaluationVisualizer']
+__all__ = ['AutoEvaluator', 'Lexicon', 'ReportGenerator', 'EvaluationVisualizer']
@@ -1,54 +1,168 @@
 """
 自动化评测主脚本
 评测所有模型的输出质量，生成评测报告
+
+两种运行方式:
+    evaluate_all + save_results
+            读入全部报告后逐份评测，结果保存在内存中，用 pandas 汇总（默认）
+    evaluate_batch
+            流式批量模式，用于大规模报告库: 按模型分片交给进程池评测(src/utils/result_loader.py)，
+            详细结果逐行写入 detailed_results.jsonl，得分表逐行写入 scores_table.csv，
+            汇总由每个模型的流式统计量(count/mean/M2)得到，内存占用与报告数无关
+
+    python -m src.evaluation.auto_evaluator --batch --workers 8
 """
-import json
+import argparse
+import csv
+import functools
+import math
 import os
 import re
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, Iterator, List, Any, Optional, Tuple, Union
 from collections import defaultdict
 import pandas as pd
+from src.utils import json_codec
+from src.utils.result_loader import DEFAULT_CHUNK_SIZE, ResultLoader
+from src.evaluation.lexicon import LEXICON_DIR, Lexicon
+
+# 汇总统计的列: (指标, 统计量, 列名)，与 generate_summary 一致
+SUMMARY_COLUMNS = [
+    ("overall_score", "mean", "总分均值"),
+    ("overall_score", "std", "总分标准差"),
+    ("overall_score", "min", "总分最小值"),
+    ("overall_score", "max", "总分最大值"),
+    ("structure_score", "mean", "结构完整性"),
+    ("entity_score", "mean", "实体覆盖率"),
+    ("numeric_score", "mean", "数值准确性"),
+    ("format_score", "mean", "格式质量")
+]
+
+# 得分表的列: (字段, 列名)
+SCORE_TABLE_COLUMNS = [
+    ("model", "模型"),
+    ("patient", "患者"),
+    ("overall_score", "总分"),
+    ("structure_score", "结构"),
+    ("entity_score", "实体"),
+    ("numeric_score", "数值"),
+    ("format_score", "格式")
+]
+
+
+def parse_markdown_name(stem: str) -> Optional[Tuple[str, str]]:
+    """
+    解析报告文件名 {model}-{patient}
+
+    Args:
+        stem: 不含扩展名的文件名
+
+    Returns:
+        (模型, 患者)，格式不符时返回None
+    """
+    # 找到最后一个'-'作为分隔符
+    parts = stem.rsplit('-', 1)
+    if len(parts) != 2:
+        return None
+    return parts[0], parts[1]
+
+
+class RunningStats:
+    """单个指标的流式统计量（Welford 算法），标准差为样本标准差，与 pandas 的 std 一致"""
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        """加入一个值"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def std(self) -> float:
+        """样本标准差，少于2个值时为NaN"""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+
+def _evaluate_markdown_file(entity_lexicon: Lexicon, field_lexicon: Lexicon, path: Path) -> Dict[str, Any]:
+    """工作进程: 评测一个报告文件（词表随分片传入，构造评测器不需要重新加载词表）"""
+    model, patient = parse_markdown_name(path.stem)
+    evaluator = AutoEvaluator(markdown_dir=str(path.parent), entity_lexicon=entity_lexicon,
+                              field_lexicon=field_lexicon)
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    return evaluator.evaluate_single(model, patient, content)
 
 
 class AutoEvaluator:
     """自动化评测器"""
 
-    def __init__(self, markdown_dir: str = "./output/markdown"):
+    def __init__(
+        self,
+        markdown_dir: str = "./output/markdown",
+        entity_lexicon: Optional[Union[str, Path, Lexicon]] = None,
+        field_lexicon: Optional[Union[str, Path, Lexicon]] = None
+    ):
+        """
+        初始化评测器
+
+        Args:
+            markdown_dir: Markdown报告目录
+            entity_lexicon: 关键医疗实体词表（文件路径或 Lexicon，None表示 config/lexicons/medical_entities.json）
+            field_lexicon: 必需字段词表（None表示 config/lexicons/required_fields.json）
+        """
         self.markdown_dir = markdown_dir
         self.results = []
 
+        # 词表加载时构建一次匹配自动机，每份报告只扫描一遍
+        self.field_lexicon = self._load_lexicon(field_lexicon, "required_fields.json")
+        self.entity_lexicon = self._load_lexicon(entity_lexicon, "medical_entities.json")
+
         # 必需字段列表
-        self.required_fields = [
-            "基本信息", "性别", "年龄", "身高", "体重",
-            "主诉", "现病史", "既往病史", "家族病史"
-        ]
+        self.required_fields = self.field_lexicon.terms
 
         # 关键医疗实体
-        self.medical_entities = {
-            "疾病": ["糖尿病", "高血压", "高甘油三酯", "高脂血症"],
-            "症状": ["泡沫", "体重下降", "体重减轻", "手麻", "脚麻", "视物模糊"],
-            "药物": ["二甲双胍", "胰岛素", "司美格鲁肽", "格列齐特", "多格列艾汀"],
-            "检查": ["血糖", "甘油三酯", "空腹血糖", "餐后血糖"]
-        }
+        self.medical_entities = self.entity_lexicon.categories
+
+    @staticmethod
+    def _load_lexicon(lexicon: Optional[Union[str, Path, Lexicon]], default_file: str) -> Lexicon:
+        if isinstance(lexicon, Lexicon):
+            return lexicon
+        return Lexicon.load(lexicon or LEXICON_DIR / default_file)
+
+    def iter_markdown_files(self) -> Iterator[Tuple[str, str, Path]]:
+        """
+        按模型、患者顺序列出报告文件（不读取内容）
+
+        Yields:
+            (模型, 患者, 文件路径)
+        """
+        entries = []
+        for md_file in Path(self.markdown_dir).glob("*.md"):
+            # 解析文件名: {model}-{patient}.md
+            parsed = parse_markdown_name(md_file.stem)
+            if parsed is not None:
+                entries.append((parsed[0], parsed[1], md_file))
+        entries.sort()
+        yield from entries
 
     def load_markdown_files(self) -> Dict[str, Dict[str, str]]:
         """加载所有Markdown文件"""
         data = defaultdict(dict)
-        markdown_path = Path(self.markdown_dir)
-
-        for md_file in sorted(markdown_path.glob("*.md")):
-            # 解析文件名: {model}-{patient}.md
-            filename = md_file.stem
-
-            # 找到最后一个'-'作为分隔符
-            parts = filename.rsplit('-', 1)
-            if len(parts) == 2:
-                model = parts[0]
-                patient = parts[1]
-            else:
-                continue
 
+        for model, patient, md_file in self.iter_markdown_files():
             with open(md_file, 'r', encoding='utf-8') as f:
                 content = f.read()
 
@@ -58,44 +172,24 @@ class AutoEvaluator:
 
     def check_structure_completeness(self, content: str) -> Dict[str, Any]:
         """检查结构完整性"""
-        score_details = {}
-        found_fields = []
-
-        for field in self.required_fields:
-            if field in content:
-                found_fields.append(field)
-                score_details[field] = True
-            else:
-                score_details[field] = False
+        score_details = self.field_lexicon.contains(content)
+        found_count = sum(1 for found in score_details.values() if found)
 
-        score = len(found_fields) / len(self.required_fields) * 100
+        score = found_count / len(self.required_fields) * 100
 
         return {
             "score": score,
-            "found_count": len(found_fields),
+            "found_count": found_count,
             "total_count": len(self.required_fields),
             "details": score_details
         }
 
     def check_entity_coverage(self, content: str) -> Dict[str, Any]:
         """检查关键医疗实体覆盖率"""
-        entity_results = {}
-        total_found = 0
-        total_entities = 0
-
-        for category, entities in self.medical_entities.items():
-            found_entities = []
-            for entity in entities:
-                if entity in content:
-                    found_entities.append(entity)
-                    total_found += 1
-                total_entities += 1
-
-            entity_results[category] = {
-                "found": found_entities,
-                "count": len(found_entities),
-                "total": len(entities)
-            }
+        # 一次扫描得到所有出现的实体，按类别计数
+        entity_results = self.entity_lexicon.coverage(content)
+        total_found = sum(result["count"] for result in entity_results.values())
+        total_entities = len(self.entity_lexicon)
 
         coverage_score = (total_found / total_entities * 100) if total_entities > 0 else 0
 
@@ -300,8 +394,7 @@ class AutoEvaluator:
 
         # 保存详细结果
         detailed_file = output_path / "detailed_results.json"
-        with open(detailed_file, 'w', encoding='utf-8') as f:
-            json.dump(self.results, f, ensure_ascii=False, indent=2)
+        json_codec.dump(self.results, detailed_file, pretty=True)
 
         print(f"✓ 详细结果已保存: {detailed_file}")
 
@@ -324,10 +417,106 @@ class AutoEvaluator:
 
         return output_path
 
+    def evaluate_batch(
+        self,
+        output_dir: str = "./evaluation_results",
+        workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        mode: str = "process"
+    ) -> pd.DataFrame:
+        """
+        流式批量评测: 进程池分片评测，结果边评测边写出
+
+        输出文件:
+            detailed_results.jsonl  每行一条详细结果（compact JSON），顺序与 evaluate_all 相同
+            scores_table.csv        与 save_results 的得分表相同
+            summary_statistics.csv  与 save_results 的汇总统计相同（由流式统计量计算）
+
+        结果不保存在 self.results 中
+
+        Args:
+            output_dir: 输出目录
+            workers: 工作进程数（None表示按环境变量 RESULT_LOADER_WORKERS 或CPU核数）
+            chunk_size: 单个分片的最大报告数
+            mode: process / thread / serial（见 ResultLoader）
+
+        Returns:
+            汇总统计表
+        """
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+
+        # 按模型分组，每组再按 chunk_size 切分为分片
+        groups = defaultdict(list)
+        for model, _, md_file in self.iter_markdown_files():
+            groups[model].append(md_file)
+
+        loader = ResultLoader(workers=workers, mode=mode, chunk_size=chunk_size, min_parallel_files=0)
+        extractor = functools.partial(_evaluate_markdown_file, self.entity_lexicon, self.field_lexicon)
+        stats: Dict[str, Dict[str, RunningStats]] = {}
+        metrics = list(dict.fromkeys(metric for metric, _, _ in SUMMARY_COLUMNS))
+
+        print("=" * 80)
+        print(f"批量评测开始: {sum(len(files) for files in groups.values())} 份报告, {len(groups)} 个模型")
+        print("=" * 80)
+
+        detailed_file = output_path / "detailed_results.jsonl"
+        simple_file = output_path / "scores_table.csv"
+        with open(detailed_file, 'wb') as detailed, \
+                open(simple_file, 'w', encoding='utf-8-sig', newline='') as simple:
+            writer = csv.writer(simple, lineterminator='\n')
+            writer.writerow([name for _, name in SCORE_TABLE_COLUMNS])
+
+            for item in loader.iter_paths(list(groups.values()), extractor):
+                if not item.ok:
+                    print(f"  ✗ {item.path.name}: {item.error}")
+                    continue
+                result = item.record
+                detailed.write(json_codec.default_codec.dumps_bytes(result) + b"\n")
+                writer.writerow([result[field] for field, _ in SCORE_TABLE_COLUMNS])
+
+                model_stats = stats.get(result["model"])
+                if model_stats is None:
+                    model_stats = stats[result["model"]] = {metric: RunningStats() for metric in metrics}
+                for metric in metrics:
+                    model_stats[metric].add(result[metric])
+
+        print(loader.format_stats())
+        print(f"✓ 详细结果已保存: {detailed_file}")
+        print(f"✓ 得分表已保存: {simple_file}")
 
-def main():
+        summary = pd.DataFrame.from_dict(
+            {model: {name: getattr(model_stats[metric], stat) for metric, stat, name in SUMMARY_COLUMNS}
+             for model, model_stats in sorted(stats.items())},
+            orient='index',
+            columns=[name for _, _, name in SUMMARY_COLUMNS]
+        ).round(2)
+        summary.index.name = 'model'
+
+        summary_file = output_path / "summary_statistics.csv"
+        summary.to_csv(summary_file, encoding='utf-8-sig')
+        print(f"✓ 汇总统计已保存: {summary_file}")
+
+        return summary
+
+
+def main(argv: Optional[List[str]] = None):
     """主函数"""
-    evaluator = AutoEvaluator(markdown_dir="./output/markdown")
+    parser = argparse.ArgumentParser(description="自动化评测所有模型的输出质量")
+    parser.add_argument("--markdown-dir", default="./output/markdown", help="Markdown报告目录")
+    parser.add_argument("--output-dir", default="./evaluation_results", help="输出目录")
+    parser.add_argument("--batch", action="store_true", help="流式批量模式（进程池评测，结果逐行写出）")
+    parser.add_argument("--workers", type=int, help="批量模式的工作进程数")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="批量模式单个分片的报告数")
+    args = parser.parse_args(argv)
+
+    evaluator = AutoEvaluator(markdown_dir=args.markdown_dir)
+
+    if args.batch:
+        summary = evaluator.evaluate_batch(args.output_dir, workers=args.workers, chunk_size=args.chunk_size)
+        print()
+        print(summary)
+        return
 
     # 执行评测
     results = evaluator.evaluate_all()
@@ -344,7 +533,7 @@ def main():
     print("=" * 80)
     print("保存结果")
     print("=" * 80)
-    output_dir = evaluator.save_results()
+    output_dir = evaluator.save_results(args.output_dir)
 
     print()
     print("=" * 80)
@@ -0,0 +1,217 @@
+"""
+医学词表与多模式匹配 - Lexicon
+词表按类别组织(疾病/症状/药物/检查...)，加载时构建一次 Aho-Corasick 自动机，
+对每份报告只扫描一遍即可找出所有词条的全部出现位置(包括重叠和相互包含的词条)，
+匹配结果与逐个词条做 `term in text` 完全一致，耗时不随词条数增长
+
+纯Python的逐字符扫描有固定开销，词条数不超过 LOOP_MAX_TERMS 时 found_ids/coverage
+仍逐个词条做子串查找(C实现，小词表更快)，结果相同；iter_matches/scan_ids 总是使用自动机
+(见 benchmarks/bench_lexicon.py，在 output/markdown 的报告上两者在约250个词条处持平)
+
+词表文件格式:
+    .json   {"name": "...", "categories": {"疾病": ["糖尿病", ...], ...}}
+            （也可以直接是 {类别: [词条, ...]}）
+    .txt / .tsv
+            每行一个词条，"类别<TAB>词条" 或只有 "词条"(类别为文件名)；# 开头为注释
+
+用法:
+    lexicon = Lexicon.load("config/lexicons/medical_entities.json")
+    for start, end, term_id in lexicon.iter_matches(text):
+        print(lexicon.terms[term_id], lexicon.term_categories[term_id], start, end)
+    lexicon.coverage(text)   # {类别: {"found": [...], "count": n, "total": m}}
+"""
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Tuple, Union
+
+from src.utils import json_codec
+
+# 项目自带的词表目录
+LEXICON_DIR = Path(__file__).parent.parent.parent / "config" / "lexicons"
+
+
+class Lexicon:
+    """按类别组织的词表，附带 Aho-Corasick 自动机"""
+
+    # 不超过该词条数时 found_ids 逐个词条查找
+    LOOP_MAX_TERMS = 200
+
+    def __init__(self, categories: Dict[str, List[str]], name: str = ""):
+        """
+        构建词表和自动机
+
+        Args:
+            categories: {类别: [词条, ...]}，保持类别和词条的顺序
+            name: 词表名称
+
+        Raises:
+            ValueError: 如果有空词条
+        """
+        self.name = name
+        self.categories = {category: list(terms) for category, terms in categories.items()}
+
+        # 词条编号: 同一个词条出现在多个类别中时各有一个编号，与逐个类别检查的计数一致
+        self.terms: List[str] = []
+        self.term_categories: List[str] = []
+        for category, terms in self.categories.items():
+            for term in terms:
+                if not term:
+                    raise ValueError(f"词表 {name or category} 中有空词条")
+                self.terms.append(term)
+                self.term_categories.append(category)
+
+        self._build()
+
+    def _build(self):
+        """构建自动机: 状态转移表(goto)、失败指针(fail)和每个状态结束的词条编号(out)"""
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Tuple[int, ...]] = [()]
+
+        for term_id, term in enumerate(self.terms):
+            state = 0
+            for ch in term:
+                next_state = goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][ch] = next_state
+                    goto.append({})
+                    out.append(())
+                state = next_state
+            out[state] += (term_id,)
+
+        # 按层次遍历计算失败指针，并把失败链上的输出合并到当前状态
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and ch not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(ch, 0)
+                if out[fail[next_state]]:
+                    out[next_state] += out[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+        self._term_lengths = [len(term) for term in self.terms]
+
+    @property
+    def state_count(self) -> int:
+        """自动机的状态数"""
+        return len(self._goto)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """
+        扫描文本，按结束位置顺序生成所有匹配
+
+        Args:
+            text: 待扫描文本
+
+        Yields:
+            (起始位置, 结束位置, 词条编号)，text[start:end] == terms[term_id]
+        """
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self._term_lengths
+        state = 0
+        for end, ch in enumerate(text, 1):
+            next_state = goto[state].get(ch)
+            while next_state is None and state:
+                state = fail[state]
+                next_state = goto[state].get(ch)
+            state = next_state if next_state is not None else 0
+            if out[state]:
+                for term_id in out[state]:
+                    yield end - lengths[term_id], end, term_id
+
+    def found_ids(self, text: str) -> Set[int]:
+        """
+        文本中出现过的词条编号（按词表规模选择逐个查找或自动机扫描）
+
+        Args:
+            text: 待扫描文本
+
+        Returns:
+            词条编号集合
+        """
+        if len(self.terms) <= self.LOOP_MAX_TERMS:
+            return {term_id for term_id, term in enumerate(self.terms) if term in text}
+        return self.scan_ids(text)
+
+    def scan_ids(self, text: str) -> Set[int]:
+        """用自动机扫描一遍，返回出现过的词条编号（比 iter_matches 少生成元组）"""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for ch in text:
+            next_state = goto[state].get(ch)
+            while next_state is None and state:
+                state = fail[state]
+                next_state = goto[state].get(ch)
+            state = next_state if next_state is not None else 0
+            if out[state]:
+                found.update(out[state])
+        return found
+
+    def contains(self, text: str) -> Dict[str, bool]:
+        """每个词条是否出现 {词条: bool}，按词表顺序"""
+        found = self.found_ids(text)
+        return {term: term_id in found for term_id, term in enumerate(self.terms)}
+
+    def coverage(self, text: str) -> Dict[str, Dict[str, object]]:
+        """
+        按类别统计出现的词条
+
+        Args:
+            text: 待扫描文本
+
+        Returns:
+            {类别: {"found": [出现的词条，按词表顺序], "count": 出现数, "total": 词条数}}
+        """
+        found = self.found_ids(text)
+        result = {category: {"found": [], "count": 0, "total": len(terms)}
+                  for category, terms in self.categories.items()}
+        for term_id in sorted(found):
+            entry = result[self.term_categories[term_id]]
+            entry["found"].append(self.terms[term_id])
+            entry["count"] += 1
+        return result
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Lexicon":
+        """
+        从文件加载词表
+
+        Args:
+            path: .json / .txt / .tsv 文件
+
+        Returns:
+            词表
+
+        Raises:
+            FileNotFoundError: 如果文件不存在
+            ValueError: 如果格式错误
+        """
+        path = Path(path)
+        if path.suffix == ".json":
+            data = json_codec.load(path)
+            categories = data.get("categories", data) if isinstance(data, dict) else None
+            if not isinstance(categories, dict) or not all(isinstance(v, list) for v in categories.values()):
+                raise ValueError(f"词表格式错误: {path}（应为 {{类别: [词条, ...]}}）")
+            return cls(categories, name=data.get("name", path.stem))
+
+        categories: Dict[str, List[str]] = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                category, sep, term = line.partition("\t")
+                if not sep:
+                    category, term = path.stem, line
+                categories.setdefault(category.strip(), []).append(term.strip())
+        return cls(categories, name=path.stem)
@@ -2,11 +2,11 @@
 评测报告生成器
 生成完整的Markdown格式评测报告
 """
-import json
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Any
+from src.utils import json_codec
 
 
 class ReportGenerator:
@@ -16,8 +16,7 @@ class ReportGenerator:
         self.results_dir = Path(results_dir)
 
         # 加载评测结果
-        with open(self.results_dir / "detailed_results.json", 'r', encoding='utf-8') as f:
-            self.results = json.load(f)
+        self.results = json_codec.load(self.results_dir / "detailed_results.json")
 
         self.df = pd.DataFrame(self.results)
 
@@ -2,13 +2,13 @@
 评测结果可视化工具
 生成各类图表展示模型对比
 """
-import json
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib
 from pathlib import Path
 from typing import List, Dict, Any
 import numpy as np
+from src.utils import json_codec
 
 # 设置中文字体
 matplotlib.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'SimHei', 'DejaVu Sans']
@@ -25,8 +25,7 @@ class EvaluationVisualizer:
         Args:
             results_file: 评测结果JSON文件路径
         """
-        with open(results_file, 'r', encoding='utf-8') as f:
-            self.results = json.load(f)
+        self.results = json_codec.load(results_file)
 
         self.df = pd.DataFrame(self.results)
         self.output_dir = Path("./evaluation_results/charts")
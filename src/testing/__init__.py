@@ -0,0 +1,7 @@
+"""
+测试工具模块 - Testing Utilities
+离线压测和测试用的本地模拟服务；合成数据集见 src.testing.synthetic_corpus
+"""
+from .mock_server import MockOpenAIServer
+
+__all__ = ['MockOpenAIServer']
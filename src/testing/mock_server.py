@@ -0,0 +1,413 @@
+"""
+本地模拟服务 - Mock OpenAI-compatible Server
+离线替代真实API，用于压测 UniversalModelService、UnifiedBatchProcessor 和交叉评测引擎
+
+特性:
+- /chat/completions 与 /v1/chat/completions，支持流式(SSE)和非流式
+- 按模型名称配置的时延分布(固定/均匀/正态/对数正态)、首Token时延和Token间隔
+- 可配置的 429 限流率、5xx 错误率和空响应率
+- 交叉评测请求返回固定结构的 JSON 评分，其他请求返回模拟报告文本
+- 同一随机种子下结果可复现
+
+模型配置示例(config/mock_server_profiles.json):
+    {
+      "default": {"latency": {"dist": "lognormal", "median": 0.2, "sigma": 0.4}},
+      "mock-flaky": {"rate_limit_rate": 0.2, "error_rate": 0.05, "empty_rate": 0.05}
+    }
+
+在 model_registry.json 中将 base_url 指向模拟服务即可使用:
+    "mock-fast": {"provider": "mock", "api_key_env": "MOCK_API_KEY",
+                  "base_url": "http://127.0.0.1:8765/v1"}
+
+命令行:
+    python -m src.testing.mock_server --port 8765 --profiles config/mock_server_profiles.json
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Union
+
+# 交叉评测 prompt 的结束语(见 cross_evaluation/prompt_loader.py)
+EVALUATION_MARKER = "请按照上述要求对该报告进行评测"
+
+# 交叉评测各维度在响应JSON中的字段及满分
+EVALUATION_DIMENSIONS = {
+    "accuracy": 40,
+    "logic": 25,
+    "completeness": 15,
+    "formatting": 15,
+    "language": 5
+}
+
+DEFAULT_PROFILE = {
+    "latency": 0.05,          # 非流式响应耗时(秒)或分布
+    "ttft": None,             # 流式首Token时延，None 表示与 latency 相同
+    "token_interval": 0.002,  # 流式Token间隔(秒)或分布
+    "output_tokens": 64,      # 输出片段数
+    "rate_limit_rate": 0.0,   # 返回 429 的概率
+    "error_rate": 0.0,        # 返回 500 的概率
+    "empty_rate": 0.0,        # 返回空内容的概率
+    "retry_after_s": 0.05,    # 429 响应中建议的重试等待时间
+    "content": None,          # 固定返回内容，None 表示自动生成
+    "evaluation": None        # 固定评分 {"accuracy": 35, ...}，None 表示按请求哈希生成
+}
+
+LatencySpec = Union[None, int, float, Dict[str, Any]]
+
+
+def sample_distribution(spec: LatencySpec, rng: random.Random) -> float:
+    """
+    按配置采样(时延、长度倍数等)
+
+    Args:
+        spec: 固定数值，或 {"dist": "fixed|uniform|normal|lognormal", ...}
+        rng: 随机数生成器
+
+    Returns:
+        采样值，不小于0
+    """
+    if spec is None:
+        return 0.0
+    if isinstance(spec, (int, float)):
+        return max(0.0, float(spec))
+
+    dist = spec.get("dist", "fixed")
+    if dist == "fixed":
+        value = spec.get("value", 0.0)
+    elif dist == "uniform":
+        value = rng.uniform(spec.get("low", 0.0), spec.get("high", 0.1))
+    elif dist == "normal":
+        value = rng.gauss(spec.get("mean", 0.1), spec.get("std", 0.02))
+    elif dist == "lognormal":
+        value = rng.lognormvariate(math.log(spec.get("median", 0.1)), spec.get("sigma", 0.5))
+    else:
+        raise ValueError(f"不支持的分布: {dist}")
+
+    return max(0.0, min(value, spec.get("max", float("inf"))))
+
+
+def evaluation_payload(model: str, prompt: str, fixed: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """
+    生成交叉评测响应JSON，分数由模型名和prompt的哈希决定
+
+    Args:
+        model: 模型名称
+        prompt: 评测prompt
+        fixed: 固定分数 {"accuracy": 35, ...}
+
+    Returns:
+        评测JSON
+    """
+    seed = zlib.crc32(f"{model}\n{prompt}".encode("utf-8"))
+    payload = {}
+    for i, (key, max_score) in enumerate(EVALUATION_DIMENSIONS.items()):
+        if fixed and key in fixed:
+            score = fixed[key]
+        else:
+            score = max_score // 2 + (seed >> i) % (max_score - max_score // 2 + 1)
+        payload[key] = {"score": score, "issues": f"模拟评测({model})"}
+    payload["critical_feedback"] = f"由本地模拟服务生成 ({model})"
+    return payload
+
+
+def report_text(model: str, tokens: int) -> List[str]:
+    """生成模拟报告文本，按片段返回"""
+    header = ["## 主诉\n", f"模拟模型 {model} 生成的报告。", "\n\n## 现病史\n"]
+    body = [f"片段{i} " for i in range(max(0, tokens - len(header)))]
+    return (header + body)[:max(tokens, 1)]
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    # 默认监听队列只有5，高并发压测时新连接会被丢弃并等待TCP重传
+    request_queue_size = 256
+    daemon_threads = True
+
+
+class MockOpenAIServer:
+    """OpenAI 兼容的本地模拟服务"""
+
+    def __init__(
+        self,
+        profiles: Optional[Dict[str, Dict[str, Any]]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int = 0
+    ):
+        """
+        初始化模拟服务
+
+        Args:
+            profiles: {模型名: 配置}，"default" 为未列出模型的默认配置
+            host: 监听地址
+            port: 监听端口(0表示随机可用端口)
+            seed: 随机种子
+        """
+        self.profiles = profiles or {}
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._in_flight = 0
+        self.max_in_flight = 0
+
+        server = self
+
+        class Handler(_MockHandler):
+            mock = server
+
+        self.httpd = _MockHTTPServer((host, port), Handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """模拟服务的 base_url(可直接写入 model_registry.json)"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def profile(self, model: str) -> Dict[str, Any]:
+        """获取模型的完整配置"""
+        return {**DEFAULT_PROFILE, **self.profiles.get("default", {}), **self.profiles.get(model, {})}
+
+    def random(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def sample(self, spec: LatencySpec) -> float:
+        with self._rng_lock:
+            return sample_distribution(spec, self._rng)
+
+    def record(self, model: str, outcome: str):
+        with self._stats_lock:
+            model_stats = self._stats.setdefault(model, {})
+            model_stats[outcome] = model_stats.get(outcome, 0) + 1
+
+    def enter(self):
+        with self._stats_lock:
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+
+    def exit(self):
+        with self._stats_lock:
+            self._in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取请求统计
+
+        Returns:
+            {"models": {模型: {结果: 次数}}, "requests": 总请求数, "max_in_flight": 最大并发}
+        """
+        with self._stats_lock:
+            models = {model: dict(counts) for model, counts in self._stats.items()}
+        return {
+            "models": models,
+            "requests": sum(sum(counts.values()) for counts in models.values()),
+            "max_in_flight": self.max_in_flight
+        }
+
+    def start(self) -> "MockOpenAIServer":
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止服务"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "MockOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    """请求处理器"""
+
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体分开写入，需关闭Nagle算法避免延迟ACK带来的约40ms额外时延
+    disable_nagle_algorithm = True
+    mock: MockOpenAIServer = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunk(self, data: Dict[str, Any]):
+        payload = f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+        self.wfile.write(f"{len(payload):X}\r\n".encode("ascii") + payload + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/models", "/v1/models"):
+            models = [name for name in self.mock.profiles if name != "default"]
+            self._send_json(200, {"object": "list", "data": [{"id": m, "object": "model"} for m in models]})
+        else:
+            self._send_json(404, {"error": {"message": f"未知路径: {self.path}"}})
+
+    def do_POST(self):
+        # 先读完请求体，保证 keep-alive 连接可以继续复用
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+
+        if self.path.rstrip("/") not in ("/chat/completions", "/v1/chat/completions"):
+            self._send_json(404, {"error": {"message": f"未知路径: {self.path}"}})
+            return
+
+        request = json.loads(body or b"{}")
+        model = request.get("model", "unknown")
+        profile = self.mock.profile(model)
+
+        self.mock.enter()
+        try:
+            self._handle_completion(request, model, profile)
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端提前断开(超时或取消)，模拟服务不需要报错
+            self.mock.record(model, "disconnected")
+            self.close_connection = True
+        finally:
+            self.mock.exit()
+
+    def _handle_completion(self, request: Dict[str, Any], model: str, profile: Dict[str, Any]):
+        roll = self.mock.random()
+        if roll < profile["rate_limit_rate"]:
+            self.mock.record(model, "429")
+            retry_after = profile["retry_after_s"]
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit exceeded (mock)", "type": "rate_limit_error"}},
+                {"retry-after-ms": str(int(retry_after * 1000)), "Retry-After": str(max(1, math.ceil(retry_after)))}
+            )
+            return
+        if roll < profile["rate_limit_rate"] + profile["error_rate"]:
+            self.mock.record(model, "500")
+            self._send_json(500, {"error": {"message": "Internal error (mock)", "type": "server_error"}})
+            return
+
+        messages = request.get("messages") or []
+        prompt = messages[-1].get("content", "") if messages else ""
+
+        if self.mock.random() < profile["empty_rate"]:
+            pieces = []
+            self.mock.record(model, "empty")
+        else:
+            if profile["content"] is not None:
+                pieces = [profile["content"]]
+            elif EVALUATION_MARKER in prompt:
+                payload = evaluation_payload(model, prompt, profile["evaluation"])
+                pieces = [f"```json\n{json.dumps(payload, ensure_ascii=False)}\n```"]
+            else:
+                pieces = report_text(model, profile["output_tokens"])
+            self.mock.record(model, "ok")
+
+        created = int(time.time())
+        completion_id = f"chatcmpl-mock-{zlib.crc32(prompt.encode('utf-8')):08x}"
+        usage = {
+            "prompt_tokens": len(prompt),
+            "completion_tokens": len(pieces),
+            "total_tokens": len(prompt) + len(pieces)
+        }
+
+        if not request.get("stream"):
+            time.sleep(self.mock.sample(profile["latency"]))
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(pieces)},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        ttft = profile["ttft"] if profile["ttft"] is not None else profile["latency"]
+        time.sleep(self.mock.sample(ttft))
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> Dict[str, Any]:
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+
+        self._send_chunk(chunk({"role": "assistant", "content": ""}))
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(self.mock.sample(profile["token_interval"]))
+            self._send_chunk(chunk({"content": piece}))
+        self._send_chunk(chunk({}, "stop"))
+
+        if (request.get("stream_options") or {}).get("include_usage"):
+            self._send_chunk({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [],
+                "usage": usage
+            })
+
+        done = b"data: [DONE]\n\n"
+        self.wfile.write(f"{len(done):X}\r\n".encode("ascii") + done + b"\r\n0\r\n\r\n")
+        self.wfile.flush()
+
+
+def load_profiles(file_path: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """加载模型配置文件"""
+    if not file_path:
+        return {}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    """命令行入口: 在前台运行模拟服务"""
+    parser = argparse.ArgumentParser(description="OpenAI 兼容的本地模拟服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--profiles", default="config/mock_server_profiles.json", help="模型配置文件")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(load_profiles(args.profiles), args.host, args.port, args.seed)
+    print(f"✓ 模拟服务已启动: {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"请求统计: {json.dumps(server.stats(), ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,526 @@
+"""
+合成数据集 - Synthetic Corpus
+以 测试输入问答记录、output/raw 和 output/cross_evaluation_results 中的真实文件为模板，
+生成任意规模(模型数 × 患者数)的患者问答记录、原始报告和交叉评测结果树，用于基准测试和压力测试
+
+生成的目录布局与线上一致，各阶段可直接指向这些目录运行:
+    {root}/问答记录/{patient}_问答记录.txt
+    {root}/raw/{model}-{patient}.json
+    {root}/cross_evaluation_results/{patient}/{evaluated}_by_{evaluator}_{patient}_{维度}.json
+    {root}/cross_evaluation_results/{patient}/{evaluated}_by_{evaluator}_{patient}_aggregated.json
+
+文本长度通过长度倍数分布控制(相对模板长度)，格式与模拟服务的时延分布相同:
+    1.5                                              固定倍数
+    {"dist": "lognormal", "median": 1.0, "sigma": 0.4, "max": 4}
+
+完整交叉矩阵的文件数为 模型数² × 患者数 × 6，100 个模型 × 1000 个患者时不可行，
+因此评测模型数单独配置(默认取前几个模型)
+
+用法:
+    python -m src.testing.synthetic_corpus /tmp/corpus --models 30 --patients 1000 --evaluators 4
+    python -m src.testing.synthetic_corpus /tmp/corpus --models 8 --patients 100 \\
+        --dialogue-scale '{"dist": "lognormal", "median": 1.0, "sigma": 0.5, "max": 4}'
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src.utils.patient_source import RECORD_SUFFIX, iter_patient_records
+from src.utils.raw_report import FORMAT_V1, build_input, load_raw_report, save_raw_report
+from .mock_server import LatencySpec, sample_distribution
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+TEMPLATE_DIALOGUE_DIR = BASE_DIR / "测试输入问答记录"
+TEMPLATE_RAW_DIR = BASE_DIR / "output" / "raw"
+TEMPLATE_RESULTS_DIR = BASE_DIR / "output" / "cross_evaluation_results"
+CONFIG_FILE = BASE_DIR / "config" / "cross_evaluation_config.json"
+
+DIALOGUE_DIR = "问答记录"
+
+# 维度结果中保存的评测模型原始输出的JSON键名
+DIMENSION_KEYS = {
+    "准确性": "accuracy",
+    "逻辑性": "logic",
+    "完整性": "completeness",
+    "格式规范性": "format",
+    "语言表达": "language"
+}
+
+# 问答记录中对话轮次的起始行: "12. 患者: ..." / "13. 医助: ..."
+TURN_PATTERN = re.compile(r'^\d+\. (?=(?:患者|医助)[:：])', re.MULTILINE)
+PATIENT_NAME_PATTERN = re.compile(r'患者\d+')
+# 报告文本按句子/行切分的边界
+SENTENCE_PATTERN = re.compile(r'(?<=[。；\n])')
+
+
+def model_names(count: int) -> List[str]:
+    """合成模型名称"""
+    return [f"synth-m{i}" for i in range(count)]
+
+
+def patient_names(count: int) -> List[str]:
+    """合成患者名称（与真实数据一致的 患者N 格式）"""
+    return [f"患者{i + 1}" for i in range(count)]
+
+
+def load_dimensions(config_file: Union[str, Path] = CONFIG_FILE) -> List[Dict[str, Any]]:
+    """读取交叉评测配置中的维度定义"""
+    with open(config_file, 'r', encoding='utf-8') as f:
+        return json.load(f)["dimensions"]
+
+
+def load_dialogue_templates(source: Union[str, Path] = TEMPLATE_DIALOGUE_DIR) -> List[str]:
+    """
+    读取患者问答记录模板
+
+    Returns:
+        问答记录文本列表
+
+    Raises:
+        FileNotFoundError: 模板来源中没有问答记录
+    """
+    templates = [record["chat"] for record in iter_patient_records(source)]
+    if not templates:
+        raise FileNotFoundError(f"{source} 中没有可用作模板的问答记录")
+    return templates
+
+
+def load_raw_templates(raw_dir: Union[str, Path] = TEMPLATE_RAW_DIR) -> List[Dict[str, Any]]:
+    """
+    读取原始报告模板
+
+    Returns:
+        v1 结构的报告列表
+
+    Raises:
+        FileNotFoundError: 模板目录中没有报告
+    """
+    templates = [load_raw_report(path) for path in sorted(Path(raw_dir).glob("*.json"))]
+    if not templates:
+        raise FileNotFoundError(f"{raw_dir} 中没有可用作模板的报告")
+    return templates
+
+
+def load_result_templates(results_dir: Union[str, Path] = TEMPLATE_RESULTS_DIR) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    读取维度评测结果模板，按维度分组
+
+    Returns:
+        {维度名称: [维度结果, ...]}
+    """
+    templates: Dict[str, List[Dict[str, Any]]] = {}
+    for path in sorted(Path(results_dir).glob("*/*.json")):
+        if path.stem.endswith("_aggregated"):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            result = json.load(f)
+        if "dimension" in result:
+            templates.setdefault(result["dimension"], []).append(result)
+    return templates
+
+
+def _target_length(length: int, scale: LatencySpec, rng: random.Random) -> int:
+    if scale is None:
+        return length
+    return max(1, round(length * sample_distribution(scale, rng)))
+
+
+def resize_text(text: str, scale: LatencySpec, rng: random.Random) -> str:
+    """
+    按长度倍数缩放报告文本
+
+    缩短时在句子边界截断(至少保留第一句)，加长时从原文中随机抽取句子追加
+
+    Args:
+        text: 原文
+        scale: 长度倍数或分布(None表示不变)
+        rng: 随机数生成器
+
+    Returns:
+        缩放后的文本
+    """
+    target = _target_length(len(text), scale, rng)
+    if target == len(text) or not text:
+        return text
+
+    sentences = [s for s in SENTENCE_PATTERN.split(text) if s]
+    if target < len(text):
+        kept, size = [], 0
+        for sentence in sentences:
+            if kept and size + len(sentence) > target:
+                break
+            kept.append(sentence)
+            size += len(sentence)
+        return "".join(kept)
+
+    parts, size = [text], len(text)
+    while size < target:
+        sentence = rng.choice(sentences)
+        parts.append(sentence)
+        size += len(sentence)
+    return "".join(parts)
+
+
+def resize_dialogue(chat: str, scale: LatencySpec, rng: random.Random) -> str:
+    """
+    按长度倍数缩放问答记录
+
+    保留基本信息头部，按对话轮次截断或重复中间轮次，并重新编号
+
+    Args:
+        chat: 问答记录文本
+        scale: 长度倍数或分布(None表示不变)
+        rng: 随机数生成器
+
+    Returns:
+        缩放后的问答记录
+    """
+    starts = [m.start() for m in TURN_PATTERN.finditer(chat)]
+    if scale is None or len(starts) < 2:
+        return chat
+
+    header = chat[:starts[0]]
+    turns = [TURN_PATTERN.sub("", chat[a:b], count=1) for a, b in zip(starts, starts[1:] + [len(chat)])]
+    body_length = len(chat) - len(header)
+    target = _target_length(body_length, scale, rng)
+
+    if target < body_length:
+        kept, size = [], 0
+        for turn in turns:
+            if kept and size + len(turn) > target:
+                break
+            kept.append(turn)
+            size += len(turn)
+        turns = kept
+    else:
+        # 首轮(自我介绍)之后插入重复的问答轮次，保持 医助/患者 交替
+        middle = turns[1:-1] or turns
+        size = body_length
+        inserted = []
+        while size < target:
+            start = 2 * rng.randrange(max(1, len(middle) // 2))
+            pair = middle[start:start + 2]
+            inserted.extend(pair)
+            size += sum(len(t) for t in pair)
+        turns = turns[:-1] + inserted + turns[-1:]
+
+    body = "".join(f"{i}. {turn}" for i, turn in enumerate(turns, 1))
+    return header + body
+
+
+def rename_patient(text: str, patient: str) -> str:
+    """将模板中的患者名称(患者N)替换为新名称"""
+    return PATIENT_NAME_PATTERN.sub(patient, text)
+
+
+def write_dialogues(
+    dialogue_dir: Union[str, Path],
+    patients: List[str],
+    templates: Optional[List[str]] = None,
+    dialogue_scale: LatencySpec = None,
+    seed: int = 0
+) -> Dict[str, str]:
+    """
+    生成患者问答记录文件 {patient}_问答记录.txt
+
+    Args:
+        dialogue_dir: 输出目录
+        patients: 患者列表
+        templates: 问答记录模板（None表示读取 测试输入问答记录）
+        dialogue_scale: 问答记录长度倍数或分布
+        seed: 随机种子
+
+    Returns:
+        {患者名称: 问答记录}
+    """
+    templates = templates or load_dialogue_templates()
+    rng = random.Random(seed)
+    dialogue_dir = Path(dialogue_dir)
+    dialogue_dir.mkdir(parents=True, exist_ok=True)
+
+    dialogues = {}
+    for patient in patients:
+        chat = resize_dialogue(rename_patient(rng.choice(templates), patient), dialogue_scale, rng)
+        with open(dialogue_dir / f"{patient}{RECORD_SUFFIX}.txt", 'w', encoding='utf-8') as f:
+            f.write(chat)
+        dialogues[patient] = chat
+    return dialogues
+
+
+def write_raw_reports(
+    raw_dir: Union[str, Path],
+    models: List[str],
+    patients: List[str],
+    templates: Optional[List[Dict[str, Any]]] = None,
+    dialogues: Optional[Dict[str, str]] = None,
+    output_scale: LatencySpec = None,
+    format_version: int = FORMAT_V1,
+    seed: int = 0
+) -> int:
+    """
+    生成原始报告 {model}-{patient}.json
+
+    每份报告随机选取一个模板，替换模型和患者字段，各段 Output 按长度倍数缩放，
+    result 与批量处理器一致为各段 Output 以换行拼接；提供问答记录时 chat/Input 使用该患者的问答记录
+
+    Args:
+        raw_dir: 输出目录
+        models: 模型列表
+        patients: 患者列表
+        templates: 报告模板（None表示读取 output/raw）
+        dialogues: {患者名称: 问答记录}（None表示保留模板中的问答记录）
+        output_scale: 报告 Output 长度倍数或分布
+        format_version: 写入格式版本(v2 下问答记录和 Prompt 去重存储，适合大规模数据集)
+        seed: 随机种子
+
+    Returns:
+        生成的报告数
+    """
+    templates = templates or load_raw_templates()
+    rng = random.Random(seed)
+    raw_dir = Path(raw_dir)
+
+    count = 0
+    for model, patient in itertools.product(models, patients):
+        template = rng.choice(templates)
+        conversations = {}
+        for key, conv in template.get("conversations", {}).items():
+            chat = dialogues[patient] if dialogues else rename_patient(conv.get("chat", ""), patient)
+            conversations[key] = {
+                **conv,
+                "model": model,
+                "people": patient,
+                "chat": chat,
+                "Input": build_input(conv.get("prompt", ""), chat),
+                "Output": resize_text(rename_patient(conv.get("Output", ""), patient), output_scale, rng)
+            }
+
+        report = {
+            **template,
+            "model": model,
+            "people": patient,
+            "conversations": conversations,
+            "result": "\n".join(conv["Output"] for conv in conversations.values())
+        }
+        save_raw_report(report, raw_dir / f"{model}-{patient}.json", format_version)
+        count += 1
+    return count
+
+
+def _dimension_result(
+    template: Dict[str, Any],
+    evaluated_model: str,
+    evaluator_model: str,
+    patient: str,
+    max_score: int,
+    rng: random.Random
+) -> Dict[str, Any]:
+    score = rng.randint(max_score // 2, max_score)
+    dimension_name = template["dimension"]
+    output = json.dumps({
+        DIMENSION_KEYS.get(dimension_name, "result"): {
+            "score": str(score),
+            "issues": template.get("issues", ""),
+            "critical_feedback": template.get("critical_feedback", "")
+        }
+    }, ensure_ascii=False, indent=2)
+    return {
+        **template,
+        "evaluated_model": evaluated_model,
+        "evaluator_model": evaluator_model,
+        "patient": patient,
+        "max_score": max_score,
+        "score": score,
+        "source_llm": evaluator_model,
+        "target_llm": evaluated_model,
+        "output": output,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def write_result_tree(
+    results_dir: Union[str, Path],
+    evaluated_models: List[str],
+    evaluator_models: List[str],
+    patients: List[str],
+    templates: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+    dimensions: Optional[List[Dict[str, Any]]] = None,
+    with_dimension_files: bool = True,
+    seed: int = 0
+) -> Tuple[int, int]:
+    """
+    生成交叉评测结果树
+
+    聚合结果的结构与 ScoreAggregator.aggregate 的输出一致
+
+    Args:
+        results_dir: 输出目录
+        evaluated_models: 被评测模型列表
+        evaluator_models: 评测模型列表
+        patients: 患者列表
+        templates: 维度结果模板（None表示读取 output/cross_evaluation_results）
+        dimensions: 维度定义（None表示读取交叉评测配置）
+        with_dimension_files: 是否写出维度结果文件（False时只写聚合结果）
+        seed: 随机种子
+
+    Returns:
+        (维度结果文件数, 聚合结果文件数)
+    """
+    templates = templates or load_result_templates()
+    dimensions = dimensions or load_dimensions()
+    missing = [d["name"] for d in dimensions if not templates.get(d["name"])]
+    if missing:
+        raise FileNotFoundError(f"缺少维度结果模板: {', '.join(missing)}")
+
+    rng = random.Random(seed)
+    results_dir = Path(results_dir)
+    dimension_count = 0
+    aggregated_count = 0
+
+    for patient in patients:
+        patient_dir = results_dir / patient
+        patient_dir.mkdir(parents=True, exist_ok=True)
+
+        for evaluated_model, evaluator_model in itertools.product(evaluated_models, evaluator_models):
+            prefix = f"{evaluated_model}_by_{evaluator_model}_{patient}"
+            results = [
+                _dimension_result(
+                    rng.choice(templates[d["name"]]), evaluated_model, evaluator_model, patient, d["weight"], rng
+                )
+                for d in dimensions
+            ]
+
+            if with_dimension_files:
+                for result in results:
+                    with open(patient_dir / f"{prefix}_{result['dimension']}.json", 'w', encoding='utf-8') as f:
+                        json.dump(result, f, ensure_ascii=False, indent=2)
+                    dimension_count += 1
+
+            aggregated = {
+                "evaluated_model": evaluated_model,
+                "evaluator_model": evaluator_model,
+                "patient": patient,
+                "total_score": sum(r["score"] for r in results),
+                "max_total_score": sum(r["max_score"] for r in results),
+                "dimensions": {
+                    r["dimension"]: {"score": r["score"], "max_score": r["max_score"], "issues": r["issues"]}
+                    for r in results
+                },
+                "critical_feedbacks": [r["critical_feedback"] for r in results if r.get("critical_feedback")],
+                "timestamp": datetime.now().isoformat()
+            }
+            with open(patient_dir / f"{prefix}_aggregated.json", 'w', encoding='utf-8') as f:
+                json.dump(aggregated, f, ensure_ascii=False, indent=2)
+            aggregated_count += 1
+
+    return dimension_count, aggregated_count
+
+
+def build_corpus(
+    root: Union[str, Path],
+    num_models: int,
+    num_patients: int,
+    num_evaluators: Optional[int] = None,
+    with_dimension_files: bool = True,
+    format_version: int = FORMAT_V1,
+    dialogue_scale: LatencySpec = None,
+    output_scale: LatencySpec = None,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    生成完整的数据集
+
+    Args:
+        root: 输出根目录
+        num_models: 模型数
+        num_patients: 患者数
+        num_evaluators: 评测模型数（None表示全部模型互评，0表示不生成结果树）
+        with_dimension_files: 是否写出维度结果文件
+        format_version: 原始报告格式版本
+        dialogue_scale: 问答记录长度倍数或分布
+        output_scale: 报告 Output 长度倍数或分布
+        seed: 随机种子
+
+    Returns:
+        数据集描述 {dialogue_dir, raw_dir, results_dir, models, evaluators, patients,
+                    dialogues, raw_reports, dimension_files, aggregated_files}
+    """
+    root = Path(root)
+    models = model_names(num_models)
+    patients = patient_names(num_patients)
+    evaluators = models[:num_evaluators] if num_evaluators is not None else models
+
+    dialogue_dir = root / DIALOGUE_DIR
+    raw_dir = root / "raw"
+    results_dir = root / "cross_evaluation_results"
+
+    dialogues = write_dialogues(dialogue_dir, patients, dialogue_scale=dialogue_scale, seed=seed)
+    raw_reports = write_raw_reports(
+        raw_dir, models, patients, dialogues=dialogues,
+        output_scale=output_scale, format_version=format_version, seed=seed
+    )
+    dimension_files, aggregated_files = write_result_tree(
+        results_dir, models, evaluators, patients, with_dimension_files=with_dimension_files, seed=seed
+    ) if evaluators else (0, 0)
+
+    return {
+        "dialogue_dir": str(dialogue_dir),
+        "raw_dir": str(raw_dir),
+        "results_dir": str(results_dir),
+        "models": models,
+        "evaluators": evaluators,
+        "patients": patients,
+        "dialogues": len(dialogues),
+        "raw_reports": raw_reports,
+        "dimension_files": dimension_files,
+        "aggregated_files": aggregated_files
+    }
+
+
+def _parse_scale(value: str) -> LatencySpec:
+    """命令行长度倍数: 数字或JSON分布"""
+    return json.loads(value)
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="生成合成数据集(问答记录/原始报告/交叉评测结果)")
+    parser.add_argument("root", help="输出目录")
+    parser.add_argument("--models", type=int, default=8, help="模型数")
+    parser.add_argument("--patients", type=int, default=10, help="患者数")
+    parser.add_argument("--evaluators", type=int, help="评测模型数(默认全部模型互评，0表示不生成结果树)")
+    parser.add_argument("--aggregated-only", action="store_true", help="只写聚合结果，不写维度结果文件")
+    parser.add_argument("--format", type=int, choices=[1, 2], default=FORMAT_V1, help="原始报告格式版本")
+    parser.add_argument("--dialogue-scale", type=_parse_scale, help="问答记录长度倍数，数字或JSON分布")
+    parser.add_argument("--output-scale", type=_parse_scale, help="报告Output长度倍数，数字或JSON分布")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    corpus = build_corpus(
+        args.root,
+        num_models=args.models,
+        num_patients=args.patients,
+        num_evaluators=args.evaluators,
+        with_dimension_files=not args.aggregated_only,
+        format_version=args.format,
+        dialogue_scale=args.dialogue_scale,
+        output_scale=args.output_scale,
+        seed=args.seed
+    )
+
+    print(f"✓ 数据集已生成: {args.root} ({time.perf_counter() - start:.1f}秒)")
+    print(f"  问答记录: {corpus['dialogues']}  ({corpus['dialogue_dir']})")
+    print(f"  原始报告: {corpus['raw_reports']}  ({corpus['raw_dir']})")
+    print(f"  维度结果: {corpus['dimension_files']}  聚合结果: {corpus['aggregated_files']}  "
+          f"({corpus['results_dir']})")
+
+
+if __name__ == "__main__":
+    main()
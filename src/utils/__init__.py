@@ -18,6 +18,23 @@ from .page_generator import (
 from .result_extractor import (
     extract_results_to_markdown
 )
+from .patient_source import (
+    parse_shard,
+    iter_patient_names,
+    iter_patient_records
+)
+from .raw_report import (
+    load_raw_report,
+    save_raw_report
+)
+from .raw_manifest import (
+    RawManifest,
+    load_manifest
+)
+from .result_loader import (
+    ResultLoader,
+    find_result_files
+)
 
 __all__ = [
     'parse_markdown_file',
@@ -28,4 +45,13 @@ __all__ = [
     'load_all_results',
     'generate_html',
     'extract_results_to_markdown',
+    'parse_shard',
+    'iter_patient_names',
+    'iter_patient_records',
+    'load_raw_report',
+    'save_raw_report',
+    'RawManifest',
+    'load_manifest',
+    'ResultLoader',
+    'find_result_files',
 ]
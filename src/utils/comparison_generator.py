@@ -2,11 +2,13 @@
 准备模型对比数据
 将 markdown 文件转换为前端可用的 JSON 数据
 """
-import json
 import re
 from pathlib import Path
 from collections import defaultdict
 
+from src.utils import json_codec
+from src.utils.raw_report import load_raw_report
+
 
 def parse_markdown_file(md_file):
     """解析单个 Markdown 文件"""
@@ -49,8 +51,7 @@ def load_raw_conversations(raw_dir):
 
     for json_file in raw_path.glob("*.json"):
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_raw_report(json_file)
 
             model = data.get("model", "")
             patient = data.get("people", "")
@@ -134,8 +135,7 @@ def main():
         print(f"  - {model}")
 
     # 保存为 JSON
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(comparison_data, f, ensure_ascii=False, indent=2)
+    json_codec.dump(comparison_data, output_file, pretty=True)
 
     print(f"\n✓ 数据已保存到: {output_file}")
     print("="*60 + "\n")
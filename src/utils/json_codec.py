@@ -0,0 +1,266 @@
+"""
+JSON编解码 - JSON Codec
+流水线中所有产物(原始报告、评测结果、聚合结果、前端数据、进度/清单/追踪文件)的读写入口
+
+安装了 orjson 时使用 orjson，否则使用标准库 json；环境变量 JSON_CODEC_BACKEND=json 可强制使用标准库
+两种输出模式:
+    compact  无缩进无空格，用于只给程序读取的产物(进度、清单、JSONL、前端数据)
+    pretty   2空格缩进，用于需要人工查看的产物(评测结果、聚合结果、原始报告、配置)
+
+两种后端的输出都保留中文原文(等价于 ensure_ascii=False)。orjson 不支持的输入
+(超过64位的整数、孤立代理字符、非字符串键等)自动回退到标准库；读取时 NaN/Infinity
+同样回退到标准库解析，写入时 orjson 把 NaN/Infinity 写为合法JSON的 null
+
+体积随数据规模增长的产物(前端详情、对比数据)用 JsonStreamWriter 逐项写出，不在内存中构造整个对象
+"""
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 取决于环境
+    orjson = None
+
+BACKEND_ORJSON = "orjson"
+BACKEND_STDLIB = "json"
+
+PathLike = Union[str, Path]
+
+
+def available_backends() -> list:
+    """当前环境可用的后端"""
+    return [BACKEND_ORJSON, BACKEND_STDLIB] if orjson is not None else [BACKEND_STDLIB]
+
+
+class JsonCodec:
+    """JSON编解码器"""
+
+    def __init__(self, backend: Optional[str] = None):
+        """
+        初始化编解码器
+
+        Args:
+            backend: "orjson" 或 "json"（None表示按环境变量 JSON_CODEC_BACKEND 或自动选择）
+
+        Raises:
+            ValueError: 如果指定的后端不可用
+        """
+        if backend is None:
+            backend = os.getenv("JSON_CODEC_BACKEND") or (BACKEND_ORJSON if orjson is not None else BACKEND_STDLIB)
+        if backend not in available_backends():
+            raise ValueError(f"JSON后端不可用: {backend}（可用: {', '.join(available_backends())}）")
+        self.backend = backend
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """
+        解析JSON文本
+
+        Args:
+            data: JSON文本或UTF-8字节
+
+        Returns:
+            解析结果
+
+        Raises:
+            json.JSONDecodeError: 如果不是合法的JSON
+        """
+        if self.backend == BACKEND_ORJSON:
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                # NaN/Infinity、超大整数等标准库可以解析的输入
+                pass
+        return json.loads(data)
+
+    def dumps(self, obj: Any, pretty: bool = False, sort_keys: bool = False,
+              default: Optional[Callable[[Any], Any]] = None) -> str:
+        """
+        序列化为JSON文本
+
+        Args:
+            obj: 要序列化的对象
+            pretty: True为2空格缩进，False为紧凑格式
+            sort_keys: 是否按键排序
+            default: 无法序列化的对象的转换函数
+
+        Returns:
+            JSON文本
+        """
+        if self.backend == BACKEND_ORJSON:
+            data = self._orjson_dumps(obj, pretty, sort_keys, default)
+            if data is not None:
+                return data.decode('utf-8')
+        return self._stdlib_dumps(obj, pretty, sort_keys, default)
+
+    def dumps_bytes(self, obj: Any, pretty: bool = False, sort_keys: bool = False,
+                    default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        """同 dumps，返回UTF-8字节（写文件时省去一次编解码）"""
+        if self.backend == BACKEND_ORJSON:
+            data = self._orjson_dumps(obj, pretty, sort_keys, default)
+            if data is not None:
+                return data
+        return self._stdlib_dumps(obj, pretty, sort_keys, default).encode('utf-8')
+
+    @staticmethod
+    def _orjson_dumps(obj, pretty, sort_keys, default) -> Optional[bytes]:
+        """orjson序列化，不支持的输入返回None"""
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except orjson.JSONEncodeError:
+            return None
+
+    @staticmethod
+    def _stdlib_dumps(obj, pretty, sort_keys, default) -> str:
+        if pretty:
+            return json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=sort_keys, default=default)
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys, default=default)
+
+    def load(self, path: PathLike) -> Any:
+        """
+        读取JSON文件
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            解析结果
+        """
+        with open(path, 'rb') as f:
+            return self.loads(f.read())
+
+    def dump(self, obj: Any, path: PathLike, pretty: bool = False, sort_keys: bool = False,
+             default: Optional[Callable[[Any], Any]] = None) -> Path:
+        """
+        写入JSON文件
+
+        Args:
+            obj: 要序列化的对象
+            path: 文件路径
+            pretty: True为2空格缩进，False为紧凑格式
+            sort_keys: 是否按键排序
+            default: 无法序列化的对象的转换函数
+
+        Returns:
+            文件路径
+        """
+        path = Path(path)
+        data = self.dumps_bytes(obj, pretty, sort_keys, default)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+
+class JsonStreamWriter:
+    """
+    增量写出一个顶层JSON对象（compact 格式）
+
+    顶层字段可以是普通值，也可以是逐项追加的数组/对象，内存中只保留当前一项:
+
+        with JsonStreamWriter(path) as writer:
+            writer.field("metadata", {...})
+            writer.begin("evaluations")          # 数组
+            for item in items:
+                writer.item(item)
+            writer.end()
+            writer.begin("data", container="object")
+            writer.item({...}, key="患者1")
+            writer.end()
+
+    输出与对同一结构调用 dump(obj, path) 的结果逐字节相同。先写入同目录下的临时文件，
+    正常结束时替换目标文件，出错时删除临时文件，目标文件不会处于写了一半的状态
+    """
+
+    def __init__(self, path: PathLike, codec: Optional[JsonCodec] = None):
+        self.path = Path(path)
+        self.codec = codec or default_codec
+        self._tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        self._file = open(self._tmp_path, 'wb')
+        self._file.write(b"{")
+        self._fields = 0
+        self._container = None
+        self._items = 0
+
+    def _key(self, key: str) -> bytes:
+        return self.codec.dumps_bytes(key) + b":"
+
+    def _begin_field(self, key: str):
+        if self._container is not None:
+            raise ValueError("上一个数组/对象字段尚未结束")
+        if self._fields:
+            self._file.write(b",")
+        self._file.write(self._key(key))
+        self._fields += 1
+
+    def field(self, key: str, value: Any):
+        """写出一个顶层字段"""
+        self._begin_field(key)
+        self._file.write(self.codec.dumps_bytes(value))
+
+    def begin(self, key: str, container: str = "array"):
+        """
+        开始一个逐项追加的顶层字段
+
+        Args:
+            key: 字段名
+            container: "array" 或 "object"
+        """
+        self._begin_field(key)
+        self._container = container
+        self._items = 0
+        self._file.write(b"[" if container == "array" else b"{")
+
+    def item(self, value: Any, key: Optional[str] = None):
+        """向当前数组追加一项；对象需要提供 key"""
+        if self._container is None:
+            raise ValueError("没有正在写出的数组/对象字段")
+        if self._items:
+            self._file.write(b",")
+        if self._container == "object":
+            self._file.write(self._key(key))
+        self._file.write(self.codec.dumps_bytes(value))
+        self._items += 1
+
+    def end(self) -> int:
+        """结束当前数组/对象字段，返回其项数"""
+        self._file.write(b"]" if self._container == "array" else b"}")
+        self._container = None
+        return self._items
+
+    def close(self) -> Path:
+        """结束顶层对象并替换目标文件"""
+        if self._container is not None:
+            self.end()
+        self._file.write(b"}")
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def abort(self):
+        """放弃写出，删除临时文件"""
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "JsonStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+# 创建全局实例
+default_codec = JsonCodec()
+
+loads = default_codec.loads
+dumps = default_codec.dumps
+load = default_codec.load
+dump = default_codec.dump
@@ -4,12 +4,15 @@
 X轴：患者（患者1-10）
 Y轴：模型
 """
-import json
 import os
 from pathlib import Path
 from typing import Dict, List
 from collections import defaultdict
 
+from src.utils import json_codec
+from src.utils.raw_manifest import load_manifest
+from src.utils.raw_report import load_raw_report
+
 
 def load_all_results(output_dir: str = "./output/raw") -> Dict[str, Dict[str, dict]]:
     """
@@ -28,17 +31,15 @@ def load_all_results(output_dir: str = "./output/raw") -> Dict[str, Dict[str, di
 
     print(f"正在扫描目录: {output_dir}")
 
-    for file_path in sorted(output_path.glob("*.json")):
-        print(f"  读取: {file_path.name}")
-
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        model = data.get('model', '')
-        people = data.get('people', '')
+    # 清单中记录了文件内的 model/people 字段，缺少这两个字段的文件不必读取
+    for entry in load_manifest(output_path, refresh=True).entries(include_unnamed=True):
+        model = entry.get('report_model') or ''
+        people = entry.get('report_people') or ''
+        if not (model and people):
+            continue
 
-        if model and people:
-            results[model][people] = data
+        print(f"  读取: {entry['file']}")
+        results[model][people] = load_raw_report(output_path / entry['file'])
 
     print(f"\n成功加载 {len(results)} 个模型的数据")
     for model, patients in results.items():
@@ -493,7 +494,7 @@ def generate_html(results: Dict[str, Dict[str, dict]], output_file: str = "compa
 
     <script>
         // 数据存储
-        const data = """ + json.dumps(results, ensure_ascii=False) + """;
+        const data = """ + json_codec.dumps(results) + """;
 
         // 联动滚动：同步左右表格的垂直和水平滚动
         const leftTable = document.querySelector('.table-left');
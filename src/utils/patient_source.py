@@ -0,0 +1,207 @@
+"""
+患者记录数据源 - Patient Record Source
+惰性读取患者问答记录，支持目录、JSONL文件和glob模式三种来源，以及确定性分片
+
+分片规则:
+    --shard i/N 表示共N个分片中的第i个(0 <= i < N)
+    患者按名称的CRC32哈希分配到分片，与文件顺序、机器和进程无关，
+    因此多个进程/机器各自指定不同的分片即可无协调地切分同一语料
+"""
+import glob
+import json
+import re
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from src.utils import json_codec
+
+# 患者文件名后缀: 患者1_问答记录.txt -> 患者1
+RECORD_SUFFIX = '_问答记录'
+
+Shard = Tuple[int, int]
+
+
+def parse_shard(spec: Optional[Union[str, Shard]]) -> Optional[Shard]:
+    """
+    解析分片参数
+
+    Args:
+        spec: "i/N" 格式的字符串、(i, N) 元组或None
+
+    Returns:
+        (i, N) 元组；spec为空时返回None
+
+    Raises:
+        ValueError: 如果格式错误或 i 不在 [0, N) 范围内
+    """
+    if spec is None or spec == "":
+        return None
+
+    if isinstance(spec, str):
+        match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d+)\s*', spec)
+        if not match:
+            raise ValueError(f"分片格式错误: '{spec}'，应为 i/N (例如 0/4)")
+        index, count = int(match.group(1)), int(match.group(2))
+    else:
+        index, count = int(spec[0]), int(spec[1])
+
+    if count <= 0 or not 0 <= index < count:
+        raise ValueError(f"分片参数超出范围: {index}/{count}，要求 0 <= i < N")
+
+    return index, count
+
+
+def shard_of(patient_name: str, num_shards: int) -> int:
+    """
+    计算患者所属分片
+
+    Args:
+        patient_name: 患者名称
+        num_shards: 分片总数
+
+    Returns:
+        分片编号 (0-based)
+    """
+    return zlib.crc32(patient_name.encode('utf-8')) % num_shards
+
+
+def in_shard(patient_name: str, shard: Optional[Shard]) -> bool:
+    """判断患者是否属于指定分片（shard为None时总是True）"""
+    if shard is None:
+        return True
+    index, count = shard
+    return shard_of(patient_name, count) == index
+
+
+def patient_name_from_path(file_path: Union[str, Path]) -> str:
+    """从患者记录文件名提取患者名称"""
+    return Path(file_path).stem.replace(RECORD_SUFFIX, '')
+
+
+def natural_key(name: str) -> List[Any]:
+    """自然排序键: 患者2 排在 患者10 之前"""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+
+def _resolve_files(source: Union[str, Path]) -> List[Path]:
+    """将目录或glob模式解析为按患者名称自然排序的文件列表"""
+    source_path = Path(source)
+
+    if source_path.is_dir():
+        files = list(source_path.glob("*.txt"))
+    elif source_path.is_file():
+        files = [source_path]
+    else:
+        files = [Path(p) for p in glob.glob(str(source), recursive=True)]
+        files = [p for p in files if p.is_file()]
+
+    return sorted(files, key=lambda p: natural_key(patient_name_from_path(p)))
+
+
+def _is_jsonl(source: Union[str, Path]) -> bool:
+    source_path = Path(source)
+    return source_path.is_file() and source_path.suffix == '.jsonl'
+
+
+def _iter_jsonl(source: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """
+    逐行读取JSONL清单
+
+    每行一个患者: {"people": "患者1", "chat": "..."}
+    也可以用 "file_path" 指向问答记录文件，chat 将在需要时读取
+    """
+    source_path = Path(source)
+    with open(source_path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json_codec.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{source_path}:{line_no} 不是合法的JSON: {e}") from e
+
+            name = entry.get('people') or entry.get('patient')
+            file_path = entry.get('file_path')
+            if not name and file_path:
+                name = patient_name_from_path(file_path)
+            if not name:
+                raise ValueError(f"{source_path}:{line_no} 缺少 people 字段")
+
+            if file_path and not Path(file_path).is_absolute():
+                # 相对路径以清单文件所在目录为基准
+                file_path = str(source_path.parent / file_path)
+
+            yield {
+                'people': name,
+                'file_path': file_path or f"{source_path}:{line_no}",
+                'chat': entry.get('chat'),
+            }
+
+
+def iter_patient_names(
+    source: Union[str, Path],
+    shard: Optional[Union[str, Shard]] = None
+) -> Iterator[str]:
+    """
+    惰性列出患者名称（不读取问答内容）
+
+    Args:
+        source: 患者记录目录、JSONL清单或glob模式
+        shard: 分片参数，"i/N" 或 (i, N)
+
+    Yields:
+        患者名称
+    """
+    shard = parse_shard(shard)
+
+    if _is_jsonl(source):
+        for entry in _iter_jsonl(source):
+            if in_shard(entry['people'], shard):
+                yield entry['people']
+        return
+
+    for file_path in _resolve_files(source):
+        name = patient_name_from_path(file_path)
+        if in_shard(name, shard):
+            yield name
+
+
+def iter_patient_records(
+    source: Union[str, Path],
+    shard: Optional[Union[str, Shard]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    惰性读取患者记录，每次只在内存中保留一个患者的问答内容
+
+    Args:
+        source: 患者记录目录、JSONL清单或glob模式
+        shard: 分片参数，"i/N" 或 (i, N)
+
+    Yields:
+        {'people': 患者名称, 'file_path': 来源, 'chat': 问答内容}
+    """
+    shard = parse_shard(shard)
+
+    if _is_jsonl(source):
+        for entry in _iter_jsonl(source):
+            if not in_shard(entry['people'], shard):
+                continue
+            if entry['chat'] is None:
+                with open(entry['file_path'], 'r', encoding='utf-8') as f:
+                    entry['chat'] = f.read()
+            yield entry
+        return
+
+    for file_path in _resolve_files(source):
+        name = patient_name_from_path(file_path)
+        if not in_shard(name, shard):
+            continue
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        yield {
+            'people': name,
+            'file_path': str(file_path),
+            'chat': content
+        }
@@ -0,0 +1,262 @@
+"""
+原始报告清单 - Raw Report Manifest
+一次扫描 output/raw，把每个报告文件的模型、患者、大小、修改时间、内容哈希和对话段编号
+记录到 {raw_dir}/_index/manifest.json；各读取方通过清单做 O(1) 的存在性检查和查找，
+不再各自 glob 目录、按不同规则解析文件名
+
+文件名规则: {模型}-{患者}.json，按最后一个 "-" 切分（模型名可以包含 "-"，患者名不含）
+文件内容中的 model/people 字段（如 "deepseek/deepseek-v3.1"）另外记录为 report_model/report_people
+
+刷新是增量的: 大小和修改时间都没变的文件沿用清单中的记录，只有新增或修改的文件会被读取
+"""
+import argparse
+import hashlib
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src.utils import json_codec
+from src.utils.raw_report import get_format_version
+
+# 清单目录（位于 raw 目录下，不会被 *.json 的 glob 匹配到）
+MANIFEST_DIR = "_index"
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def parse_report_filename(filename: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    从报告文件名解析模型和患者
+
+    Args:
+        filename: 文件名（如 "gpt-5.1-患者1.json"）
+
+    Returns:
+        (模型, 患者)，不符合命名规则时为 (None, None)
+    """
+    stem = filename[:-5] if filename.endswith(".json") else filename
+    model, sep, patient = stem.rpartition("-")
+    if not sep or not model or not patient:
+        return None, None
+    return model, patient
+
+
+def report_filename(model: str, patient: str) -> str:
+    """报告文件名: {模型}-{患者}.json"""
+    return f"{model}-{patient}.json"
+
+
+def _manifest_path(raw_dir: Path) -> Path:
+    return raw_dir / MANIFEST_DIR / MANIFEST_FILE
+
+
+def scan_report_file(path: Path, stat: os.stat_result) -> Dict[str, Any]:
+    """
+    读取一个报告文件，生成清单记录
+
+    Args:
+        path: 报告文件路径
+        stat: 文件的 stat 结果
+
+    Returns:
+        清单记录
+    """
+    model, patient = parse_report_filename(path.name)
+    entry = {
+        "file": path.name,
+        "model": model,
+        "patient": patient,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+    content = path.read_bytes()
+    entry["sha256"] = hashlib.sha256(content).hexdigest()
+    try:
+        data = json_codec.loads(content)
+    except ValueError as e:
+        entry["error"] = f"JSON解析失败: {e}"
+        return entry
+
+    entry["report_model"] = data.get("model")
+    entry["report_people"] = data.get("people")
+    entry["format_version"] = get_format_version(data)
+    entry["conversations"] = list(data.get("conversations", {}).keys())
+    return entry
+
+
+class RawManifest:
+    """原始报告目录的清单"""
+
+    def __init__(self, raw_dir: Union[str, Path]):
+        """
+        初始化清单（不扫描，调用 refresh 后可用）
+
+        Args:
+            raw_dir: 原始报告目录
+        """
+        self.raw_dir = Path(raw_dir)
+        self.manifest_path = _manifest_path(self.raw_dir)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._by_pair: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.updated_at: Optional[str] = None
+
+    def _load_saved(self) -> Dict[str, Dict[str, Any]]:
+        """读取已保存的清单，不存在或版本不符时为空"""
+        try:
+            saved = json_codec.load(self.manifest_path)
+        except (OSError, ValueError):
+            return {}
+        if saved.get("version") != MANIFEST_VERSION:
+            return {}
+        return saved.get("entries", {})
+
+    def refresh(self, save: bool = True) -> Dict[str, int]:
+        """
+        扫描目录并增量更新清单
+
+        Args:
+            save: 有变化时是否写回清单文件
+
+        Returns:
+            {"total", "scanned", "reused", "removed"}
+        """
+        with self._lock:
+            previous = self._entries or self._load_saved()
+            entries = {}
+            scanned = reused = 0
+
+            if self.raw_dir.is_dir():
+                with os.scandir(self.raw_dir) as it:
+                    for dir_entry in it:
+                        if not dir_entry.name.endswith(".json") or not dir_entry.is_file():
+                            continue
+                        stat = dir_entry.stat()
+                        old = previous.get(dir_entry.name)
+                        if old is not None and old.get("size") == stat.st_size \
+                                and old.get("mtime_ns") == stat.st_mtime_ns:
+                            entries[dir_entry.name] = old
+                            reused += 1
+                        else:
+                            entries[dir_entry.name] = scan_report_file(Path(dir_entry.path), stat)
+                            scanned += 1
+
+            removed = len(set(previous) - set(entries))
+            changed = scanned or removed or not self.manifest_path.exists()
+            self._set_entries(entries)
+            self.updated_at = datetime.now().isoformat()
+
+            if save and changed and self.raw_dir.is_dir():
+                self._save()
+
+            return {"total": len(entries), "scanned": scanned, "reused": reused, "removed": removed}
+
+    def _set_entries(self, entries: Dict[str, Dict[str, Any]]):
+        self._entries = dict(sorted(entries.items()))
+        self._by_pair = {
+            (entry["model"], entry["patient"]): entry
+            for entry in self._entries.values()
+            if entry.get("model") and entry.get("patient")
+        }
+
+    def _save(self):
+        """写回清单文件（先写临时文件再改名）；目录不可写时只保留内存中的清单"""
+        payload = {
+            "version": MANIFEST_VERSION,
+            "updated_at": self.updated_at,
+            "entries": self._entries
+        }
+        try:
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.manifest_path.with_suffix(f".{os.getpid()}.tmp")
+            json_codec.dump(payload, tmp_path)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError:
+            pass
+
+    def exists(self, model: str, patient: str) -> bool:
+        """清单中是否有该模型和患者的报告"""
+        return (model, patient) in self._by_pair
+
+    def get(self, model: str, patient: str) -> Optional[Dict[str, Any]]:
+        """获取该模型和患者的清单记录，没有时为None"""
+        return self._by_pair.get((model, patient))
+
+    def path(self, model: str, patient: str) -> Path:
+        """报告文件路径（不在清单中时按命名规则拼出）"""
+        entry = self._by_pair.get((model, patient))
+        return self.raw_dir / (entry["file"] if entry else report_filename(model, patient))
+
+    def entries(self, include_unnamed: bool = False) -> List[Dict[str, Any]]:
+        """
+        清单记录，按文件名排序
+
+        Args:
+            include_unnamed: 是否包含文件名不符合 {模型}-{患者}.json 规则的记录
+
+        Returns:
+            记录列表
+        """
+        if include_unnamed:
+            return list(self._entries.values())
+        return [entry for entry in self._entries.values() if entry.get("model") and entry.get("patient")]
+
+    def models(self) -> List[str]:
+        """清单中的所有模型"""
+        return sorted({model for model, _ in self._by_pair})
+
+    def patients(self) -> List[str]:
+        """清单中的所有患者，按长度和名称排序（患者2 在 患者10 之前）"""
+        return sorted({patient for _, patient in self._by_pair}, key=lambda x: (len(x), x))
+
+    def __len__(self) -> int:
+        return len(self._by_pair)
+
+
+_manifests: Dict[str, RawManifest] = {}
+_manifests_lock = threading.Lock()
+
+
+def load_manifest(raw_dir: Union[str, Path], refresh: bool = False) -> RawManifest:
+    """
+    获取目录的清单，同一目录在进程内只扫描一次
+
+    Args:
+        raw_dir: 原始报告目录
+        refresh: 是否重新扫描（增量）
+
+    Returns:
+        清单
+    """
+    key = str(Path(raw_dir).resolve())
+    with _manifests_lock:
+        manifest = _manifests.get(key)
+        if manifest is None:
+            # 在锁内完成首次扫描，并发的调用方不会拿到空清单
+            manifest = RawManifest(raw_dir)
+            manifest.refresh()
+            _manifests[key] = manifest
+            return manifest
+    if refresh:
+        manifest.refresh()
+    return manifest
+
+
+def main():
+    """命令行入口: 生成/增量更新清单"""
+    parser = argparse.ArgumentParser(description="生成原始报告清单")
+    parser.add_argument("raw_dir", nargs="?", default="output/raw", help="原始报告目录")
+    args = parser.parse_args()
+
+    manifest = RawManifest(args.raw_dir)
+    stats = manifest.refresh()
+    print(f"✓ 清单已更新: {manifest.manifest_path}")
+    print(f"  报告 {stats['total']} 个（读取 {stats['scanned']}，沿用 {stats['reused']}，移除 {stats['removed']}）")
+    print(f"  模型 {len(manifest.models())} 个，患者 {len(manifest.patients())} 个")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+原始报告读写 - Raw Report Format
+统一读写 output/raw/{model}-{patient}.json，透明支持 v1 和 v2 两种格式
+
+v1 (旧格式): 每个对话段都保存 prompt、chat 以及 Input(= prompt + chat)，
+    患者问答记录在每个文件中重复 3 个字段 × 4 个对话段
+v2 (紧凑格式): 问答记录和 Prompt 以内容哈希存入 {raw_dir}/_blobs/，
+    每个患者的问答记录、每个 Prompt 只保存一次；读取时重建 Input 等字段
+
+读取函数总是返回 v1 结构的字典，调用方无需关心文件版本
+"""
+import argparse
+import hashlib
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Union
+
+from src.utils import json_codec
+
+FORMAT_V1 = 1
+FORMAT_V2 = 2
+
+# 内容寻址存储目录（位于 raw 目录下，不会被 *.json 的 glob 匹配到）
+BLOB_DIR = "_blobs"
+
+# v1 对话段的字段顺序
+CONVERSATION_FIELDS = ['model', 'prompt', 'people', 'chat', 'Input', 'Output']
+
+
+def build_input(prompt: str, chat: str) -> str:
+    """构造模型输入，与批量处理器的拼接方式保持一致"""
+    return f"{prompt} \n {chat}"
+
+
+def blob_key(text: str) -> str:
+    """计算文本的内容哈希"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:24]
+
+
+def _blob_path(raw_dir: Union[str, Path], key: str) -> Path:
+    return Path(raw_dir) / BLOB_DIR / f"{key}.txt"
+
+
+def write_blob(raw_dir: Union[str, Path], text: str) -> str:
+    """
+    写入文本到内容寻址存储（已存在则跳过）
+
+    Args:
+        raw_dir: 原始报告目录
+        text: 文本内容
+
+    Returns:
+        内容哈希
+    """
+    key = blob_key(text)
+    path = _blob_path(raw_dir, key)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 先写临时文件再改名，避免并发写入时读到半个文件
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    return key
+
+
+@lru_cache(maxsize=512)
+def _read_blob_cached(path: str) -> str:
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def read_blob(raw_dir: Union[str, Path], key: str) -> str:
+    """读取内容寻址存储中的文本（内容不可变，可安全缓存）"""
+    path = _blob_path(raw_dir, key)
+    if not path.exists():
+        raise FileNotFoundError(f"原始报告引用的内容不存在: {path}")
+    return _read_blob_cached(str(path))
+
+
+def get_format_version(data: Dict[str, Any]) -> int:
+    """获取报告数据的格式版本"""
+    return int(data.get('format_version', FORMAT_V1))
+
+
+def compact_report(data: Dict[str, Any], raw_dir: Union[str, Path]) -> Dict[str, Any]:
+    """
+    将 v1 报告转换为 v2 紧凑格式，并把问答记录和 Prompt 写入内容存储
+
+    Args:
+        data: v1 报告数据
+        raw_dir: 原始报告目录
+
+    Returns:
+        v2 报告数据
+    """
+    if get_format_version(data) == FORMAT_V2:
+        return data
+
+    model = data.get('model')
+    people = data.get('people')
+    conversations = data.get('conversations', {})
+
+    # 同一患者的所有对话段共用一份问答记录
+    chats = [conv.get('chat') for conv in conversations.values() if conv.get('chat') is not None]
+    shared_chat = chats[0] if chats else None
+    shared_chat_ref = write_blob(raw_dir, shared_chat) if shared_chat is not None else None
+
+    compact_conversations = {}
+    for conv_id, conv in conversations.items():
+        entry = {}
+        prompt = conv.get('prompt')
+        chat = conv.get('chat')
+
+        if prompt is not None:
+            entry['prompt_ref'] = write_blob(raw_dir, prompt)
+        if chat is not None and chat != shared_chat:
+            entry['chat_ref'] = write_blob(raw_dir, chat)
+
+        for key, value in conv.items():
+            if key in ('prompt', 'chat'):
+                continue
+            if key == 'Input' and prompt is not None and chat is not None \
+                    and value == build_input(prompt, chat):
+                continue
+            if key == 'model' and value == model:
+                continue
+            if key == 'people' and value == people:
+                continue
+            entry[key] = value
+
+        compact_conversations[conv_id] = entry
+
+    compact = {'format_version': FORMAT_V2}
+    for key, value in data.items():
+        if key == 'conversations':
+            if shared_chat_ref is not None:
+                compact['chat_ref'] = shared_chat_ref
+            compact['conversations'] = compact_conversations
+        else:
+            compact[key] = value
+
+    return compact
+
+
+def expand_report(data: Dict[str, Any], raw_dir: Union[str, Path]) -> Dict[str, Any]:
+    """
+    将 v2 报告还原为 v1 结构（重建 prompt、chat、Input 等字段）
+
+    Args:
+        data: 报告数据（v1 数据原样返回）
+        raw_dir: 原始报告目录
+
+    Returns:
+        v1 结构的报告数据
+    """
+    if get_format_version(data) != FORMAT_V2:
+        return data
+
+    model = data.get('model')
+    people = data.get('people')
+    shared_chat_ref = data.get('chat_ref')
+    shared_chat = read_blob(raw_dir, shared_chat_ref) if shared_chat_ref else None
+
+    conversations = {}
+    for conv_id, entry in data.get('conversations', {}).items():
+        prompt = read_blob(raw_dir, entry['prompt_ref']) if 'prompt_ref' in entry else None
+        chat = read_blob(raw_dir, entry['chat_ref']) if 'chat_ref' in entry else shared_chat
+
+        conv = {
+            'model': entry.get('model', model),
+            'prompt': prompt,
+            'people': entry.get('people', people),
+            'chat': chat,
+            'Input': entry.get('Input', build_input(prompt, chat) if prompt is not None and chat is not None else None),
+            'Output': entry.get('Output', ""),
+        }
+        conv = {key: value for key, value in conv.items() if value is not None}
+
+        # 保留额外字段（如调用指标）
+        for key, value in entry.items():
+            if key not in conv and key not in ('prompt_ref', 'chat_ref'):
+                conv[key] = value
+
+        conversations[conv_id] = conv
+
+    expanded = {}
+    for key, value in data.items():
+        if key in ('format_version', 'chat_ref'):
+            continue
+        expanded[key] = conversations if key == 'conversations' else value
+
+    return expanded
+
+
+def load_raw_report(file_path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    读取原始报告文件，v1/v2 均返回 v1 结构
+
+    Args:
+        file_path: 报告文件路径
+
+    Returns:
+        v1 结构的报告数据
+    """
+    file_path = Path(file_path)
+    data = json_codec.load(file_path)
+    return expand_report(data, file_path.parent)
+
+
+def save_raw_report(
+    data: Dict[str, Any],
+    file_path: Union[str, Path],
+    format_version: int = FORMAT_V2
+) -> Path:
+    """
+    保存原始报告文件
+
+    Args:
+        data: v1 结构的报告数据
+        file_path: 报告文件路径
+        format_version: 写入格式版本（1 或 2）
+
+    Returns:
+        保存的文件路径
+    """
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if format_version == FORMAT_V2:
+        data = compact_report(data, file_path.parent)
+    elif format_version == FORMAT_V1:
+        data = expand_report(data, file_path.parent)
+    else:
+        raise ValueError(f"不支持的原始报告格式版本: {format_version}")
+
+    json_codec.dump(data, file_path, pretty=True)
+
+    return file_path
+
+
+def convert_directory(raw_dir: Union[str, Path], format_version: int) -> int:
+    """
+    将目录中的所有原始报告转换为指定格式
+
+    Args:
+        raw_dir: 原始报告目录
+        format_version: 目标格式版本
+
+    Returns:
+        转换的文件数
+    """
+    count = 0
+    for file_path in sorted(Path(raw_dir).glob("*.json")):
+        data = json_codec.load(file_path)
+        if get_format_version(data) == format_version:
+            continue
+        save_raw_report(expand_report(data, file_path.parent), file_path, format_version)
+        count += 1
+    return count
+
+
+def main():
+    """命令行入口: 在 v1 / v2 格式之间转换整个目录"""
+    parser = argparse.ArgumentParser(description="原始报告格式转换 (v1 <-> v2)")
+    parser.add_argument("action", choices=["compact", "expand"], help="compact: 转为v2; expand: 还原为v1")
+    parser.add_argument("raw_dir", nargs="?", default="output/raw", help="原始报告目录")
+    args = parser.parse_args()
+
+    target = FORMAT_V2 if args.action == "compact" else FORMAT_V1
+    count = convert_directory(args.raw_dir, target)
+    print(f"✓ 已转换 {count} 个文件为 v{target} 格式: {args.raw_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+并行结果加载器 - Parallel Result Loader
+把评测结果目录(output/cross_evaluation_results/患者*/...)中的JSON文件分片交给进程池或线程池，
+在工作进程中读取、解码并提取为紧凑记录，按分片顺序流式返回父进程
+
+    分片   按患者目录划分，单个目录文件较多时再按 chunk_size 切分，使大目录也能分到多个工作进程
+    模式   process 进程池(默认，解码是CPU密集的，可用满多核) / thread 线程池 / serial 当前进程逐个读取
+    统计   文件数、失败数、耗时和 files/s，通过 stats() 获取
+
+提取函数在工作进程中执行，必须是可以按名称导入的模块级函数(进程模式需要pickle)；
+单个文件失败不会中断加载，错误作为 LoadedFile.error 返回
+文件数少于 min_parallel_files 时不启动进程池，直接在当前进程读取
+
+用法:
+    loader = ResultLoader()
+    for item in loader.iter_files(results_dir, "*_aggregated.json", summarize_aggregated):
+        ...
+    print(loader.format_stats())
+
+    python -m src.utils.result_loader output/cross_evaluation_results --workers 4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from src.utils import json_codec
+
+MODE_PROCESS = "process"
+MODE_THREAD = "thread"
+MODE_SERIAL = "serial"
+MODES = (MODE_PROCESS, MODE_THREAD, MODE_SERIAL)
+
+DEFAULT_CHUNK_SIZE = 256
+DEFAULT_MIN_PARALLEL_FILES = 512
+
+# 非结果文件（进度、追踪等以 . 开头的文件）
+_HIDDEN_PREFIX = "."
+
+Extractor = Callable[[Path], Any]
+
+
+class LoadedFile:
+    """一个文件的加载结果"""
+
+    __slots__ = ("path", "record", "error")
+
+    def __init__(self, path: Path, record: Any = None, error: Optional[str] = None):
+        self.path = path
+        self.record = record
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def load_json(path: Path) -> Any:
+    """默认提取函数: 返回解码后的完整JSON"""
+    return json_codec.load(path)
+
+
+def summarize_aggregated(path: Path) -> Dict[str, Any]:
+    """
+    聚合结果的紧凑摘要（数据校验、质量报告只需要这些字段）
+
+    兼容旧版的 总分/维度评分 键；JSON格式错误时 error_type 为 "json"，
+    其他读取错误按异常抛出，由加载器记录到 LoadedFile.error
+
+    Args:
+        path: 聚合结果文件路径
+
+    Returns:
+        {"file", "patient", "size", "total_score", "dimension_count", "error_type", "error"}
+    """
+    summary = {
+        "file": path.name,
+        "patient": path.parent.name,
+        "size": path.stat().st_size,
+        "total_score": None,
+        "dimension_count": 0,
+        "error_type": None,
+        "error": None
+    }
+    try:
+        data = json_codec.load(path)
+    except ValueError as e:
+        summary["error_type"] = "json"
+        summary["error"] = str(e)
+        return summary
+
+    total_score = data.get("总分") or data.get("total_score")
+    dimensions = data.get("维度评分") or data.get("dimensions")
+    summary["total_score"] = total_score
+    summary["dimension_count"] = len(dimensions) if dimensions else 0
+    return summary
+
+
+def _load_shard(extractor: Extractor, paths: List[str]) -> List[tuple]:
+    """工作进程: 依次提取分片中的文件，返回 (路径, 记录, 错误) 列表"""
+    results = []
+    for path in paths:
+        try:
+            results.append((path, extractor(Path(path)), None))
+        except Exception as e:
+            results.append((path, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def find_result_files(
+    root: Union[str, Path],
+    pattern: str = "*.json",
+    exclude: str = "",
+    dir_pattern: str = "*"
+) -> List[List[Path]]:
+    """
+    查找结果文件，按目录分组
+
+    Args:
+        root: 结果根目录（根目录及其一级子目录中的文件都会被查找）
+        pattern: 文件名模式
+        exclude: 文件名中包含该字符串的文件被排除（如维度文件排除 "_aggregated"）
+        dir_pattern: 子目录名模式（如 "患者*"）
+
+    Returns:
+        每个目录的文件列表（目录和文件均按名称排序，跳过以 . 开头的文件）
+    """
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    groups = []
+    for directory in [root] + sorted(p for p in root.glob(dir_pattern) if p.is_dir()):
+        files = sorted(
+            p for p in directory.glob(pattern)
+            if not p.name.startswith(_HIDDEN_PREFIX) and not (exclude and exclude in p.name)
+        )
+        if files:
+            groups.append(files)
+    return groups
+
+
+class ResultLoader:
+    """并行结果加载器"""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        mode: str = MODE_PROCESS,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        min_parallel_files: int = DEFAULT_MIN_PARALLEL_FILES
+    ):
+        """
+        初始化加载器
+
+        Args:
+            workers: 工作进程/线程数（None表示按环境变量 RESULT_LOADER_WORKERS 或CPU核数）
+            mode: process / thread / serial
+            chunk_size: 单个分片的最大文件数
+            min_parallel_files: 文件数少于该值时在当前进程读取
+
+        Raises:
+            ValueError: 如果模式未知
+        """
+        if mode not in MODES:
+            raise ValueError(f"未知加载模式: {mode}（可用: {', '.join(MODES)}）")
+        if workers is None:
+            workers = int(os.getenv("RESULT_LOADER_WORKERS") or 0) or os.cpu_count() or 1
+        self.workers = max(1, workers)
+        self.mode = mode
+        self.chunk_size = max(1, chunk_size)
+        self.min_parallel_files = min_parallel_files
+        self._stats = {"files": 0, "errors": 0, "elapsed_s": 0.0, "mode": mode, "workers": self.workers}
+
+    def _shards(self, groups: List[List[Path]]) -> List[List[str]]:
+        """按目录划分分片，大目录按 chunk_size 切分；路径转为字符串以减少pickle开销"""
+        shards = []
+        for files in groups:
+            for start in range(0, len(files), self.chunk_size):
+                shards.append([str(p) for p in files[start:start + self.chunk_size]])
+        return shards
+
+    def _executor(self, shard_count: int) -> Executor:
+        workers = min(self.workers, shard_count)
+        if self.mode == MODE_PROCESS:
+            return ProcessPoolExecutor(max_workers=workers)
+        return ThreadPoolExecutor(max_workers=workers)
+
+    def iter_paths(self, groups: List[List[Path]], extractor: Extractor = load_json) -> Iterator[LoadedFile]:
+        """
+        加载已分组的文件，按分片顺序流式返回
+
+        Args:
+            groups: 按目录分组的文件列表（见 find_result_files）
+            extractor: 在工作进程中执行的提取函数，输入文件路径，返回紧凑记录
+
+        Yields:
+            LoadedFile
+        """
+        shards = self._shards(groups)
+        total = sum(len(shard) for shard in shards)
+        mode = self.mode
+        if mode != MODE_SERIAL and (self.workers == 1 or total < self.min_parallel_files or len(shards) < 2):
+            mode = MODE_SERIAL
+
+        stats = {"files": 0, "errors": 0, "elapsed_s": 0.0, "mode": mode,
+                 "workers": 1 if mode == MODE_SERIAL else min(self.workers, len(shards))}
+        self._stats = stats
+        start = time.perf_counter()
+
+        if mode == MODE_SERIAL:
+            batches = (_load_shard(extractor, shard) for shard in shards)
+            executor = None
+        else:
+            executor = self._executor(len(shards))
+            batches = executor.map(_load_shard, [extractor] * len(shards), shards)
+
+        try:
+            for batch in batches:
+                for path, record, error in batch:
+                    stats["files"] += 1
+                    if error is not None:
+                        stats["errors"] += 1
+                    yield LoadedFile(Path(path), record, error)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            stats["elapsed_s"] = time.perf_counter() - start
+
+    def iter_files(
+        self,
+        root: Union[str, Path],
+        pattern: str = "*.json",
+        extractor: Extractor = load_json,
+        exclude: str = "",
+        dir_pattern: str = "*"
+    ) -> Iterator[LoadedFile]:
+        """
+        查找并加载结果目录中的文件
+
+        Args:
+            root: 结果根目录
+            pattern: 文件名模式（如 "*_aggregated.json"）
+            extractor: 提取函数（模块级函数）
+            exclude: 文件名中包含该字符串的文件被排除
+            dir_pattern: 子目录名模式
+
+        Yields:
+            LoadedFile
+        """
+        yield from self.iter_paths(find_result_files(root, pattern, exclude, dir_pattern), extractor)
+
+    def load_files(self, *args, **kwargs) -> List[LoadedFile]:
+        """同 iter_files，返回列表"""
+        return list(self.iter_files(*args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        最近一次加载的统计
+
+        Returns:
+            {"files", "errors", "elapsed_s", "files_per_s", "mode", "workers"}
+        """
+        stats = dict(self._stats)
+        elapsed = stats["elapsed_s"]
+        stats["elapsed_s"] = round(elapsed, 4)
+        stats["files_per_s"] = round(stats["files"] / elapsed, 1) if elapsed else 0.0
+        return stats
+
+    def format_stats(self) -> str:
+        """统计的单行文本"""
+        stats = self.stats()
+        return (f"加载 {stats['files']} 个文件（失败 {stats['errors']}），耗时 {stats['elapsed_s']:.2f}s，"
+                f"{stats['files_per_s']:.0f} files/s [{stats['mode']} x{stats['workers']}]")
+
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口: 加载结果目录并输出吞吐"""
+    parser = argparse.ArgumentParser(description="并行加载评测结果目录")
+    parser.add_argument("root", nargs="?", default="output/cross_evaluation_results", help="结果根目录")
+    parser.add_argument("--pattern", default="*.json", help="文件名模式")
+    parser.add_argument("--mode", choices=MODES, default=MODE_PROCESS, help="加载模式")
+    parser.add_argument("--workers", type=int, help="工作进程/线程数")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="单个分片的最大文件数")
+    args = parser.parse_args(argv)
+
+    loader = ResultLoader(workers=args.workers, mode=args.mode, chunk_size=args.chunk_size, min_parallel_files=0)
+    for item in loader.iter_files(args.root, args.pattern):
+        if item.error:
+            print(f"✗ {item.path}: {item.error}")
+    print(loader.format_stats())
+
+
+if __name__ == "__main__":
+    main()
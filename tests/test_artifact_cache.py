@@ -0,0 +1,77 @@
+"""
+测试报告产物缓存
+"""
+import json
+import os
+
+import cross_evaluation.report_loader as report_loader_module
+from cross_evaluation.artifact_cache import ReportArtifactCache
+from cross_evaluation.module_parser import module_parser
+from cross_evaluation.report_loader import report_loader
+
+
+def _write_report(path, output="多饮多尿3月"):
+    data = {
+        "model": "gpt-5.1",
+        "people": "患者1",
+        "conversations": {
+            "1": {"chat": "医生：哪里不舒服？\n患者：口渴。", "Output": output},
+            "2": {"chat": "医生：多久了？", "Output": "3月前出现口干多饮"}
+        }
+    }
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+
+
+def test_report_read_once(tmp_path, monkeypatch):
+    """测试1: 多个维度/评测模型重复加载同一报告时，文件只读取一次；文件修改后重新读取"""
+    cache = ReportArtifactCache()
+    reads = []
+
+    def counting_loader(path):
+        reads.append(path)
+        return json.loads(path.read_text(encoding='utf-8'))
+
+    monkeypatch.setattr(report_loader_module, "report_cache", cache)
+    monkeypatch.setattr(report_loader_module, "load_raw_report", counting_loader)
+    monkeypatch.setattr(report_loader, "raw_reports_dir", tmp_path)
+    path = tmp_path / "gpt-5.1-患者1.json"
+    _write_report(path)
+
+    first = report_loader.load_report_data("gpt-5.1", "患者1")
+    for _ in range(5):
+        assert report_loader.load_report_data("gpt-5.1", "患者1") == first
+    assert len(reads) == 1
+    assert first[1].startswith("1. 主诉 (Chief Complaint)\n多饮多尿3月")
+    assert cache.stats()["hits"] == 11
+
+    _write_report(path, output="口干多饮半年")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert "口干多饮半年" in report_loader.extract_result("gpt-5.1", "患者1")
+    assert len(reads) == 2
+
+
+def test_lru_bound_and_analysis(tmp_path):
+    """测试2: 条目数超过上限时淘汰最久未使用的条目；模块解析结果按报告文本复用"""
+    cache = ReportArtifactCache(max_entries=2)
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"m{i}.json"
+        _write_report(path)
+        paths.append(path)
+
+    load = lambda p: json.loads(p.read_text(encoding='utf-8'))
+    cache.get(paths[0], load)
+    cache.get(paths[1], load)
+    cache.get(paths[0], load)
+    cache.get(paths[2], load)  # 淘汰 m1
+    assert cache.stats()["files"] == 2
+    cache.get(paths[0], load)
+    cache.get(paths[1], load)
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 4
+
+    report = "主诉：多饮多尿3月\n现病史：3月前出现口干"
+    analysis = cache.analyze(report)
+    assert cache.analyze(report) is analysis
+    assert analysis == module_parser.analyze(report)
+    assert cache.stats()["analysis_hits"] == 1
@@ -0,0 +1,41 @@
+"""
+测试自动化评测的流式批量模式
+"""
+import math
+import statistics
+
+from src.evaluation.auto_evaluator import AutoEvaluator, RunningStats
+from src.utils import json_codec
+
+
+def test_running_stats():
+    """测试1: 流式统计量与一次性计算的均值、样本标准差、最值一致"""
+    values = [69.01, 70.2, 57.63, 78.09, 64.5, 64.5]
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+    assert stats.count == len(values)
+    assert math.isclose(stats.mean, statistics.mean(values))
+    assert math.isclose(stats.std, statistics.stdev(values))
+    assert (stats.min, stats.max) == (min(values), max(values))
+
+    single = RunningStats()
+    single.add(1.0)
+    assert math.isnan(single.std)
+
+
+def test_batch_matches_default(tmp_path, capsys):
+    """测试2: 批量模式(进程池，多个分片)的得分表、汇总统计和详细结果与默认模式相同"""
+    evaluator = AutoEvaluator()
+    evaluator.evaluate_all()
+    evaluator.save_results(str(tmp_path / "default"))
+
+    summary = AutoEvaluator().evaluate_batch(str(tmp_path / "batch"), workers=2, chunk_size=7)
+    assert list(summary.index) == sorted({result["model"] for result in evaluator.results})
+
+    for name in ("scores_table.csv", "summary_statistics.csv"):
+        assert (tmp_path / "batch" / name).read_bytes() == (tmp_path / "default" / name).read_bytes()
+
+    with open(tmp_path / "batch" / "detailed_results.jsonl", 'rb') as f:
+        detailed = [json_codec.loads(line) for line in f]
+    assert detailed == json_codec.load(tmp_path / "default" / "detailed_results.json")
@@ -0,0 +1,175 @@
+"""
+测试 UniversalModelService 并发批量调用
+使用假客户端替代真实API，验证并发上限、结果顺序和单个失败隔离
+"""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from src.core.model_service import UniversalModelService
+
+
+def _response(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class FakeCompletions:
+    """按提示词返回结果，提示词包含 "fail" 时抛出异常，并记录最大在途请求数"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _enter(self):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _exit(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def create(self, **params):
+        self._enter()
+        try:
+            prompt = params["messages"][-1]["content"]
+            # 越靠前的提示词耗时越长，使完成顺序与输入顺序相反
+            time.sleep(0.01 * (10 - int(prompt.split("-")[-1])))
+            if "fail" in prompt:
+                raise RuntimeError("boom")
+            return _response(prompt.upper())
+        finally:
+            self._exit()
+
+
+class FakeAsyncCompletions(FakeCompletions):
+
+    async def create(self, **params):
+        self._enter()
+        try:
+            await asyncio.sleep(0.01)
+            prompt = params["messages"][-1]["content"]
+            if "fail" in prompt:
+                raise RuntimeError("boom")
+            return _response(prompt.upper())
+        finally:
+            self._exit()
+
+
+def _service_with(completions, attr="clients"):
+    service = UniversalModelService()
+    model = service.registry.list_models()[0]
+    getattr(service, attr)[model] = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return service, model
+
+
+def test_batch_call_concurrent_ordered_with_failures():
+    """测试1: 并发数受限，结果按输入顺序返回，单个失败不影响其他"""
+    completions = FakeCompletions()
+    service, model = _service_with(completions)
+    prompts = [f"q-{i}" for i in range(6)] + ["fail-6"]
+
+    results = service.batch_call(model, prompts, max_concurrency=3)
+
+    assert completions.max_in_flight == 3
+    assert [r.index for r in results] == list(range(7))
+    assert [r.output for r in results[:6]] == [p.upper() for p in prompts[:6]]
+    assert not results[6].ok and "boom" in results[6].error
+
+
+def test_imap_call_yields_in_completion_order():
+    """测试2: imap_call 按完成顺序产出"""
+    service, model = _service_with(FakeCompletions())
+
+    indexes = [r.index for r in service.imap_call(model, [f"q-{i}" for i in range(4)], max_concurrency=4)]
+
+    assert indexes == [3, 2, 1, 0]
+
+
+def test_abatch_call():
+    """测试3: 异步批量调用"""
+    completions = FakeAsyncCompletions()
+    service, model = _service_with(completions, "async_clients")
+    prompts = [f"q-{i}" for i in range(5)] + ["fail-5"]
+
+    results = asyncio.run(service.abatch_call(model, prompts, max_concurrency=2))
+
+    assert completions.max_in_flight == 2
+    assert [r.output for r in results[:5]] == [p.upper() for p in prompts[:5]]
+    assert results[5].error == "boom"
+
+
+def test_identical_concurrent_calls_are_coalesced():
+    """测试4: 相同的并发请求只调用一次上游，不同请求不受影响"""
+    from src.core.single_flight import SingleFlight
+
+    class SlowCompletions(FakeCompletions):
+        calls = 0
+
+        def create(self, **params):
+            SlowCompletions.calls += 1
+            time.sleep(0.05)
+            return _response(params["messages"][-1]["content"].upper())
+
+    service, model = _service_with(SlowCompletions())
+    service.single_flight = SingleFlight()
+
+    results = service.batch_call(model, ["same-1"] * 4 + ["other-2"], max_concurrency=5)
+
+    assert [r.output for r in results] == ["SAME-1"] * 4 + ["OTHER-2"]
+    assert SlowCompletions.calls == 2
+    stats = service.single_flight_stats()
+    assert stats["shared"] == 3 and stats["executions"] == 2
+
+
+def test_async_calls_are_coalesced():
+    """测试5: 异步模式下相同请求共享结果和异常"""
+    from src.core.single_flight import SingleFlight
+
+    flight = SingleFlight()
+    executions = []
+
+    async def upstream(value):
+        executions.append(value)
+        await asyncio.sleep(0.02)
+        if value == "bad":
+            raise RuntimeError("bad")
+        return value
+
+    async def main():
+        results = await asyncio.gather(
+            *[flight.ado("k", lambda: upstream("ok")) for _ in range(3)],
+            *[flight.ado("b", lambda: upstream("bad")) for _ in range(2)],
+            return_exceptions=True
+        )
+        return results
+
+    results = asyncio.run(main())
+
+    assert results[:3] == ["ok"] * 3
+    assert all(isinstance(r, RuntimeError) for r in results[3:])
+    assert executions == ["ok", "bad"]
+    assert flight.stats()["shared"] == 3
+
+
+def test_async_upstream_task_is_referenced():
+    """测试6: 在途的上游调用任务由合并器持有，完成后释放"""
+    import gc
+
+    from src.core.single_flight import SingleFlight
+
+    flight = SingleFlight()
+
+    async def main():
+        waiter = asyncio.ensure_future(flight.ado("k", lambda: asyncio.sleep(0.02, result="ok")))
+        await asyncio.sleep(0)
+        assert len(flight._tasks) == 1
+        gc.collect()
+        result = await waiter
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(main()) == "ok"
+    assert not flight._tasks
@@ -0,0 +1,82 @@
+"""
+测试交叉评测离线批量任务的导出和导入
+"""
+import json
+
+import pytest
+
+from cross_evaluation.aggregator import score_aggregator
+from cross_evaluation.batch_job import (batch_file_name, batch_job, fabricate_results, make_custom_id,
+                                        parse_custom_id)
+from cross_evaluation.model_client import model_client
+
+MODELS = ["gpt-5.1", "qwen3-max"]
+PATIENT = "患者1"
+
+
+@pytest.fixture
+def output_dir(tmp_path, monkeypatch):
+    results_dir = tmp_path / "results"
+    monkeypatch.setattr(batch_job, "output_dir", results_dir)
+    monkeypatch.setattr(score_aggregator, "output_dir", results_dir)
+    return results_dir
+
+
+def test_export_and_ingest_roundtrip(tmp_path, output_dir):
+    """测试1: 导出请求 -> 本地替身生成结果 -> 导入并聚合"""
+    files = batch_job.export_requests(tmp_path / "batch", MODELS, [PATIENT])
+
+    requests = [json.loads(line) for f in files.values() for line in f.read_text(encoding='utf-8').splitlines()]
+    assert len(requests) == len(MODELS) * len(MODELS) * 5
+    assert requests[0]["url"] == "/v1/chat/completions"
+    assert "【生成的医疗报告】" in requests[0]["body"]["messages"][0]["content"]
+
+    result_files = [fabricate_results(f, tmp_path / "out" / f.name) for f in files.values()]
+    stats = batch_job.ingest_results(result_files)
+
+    assert stats == {"ingested": 20, "failed": 0, "aggregated": 4}
+
+    custom_id = make_custom_id(PATIENT, "gpt-5.1", "qwen3-max", "准确性")
+    dimension = json.loads((output_dir / PATIENT / "gpt-5.1_by_qwen3-max_患者1_准确性.json").read_text(encoding='utf-8'))
+    aggregated = json.loads(
+        (output_dir / PATIENT / "gpt-5.1_by_qwen3-max_患者1_aggregated.json").read_text(encoding='utf-8'))
+    assert 0 <= dimension["score"] <= 40
+    assert dimension["issues"] == "模拟评测: 准确性"
+    assert aggregated["dimensions"]["准确性"]["score"] == dimension["score"]
+    assert parse_custom_id(custom_id) == (PATIENT, "gpt-5.1", "qwen3-max", "准确性")
+
+    # 再次导出时跳过已完成的维度
+    assert batch_job.export_requests(tmp_path / "batch2", MODELS, [PATIENT]) == {}
+
+
+def test_export_files_per_base_url(tmp_path, output_dir, monkeypatch):
+    """测试2: 同一主机上不同路径的接口地址分文件，只差末尾 "/" 的写入同一文件，不互相覆盖"""
+    base_urls = {"gpt-5.1": "https://api.example.com/v1", "qwen3-max": "https://api.example.com/v1/",
+                 "Baichuan-M2": "https://api.example.com/v2"}
+    monkeypatch.setattr(model_client, "get_base_url", lambda model: base_urls[model].rstrip("/"))
+
+    files = batch_job.export_requests(tmp_path / "batch", list(base_urls), [PATIENT])
+
+    assert {url: path.name for url, path in files.items()} == {
+        "https://api.example.com/v1": "api.example.com_v1.jsonl",
+        "https://api.example.com/v2": "api.example.com_v2.jsonl"
+    }
+    lines = {path.name: len(path.read_text(encoding='utf-8').splitlines()) for path in files.values()}
+    assert lines == {"api.example.com_v1.jsonl": 2 * 3 * 5, "api.example.com_v2.jsonl": 3 * 5}
+    assert batch_file_name("https://api.deepseek.com/") == batch_file_name("https://api.deepseek.com")
+
+
+def test_ingest_skips_responses_without_choices(tmp_path, output_dir, capsys):
+    """测试3: 状态码200但没有 choices 的响应计为失败，其余结果照常导入"""
+    files = batch_job.export_requests(tmp_path / "batch", MODELS[:1], [PATIENT])
+    result_file = fabricate_results(files[model_client.get_base_url(MODELS[0])], tmp_path / "out.jsonl")
+
+    lines = [json.loads(line) for line in result_file.read_text(encoding='utf-8').splitlines()]
+    lines[0]["response"]["body"].pop("choices")
+    lines[1]["response"]["body"]["choices"] = []
+    result_file.write_text("\n".join(json.dumps(line, ensure_ascii=False) for line in lines), encoding='utf-8')
+
+    stats = batch_job.ingest_results([result_file])
+
+    assert stats == {"ingested": 3, "failed": 2, "aggregated": 0}
+    assert capsys.readouterr().out.count("响应中没有 choices") == 2
@@ -0,0 +1,74 @@
+"""
+测试客户端连接池
+"""
+import asyncio
+import json
+
+from src.core.client_pool import ClientPool
+from src.core.model_service import UniversalModelService
+
+
+def test_models_on_same_base_url_share_connection_pool(tmp_path, monkeypatch):
+    """测试1: 同一接口地址的模型共享连接池，超时按模型配置"""
+    monkeypatch.setenv("FAKE_KEY", "sk-test")
+    monkeypatch.setenv("OTHER_KEY", "sk-other")
+    registry = {
+        "model-a": {"provider": "p", "api_key_env": "FAKE_KEY", "base_url": "http://127.0.0.1:9/v1"},
+        "model-b": {"provider": "p", "api_key_env": "FAKE_KEY", "base_url": "http://127.0.0.1:9/v1/",
+                    "timeout": {"connect": 3, "read": 120}},
+        "model-c": {"provider": "p", "api_key_env": "OTHER_KEY", "base_url": "http://127.0.0.1:9/v1"},
+    }
+    registry_file = tmp_path / "model_registry.json"
+    registry_file.write_text(json.dumps(registry), encoding="utf-8")
+
+    pool = ClientPool(max_connections=8, http2=False)
+    service = UniversalModelService(str(registry_file), pool=pool)
+    a, b, c = (service._get_client(name) for name in ("model-a", "model-b", "model-c"))
+
+    assert a._client is b._client
+    assert a._client is not c._client
+    assert a.timeout.read == 60
+    assert b.timeout.connect == 3 and b.timeout.read == 120
+
+    stats = service.pool_stats()
+    assert stats["limits"]["max_connections"] == 8
+    assert [p["models"] for p in stats["pools"]] == [["model-a", "model-b"], ["model-c"]]
+    assert all("sk-" not in json.dumps(p) for p in stats["pools"])
+    pool.close()
+
+
+def test_async_client_closed_when_loop_changes():
+    """测试2: 多次 asyncio.run 时，上一个事件循环的异步客户端在循环结束前关闭，不泄漏连接"""
+    pool = ClientPool(http2=False)
+    clients = []
+
+    async def get_client():
+        clients.append(pool.get_async_client("http://127.0.0.1:9/v1", "sk-test"))
+
+    asyncio.run(get_client())
+    assert clients[0]._client.is_closed
+
+    asyncio.run(get_client())
+    assert clients[1]._client is not clients[0]._client
+    assert clients[1]._client.is_closed
+
+
+def test_model_client_keeps_sdk_default_timeout(monkeypatch):
+    """测试3: 交叉评测模型未配置超时时保持SDK默认的600秒读取超时，未配置 base_url 时使用SDK默认地址"""
+    from cross_evaluation import model_client as model_client_module
+
+    monkeypatch.setenv("FAKE_KEY", "sk-test")
+    pool = ClientPool(http2=False)
+    monkeypatch.setattr(model_client_module, "default_pool", pool)
+    client = model_client_module.ModelClient()
+    monkeypatch.setattr(client, "model_registry", {
+        "model-a": {"provider": "p", "api_key_env": "FAKE_KEY", "base_url": "http://127.0.0.1:9/v1"},
+        "model-b": {"provider": "p", "api_key_env": "FAKE_KEY", "base_url": "http://127.0.0.1:9/v1", "timeout": 30},
+        "model-c": {"provider": "p", "api_key_env": "FAKE_KEY"},
+    })
+    monkeypatch.setattr(client, "api_config", {})
+
+    assert client._create_client("model-a").timeout.read == 600
+    assert client._create_client("model-b").timeout.read == 30
+    assert "api.openai.com" in str(client._create_client("model-c").base_url)
+    pool.close()
@@ -0,0 +1,41 @@
+"""
+测试前端数据的流式生成
+"""
+from pathlib import Path
+
+import generate_frontend_data as gfd
+from src.testing.synthetic_corpus import build_corpus
+from src.utils import json_codec
+
+
+def test_streaming_generation(tmp_path, monkeypatch):
+    """测试1: 报告按需加载且只缓存少量，评测结果流式读取，逐条写出的详情与报告一一对应"""
+    corpus = build_corpus(tmp_path / "corpus", num_models=3, num_patients=4, num_evaluators=2,
+                          with_dimension_files=False)
+    monkeypatch.setattr(gfd, "RAW_DIR", Path(corpus["raw_dir"]))
+    monkeypatch.setattr(gfd, "RESULTS_DIR", Path(corpus["results_dir"]))
+    monkeypatch.setattr(gfd, "OUTPUT_DIR", tmp_path)
+
+    reports = gfd.RawReportStore(corpus["raw_dir"], cache_size=2)
+    assert len(reports) == corpus["raw_reports"] == 12
+    assert [patient for patient, _ in reports.iter_by_patient()] == corpus["patients"]
+    assert len(reports._cache) == 2
+
+    evaluations = gfd.iter_evaluation_results()
+    assert not isinstance(evaluations, list)
+    metadata = gfd.generate_evaluation_details(evaluations, reports)
+    assert metadata["total_evaluations"] == corpus["aggregated_files"]
+
+    details = json_codec.load(tmp_path / "evaluation_details.json")
+    assert len(details["evaluations"]) == corpus["aggregated_files"]
+    for entry in details["evaluations"][:5]:
+        report = reports.get(f"{entry['model']}_{entry['patient']}")
+        assert entry["report"] == report.result and entry["conversations"] == report.conversations
+
+    gfd.generate_comparison_data(reports, corpus["models"], corpus["patients"])
+    comparison = json_codec.load(tmp_path / "comparison_data.json")
+    assert list(comparison["data"]) == corpus["patients"]
+    assert comparison["metadata"]["total_reports"] == 12
+
+    statistics = gfd.generate_statistics(gfd.iter_evaluation_results(), corpus["models"], corpus["patients"], reports)
+    assert statistics["overview"]["total_evaluations"] == corpus["aggregated_files"]
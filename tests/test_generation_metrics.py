@@ -0,0 +1,94 @@
+"""
+测试流式调用的时延指标和时延排行榜
+"""
+from types import SimpleNamespace
+
+from src.core import model_service as model_service_module
+from src.core.generation_metrics import StreamMetrics, build_latency_leaderboard, percentile
+from src.core.model_service import UniversalModelService
+
+
+def _chunk(text):
+    return SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+def _usage_chunk(completion_tokens):
+    usage = {"prompt_tokens": 30, "completion_tokens": completion_tokens, "total_tokens": 30 + completion_tokens}
+    return SimpleNamespace(usage=usage, choices=[])
+
+
+class FakeCompletions:
+    """返回固定的流，并记录请求参数"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.params = None
+
+    def create(self, **params):
+        self.params = params
+        return iter(self.chunks)
+
+
+def _call(monkeypatch, chunks):
+    """用假时钟(开始0s，三个片段在0.5/0.6/0.7s到达，1.0s结束)调用 call_with_metrics"""
+    ticks = iter([0.0, 0.5, 0.6, 0.7, 1.0])
+    monkeypatch.setattr(model_service_module, "StreamMetrics", lambda: StreamMetrics(clock=lambda: next(ticks)))
+
+    service = UniversalModelService()
+    model = service.registry.list_models()[0]
+    completions = FakeCompletions(chunks)
+    service.clients[model] = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    content, metrics = service.call_with_metrics(model, "问题")
+    return content, metrics, completions.params
+
+
+def test_call_with_metrics_uses_stream_usage(monkeypatch):
+    """测试1: 流末尾返回usage时，输出Token数取usage，TTFT和输出速度按片段到达时间计算"""
+    content, metrics, params = _call(monkeypatch, [_chunk("血糖"), _chunk("偏高"), _chunk("。"), _usage_chunk(7)])
+
+    assert content == "血糖偏高。"
+    assert params["stream"] is True and params["stream_options"] == {"include_usage": True}
+    assert metrics["ttft_s"] == 0.5
+    assert metrics["total_s"] == 1.0
+    assert metrics["chunks"] == 3
+    assert metrics["output_tokens"] == 7 and metrics["usage_estimated"] is False
+    assert metrics["usage"]["completion_tokens"] == 7
+    assert metrics["output_tokens_per_s"] == 12.0
+    assert metrics["inter_token_latency_s"]["p50"] == 0.1
+
+
+def test_call_with_metrics_estimates_without_usage(monkeypatch):
+    """测试2: 没有usage片段时，输出Token数以片段数估算并标记 usage_estimated"""
+    content, metrics, _ = _call(monkeypatch, [_chunk("血糖"), _chunk("偏高"), _chunk("。")])
+
+    assert content == "血糖偏高。"
+    assert metrics["ttft_s"] == 0.5
+    assert metrics["output_tokens"] == 3 and metrics["usage_estimated"] is True
+    assert metrics["usage"] is None
+    assert metrics["output_tokens_per_s"] == 4.0
+
+
+def test_latency_leaderboard():
+    """测试3: 排行榜按TTFT中位数升序，百分位数线性插值，没有TTFT的模型排在最后"""
+    assert percentile([], 50) == 0.0
+    assert percentile([4, 1, 3, 2], 50) == 2.5
+    assert percentile([0.2, 0.4, 0.6], 95) == 0.58
+
+    def record(ttft, total, tokens):
+        return {"ttft_s": ttft, "total_s": total, "output_tokens": tokens, "output_tokens_per_s": tokens / total,
+                "inter_token_latency_s": {"mean": 0.01}}
+
+    leaderboard = build_latency_leaderboard({
+        "slow": [record(0.2, 2.0, 100), record(0.4, 3.0, 150), record(0.6, 4.0, 200)],
+        "fast": [record(0.1, 1.0, 50), record(0.3, 2.0, 80)],
+        "silent": [{"ttft_s": None, "total_s": 5.0, "output_tokens": 0}],
+        "unused": []
+    })
+
+    assert [(e["rank"], e["model"]) for e in leaderboard] == [(1, "fast"), (2, "slow"), (3, "silent")]
+    fast, slow, silent = leaderboard
+    assert fast["ttft_p50_s"] == 0.2 and fast["calls"] == 2 and fast["output_tokens"] == 130
+    assert slow["ttft_p50_s"] == 0.4 and slow["ttft_p95_s"] == 0.58
+    assert slow["total_p50_s"] == 3.0 and slow["total_p95_s"] == 3.9
+    assert slow["output_tokens_per_s_p50"] == 50.0
+    assert silent["ttft_p50_s"] == 0 and silent["inter_token_latency_mean_s"] == 0
@@ -0,0 +1,98 @@
+"""
+测试阶段计时和指标导出
+"""
+import json
+
+import pytest
+
+from src.core.instrumentation import Instrumentation, default_instrumentation
+
+
+def test_disabled_records_nothing():
+    """测试1: 关闭时 span 为共享空上下文，不记录任何数据"""
+    instr = Instrumentation()
+    with instr.span("load_report", model="gpt-5.1") as span:
+        span.set(status="ok")
+
+    @instr.timed("aggregate")
+    def aggregate():
+        return 42
+
+    assert aggregate() == 42
+    assert instr.span("a") is instr.span("b")
+    assert instr.snapshot() == []
+
+
+def test_histograms_labels_and_errors():
+    """测试2: 按阶段和标签记录直方图，失败的阶段计入错误数并通知监听器"""
+    instr = Instrumentation(enabled=True)
+    events = []
+    instr.add_listener(lambda stage, labels, seconds, error: events.append((stage, labels, error)))
+
+    for seconds in (0.01, 0.02, 0.03, 2.0):
+        instr.observe("api_call", seconds, model="gpt-5.1", provider="jiekou")
+    instr.observe("api_call", 0.5, model="qwen3-max", provider="jiekou")
+
+    with pytest.raises(ValueError):
+        with instr.span("parse_response", dimension="准确性"):
+            raise ValueError("bad json")
+
+    series = {(s["stage"], s["labels"].get("model")): s for s in instr.snapshot()}
+    gpt = series[("api_call", "gpt-5.1")]
+    assert gpt["count"] == 4
+    assert gpt["max"] == 2.0
+    assert 0.01 <= gpt["p50"] <= 0.03
+    assert series[("parse_response", None)]["errors"] == 1
+    assert events[-1] == ("parse_response", {"dimension": "准确性"}, "ValueError: bad json")
+
+    totals = instr.stage_totals()
+    assert totals["api_call"].count == 5
+    table = instr.summary_table(group_by="provider", stages=["api_call"])
+    assert "api_call[jiekou]" in table
+    assert "parse_response" not in table
+
+
+def test_metrics_export(tmp_path):
+    """测试3: 导出 Prometheus 文本格式(累计桶、+Inf、sum/count)和JSON"""
+    instr = Instrumentation(enabled=True, buckets=(0.1, 1.0))
+    instr.observe("api_call", 0.05, model='m"1')
+    instr.observe("api_call", 0.5, model='m"1')
+    instr.observe("api_call", 5.0, model='m"1', error="timeout")
+
+    text = instr.write_metrics(tmp_path / "metrics.prom").read_text(encoding='utf-8')
+    assert '# TYPE stage_duration_seconds histogram' in text
+    assert 'stage_duration_seconds_bucket{stage="api_call",model="m\\"1",le="0.1"} 1' in text
+    assert 'stage_duration_seconds_bucket{stage="api_call",model="m\\"1",le="1.0"} 2' in text
+    assert 'stage_duration_seconds_bucket{stage="api_call",model="m\\"1",le="+Inf"} 3' in text
+    assert 'stage_duration_seconds_count{stage="api_call",model="m\\"1"} 3' in text
+    assert 'stage_errors_total{stage="api_call",model="m\\"1"} 1' in text
+
+    data = json.loads(instr.write_metrics(tmp_path / "metrics.json").read_text(encoding='utf-8'))
+    assert data["stages"]["api_call"]["count"] == 3
+    assert data["series"][0]["labels"] == {"model": 'm"1'}
+
+
+def test_engine_stages(tmp_path, monkeypatch):
+    """测试4: 交叉评测任务记录加载、格式化、调用、解析和写文件各阶段"""
+    from cross_evaluation.aggregator import score_aggregator
+    from cross_evaluation.engine import engine
+    from cross_evaluation.model_client import model_client
+
+    monkeypatch.setattr(engine, "output_dir", tmp_path)
+    monkeypatch.setattr(score_aggregator, "output_dir", tmp_path)
+    monkeypatch.setattr(model_client, "call_model", lambda model_name, prompt: '{"score": 10, "issues": "无"}')
+    default_instrumentation.reset()
+    default_instrumentation.enable()
+    try:
+        engine._evaluate_single_task("患者1", "Baichuan-M2", "gpt-5.1")
+    finally:
+        default_instrumentation.disable()
+
+    totals = default_instrumentation.stage_totals()
+    default_instrumentation.reset()
+
+    assert totals["load_report"].count == 1
+    for stage in ("format_prompt", "api_call", "parse_modules", "parse_response"):
+        assert totals[stage].count == 5
+    assert totals["write_result"].count == 6
+    assert totals["aggregate"].count == 1
@@ -0,0 +1,75 @@
+"""
+测试JSON编解码层
+"""
+import json
+
+import pytest
+
+from src.utils.json_codec import BACKEND_STDLIB, JsonCodec, JsonStreamWriter, available_backends
+
+DATA = {"model": "gpt-5.1", "patient": "患者1", "score": 38, "ratio": 0.95, "dimensions": {"准确性": [1, None, True]}}
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_modes_match_stdlib(backend, tmp_path):
+    """测试1: 两种后端的 pretty/compact 输出与标准库(ensure_ascii=False)一致，文件读写往返不变"""
+    codec = JsonCodec(backend)
+    assert codec.dumps(DATA, pretty=True) == json.dumps(DATA, ensure_ascii=False, indent=2)
+    assert codec.dumps(DATA) == json.dumps(DATA, ensure_ascii=False, separators=(",", ":"))
+    assert codec.dumps({"b": 1, "a": 2}, sort_keys=True) == '{"a":2,"b":1}'
+
+    path = codec.dump(DATA, tmp_path / "result.json", pretty=True)
+    assert "患者1" in path.read_text(encoding='utf-8')
+    assert codec.load(path) == DATA
+    assert codec.loads(path.read_bytes()) == codec.loads(path.read_text(encoding='utf-8')) == DATA
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_stdlib_fallback(backend):
+    """测试2: orjson 不支持的输入回退到标准库，错误类型与标准库一致"""
+    codec = JsonCodec(backend)
+    assert codec.dumps({"x": 2 ** 70, 1: "a"}) == '{"x":1180591620717411303424,"1":"a"}'
+    assert codec.loads('{"a": Infinity}')["a"] == float("inf")
+    assert codec.dumps({"t": object()}, default=lambda o: "obj") == '{"t":"obj"}'
+
+    with pytest.raises(json.JSONDecodeError):
+        codec.loads("{bad")
+    with pytest.raises(TypeError):
+        codec.dumps({"t": object()})
+
+
+def test_backend_selection(monkeypatch):
+    """测试3: 环境变量可强制使用标准库，不可用的后端报错"""
+    monkeypatch.setenv("JSON_CODEC_BACKEND", BACKEND_STDLIB)
+    assert JsonCodec().backend == BACKEND_STDLIB
+    with pytest.raises(ValueError):
+        JsonCodec("msgpack")
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_stream_writer(backend, tmp_path):
+    """测试4: 增量写出与一次性写出逐字节相同，出错时不留下目标文件和临时文件"""
+    codec = JsonCodec(backend)
+    items = [{"patient": f"患者{i}", "score": i} for i in range(3)]
+    expected = {"evaluations": items, "data": {"患者1": {"1": "a"}, "患者2": {}}, "metadata": {"total": 3}}
+
+    path = tmp_path / "details.json"
+    with JsonStreamWriter(path, codec) as writer:
+        writer.begin("evaluations")
+        for item in items:
+            writer.item(item)
+        total = writer.end()
+        writer.begin("data", container="object")
+        writer.item({"1": "a"}, key="患者1")
+        writer.item({}, key="患者2")
+        writer.end()
+        writer.field("metadata", {"total": total})
+    assert path.read_bytes() == codec.dumps_bytes(expected)
+
+    failed = tmp_path / "failed.json"
+    with pytest.raises(RuntimeError):
+        with JsonStreamWriter(failed, codec) as writer:
+            writer.begin("evaluations")
+            writer.item(items[0])
+            raise RuntimeError("中断")
+    assert list(tmp_path.iterdir()) == [path]
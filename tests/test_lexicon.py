@@ -0,0 +1,57 @@
+"""
+测试医学词表与多模式匹配
+"""
+import random
+
+import pytest
+
+from src.evaluation.auto_evaluator import AutoEvaluator
+from src.evaluation.lexicon import Lexicon
+
+
+def test_matches_equal_substring_search():
+    """测试1: 自动机找到的位置与逐个词条查找全部出现位置一致（包括重叠、相互包含的词条）"""
+    rng = random.Random(0)
+    alphabet = "糖尿病血糖餐后空腹胰岛素"
+    for _ in range(200):
+        terms = sorted({"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(12)})
+        lexicon = Lexicon({"a": terms[:6], "b": terms[6:]})
+        text = "".join(rng.choice(alphabet + "，。x") for _ in range(rng.randint(0, 80)))
+
+        expected = sorted((i, i + len(term), term_id) for term_id, term in enumerate(lexicon.terms)
+                          for i in range(len(text)) if text.startswith(term, i))
+        assert sorted(lexicon.iter_matches(text)) == expected
+        found = {term_id for term_id, term in enumerate(lexicon.terms) if term in text}
+        assert lexicon.scan_ids(text) == lexicon.found_ids(text) == found
+
+
+def test_load_and_coverage(tmp_path):
+    """测试2: 从 JSON/TSV 文件加载词表，按类别统计出现的词条（按词表顺序）"""
+    tsv = tmp_path / "diabetes.tsv"
+    tsv.write_text("# 类别\t词条\n药物\t二甲双胍\n药物\t胰岛素\n检查\t血糖\n检查\t空腹血糖\n", encoding='utf-8')
+    lexicon = Lexicon.load(tsv)
+    assert lexicon.categories == {"药物": ["二甲双胍", "胰岛素"], "检查": ["血糖", "空腹血糖"]}
+
+    coverage = lexicon.coverage("空腹血糖 8.2，二甲双胍 0.5g")
+    assert coverage["检查"] == {"found": ["血糖", "空腹血糖"], "count": 2, "total": 2}
+    assert coverage["药物"] == {"found": ["二甲双胍"], "count": 1, "total": 2}
+
+    (tmp_path / "bad.json").write_text('{"categories": {"药物": "二甲双胍"}}', encoding='utf-8')
+    with pytest.raises(ValueError):
+        Lexicon.load(tmp_path / "bad.json")
+    with pytest.raises(ValueError):
+        Lexicon({"药物": [""]})
+
+
+def test_auto_evaluator_lexicons(tmp_path):
+    """测试3: AutoEvaluator 默认加载项目词表，也可以指定词表文件"""
+    evaluator = AutoEvaluator()
+    assert evaluator.required_fields[:2] == ["基本信息", "性别"]
+    assert evaluator.medical_entities["药物"][0] == "二甲双胍"
+
+    lexicon_file = tmp_path / "entities.json"
+    lexicon_file.write_text('{"药物": ["二甲双胍", "阿卡波糖"]}', encoding='utf-8')
+    evaluator = AutoEvaluator(entity_lexicon=lexicon_file)
+    result = evaluator.check_entity_coverage("二甲双胍 0.5g bid")
+    assert result["score"] == 50
+    assert result["by_category"] == {"药物": {"found": ["二甲双胍"], "count": 1, "total": 2}}
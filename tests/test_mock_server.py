@@ -0,0 +1,62 @@
+"""
+测试本地模拟服务
+"""
+import json
+
+import pytest
+
+from src.core.client_pool import ClientPool
+from src.core.model_service import UniversalModelService
+from src.testing.mock_server import EVALUATION_MARKER, MockOpenAIServer
+
+PROFILES = {
+    "default": {"latency": 0.01, "token_interval": 0.0, "output_tokens": 8},
+    "mock-limited": {"rate_limit_rate": 1.0, "retry_after_s": 0.01},
+    "mock-empty": {"empty_rate": 1.0},
+}
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setenv("MOCK_API_KEY", "sk-mock")
+    with MockOpenAIServer(PROFILES) as server:
+        registry = {
+            name: {"provider": "mock", "api_key_env": "MOCK_API_KEY", "base_url": server.base_url}
+            for name in ("mock-fast", "mock-limited", "mock-empty")
+        }
+        registry_file = tmp_path / "model_registry.json"
+        registry_file.write_text(json.dumps(registry), encoding="utf-8")
+        pool = ClientPool(http2=False)
+        yield UniversalModelService(str(registry_file), pool=pool), server
+        pool.close()
+
+
+def test_streaming_and_non_streaming(service):
+    """测试1: 非流式返回完整内容，流式返回相同内容并带usage"""
+    service, server = service
+
+    text = service.call("mock-fast", "写一份报告")
+    content, metrics = service.call_with_metrics("mock-fast", "写一份报告")
+
+    assert text.startswith("## 主诉") and content == text
+    assert metrics["usage"]["completion_tokens"] == 8
+    assert metrics["usage_estimated"] is False
+    assert server.stats()["models"]["mock-fast"]["ok"] == 2
+
+
+def test_evaluation_payload_rate_limit_and_empty(service):
+    """测试2: 评测请求返回可解析的评分JSON；429 和空响应按配置出现"""
+    service, server = service
+
+    response = service.call("mock-fast", f"评测模板\n{EVALUATION_MARKER}，并以JSON格式输出结果。")
+    payload = json.loads(response.strip("`").removeprefix("json"))
+    assert 20 <= payload["accuracy"]["score"] <= 40
+
+    with pytest.raises(Exception):
+        service.call("mock-limited", "你好")
+    assert service.call("mock-empty", "你好") == ""
+
+    stats = server.stats()["models"]
+    # SDK 默认重试2次，按 retry-after-ms 等待
+    assert stats["mock-limited"] == {"429": 3}
+    assert stats["mock-empty"] == {"empty": 1}
@@ -134,9 +134,12 @@ def test_batch_call():
             max_tokens=100
         )
 
-        for i, (question, answer) in enumerate(zip(questions, results), 1):
+        for i, (question, result) in enumerate(zip(questions, results), 1):
             print(f"{i}. 问题: {question}")
-            print(f"   回答: {answer[:150]}...")
+            if result.ok:
+                print(f"   回答: {result.output[:150]}...")
+            else:
+                print(f"   失败: {result.error}")
             print()
 
         print("✅ 批量调用成功")
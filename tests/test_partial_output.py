@@ -0,0 +1,79 @@
+"""
+测试流式生成的部分输出文件
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from src.batch.unified_processor import UnifiedBatchProcessor
+from src.core.model_service import UniversalModelService
+from src.core.partial_output import PartialOutput, load_partial_meta
+
+
+def _chunk(text):
+    return SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FlakyStream:
+    """第一次调用输出两个片段后断开，之后正常输出"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **params):
+        self.calls += 1
+        first = self.calls == 1
+
+        def stream():
+            yield _chunk("血糖")
+            yield _chunk("偏高")
+            if first:
+                raise TimeoutError("read timeout")
+            yield _chunk("，建议复查")
+
+        return stream()
+
+
+def test_failed_attempt_is_kept_and_reported(tmp_path):
+    """测试1: 失败的尝试保留已生成内容，成功后 finalized 并汇总为诊断信息"""
+    service = UniversalModelService()
+    model = service.registry.list_models()[0]
+    service.clients[model] = SimpleNamespace(chat=SimpleNamespace(completions=FlakyStream()))
+    partial_file = tmp_path / "m" / "患者1" / "1.partial"
+
+    with pytest.raises(TimeoutError):
+        service.call_with_metrics(model, "问题", partial_file=partial_file)
+
+    assert partial_file.read_text(encoding='utf-8') == "血糖偏高"
+    assert load_partial_meta(partial_file)["finalized"] is False
+
+    content, _ = service.call_with_metrics(model, "问题", partial_file=partial_file)
+
+    assert content == partial_file.read_text(encoding='utf-8') == "血糖偏高，建议复查"
+    meta = load_partial_meta(partial_file)
+    assert meta["finalized"] is True
+    assert [a["finalized"] for a in meta["attempts"]] == [False, True]
+
+    diagnostics = UnifiedBatchProcessor._partial_diagnostics(partial_file)
+    assert diagnostics["wasted_output_chars"] == 4
+    assert diagnostics["partial_attempts"][0]["error"] == "read timeout"
+
+    # 失败的尝试的文本保留在 {name}.partial.1
+    assert diagnostics["partial_attempts"][0]["file"] == "1.partial.1"
+    assert (partial_file.parent / "1.partial.1").read_text(encoding='utf-8') == "血糖偏高"
+
+
+def test_interrupted_attempt_is_recovered_from_disk(tmp_path):
+    """测试2: 进程中途退出(未调用 fail/finalize)时，下一次尝试补记为 interrupted"""
+    path = tmp_path / "1.partial"
+    crashed = PartialOutput(path, {"model": "m"})
+    crashed.append("已生成的一半")
+    crashed._file.close()
+
+    PartialOutput(path).finalize()
+
+    first = load_partial_meta(path)["attempts"][0]
+    assert first["error"] == "interrupted"
+    assert first["chars"] == len("已生成的一半")
+    assert (tmp_path / first["file"]).read_text(encoding='utf-8') == "已生成的一半"
+    assert path.read_text(encoding='utf-8') == ""
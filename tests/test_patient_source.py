@@ -0,0 +1,71 @@
+"""
+测试患者记录数据源
+覆盖目录、JSONL清单、glob三种来源以及确定性分片
+"""
+import json
+
+import pytest
+
+from src.utils.patient_source import (
+    iter_patient_names,
+    iter_patient_records,
+    parse_shard,
+)
+
+
+def _make_records_dir(tmp_path, count=12):
+    records_dir = tmp_path / "records"
+    records_dir.mkdir()
+    for i in range(1, count + 1):
+        (records_dir / f"患者{i}_问答记录.txt").write_text(f"医生：你好\n患者：我是{i}号", encoding="utf-8")
+    return records_dir
+
+
+def test_directory_source_is_lazy_and_naturally_sorted(tmp_path):
+    """测试1: 目录来源按自然顺序惰性产出"""
+    records_dir = _make_records_dir(tmp_path)
+
+    records = iter_patient_records(records_dir)
+    first = next(records)
+
+    assert first['people'] == "患者1"
+    assert "我是1号" in first['chat']
+    assert [r['people'] for r in records][:2] == ["患者2", "患者3"]
+
+
+def test_jsonl_and_glob_sources(tmp_path):
+    """测试2: JSONL清单(内联chat或file_path引用)与glob模式"""
+    records_dir = _make_records_dir(tmp_path, count=3)
+    manifest = tmp_path / "patients.jsonl"
+    manifest.write_text("\n".join([
+        json.dumps({"people": "患者A", "chat": "内联对话"}, ensure_ascii=False),
+        json.dumps({"file_path": "records/患者2_问答记录.txt"}, ensure_ascii=False),
+    ]), encoding="utf-8")
+
+    records = list(iter_patient_records(manifest))
+    assert [r['people'] for r in records] == ["患者A", "患者2"]
+    assert records[0]['chat'] == "内联对话"
+    assert "我是2号" in records[1]['chat']
+
+    names = list(iter_patient_names(str(records_dir / "患者[12]_*.txt")))
+    assert names == ["患者1", "患者2"]
+
+
+def test_shards_partition_corpus(tmp_path):
+    """测试3: 各分片互不重叠且合起来覆盖全部患者"""
+    records_dir = _make_records_dir(tmp_path, count=50)
+    all_names = list(iter_patient_names(records_dir))
+
+    shards = [list(iter_patient_names(records_dir, f"{i}/4")) for i in range(4)]
+
+    assert sorted(sum(shards, [])) == sorted(all_names)
+    assert all(shards), "50个患者分4片时每片都应非空"
+    # 同一分片多次调用结果一致
+    assert shards[2] == list(iter_patient_names(records_dir, (2, 4)))
+
+
+@pytest.mark.parametrize("spec", ["4/4", "-1/2", "a/b", "1/0"])
+def test_parse_shard_rejects_invalid(spec):
+    """测试4: 非法分片参数"""
+    with pytest.raises(ValueError):
+        parse_shard(spec)
@@ -0,0 +1,80 @@
+"""
+测试交叉评测的规则预筛
+"""
+import json
+
+import pytest
+
+from cross_evaluation.aggregator import score_aggregator
+from cross_evaluation.config import config
+from cross_evaluation.engine import engine
+from cross_evaluation.model_client import model_client
+from cross_evaluation.prescreen import ReportPrescreener, prescreener
+from cross_evaluation.report_loader import report_loader
+
+PATIENT = "患者1"
+GOOD, ERROR, EMPTY = "gpt-5.1", "qwen3-max", "Baichuan-M2"
+
+
+@pytest.fixture
+def raw_dir(tmp_path, monkeypatch):
+    """三份报告: 正常、主诉生成失败、现病史为空"""
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    template = json.loads((config.raw_reports_dir / f"{GOOD}-{PATIENT}.json").read_text(encoding='utf-8'))
+    for model, conversation, output in ((GOOD, None, None), (ERROR, "1", "ERROR: 请求超时"), (EMPTY, "2", "")):
+        data = json.loads(json.dumps(template))
+        if conversation:
+            data["conversations"][conversation]["Output"] = output
+        (raw_dir / f"{model}-{PATIENT}.json").write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    monkeypatch.setattr(report_loader, "raw_reports_dir", raw_dir)
+    return raw_dir
+
+
+def test_screen_rules(raw_dir):
+    """测试1: 生成失败和缺少现病史的报告未通过，正常报告通过并带有本地评分"""
+    screener = ReportPrescreener(rules={})
+
+    good = screener.screen(GOOD, PATIENT)
+    assert good.passed and good.local_scores["overall"] > 0
+    assert good.modules[:2] == ["主诉", "现病史"]
+
+    error = screener.screen(ERROR, PATIENT)
+    assert not error.passed and error.reasons[0].startswith("对话1生成失败: ERROR: 请求超时")
+    assert "主诉" not in error.modules
+
+    empty = screener.screen(EMPTY, PATIENT)
+    assert empty.reasons == ["缺少现病史"]
+    assert "现病史" not in empty.modules
+
+    strict = ReportPrescreener(rules={"min_local_score": 101})
+    assert not strict.screen(GOOD, PATIENT).passed
+    assert screener.stats() == {"screened": 3, "failed": 2, "tasks": 0, "calls_saved": 0}
+
+
+def test_engine_skips_failed_reports(tmp_path, raw_dir, monkeypatch, capsys):
+    """测试2: 启用预筛时只有通过的报告调用评测模型，未通过的直接得到0分的聚合结果"""
+    results_dir = tmp_path / "results"
+    for target in (engine, score_aggregator, prescreener):
+        monkeypatch.setattr(target, "output_dir", results_dir)
+    monkeypatch.setattr(engine, "progress_file", results_dir / ".progress.json")
+    monkeypatch.setattr(engine, "prescreen_enabled", True)
+    calls = []
+    monkeypatch.setattr(model_client, "call_model",
+                        lambda model_name, prompt: calls.append(model_name) or '{"score": 10, "issues": "无"}')
+
+    models = [GOOD, ERROR, EMPTY]
+    engine.run(models=models, patients=[PATIENT])
+
+    dimensions = len(config.dimensions)
+    assert len(calls) == len(models) * dimensions
+    assert prescreener.stats()["calls_saved"] == 2 * len(models) * dimensions
+    assert "节省API调用 30 次" in capsys.readouterr().out
+
+    aggregated = json.loads(
+        (results_dir / PATIENT / f"{ERROR}_by_{GOOD}_{PATIENT}_aggregated.json").read_text(encoding='utf-8'))
+    assert aggregated["total_score"] == 0
+    dimension = json.loads(
+        (results_dir / PATIENT / f"{EMPTY}_by_{ERROR}_{PATIENT}_准确性.json").read_text(encoding='utf-8'))
+    assert dimension["prescreen"]["reasons"] == ["缺少现病史"] and dimension["target_llm"] == ERROR
+    assert (results_dir / PATIENT / f"{GOOD}_by_{EMPTY}_{PATIENT}_aggregated.json").exists()
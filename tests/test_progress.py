@@ -0,0 +1,84 @@
+"""
+测试运行进度统计和实时面板
+"""
+import json
+
+import pytest
+
+from src.core.client_pool import ClientPool
+from src.core.model_service import UniversalModelService
+from src.core.progress import ProgressDashboard, ProgressTracker, default_progress, format_log_line
+from src.testing.mock_server import MockOpenAIServer
+
+
+def test_provider_stats_and_eta():
+    """测试1: 按提供商统计在途调用、错误率、重试率、p95和tokens，按吞吐估算ETA"""
+    tracker = ProgressTracker()
+    tracker.start(total_tasks=4, title="测试")
+
+    with tracker.call("jiekou") as call:
+        assert tracker.snapshot()["providers"]["jiekou"]["in_flight"] == 1
+        call.tokens = 120
+    with pytest.raises(RuntimeError):
+        with tracker.call("jiekou"):
+            raise RuntimeError("timeout")
+    tracker.record_retry("jiekou")
+    with tracker.call("baichuan") as call:
+        call.tokens = 30
+
+    tracker.task_finished()
+    tracker.task_finished(ok=False)
+
+    snapshot = tracker.snapshot()
+    jiekou = snapshot["providers"]["jiekou"]
+    assert jiekou["in_flight"] == 0
+    assert jiekou["calls"] == 2
+    assert jiekou["error_rate"] == 0.5
+    assert jiekou["retry_rate"] == 0.5
+    assert jiekou["tokens"] == 120
+    assert jiekou["calls_per_min"] > 0
+    assert snapshot["providers"]["baichuan"]["tokens"] == 30
+    assert snapshot["tasks_done"] == 1 and snapshot["tasks_failed"] == 1
+    assert snapshot["eta_s"] is not None
+
+    line = format_log_line(snapshot)
+    assert line.startswith("[进度] 2/4 (50.0%)")
+    assert "jiekou: 在途 0" in line and "错误 50.0%" in line
+
+
+def test_dashboard_log_mode():
+    """测试2: 非终端时 auto 退化为日志行，退出时输出最终状态；未知模式报错"""
+    tracker = ProgressTracker()
+    tracker.start(total_tasks=1)
+    lines = []
+
+    with ProgressDashboard(tracker, mode="auto", log_interval_s=0.01, log=lines.append) as dashboard:
+        assert dashboard.mode == "log"
+        tracker.task_finished()
+
+    assert lines[-1].startswith("[进度] 1/1 (100.0%)")
+    with pytest.raises(ValueError):
+        ProgressDashboard(tracker, mode="curses")
+
+
+def test_model_service_records_calls(tmp_path, monkeypatch):
+    """测试3: 模型服务的非流式和流式调用都记录到默认统计，tokens取自usage"""
+    monkeypatch.setenv("MOCK_API_KEY", "sk-mock")
+    profiles = {"default": {"latency": 0.01, "token_interval": 0.0, "output_tokens": 8}}
+    with MockOpenAIServer(profiles) as server:
+        registry = {"mock-fast": {"provider": "mock", "api_key_env": "MOCK_API_KEY", "base_url": server.base_url}}
+        registry_file = tmp_path / "model_registry.json"
+        registry_file.write_text(json.dumps(registry), encoding="utf-8")
+        pool = ClientPool(http2=False)
+        service = UniversalModelService(str(registry_file), pool=pool, coalesce=False)
+
+        default_progress.start()
+        service.call("mock-fast", "写一份报告")
+        service.call_with_metrics("mock-fast", "写一份报告")
+        pool.close()
+
+    mock = default_progress.snapshot()["providers"]["mock"]
+    default_progress.start()
+    assert mock["calls"] == 2
+    assert mock["errors"] == 0
+    assert mock["tokens"] >= 2 * 8
@@ -0,0 +1,72 @@
+"""
+测试原始报告清单
+"""
+import json
+import os
+import shutil
+from pathlib import Path
+
+from cross_evaluation.report_loader import report_loader
+from src.utils.raw_manifest import RawManifest, load_manifest, parse_report_filename
+
+RAW_DIR = Path(__file__).parent.parent / "output" / "raw"
+
+
+def _copy_reports(tmp_path, count=4):
+    target = tmp_path / "raw"
+    target.mkdir()
+    for path in sorted(RAW_DIR.glob("deepseek*.json"))[:count]:
+        shutil.copy(path, target / path.name)
+    return target
+
+
+def test_parse_report_filename():
+    """测试1: 按最后一个 "-" 切分模型和患者"""
+    assert parse_report_filename("doubao-seed-1-6-251015-患者10.json") == ("doubao-seed-1-6-251015", "患者10")
+    assert parse_report_filename("notes.json") == (None, None)
+
+
+def test_incremental_refresh(tmp_path):
+    """测试2: 清单记录模型/患者/哈希/对话段，刷新时只读取新增或修改的文件"""
+    raw_dir = _copy_reports(tmp_path)
+    manifest = RawManifest(raw_dir)
+    assert manifest.refresh() == {"total": 4, "scanned": 4, "reused": 0, "removed": 0}
+
+    entry = manifest.get("deepseek_deepseek-v3.1", "患者1")
+    assert entry["report_model"] == "deepseek/deepseek-v3.1"
+    assert entry["conversations"] == ["1", "2", "3", "4"]
+    assert len(entry["sha256"]) == 64
+    assert manifest.path("deepseek_deepseek-v3.1", "患者1") == raw_dir / "deepseek_deepseek-v3.1-患者1.json"
+    assert not manifest.exists("gpt-5.1", "患者1")
+
+    # 新实例从清单文件恢复，未变化的文件不再读取
+    reloaded = RawManifest(raw_dir)
+    assert reloaded.refresh()["reused"] == 4
+
+    changed = raw_dir / "deepseek_deepseek-v3.1-患者1.json"
+    data = json.loads(changed.read_text(encoding='utf-8'))
+    data["people"] = "患者1(复诊)"
+    changed.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    stat = changed.stat()
+    os.utime(changed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    (raw_dir / "deepseek_deepseek-v3.1-患者10.json").unlink()
+
+    assert reloaded.refresh() == {"total": 3, "scanned": 1, "reused": 2, "removed": 1}
+    assert reloaded.get("deepseek_deepseek-v3.1", "患者1")["report_people"] == "患者1(复诊)"
+    saved = json.loads(reloaded.manifest_path.read_text(encoding='utf-8'))
+    assert len(saved["entries"]) == 3
+
+
+def test_report_loader_uses_manifest(tmp_path, monkeypatch):
+    """测试3: 报告加载器通过清单检查存在性，清单生成后新写入的报告同样可以找到"""
+    raw_dir = _copy_reports(tmp_path, count=1)
+    monkeypatch.setattr(report_loader, "raw_reports_dir", raw_dir)
+
+    assert report_loader.check_report_exists("deepseek_deepseek-v3.1", "患者1")
+    assert not report_loader.check_report_exists("gpt-5.1", "患者1")
+    assert load_manifest(raw_dir) is report_loader.manifest
+
+    shutil.copy(RAW_DIR / "gpt-5.1-患者1.json", raw_dir / "gpt-5.1-患者1.json")
+    assert report_loader.check_report_exists("gpt-5.1", "患者1")
+    assert report_loader.refresh_manifest()["scanned"] == 1
+    assert report_loader.manifest.models() == ["deepseek_deepseek-v3.1", "gpt-5.1"]
@@ -0,0 +1,61 @@
+"""
+测试原始报告 v1/v2 格式读写
+"""
+import json
+import shutil
+from pathlib import Path
+
+from src.utils.raw_report import (
+    FORMAT_V1,
+    FORMAT_V2,
+    convert_directory,
+    load_raw_report,
+    save_raw_report,
+)
+
+RAW_DIR = Path(__file__).parent.parent / "output" / "raw"
+
+
+def _copy_reports(tmp_path, count=8):
+    target = tmp_path / "raw"
+    target.mkdir()
+    for path in sorted(RAW_DIR.glob("*.json"))[:count]:
+        shutil.copy(path, target / path.name)
+    return target
+
+
+def test_v2_roundtrip_matches_v1(tmp_path):
+    """测试1: v1 -> v2 -> 读取，结果与原文件完全一致"""
+    raw_dir = _copy_reports(tmp_path)
+    originals = {p.name: json.loads(p.read_text(encoding='utf-8')) for p in raw_dir.glob("*.json")}
+    size_before = sum(p.stat().st_size for p in raw_dir.glob("*.json"))
+
+    assert convert_directory(raw_dir, FORMAT_V2) == len(originals)
+
+    size_after = sum(p.stat().st_size for p in raw_dir.rglob("*") if p.is_file())
+    assert size_after < size_before / 2
+
+    for name, original in originals.items():
+        stored = json.loads((raw_dir / name).read_text(encoding='utf-8'))
+        assert stored['format_version'] == FORMAT_V2
+        assert 'Input' not in stored['conversations']['1']
+        assert load_raw_report(raw_dir / name) == original
+
+
+def test_extra_fields_survive_and_v1_passthrough(tmp_path):
+    """测试2: 额外字段(如调用指标)在v2中保留；v1文件原样读取"""
+    report = {
+        'model': 'mock-model',
+        'people': '患者1',
+        'conversations': {
+            '1': {'model': 'mock-model', 'prompt': 'P', 'people': '患者1', 'chat': 'C',
+                  'Input': 'P \n C', 'Output': 'O', 'metrics': {'ttft_s': 0.5}},
+        },
+        'result': 'O',
+    }
+
+    v2_path = save_raw_report(report, tmp_path / "mock-model-患者1.json", FORMAT_V2)
+    assert load_raw_report(v2_path) == report
+
+    v1_path = save_raw_report(report, tmp_path / "v1" / "mock-model-患者1.json", FORMAT_V1)
+    assert json.loads(v1_path.read_text(encoding='utf-8')) == report
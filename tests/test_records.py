@@ -0,0 +1,69 @@
+"""
+测试评测记录类型
+"""
+from pathlib import Path
+
+import pytest
+
+from cross_evaluation.aggregator import score_aggregator
+from cross_evaluation.records import AggregatedResult, DimensionResult, RawReport
+from src.utils import json_codec
+
+OUTPUT_DIR = Path(__file__).parent.parent / "output"
+
+
+def test_round_trip_real_files():
+    """测试1: 现有的维度结果、聚合结果和原始报告转换为记录后再转回字典，内容和键顺序不变"""
+    results_dir = OUTPUT_DIR / "cross_evaluation_results" / "患者1"
+    dimension_files = [p for p in sorted(results_dir.glob("*.json")) if not p.name.endswith("_aggregated.json")]
+    aggregated_files = sorted(results_dir.glob("*_aggregated.json"))
+    assert dimension_files and aggregated_files
+
+    for path in dimension_files[:50]:
+        data = json_codec.load(path)
+        assert list(DimensionResult.load(path).to_dict().items()) == list(data.items())
+    for path in aggregated_files[:50]:
+        data = json_codec.load(path)
+        assert list(AggregatedResult.load(path).to_dict().items()) == list(data.items())
+
+    raw_path = OUTPUT_DIR / "raw" / "gpt-5.1-患者1.json"
+    data = json_codec.load(raw_path)
+    report = RawReport.from_dict(data, patient="患者1")
+    assert report.model == data["model"] and report.conversations is data["conversations"]
+    assert report.to_dict() == data
+
+
+def test_validation_and_legacy_keys():
+    """测试2: 评分不是数值或缺少字段时抛出 ValueError，旧版 总分/维度评分 键可以读取"""
+    with pytest.raises(ValueError):
+        DimensionResult.from_dict({"dimension": "准确性", "score": "38"})
+    with pytest.raises(ValueError):
+        DimensionResult.from_dict({"score": 38})
+    with pytest.raises(ValueError):
+        AggregatedResult.from_dict({"evaluated_model": "a", "evaluator_model": "b"}, source="x.json")
+
+    legacy = AggregatedResult.from_dict({
+        "evaluated_model": "gpt-5.1", "evaluator_model": "kimi-k2",
+        "总分": 80, "维度评分": {"准确性": {"score": 32, "max_score": 40, "issues": ["遗漏用药史"]}}
+    }, patient="患者1")
+    assert legacy.total_score == 80 and legacy.patient == "患者1"
+    assert legacy.dimensions["准确性"].issues == ["遗漏用药史"]
+    assert "总分" not in legacy.to_dict()
+
+
+def test_aggregate_records():
+    """测试3: 聚合器校验维度结果并返回记录，字典接口的输出与记录一致"""
+    results = [
+        {"dimension": "准确性", "score": 30, "max_score": 40, "issues": "", "critical_feedback": "遗漏过敏史"},
+        DimensionResult(dimension="逻辑性", score=20, max_score=25, critical_feedback="")
+    ]
+    record = score_aggregator.aggregate_records(results, "gpt-5.1", "kimi-k2", "患者1")
+    assert record.total_score == 50
+    assert record.critical_feedbacks == ["遗漏过敏史"]
+    assert list(record.dimensions) == ["准确性", "逻辑性"]
+
+    data = score_aggregator.aggregate(results, "gpt-5.1", "kimi-k2", "患者1")
+    assert {**data, "timestamp": None} == {**record.to_dict(), "timestamp": None}
+
+    with pytest.raises(ValueError):
+        score_aggregator.aggregate([{"dimension": "准确性", "score": None}], "gpt-5.1", "kimi-k2", "患者1")
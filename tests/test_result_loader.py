@@ -0,0 +1,65 @@
+"""
+测试并行结果加载器
+"""
+import pytest
+
+from cross_evaluation.records import AggregatedResult
+from src.testing.synthetic_corpus import write_result_tree
+from src.utils.result_loader import ResultLoader, find_result_files, summarize_aggregated
+
+MODELS = ["model-a", "model-b", "model-c"]
+PATIENTS = ["患者1", "患者2", "患者3"]
+
+
+@pytest.fixture(scope="module")
+def results_dir(tmp_path_factory):
+    root = tmp_path_factory.mktemp("results")
+    write_result_tree(root, MODELS, MODELS[:2], PATIENTS)
+    (root / "患者2" / "broken_aggregated.json").write_text("{", encoding='utf-8')
+    (root / ".progress.json").write_text("{}", encoding='utf-8')
+    return root
+
+
+def _load_aggregated(path):
+    return AggregatedResult.load(path, patient=path.parent.name)
+
+
+def test_find_result_files(results_dir):
+    """测试1: 按患者目录分组并排序，跳过隐藏文件，可排除聚合文件"""
+    groups = find_result_files(results_dir, "*_aggregated.json")
+    assert [group[0].parent.name for group in groups] == PATIENTS
+    assert sum(len(group) for group in groups) == len(MODELS) * 2 * len(PATIENTS) + 1
+
+    dimension_files = find_result_files(results_dir, exclude="_aggregated")
+    assert all("_aggregated" not in p.name for group in dimension_files for p in group)
+
+
+@pytest.mark.parametrize("mode", ["process", "thread", "serial"])
+def test_modes_match(results_dir, mode):
+    """测试2: 三种模式返回相同的记录和顺序，失败的文件作为错误返回并计入统计"""
+    expected = ResultLoader(mode="serial").load_files(results_dir, "*_aggregated.json", _load_aggregated)
+
+    loader = ResultLoader(workers=3, mode=mode, chunk_size=4, min_parallel_files=0)
+    items = loader.load_files(results_dir, "*_aggregated.json", _load_aggregated)
+    assert [item.path for item in items] == [item.path for item in expected]
+    assert [item.record.to_dict() for item in items if item.ok] == \
+        [item.record.to_dict() for item in expected if item.ok]
+
+    errors = [item for item in items if not item.ok]
+    assert [item.path.name for item in errors] == ["broken_aggregated.json"]
+
+    stats = loader.stats()
+    assert stats["files"] == len(items) and stats["errors"] == 1
+    assert stats["mode"] == mode and stats["files_per_s"] > 0
+
+
+def test_summarize_aggregated(results_dir):
+    """测试3: 紧凑摘要只保留总分、维度数和大小，JSON格式错误记录为 error_type"""
+    loader = ResultLoader(workers=2, min_parallel_files=0)
+    summaries = {item.path.name: item.record
+                 for item in loader.iter_files(results_dir / "患者2", "*_aggregated.json", summarize_aggregated)}
+    assert summaries["broken_aggregated.json"]["error_type"] == "json"
+
+    summary = summaries["model-a_by_model-b_患者2_aggregated.json"]
+    assert summary["patient"] == "患者2" and summary["dimension_count"] == 5
+    assert isinstance(summary["total_score"], (int, float)) and summary["error_type"] is None
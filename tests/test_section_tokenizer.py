@@ -0,0 +1,69 @@
+"""
+测试报告分段扫描和模块解析
+"""
+import random
+from pathlib import Path
+
+from benchmarks.legacy_module_parser import legacy_module_parser
+from cross_evaluation.module_parser import module_parser
+from cross_evaluation.section_tokenizer import split_sections, tokenize
+from src.utils.raw_report import load_raw_report
+
+RAW_DIR = Path(__file__).resolve().parent.parent / "output" / "raw"
+
+STRUCTURED_REPORT = (
+    "## 患者预问诊报告\n"
+    "- **主诉：** 多饮多尿3月\n"
+    "- **现病史：** 3月前出现口干，现病史摘要如下\n"
+    "- **既往病史：** 高血压5年\n"
+    "- **家族史：** 父亲糖尿病\n"
+    "- **个人史：** 吸烟10年"
+)
+
+TOKENS = ["主诉", "现病史", "病史摘要", "既往史", "既往", "既往病史", "家族史", "家族病史", "个人史", "烟酒史",
+          "有", "：", ":", "**", "- **", "-\n**", "##", "\\n", "\n", "\n\n", " ", "文本", "发现", "摘要"]
+
+
+def _legacy(report):
+    return (legacy_module_parser.parse_report(report),
+            legacy_module_parser.get_module_summary(report),
+            legacy_module_parser.identify_modules_in_report(report))
+
+
+def _current(report):
+    return module_parser.analyze(report) + (module_parser.identify_modules_in_report(report),)
+
+
+def test_tokenize_markers():
+    """测试1: 一次扫描得到全部标记，重叠的 "病史摘要" 单独补上"""
+    markers = tokenize("- **现病史摘要：** 略\\n## 既往史")
+    assert [(kind, text) for kind, text, _, _ in markers] == [
+        ("bullet", "- **"), ("keyword", "现病史"), ("keyword", "病史摘要"),
+        ("escaped", "\\n"), ("heading", "##"), ("keyword", "既往史")
+    ]
+    report = "- **现病史摘要：** 略\\n## 既往史"
+    for _, text, start, end in markers:
+        assert report[start:end] == text
+
+
+def test_split_sections():
+    """测试2: 按结构化标签切分段落，内容到下一个标签为止"""
+    sections = split_sections(STRUCTURED_REPORT)
+    assert [s.module for s in sections] == ["主诉", "现病史", "既往史", "家族史", "个人史"]
+    assert all(s.structured for s in sections)
+    assert sections[0].content(STRUCTURED_REPORT) == "多饮多尿3月"
+    assert sections[2].label == "既往病史"
+    assert sections[4].content(STRUCTURED_REPORT) == "吸烟10年"
+
+
+def test_matches_legacy_parser():
+    """测试3: 模块内容、摘要和位置与原正则级联实现完全一致"""
+    reports = [STRUCTURED_REPORT, "", "主诉：", "既往有", "发现血糖高\\n口干\\n既往体健\n- **主诉：**\n"]
+    reports += [load_raw_report(path).get("result", "") for path in sorted(RAW_DIR.glob("*.json"))]
+
+    rng = random.Random(41)
+    for _ in range(3000):
+        reports.append("".join(rng.choice(TOKENS) for _ in range(rng.randint(0, 40))))
+
+    for report in reports:
+        assert _current(report) == _legacy(report), repr(report)
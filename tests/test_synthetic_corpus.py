@@ -0,0 +1,88 @@
+"""
+测试合成数据集生成器
+"""
+import json
+import random
+import re
+
+from cross_evaluation.aggregator import score_aggregator
+from cross_evaluation.dimension_evaluator import dimension_evaluator
+from cross_evaluation.report_loader import report_loader
+from src.testing.synthetic_corpus import build_corpus, load_dialogue_templates, resize_dialogue, resize_text
+from src.utils.patient_source import iter_patient_records
+from src.utils.raw_report import FORMAT_V1, build_input, get_format_version
+
+
+def test_build_corpus_layout(tmp_path, monkeypatch):
+    """测试1: 生成的原始报告和结果树可被现有加载器直接读取"""
+    corpus = build_corpus(tmp_path, num_models=3, num_patients=2, num_evaluators=2)
+
+    assert corpus["raw_reports"] == 6
+    assert corpus["aggregated_files"] == 3 * 2 * 2
+    assert corpus["dimension_files"] == 3 * 2 * 2 * 5
+
+    monkeypatch.setattr(report_loader, "raw_reports_dir", tmp_path / "raw")
+    monkeypatch.setattr(score_aggregator, "output_dir", tmp_path / "cross_evaluation_results")
+
+    model, patient = corpus["models"][2], corpus["patients"][1]
+    report = report_loader.load_report(model, patient)
+    assert report["model"] == model
+    assert report["people"] == patient
+    assert "主诉" in report_loader.extract_result(model, patient)
+
+    evaluator = corpus["evaluators"][1]
+    aggregated = score_aggregator.aggregate_from_files(model, evaluator, patient)
+    saved = json.loads((tmp_path / "cross_evaluation_results" / patient /
+                        f"{model}_by_{evaluator}_{patient}_aggregated.json").read_text(encoding='utf-8'))
+    assert aggregated["total_score"] == saved["total_score"]
+    assert set(aggregated["dimensions"]) == set(saved["dimensions"])
+
+
+def test_dimension_output_parses(tmp_path):
+    """测试2: 维度结果中的模型输出与真实输出格式一致，可被评测器解析出相同分数"""
+    corpus = build_corpus(tmp_path, num_models=2, num_patients=1, seed=7)
+    patient = corpus["patients"][0]
+
+    for path in (tmp_path / "cross_evaluation_results" / patient).glob("*_准确性.json"):
+        result = json.loads(path.read_text(encoding='utf-8'))
+        parsed = dimension_evaluator._parse_response(
+            result["output"], "准确性", result["evaluator_model"], result["evaluated_model"], patient)
+        assert parsed["score"] == result["score"]
+
+
+def test_dialogues_and_v1_reports(tmp_path):
+    """测试3: 问答记录可被患者数据源读取，原始报告为v1格式且 chat 与该患者的问答记录一致"""
+    corpus = build_corpus(tmp_path, num_models=2, num_patients=12, num_evaluators=0)
+
+    records = {r["people"]: r["chat"] for r in iter_patient_records(corpus["dialogue_dir"])}
+    assert sorted(records) == sorted(corpus["patients"])
+    assert "患者12" in records["患者12"]
+    assert corpus["aggregated_files"] == 0
+
+    data = json.loads((tmp_path / "raw" / "synth-m1-患者12.json").read_text(encoding='utf-8'))
+    assert get_format_version(data) == FORMAT_V1
+    conv = data["conversations"]["1"]
+    assert conv["chat"] == records["患者12"]
+    assert conv["Input"] == build_input(conv["prompt"], conv["chat"])
+    assert data["result"] == "\n".join(c["Output"] for c in data["conversations"].values())
+
+
+def test_length_distributions():
+    """测试4: 长度倍数控制问答记录和报告文本的长度，问答轮次保持交替并连续编号"""
+    chat = load_dialogue_templates()[0]
+    rng = random.Random(0)
+
+    longer = resize_dialogue(chat, 3.0, rng)
+    shorter = resize_dialogue(chat, 0.3, rng)
+    assert len(longer) > 2.5 * len(chat)
+    assert len(shorter) < 0.5 * len(chat)
+
+    for text in (longer, shorter):
+        turns = re.findall(r'^(\d+)\. (患者|医助)', text, re.MULTILINE)
+        assert [int(n) for n, _ in turns] == list(range(1, len(turns) + 1))
+        assert all(a[1] != b[1] for a, b in zip(turns, turns[1:]))
+
+    text = "主诉：口干多饮。现病史：血糖升高12年。既往史：高血压。"
+    assert resize_text(text, None, rng) == text
+    assert resize_text(text, 0.1, rng) == "主诉：口干多饮。"
+    assert len(resize_text(text, {"dist": "fixed", "value": 2.0}, rng)) >= 2 * len(text)
@@ -0,0 +1,117 @@
+"""
+测试调用链追踪和关键路径分析
+"""
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.trace_analyzer import breakdown, build_tree, critical_path, format_report, load_spans
+from src.core.tracing import Tracer, default_tracer
+
+
+def test_span_nesting_and_export(tmp_path):
+    """测试1: 嵌套 span 共享 traceId 并记录父子关系，异常记为错误状态；关闭时不写文件"""
+    tracer = Tracer()
+    with tracer.span("unused") as span:
+        span.set(a=1)
+    assert not tracer.enabled
+
+    trace_file = tmp_path / "traces.jsonl"
+    tracer.enable(trace_file)
+    with tracer.span("evaluate_task", patient="患者1") as task:
+        with tracer.span("model_call", model="gpt-5.1", skipped=None) as call:
+            call.set(**{"retry.count": 1})
+        with pytest.raises(ValueError):
+            with tracer.span("parse_response"):
+                raise ValueError("bad json")
+    with tracer.span("evaluate_task"):
+        pass
+    tracer.disable()
+
+    spans = {s["name"] + str(i): s for i, s in enumerate(load_spans(trace_file))}
+    call, parse, task, other = spans["model_call0"], spans["parse_response1"], spans["evaluate_task2"], spans["evaluate_task3"]
+    assert call["traceId"] == task["traceId"] == parse["traceId"] != other["traceId"]
+    assert call["parentSpanId"] == task["spanId"] and task["parentSpanId"] == ""
+    assert call["attributes"] == {"service.name": "model-comparison", "model": "gpt-5.1", "retry.count": 1}
+    assert task["status"] == {"code": "STATUS_CODE_OK"}
+    assert parse["status"] == {"code": "STATUS_CODE_ERROR", "message": "ValueError: bad json"}
+    assert task["startTimeUnixNano"] <= call["startTimeUnixNano"] <= call["endTimeUnixNano"] <= task["endTimeUnixNano"]
+
+
+def _span(name, span_id, parent, start, end):
+    return {"traceId": "t", "spanId": span_id, "parentSpanId": parent, "name": name,
+            "startTimeUnixNano": int(start * 1e9), "endTimeUnixNano": int(end * 1e9), "attributes": {}, "status": {}}
+
+
+def test_critical_path():
+    """测试2: 关键路径跳过被更晚结束的兄弟 span 覆盖的并行 span，自身耗时为未被子 span 覆盖的部分"""
+    spans = [
+        _span("task", "a", "", 0, 10),
+        _span("dimension", "b", "a", 1, 4),
+        _span("dimension", "c", "a", 2, 3),  # 与 b 并行且更早结束，不在关键路径上
+        _span("dimension", "d", "a", 4, 9),
+        _span("model_call", "e", "d", 4.5, 8.5),
+    ]
+    roots, children = build_tree(spans)
+    path = critical_path(roots[0], children)
+
+    assert [span["spanId"] for span, _, _ in path] == ["a", "b", "d", "e"]
+    assert [depth for _, _, depth in path] == [0, 1, 1, 2]
+    totals = dict(breakdown(path))
+    assert totals["task"] == pytest.approx(2.0)
+    assert totals["dimension"] == pytest.approx(4.0)
+    assert totals["model_call"] == pytest.approx(4.0)
+
+
+def test_engine_task_trace(tmp_path, monkeypatch):
+    """测试3: 交叉评测任务记录 任务→维度→模型调用→重试尝试，评分文件记录对应的 span"""
+    from cross_evaluation.aggregator import score_aggregator
+    from cross_evaluation.engine import engine
+    from cross_evaluation.model_client import model_client
+
+    attempts = []
+
+    def create(**kwargs):
+        attempts.append(kwargs["model"])
+        time.sleep(0.001)
+        if len(attempts) == 1:
+            raise RuntimeError("429 Too Many Requests")
+        message = SimpleNamespace(content='{"score": 10, "issues": "无"}')
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=20, total_tokens=120)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage, model=kwargs["model"])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(engine, "output_dir", tmp_path)
+    monkeypatch.setattr(score_aggregator, "output_dir", tmp_path)
+    monkeypatch.setattr(model_client, "_create_client", lambda model_name: client)
+    monkeypatch.setattr(model_client, "api_config", {**model_client.api_config, "retry_delay": 0})
+
+    trace_file = tmp_path / "traces.jsonl"
+    default_tracer.enable(trace_file)
+    try:
+        engine._evaluate_single_task("患者1", "Baichuan-M2", "gpt-5.1")
+    finally:
+        default_tracer.disable()
+
+    spans = load_spans(trace_file)
+    names = [s["name"] for s in spans]
+    assert names.count("evaluate_task") == 1
+    assert names.count("evaluate_dimension") == 5
+    assert names.count("model_call") == 5
+    assert names.count("model_call.attempt") == 6
+
+    first_call = next(s for s in spans if s["name"] == "model_call" and s["attributes"]["retry.count"] == 1)
+    assert first_call["attributes"]["gen_ai.request.model"] == "gpt-5.1"
+    assert first_call["attributes"]["gen_ai.usage.input_tokens"] == 100
+    assert len(first_call["attributes"]["prompt.sha256"]) == 16
+    assert first_call["attributes"]["coalesced"] is False
+
+    result = json.loads((tmp_path / "患者1" / "Baichuan-M2_by_gpt-5.1_患者1_准确性.json").read_text(encoding='utf-8'))
+    dimension = next(s for s in spans if s["spanId"] == result["trace"]["span_id"])
+    assert dimension["attributes"]["dimension"] == "准确性"
+    assert dimension["attributes"]["score"] == 10
+
+    report = format_report(spans, root_name="evaluate_task")
+    assert "关键路径" in report and "model_call.attempt" in report